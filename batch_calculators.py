@@ -0,0 +1,429 @@
+"""
+ПАКЕТНЫЕ КАЛЬКУЛЯТОРЫ v12.0
+Векторизованные расчеты на NumPy: тысячи вариантов за один вызов
+"""
+
+from typing import Dict, Optional, Sequence, Union
+
+import numpy as np
+
+from config import DEFAULT_DELTA_T
+from units import convert
+from norms import consumption_norms
+from price_book import price_book
+from heat_loss import BOILER_RESERVE, box_house
+from electrical import line_current, select_protection
+from concrete_mix import REFERENCE_AGGREGATE, REFERENCE_SLUMP, additive_flags, composition
+
+ArrayLike = Union[float, str, Sequence, np.ndarray]
+
+# Допустимые значения категориальных параметров
+FOUNDATION_TYPES = ("ленточный", "плитный")
+WALL_MATERIALS = ("газобетон", "кирпич", "дерево")
+ROOF_MATERIALS = ("металлочерепица", "мягкая")
+MATERIAL_TYPES = ("бетон", "кирпич", "утеплитель", "краска")
+
+# Типизированные результаты
+FOUNDATION_DTYPE = np.dtype([
+    ("perimeter", "f8"), ("area", "f8"), ("volume", "f8"),
+    ("concrete", "f8"), ("rebar", "f8"), ("formwork", "f8"), ("insulation", "f8"),
+    ("concrete_cost", "f8"), ("rebar_cost", "f8"), ("insulation_cost", "f8"),
+    ("work_cost", "f8"), ("total_cost", "f8")
+])
+
+WALLS_DTYPE = np.dtype([
+    ("area", "f8"),
+    ("blocks", "f8"), ("bricks", "f8"), ("beams", "f8"),
+    ("glue", "f8"), ("mortar", "f8"), ("rebar", "f8"), ("insulation", "f8"), ("windproof", "f8"),
+    ("blocks_cost", "f8"), ("bricks_cost", "f8"), ("beams_cost", "f8"),
+    ("glue_cost", "f8"), ("mortar_cost", "f8"), ("insulation_cost", "f8"),
+    ("work_cost", "f8"), ("total_cost", "f8")
+])
+
+ROOF_DTYPE = np.dtype([
+    ("roof_length", "f8"), ("area", "f8"),
+    ("roofing", "f8"), ("waterproofing", "f8"), ("osb", "f8"), ("insulation", "f8"), ("battens", "f8"),
+    ("roofing_cost", "f8"), ("waterproofing_cost", "f8"), ("osb_cost", "f8"),
+    ("insulation_cost", "f8"), ("work_cost", "f8"), ("total_cost", "f8")
+])
+
+HEAT_LOSS_DTYPE = np.dtype([
+    ("delta_t", "f8"), ("k", "f8"), ("envelope_area", "f8"),
+    ("transmission", "f8"), ("ventilation", "f8"),
+    ("heat_loss", "f8"), ("boiler_power", "f8"), ("insulation_cost", "f8"),
+    ("monthly_heating_cost", "f8")
+])
+
+WATER_DTYPE = np.dtype([
+    ("total_daily", "f8"), ("septic_volume", "f8"), ("boiler_volume", "f8"),
+    ("septic_cost", "f8"), ("boiler_cost", "f8"), ("piping_cost", "f8"), ("total_cost", "f8")
+])
+
+ELECTRIC_DTYPE = np.dtype([
+    ("current", "f8"), ("cable_section", "f8"), ("cores", "f8"), ("breaker", "f8"), ("meter", "f8"),
+    ("cable_cost", "f8"), ("panel_cost", "f8"), ("work_cost", "f8"), ("total_cost", "f8")
+])
+
+CONCRETE_DTYPE = np.dtype([
+    ("cement", "f8"), ("sand", "f8"), ("gravel", "f8"), ("water", "f8"),
+    ("cement_cost", "f8"), ("sand_cost", "f8"), ("gravel_cost", "f8"), ("additives_cost", "f8"),
+    ("material_cost", "f8"), ("work_cost", "f8"), ("total_cost", "f8"), ("cost_per_m3", "f8")
+])
+
+MATERIALS_DTYPE = np.dtype([
+    ("cement", "f8"), ("sand", "f8"), ("gravel", "f8"), ("water", "f8"),
+    ("bricks", "f8"), ("mortar", "f8"),
+    ("volume", "f8"), ("weight", "f8"), ("vapor_barrier", "f8"), ("fasteners", "f8"),
+    ("paint", "f8"), ("primer", "f8"),
+    ("bricks_cost", "f8"), ("mortar_cost", "f8"), ("insulation_cost", "f8"),
+    ("vapor_barrier_cost", "f8"), ("paint_cost", "f8"), ("primer_cost", "f8"),
+    ("materials_cost", "f8"), ("work_cost", "f8"), ("total_cost", "f8")
+])
+
+def _numbers(*values: ArrayLike) -> list:
+    """Приведение числовых параметров к float-массивам одной формы"""
+    return np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in values])
+
+def _categories(values: ArrayLike, allowed: Sequence[str], title: str) -> np.ndarray:
+    """Приведение категориального параметра к нижнему регистру с проверкой"""
+    arr = np.char.lower(np.asarray(values, dtype=str))
+    unknown = np.setdiff1d(np.unique(arr), allowed)
+    if unknown.size:
+        raise ValueError(f"{title}: {', '.join(unknown)}. Доступно: {', '.join(allowed)}")
+    return arr
+
+def _lookup(values: np.ndarray, table: Dict[str, float], default: float) -> np.ndarray:
+    """Векторный поиск по словарю: каждое уникальное значение ищется один раз"""
+    keys, inverse = np.unique(values, return_inverse=True)
+    mapped = np.array([table.get(key, default) for key in keys], dtype=float)
+    return mapped[inverse].reshape(values.shape)
+
+def _result(dtype: np.dtype, **fields) -> np.ndarray:
+    """Структурированный массив; форма - общая форма всех полей (параметры и цены)"""
+    result = np.zeros(np.broadcast_shapes(*(np.shape(v) for v in fields.values())), dtype=dtype)
+    for name, value in fields.items():
+        result[name] = value
+    return result
+
+class BatchCalculators:
+    """Векторизованные версии калькуляторов ConstructionCalculators"""
+
+    @staticmethod
+    def foundation(length: ArrayLike, width: ArrayLike, depth: ArrayLike, f_type: ArrayLike,
+                   prices: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Фундамент: ленточный (лента 0.5 м) или плитный (плита 0.3 м)"""
+        prices = prices or price_book.prices()
+        length, width, depth = _numbers(length, width, depth)
+        f_type = _categories(f_type, FOUNDATION_TYPES, "Неизвестный тип фундамента")
+        length, width, depth, f_type = np.broadcast_arrays(length, width, depth, f_type)
+        lenta = f_type == "ленточный"
+
+        perimeter = (length + width) * 2
+        area = length * width
+        volume = np.where(lenta, perimeter * 0.5 * depth, area * 0.3)
+
+        concrete = volume * 1.05  # +5% на потери
+        rebar = volume * np.where(lenta, 100, 120)  # кг/м³
+        formwork = np.where(lenta, perimeter * depth * 2, 0.0)
+        insulation = np.where(lenta, 0.0, area)
+
+        concrete_cost = concrete * prices["materials_beton"]
+        rebar_cost = rebar * prices["rebar"]
+        insulation_cost = insulation * prices["insulation"]
+        work_cost = volume * np.where(lenta, prices["fundament_lenta"], prices["fundament_plita"])
+
+        return _result(
+            FOUNDATION_DTYPE,
+            perimeter=perimeter, area=area, volume=volume,
+            concrete=concrete, rebar=rebar, formwork=formwork, insulation=insulation,
+            concrete_cost=concrete_cost, rebar_cost=rebar_cost, insulation_cost=insulation_cost,
+            work_cost=work_cost,
+            total_cost=concrete_cost + rebar_cost + insulation_cost + work_cost
+        )
+
+    @staticmethod
+    def walls(perimeter: ArrayLike, height: ArrayLike, thickness: ArrayLike, material: ArrayLike,
+              prices: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Стены: газобетон, кирпич или брус"""
+        prices = prices or price_book.prices()
+        perimeter, height, thickness = _numbers(perimeter, height, thickness)
+        material = _categories(material, WALL_MATERIALS, "Неизвестный материал")
+        perimeter, height, thickness, material = np.broadcast_arrays(perimeter, height, thickness, material)
+        gas = material == "газобетон"
+        brick = material == "кирпич"
+        wood = material == "дерево"
+
+        area = perimeter * height
+
+        # Газоблок 600×300×200 мм
+        blocks = np.where(gas, area * (thickness / 0.3), 0.0)
+        glue = np.where(gas, area * 0.03, 0.0)  # кг/м²
+        rebar = np.where(gas, perimeter / 0.5 * 4 * height, 0.0)  # м арматуры
+
+        # Кирпич 250×120×65 мм, 102 шт/м² при толщине 510 мм
+        bricks = np.where(brick, area * 102 * (thickness / 0.51), 0.0)
+        mortar = np.where(brick, area * 0.25 * (thickness / 0.51), 0.0)  # м³ раствора
+
+        # Брус 150×150×6000 мм
+        beams = np.where(wood, perimeter * height / (0.15 * 0.15) / 6, 0.0)
+        insulation = np.where(wood, area, 0.0)
+        windproof = np.where(wood, area, 0.0)
+
+        blocks_cost = blocks * prices["gasblock"]
+        glue_cost = glue * prices["glue"]
+        bricks_cost = bricks * prices["materials_kirpich"]
+        mortar_cost = mortar * prices["mortar"]
+        beams_cost = beams * prices["beam"]
+        insulation_cost = insulation * prices["insulation"]
+
+        work_price = np.select(
+            [gas, brick],
+            [prices["walls_gas"], prices["walls_brick"]],
+            prices["walls_wood"]
+        )
+        work_cost = area * work_price
+
+        return _result(
+            WALLS_DTYPE,
+            area=area, blocks=blocks, bricks=bricks, beams=beams,
+            glue=glue, mortar=mortar, rebar=rebar, insulation=insulation, windproof=windproof,
+            blocks_cost=blocks_cost, bricks_cost=bricks_cost, beams_cost=beams_cost,
+            glue_cost=glue_cost, mortar_cost=mortar_cost, insulation_cost=insulation_cost,
+            work_cost=work_cost,
+            total_cost=blocks_cost + bricks_cost + beams_cost + glue_cost + mortar_cost + insulation_cost + work_cost
+        )
+
+    @staticmethod
+    def roof(length: ArrayLike, width: ArrayLike, angle: ArrayLike, material: ArrayLike,
+             prices: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Двускатная крыша: металлочерепица или мягкая кровля"""
+        prices = prices or price_book.prices()
+        length, width, angle = _numbers(length, width, angle)
+        material = _categories(material, ROOF_MATERIALS, "Неизвестный материал")
+        length, width, angle, material = np.broadcast_arrays(length, width, angle, material)
+        metal = material == "металлочерепица"
+
+        roof_length = width / (2 * np.cos(np.radians(angle)))  # длина ската
+        area = length * roof_length * 2  # площадь двух скатов
+
+        roofing = area * np.where(metal, 1.1, 1.15)  # нахлест
+        waterproofing = np.where(metal, area, 0.0)
+        osb = np.where(metal, 0.0, area)
+        insulation = area
+        battens = np.where(metal, area * 1.2, 0.0)
+
+        roofing_cost = roofing * np.where(metal, prices["roof_metal"], prices["roof_soft"])
+        waterproofing_cost = waterproofing * prices["waterproofing"]
+        osb_cost = osb * prices["osb"]
+        insulation_cost = insulation * prices["insulation"]
+        work_cost = area * np.where(metal, prices["roof_work_metal"], prices["roof_work_soft"])
+
+        return _result(
+            ROOF_DTYPE,
+            roof_length=roof_length, area=area,
+            roofing=roofing, waterproofing=waterproofing, osb=osb, insulation=insulation, battens=battens,
+            roofing_cost=roofing_cost, waterproofing_cost=waterproofing_cost, osb_cost=osb_cost,
+            insulation_cost=insulation_cost, work_cost=work_cost,
+            total_cost=roofing_cost + waterproofing_cost + osb_cost + insulation_cost + work_cost
+        )
+
+    @staticmethod
+    def heat_loss(area: ArrayLike, floors: ArrayLike, region: ArrayLike, insulation: ArrayLike,
+                  prices: Optional[Dict[str, float]] = None, floor_height: ArrayLike = 2.7) -> np.ndarray:
+        """Теплопотери и мощность котла: укрупненная модель дома (heat_loss.box_house)"""
+        prices = prices or price_book.prices()
+        area, floors, floor_height = _numbers(area, floors, floor_height)
+        if np.any(area <= 0) or np.any(floors < 1) or np.any(floor_height <= 0):
+            # Площадь этажа area / floors: ноль и отрицательные дают inf/NaN
+            raise ValueError("Площадь и высота этажа должны быть больше нуля, этажей - не меньше 1")
+        region = np.char.lower(np.asarray(region, dtype=str))
+        insulation = np.char.lower(np.asarray(insulation, dtype=str))
+        area, floors, floor_height, region, insulation = np.broadcast_arrays(
+            area, floors, floor_height, region, insulation
+        )
+
+        delta_t = _lookup(region, price_book.delta_t(), DEFAULT_DELTA_T)
+        box = box_house(area, floors, insulation, floor_height)
+        envelope_area = box["envelope_area"]
+        k = box["transmission"] / envelope_area  # средний U оболочки, Вт/(м²·К)
+
+        transmission = box["transmission"] * delta_t / 1000  # кВт
+        ventilation = box["ventilation"] * delta_t / 1000
+        heat_loss = transmission + ventilation
+        boiler_power = heat_loss * BOILER_RESERVE
+
+        insulation_cost = np.select(
+            [insulation == "хорошее", insulation == "отличное"],
+            [area * prices["heat_loss"], area * prices["insulation_premium"]],
+            0.0
+        )
+
+        return _result(
+            HEAT_LOSS_DTYPE,
+            delta_t=delta_t, k=k, envelope_area=envelope_area,
+            transmission=transmission, ventilation=ventilation, heat_loss=heat_loss, boiler_power=boiler_power, insulation_cost=insulation_cost,
+            monthly_heating_cost=heat_loss * 0.1 * 720 * 30 / 1000
+        )
+
+    @staticmethod
+    def water_supply(people: ArrayLike, daily_use: ArrayLike,
+                     prices: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Септик, водонагреватель и разводка по числу жильцов"""
+        prices = prices or price_book.prices()
+        people, daily_use = _numbers(people, daily_use)
+
+        total_daily = people * daily_use  # л/сутки
+        septic_volume = total_daily * 3 / 1000  # м³, 3 дня отстоя
+        boiler_volume = np.maximum(50, people * 20)  # л
+
+        septic_cost = septic_volume * prices["septic"]
+        boiler_cost = boiler_volume * prices["water_heater"]
+        piping_cost = people * prices["piping"]
+
+        return _result(
+            WATER_DTYPE,
+            total_daily=total_daily, septic_volume=septic_volume, boiler_volume=boiler_volume,
+            septic_cost=septic_cost, boiler_cost=boiler_cost, piping_cost=piping_cost,
+            total_cost=septic_cost + boiler_cost + piping_cost
+        )
+
+    @staticmethod
+    def electric(power: ArrayLike, voltage: ArrayLike, phases: ArrayLike,
+                 prices: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Расчетный ток, сечение кабеля и автомат (таблицы electrical)"""
+        prices = prices or price_book.prices()
+        power, voltage, phases = _numbers(power, voltage, phases)
+        phases = np.where(phases == 1, 1, 3)  # все, кроме одной фазы, - трехфазная сеть
+
+        # I = P / (U × cosφ) для 1 фазы, I = P / (√3 × U × cosφ) для 3 фаз
+        current = line_current(power, phases, voltage, np.where(phases == 1, 0.9, 0.85))
+        protection = select_protection(current, phases=phases)
+
+        cable_cost = power * prices["cable"]
+        panel_cost = power * prices["panel"]
+        work_cost = power * prices["electric_work"]
+
+        return _result(
+            ELECTRIC_DTYPE,
+            current=current, cable_section=protection["cable_section"], cores=protection["cores"],
+            breaker=protection["breaker"], meter=power * 1.5,
+            cable_cost=cable_cost, panel_cost=panel_cost, work_cost=work_cost,
+            total_cost=cable_cost + panel_cost + work_cost
+        )
+
+    @staticmethod
+    def concrete(volume: ArrayLike, grade: ArrayLike, additives: ArrayLike = "",
+                 prices: Optional[Dict[str, float]] = None, aggregate: ArrayLike = REFERENCE_AGGREGATE,
+                 slump: ArrayLike = REFERENCE_SLUMP) -> np.ndarray:
+        """Состав и стоимость бетона: марка М100-М500 или класс, крупность щебня, подвижность"""
+        prices = prices or price_book.prices()
+        (volume,) = _numbers(volume)
+
+        # Добавки: каждое уникальное описание разбирается один раз
+        keys, inverse = np.unique(np.asarray(additives, dtype=str), return_inverse=True)
+        flags = [additive_flags(key) for key in keys]
+        key_prices = np.stack(np.broadcast_arrays(*[
+            np.asarray(prices["plasticizer"] if plasticizer else 0.0, dtype=float)
+            + np.asarray(prices["antifreeze"] if antifreeze else 0.0, dtype=float)
+            for plasticizer, antifreeze in flags
+        ]))
+        additive_price = key_prices[inverse].reshape(np.shape(additives) + key_prices.shape[1:])  # руб/м³
+        plasticizer = np.array([plasticizer for plasticizer, _ in flags])[inverse].reshape(np.shape(additives))
+
+        # Состав на 1 м³ - выборка из заранее посчитанной таблицы
+        comp = composition(grade, aggregate, slump, plasticizer)
+        volume, additive_price, *comp = np.broadcast_arrays(volume, additive_price, *np.moveaxis(comp, -1, 0))
+        cement, sand, gravel, water = (rate * volume for rate in comp)
+
+        cement_cost = cement * prices["cement"]
+        sand_cost = sand * prices["sand"]
+        gravel_cost = gravel * prices["gravel"]
+
+        additives_cost = volume * additive_price
+
+        material_cost = cement_cost + sand_cost + gravel_cost + additives_cost
+        work_cost = volume * prices["concrete_work"]
+        total_cost = material_cost + work_cost
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            cost_per_m3 = total_cost / volume
+
+        return _result(
+            CONCRETE_DTYPE,
+            cement=cement, sand=sand, gravel=gravel, water=water,
+            cement_cost=cement_cost, sand_cost=sand_cost, gravel_cost=gravel_cost,
+            additives_cost=additives_cost, material_cost=material_cost,
+            work_cost=work_cost, total_cost=total_cost, cost_per_m3=cost_per_m3
+        )
+
+    @staticmethod
+    def materials(material: ArrayLike, quantity: ArrayLike, thickness: ArrayLike = 0.0,
+                  prices: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Универсальный расчет материалов: бетон (м³), кирпич, утеплитель, краска (м²)"""
+        prices = prices or price_book.prices()
+        quantity, thickness = _numbers(quantity, thickness)
+        material = _categories(material, MATERIAL_TYPES, "Неизвестный материал")
+        quantity, thickness, material = np.broadcast_arrays(quantity, thickness, material)
+        concrete = material == "бетон"
+        brick = material == "кирпич"
+        insulation = material == "утеплитель"
+        paint_mask = material == "краска"
+
+        rate = consumption_norms.rate
+
+        # Бетон М300, состав на 1 м³ - из таблиц подбора состава
+        mix = composition("М300")
+        cement = np.where(concrete, quantity * mix[0], 0.0)
+        sand = np.where(concrete, quantity * mix[1], 0.0)
+        gravel = np.where(concrete, quantity * mix[2], 0.0)
+        water = np.where(concrete, quantity * mix[3], 0.0)
+
+        # Кирпич: расход на 1 м² кладки
+        bricks = np.where(brick, quantity * rate("кирпич", "кладка"), 0.0)
+        mortar = np.where(brick, quantity * rate("раствор", "кладка"), 0.0)
+
+        # Утеплитель: толщина в мм, вес по плотности минваты
+        volume = np.where(insulation, quantity * convert(thickness, "мм", "м"), 0.0)
+        weight = volume * rate("утеплитель", "плотность")
+        vapor_barrier = np.where(insulation, quantity * rate("пароизоляция", "утепление"), 0.0)
+        fasteners = np.where(insulation, quantity * rate("крепеж", "утепление"), 0.0)
+
+        # Краска и грунтовка на 1 м²
+        paint = np.where(paint_mask, quantity * rate("краска", "покраска"), 0.0)
+        primer = np.where(paint_mask, quantity * rate("грунтовка", "покраска"), 0.0)
+
+        bricks_cost = bricks * prices["brick_piece"]
+        mortar_cost = mortar * prices["mortar"]
+        insulation_cost = np.where(insulation, quantity * prices["insulation"], 0.0)
+        vapor_barrier_cost = vapor_barrier * prices["vapor_barrier"]
+        paint_cost = paint * prices["paint"]
+        primer_cost = primer * prices["primer"]
+
+        materials_cost = np.where(concrete, quantity * prices["concrete_material"], 0.0)
+        work_cost = np.select(
+            [concrete, insulation],
+            [quantity * prices["concrete_work"], quantity * prices["insulation_work"]],
+            0.0
+        )
+        total_cost = np.select(
+            [concrete, brick, insulation],
+            [materials_cost + work_cost, bricks_cost + mortar_cost,
+             insulation_cost + vapor_barrier_cost + work_cost],
+            paint_cost + primer_cost
+        )
+
+        return _result(
+            MATERIALS_DTYPE,
+            cement=cement, sand=sand, gravel=gravel, water=water,
+            bricks=bricks, mortar=mortar,
+            volume=volume, weight=weight, vapor_barrier=vapor_barrier, fasteners=fasteners,
+            paint=paint, primer=primer,
+            bricks_cost=bricks_cost, mortar_cost=mortar_cost, insulation_cost=insulation_cost,
+            vapor_barrier_cost=vapor_barrier_cost, paint_cost=paint_cost, primer_cost=primer_cost,
+            materials_cost=materials_cost, work_cost=work_cost, total_cost=total_cost
+        )
+
+def to_scalars(result: np.ndarray, index: Union[int, tuple] = ()) -> Dict[str, float]:
+    """Одна строка типизированного результата в виде словаря float"""
+    row = result[index]
+    return {name: float(row[name]) for name in result.dtype.names}
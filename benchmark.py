@@ -0,0 +1,321 @@
+"""
+МИКРОБЕНЧМАРКИ КАЛЬКУЛЯТОРОВ v12.0
+Скорость каждого calculate_*, parse_calc_command и format_result на
+примерах из справки get_calc_help: операций в секунду, задержка p99 и
+память на вызов. Результат сравнивается с базовой линией в репозитории,
+регрессия сверх допуска - код выхода 1. Сеть не нужна
+
+Запуск:
+    python benchmark.py                      # сравнить с базовой линией
+    python benchmark.py --filter бетон       # только бенчмарки с "бетон"
+    python benchmark.py --update             # записать новую базовую линию
+"""
+
+import argparse
+import gc
+import json
+import platform
+import re
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import numpy as np
+
+from calc_grammar import parse_command
+from keyboards import CALCULATORS, ConstructionCalculators
+
+BASELINE_PATH = Path(__file__).with_name("benchmark_baseline.json")
+BASELINE_VERSION = 2
+
+# Допуски регрессии: доля от базовой линии и абсолютный запас на шум
+TIME_TOLERANCE = 0.25      # падение операций в секунду
+P99_TOLERANCE = 2.0        # рост p99: хвост на общей машине шумный, ловятся только выбросы в разы
+P99_SLACK_US = 250.0       # вытеснение процесса на общей машине - сотни мкс
+ALLOC_TOLERANCE = 0.1      # рост памяти на вызов
+ALLOC_SLACK_KIB = 1.0
+
+MIN_TIME = 0.2     # секунд замеров на бенчмарк
+MIN_RUNS = 30
+MAX_RUNS = 100_000
+RETRIES = 2        # повторных замеров бенчмарка с регрессией: шумовой выброс не повторяется
+ALLOC_RUNS = 5     # вызовов под tracemalloc (он замедляет код, поэтому отдельно)
+
+class Benchmark(NamedTuple):
+    name: str
+    run: Callable[[], Any]
+    setup: Optional[Callable[[], None]] = None   # перед каждым вызовом, вне замера
+
+class Measurement(NamedTuple):
+    ops: float              # вызовов в секунду по медиане: выбросы не сдвигают
+    p50_us: float
+    p99_us: float
+    alloc_kib: float        # пик выделенной памяти за вызов (tracemalloc), медиана
+    reference_us: float     # медиана эталонной нагрузки между вызовами - скорость машины
+    runs: int
+
+    def to_dict(self) -> Dict[str, float]:
+        return {"ops": round(self.ops, 1), "p50_us": round(self.p50_us, 2),
+                "p99_us": round(self.p99_us, 2), "alloc_kib": round(self.alloc_kib, 2)}
+
+    def scaled(self, slowdown: float) -> "Measurement":
+        """Время, приведенное к машине в slowdown раз быстрее (эталон базовой линии)"""
+        return self._replace(ops=self.ops * slowdown, p50_us=self.p50_us / slowdown,
+                             p99_us=self.p99_us / slowdown, reference_us=self.reference_us / slowdown)
+
+# ==================== НАБОР ====================
+
+def help_commands() -> List[str]:
+    """
+    Команды-примеры из справки: общая справка дает команды целиком,
+    справка калькулятора - параметры после имени. Строки "Формат:" и
+    примеры, на которых калькулятор возвращает ошибку, пропускаются.
+    """
+    texts = [(None, ConstructionCalculators.get_calc_help())]
+    texts += [(name, ConstructionCalculators.get_calc_help(name)) for name in CALCULATORS]
+    commands = []
+    for name, text in texts:
+        for line in text.split("\n"):
+            if line.startswith("Формат:"):
+                continue
+            for snippet in re.findall(r"`([^`]+)`", line):
+                command = snippet if name is None else f"{name} {snippet}"
+                if command not in commands and _succeeds(command):
+                    commands.append(command)
+    return commands
+
+def _succeeds(command: str) -> bool:
+    try:
+        parsed = parse_command(command)
+    except Exception:
+        return False
+    return CALCULATORS[parsed.command](list(parsed.params)).success
+
+def build_benchmarks(commands: List[str]) -> List[Benchmark]:
+    """
+    Три бенчмарка на команду: сам калькулятор (без кэша), разбор с
+    кэшем результатов (путь сообщения из чата) и рендер текста
+    """
+    benchmarks = []
+    for command in commands:
+        parsed = parse_command(command)
+        calculator = CALCULATORS[parsed.command]
+        params = list(parsed.params)
+        result = calculator(params)
+
+        def reset(result=result):
+            result._text = None   # render() кэширует текст в результате
+
+        benchmarks += [
+            Benchmark(f"{calculator.__name__}: {command}", lambda c=calculator, p=params: c(list(p))),
+            Benchmark(f"parse_calc_command: {command}",
+                      lambda c=command: ConstructionCalculators.parse_calc_command(c)),
+            Benchmark(f"format_result: {command}",
+                      lambda t=parsed.command, r=result: ConstructionCalculators.format_result(t, r), reset),
+        ]
+    return benchmarks
+
+def uncovered(commands: List[str]) -> List[str]:
+    """Методы calculate_* без единого примера в справке"""
+    methods = {name for name in dir(ConstructionCalculators) if name.startswith("calculate_")}
+    covered = {CALCULATORS[parse_command(command).command].__name__ for command in commands}
+    return sorted(methods - covered)
+
+# ==================== ЗАМЕРЫ ====================
+
+def _reference() -> int:
+    """Эталонная нагрузка (~50 мкс): словарь, строки и numpy, как в калькуляторах"""
+    data = {str(i): i * 1.5 for i in range(50)}
+    text = "".join(f"{key}:{value:.1f};" for key, value in data.items())
+    return len(text) + int(np.arange(100, dtype=float).sum())
+
+def measure(benchmark: Benchmark, min_time: float = MIN_TIME) -> Measurement:
+    """
+    Замер бенчмарка: вызовы чередуются с эталонной нагрузкой
+
+    Скорость общей виртуальной машины скачет в полтора-два раза на
+    интервалах в секунды; эталон, снятый вперемешку с вызовами, попадает
+    в те же условия. Скорость машины за прогон - медиана эталона по всем
+    бенчмаркам (run_reference): эталон одного бенчмарка бывает выбросом.
+    """
+    run, setup = benchmark.run, benchmark.setup or (lambda: None)
+    for _ in range(3):
+        setup()
+        run()
+        _reference()
+
+    gc.collect()
+    timings, reference = [], []
+    clock = time.perf_counter_ns
+    deadline = time.perf_counter() + min_time
+    while len(timings) < MAX_RUNS and (len(timings) < MIN_RUNS or time.perf_counter() < deadline):
+        setup()
+        start = clock()
+        run()
+        timings.append(clock() - start)
+        start = clock()
+        _reference()
+        reference.append(clock() - start)
+    timings = np.array(timings) / 1000
+
+    allocations = []
+    tracemalloc.start()
+    try:
+        for _ in range(ALLOC_RUNS):
+            setup()
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+            run()
+            allocations.append(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+
+    p50, p99 = np.percentile(timings, (50, 99))
+    return Measurement(1e6 / p50, float(p50), float(p99), float(np.median(allocations)) / 1024,
+                       float(np.median(reference)) / 1000, len(timings))
+
+# ==================== СРАВНЕНИЕ ====================
+
+def run_reference(results: Dict[str, Measurement]) -> float:
+    """Эталон прогона: медиана по бенчмаркам, выброс одного замера ее не сдвигает"""
+    return float(np.median([m.reference_us for m in results.values()]))
+
+def compare(current: Measurement, base: Dict[str, float], slowdown: float = 1.0,
+            time_tolerance: float = TIME_TOLERANCE, p99_tolerance: float = P99_TOLERANCE,
+            alloc_tolerance: float = ALLOC_TOLERANCE) -> List[str]:
+    """
+    Регрессии бенчмарка относительно базовой линии; slowdown - во сколько
+    раз эталон прогона медленнее эталона базовой линии, на него
+    пересчитываются пороги по времени
+    """
+    problems = []
+    expected_ops = base["ops"] / slowdown
+    if current.ops < expected_ops * (1 - time_tolerance):
+        problems.append(f"операций/с {current.ops:,.0f} < {expected_ops:,.0f} -{time_tolerance:.0%}")
+    expected_p99 = base["p99_us"] * slowdown
+    if current.p99_us > max(expected_p99 * (1 + p99_tolerance), expected_p99 + P99_SLACK_US):
+        problems.append(f"p99 {current.p99_us:,.1f} мкс > {expected_p99:,.1f} мкс +{p99_tolerance:.0%}")
+    if current.alloc_kib > max(base["alloc_kib"] * (1 + alloc_tolerance), base["alloc_kib"] + ALLOC_SLACK_KIB):
+        problems.append(f"память {current.alloc_kib:,.1f} КиБ > {base['alloc_kib']:,.1f} КиБ +{alloc_tolerance:.0%}")
+    return problems
+
+def load_baseline(path: Path) -> Optional[Dict[str, Any]]:
+    if not path.exists():
+        return None
+    baseline = json.loads(path.read_text(encoding="utf-8"))
+    if baseline.get("version") != BASELINE_VERSION:
+        raise SystemExit(f"Базовая линия {path} другой версии формата: перезапишите ее с --update")
+    return baseline
+
+def save_baseline(path: Path, results: Dict[str, Measurement], previous: Optional[Dict[str, Any]]) -> None:
+    """
+    Записывает базовую линию; с --filter прочие бенчмарки берутся из
+    прежней, а новые замеры приводятся к ее эталону
+    """
+    reference = run_reference(results)
+    benchmarks = {}
+    if previous:
+        benchmarks = dict(previous["benchmarks"])
+        slowdown = reference / previous["reference_us"]
+        results = {name: m.scaled(slowdown) for name, m in results.items()}
+        reference = previous["reference_us"]
+    benchmarks.update({name: m.to_dict() for name, m in results.items()})
+    baseline = {
+        "version": BASELINE_VERSION,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "reference_us": round(reference, 2),
+        "benchmarks": dict(sorted(benchmarks.items()))
+    }
+    path.write_text(json.dumps(baseline, ensure_ascii=False, indent=1) + "\n", encoding="utf-8")
+
+def main():
+    parser = argparse.ArgumentParser(description="Микробенчмарки калькуляторов с проверкой регрессий")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="файл базовой линии")
+    parser.add_argument("--update", action="store_true", help="записать замеры как новую базовую линию")
+    parser.add_argument("--filter", help="только бенчмарки, в названии которых есть подстрока")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="секунд замеров на бенчмарк")
+    parser.add_argument("--tolerance", type=float, default=TIME_TOLERANCE,
+                        help="допустимое падение операций в секунду (доля)")
+    parser.add_argument("--p99-tolerance", type=float, default=P99_TOLERANCE, help="допустимый рост p99 (доля)")
+    parser.add_argument("--alloc-tolerance", type=float, default=ALLOC_TOLERANCE,
+                        help="допустимый рост памяти на вызов (доля)")
+    parser.add_argument("--json", type=Path, help="сохранить замеры этого прогона в файл")
+    args = parser.parse_args()
+
+    commands = help_commands()
+    missing = uncovered(commands)
+    if missing:
+        print(f"Нет примеров в справке для: {', '.join(missing)}", file=sys.stderr)
+        sys.exit(2)
+
+    benchmarks = build_benchmarks(commands)
+    if args.filter:
+        benchmarks = [b for b in benchmarks if args.filter in b.name]
+        if not benchmarks:
+            raise SystemExit(f"Нет бенчмарков с «{args.filter}»")
+
+    # Полная перезапись не читает прежнюю базовую линию: она может быть старого формата
+    baseline = None if args.update and not args.filter else load_baseline(args.baseline)
+    if baseline and baseline.get("python") != platform.python_version():
+        print(f"Базовая линия снята на Python {baseline.get('python')}, сейчас {platform.python_version()}: "
+              f"сравнение неточное, перезапишите ее с --update", file=sys.stderr)
+    # Сначала все замеры: пороги зависят от эталона всего прогона
+    results = {benchmark.name: measure(benchmark, args.min_time) for benchmark in benchmarks}
+    reference = run_reference(results)
+    slowdown = reference / baseline["reference_us"] if baseline else 1.0
+    print(f"Эталон: {reference:.1f} мкс" +
+          (f", в базовой линии {baseline['reference_us']:.1f} мкс" if baseline else ""))
+
+    regressions = 0
+    width = max(len(b.name) for b in benchmarks)
+    print(f"{'бенчмарк':<{width}}  {'операций/с':>11}  {'p99, мкс':>10}  {'КиБ/вызов':>9}")
+    for benchmark in benchmarks:
+        name = benchmark.name
+        current = results[name]
+        status = ""
+        if baseline and not args.update:
+            base = baseline["benchmarks"].get(name)
+            if base is None:
+                status = "новый"
+            else:
+                tolerances = (args.tolerance, args.p99_tolerance, args.alloc_tolerance)
+                problems = compare(current, base, slowdown, *tolerances)
+                for _ in range(RETRIES if problems else 0):
+                    current = results[name] = measure(benchmark, args.min_time)
+                    problems = compare(current, base, slowdown, *tolerances)
+                    if not problems:
+                        break
+                if problems:
+                    regressions += 1
+                    status = "РЕГРЕССИЯ: " + "; ".join(problems)
+        print(f"{name:<{width}}  {current.ops:>11,.0f}  {current.p99_us:>10,.1f}  "
+              f"{current.alloc_kib:>9,.1f}  {status}".rstrip())
+
+    if args.json:
+        args.json.write_text(json.dumps({name: m.to_dict() for name, m in results.items()},
+                                        ensure_ascii=False, indent=1) + "\n", encoding="utf-8")
+
+    if args.update:
+        save_baseline(args.baseline, results, baseline if args.filter else None)
+        print(f"Базовая линия записана: {args.baseline} ({len(results)} бенчмарков)")
+        return
+
+    if baseline is None:
+        print(f"Базовой линии {args.baseline} нет: запишите ее с --update", file=sys.stderr)
+        sys.exit(2)
+
+    # Бенчмарк из базовой линии пропал: пример из справки перестал считаться
+    vanished = [] if args.filter else [name for name in baseline["benchmarks"] if name not in results]
+    for name in vanished:
+        print(f"Пропал бенчмарк: {name}", file=sys.stderr)
+
+    if regressions or vanished:
+        print(f"Регрессий: {regressions}, пропало: {len(vanished)}", file=sys.stderr)
+        sys.exit(1)
+    print(f"Регрессий нет ({len(results)} бенчмарков)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+"""
+ПАКЕТНЫЙ РАСЧЕТ ИЗ ТАБЛИЦ v12.0
+Строки CSV/XLSX прогоняются через калькуляторы бота в пуле процессов,
+результаты дописываются по мере готовности; прерванный прогон
+продолжается с контрольной точки
+
+Таблица - либо колонка "команда" с текстом как в чате, либо --calc и
+колонки с именами параметров (длина, ширина, глубина, тип...). Прочие
+колонки (номер участка, адрес) переносятся в результат без изменений.
+
+Запуск:
+    python bulk.py участки.csv -o сметы.csv --calc фундамент
+    python bulk.py заявки.xlsx -o сметы.jsonl --workers 8
+    python bulk.py участки.csv -o сметы.csv --calc фундамент --resume
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Deque, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from calc_grammar import COMMANDS
+from keyboards import ConstructionCalculators
+
+logger = logging.getLogger(__name__)
+
+CHUNK_ROWS = 500          # строк в одном задании процесса (и между контрольными точками)
+IN_FLIGHT_PER_WORKER = 2  # заданий в очереди на процесс: память не растет с размером файла
+PROGRESS_INTERVAL = 5.0   # сек между строками прогресса
+COMMAND_COLUMN = "команда"
+RESULT_SECTIONS = ("materials", "cost", "results")
+
+# ==================== ЧТЕНИЕ ====================
+
+def _cell(value: Any) -> str:
+    """Ячейка строкой: 10.0 -> "10", пустая -> "" """
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+def read_rows(path: str, skip: int = 0, encoding: str = "utf-8-sig",
+              sheet: Optional[str] = None) -> Iterator[List[str]]:
+    """
+    Строки таблицы по одной, начиная со строки skip (с 0, заголовок - строка 0)
+
+    CSV - разделитель определяется по началу файла (Excel сохраняет с ";").
+    XLSX читается потоком (openpyxl, read_only); openpyxl нужен только для XLSX.
+    """
+    if path.lower().endswith((".xlsx", ".xlsm")):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise SystemExit("Для чтения XLSX установите openpyxl: pip install openpyxl") from None
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            worksheet = workbook[sheet] if sheet else workbook.active
+            for row in worksheet.iter_rows(min_row=skip + 1, values_only=True):
+                yield [_cell(value) for value in row]
+        finally:
+            workbook.close()
+        return
+
+    with open(path, newline="", encoding=encoding) as f:
+        sample = f.read(4096)
+        f.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        for row in islice(csv.reader(f, dialect), skip, None):
+            yield [_cell(value) for value in row]
+
+class RowTemplate(NamedTuple):
+    """Как из строки таблицы получить текст команды"""
+    calc: Optional[str]
+    command: Optional[int]              # индекс колонки "команда"
+    params: Tuple[Tuple[int, str], ...] # (индекс колонки, имя параметра)
+    passthrough: Tuple[int, ...]        # колонки, переносимые в результат
+    header: Tuple[str, ...]
+
+    @classmethod
+    def build(cls, header: Optional[Sequence[str]], calc: Optional[str]) -> "RowTemplate":
+        """
+        Шаблон по заголовку; без заголовка ячейки - позиционные параметры
+        (без --calc первая ячейка - название калькулятора)
+        """
+        if calc is not None and calc.lower() not in COMMANDS:
+            raise ValueError(f"Неизвестный калькулятор: {calc}")
+        if header is None:
+            return cls(calc, None, (), (), ())
+
+        names = [name.strip().lower() for name in header]
+        if COMMAND_COLUMN in names:
+            index = names.index(COMMAND_COLUMN)
+            return cls(calc, index, (), tuple(i for i in range(len(names)) if i != index), tuple(header))
+        if calc is None:
+            raise ValueError(f"Нет колонки «{COMMAND_COLUMN}»: укажите калькулятор через --calc")
+
+        compiled = COMMANDS[calc.lower()]
+        params = tuple((i, compiled.names[name].name) for i, name in enumerate(names) if name in compiled.names)
+        if not params:
+            raise ValueError(
+                f"В заголовке нет параметров калькулятора {compiled.command.name}: "
+                f"{', '.join(param.name for param in compiled.command.params)}"
+            )
+        used = {i for i, _ in params}
+        return cls(calc, None, params, tuple(i for i in range(len(names)) if i not in used), tuple(header))
+
+    def text(self, row: Sequence[str]) -> str:
+        """Текст команды, как если бы его написали в чат"""
+        def cell(i: int) -> str:
+            return row[i] if i < len(row) else ""
+
+        if self.command is not None:
+            text = cell(self.command)
+            return f"{self.calc} {text}" if self.calc and text and text.split()[0].lower() not in COMMANDS else text
+        # Строка без единого заполненного параметра - пустая: без команды калькулятора
+        if self.params:
+            # Имя=значение; пробелы внутри значения разбили бы его на слова
+            filled = [f"{name}={cell(i).replace(' ', '')}" for i, name in self.params if cell(i).strip()]
+            return " ".join([self.calc] + filled) if filled else ""
+        filled = [value for value in row if value.strip()]
+        return " ".join(([self.calc] if self.calc else []) + filled) if filled else ""
+
+    def columns(self) -> List[str]:
+        return [self.header[i] for i in self.passthrough]
+
+    def values(self, row: Sequence[str]) -> List[str]:
+        return [row[i] if i < len(row) else "" for i in self.passthrough]
+
+# ==================== РАСЧЕТ ====================
+
+Job = Tuple[int, List[str], str]   # номер строки, переносимые значения, команда
+
+def _summary(result) -> str:
+    """Итоги расчета одной ячейкой: "Цемент: 3800 кг; Итого: 80,620 руб" """
+    return "; ".join(
+        f"{key}: {value}"
+        for section in RESULT_SECTIONS
+        for key, value in (getattr(result, section) or {}).items()
+    )
+
+def evaluate_chunk(jobs: List[Job], jsonl: bool, columns: List[str]) -> Tuple[List[Any], int]:
+    """
+    Расчет задания в процессе пула: записи, готовые к выводу (между
+    процессами не передаются объекты результатов), и число ошибок
+    """
+    records: List[Any] = []
+    errors = 0
+    for line, values, text in jobs:
+        try:
+            calc, _, result = ConstructionCalculators.parse_calc_command(text)
+        except Exception as e:
+            logger.error(f"Строка {line}: ошибка расчета «{text}»: {e}")
+            calc, result = "", None
+            error = f"Внутренняя ошибка: {e}"
+        else:
+            error = result.error or ""
+        errors += bool(error)
+
+        if jsonl:
+            records.append(json.dumps({
+                "row": line,
+                "columns": dict(zip(columns, values)),
+                "command": text,
+                "calc": calc,
+                "result": result.to_dict(raw=True) if result is not None else {"error": error}
+            }, ensure_ascii=False))
+        else:
+            total = result.total_cost if result is not None and not error else None
+            records.append([line, *values, text, calc, "" if total is None else f"{total:.2f}", error,
+                            _summary(result) if result is not None and not error else ""])
+    return records, errors
+
+# ==================== КОНТРОЛЬНАЯ ТОЧКА ====================
+
+class Checkpoint:
+    """
+    Сколько строк входа обработано и сколько байт результата им соответствует
+
+    Пишется после каждого записанного задания (через временный файл,
+    атомарно). При продолжении результат обрезается до сохраненной длины -
+    недописанный хвост отбрасывается, строки входа пропускаются.
+    """
+
+    def __init__(self, path: str, source: str):
+        self.path = path
+        stat = os.stat(source)
+        self.source = {"input": os.path.abspath(source), "size": stat.st_size, "mtime": stat.st_mtime}
+
+    def load(self) -> Dict[str, Any]:
+        with open(self.path, encoding="utf-8") as f:
+            state = json.load(f)
+        if {key: state.get(key) for key in self.source} != self.source:
+            raise SystemExit(f"Входной файл изменился после контрольной точки {self.path}: начните заново без --resume")
+        return state
+
+    def save(self, rows: int, output_bytes: int, stats: Dict[str, int]) -> None:
+        temp = self.path + ".tmp"
+        with open(temp, "w", encoding="utf-8") as f:
+            json.dump({**self.source, "rows": rows, "output_bytes": output_bytes, **stats}, f)
+        os.replace(temp, self.path)
+
+    def remove(self) -> None:
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+# ==================== ПРОГОН ====================
+
+def _chunks(rows: Iterator[List[str]], template: RowTemplate, first_line: int,
+            size: int) -> Iterator[Tuple[List[Job], int]]:
+    """Задания по size строк входа и число строк в задании (пустые строки пропускаются)"""
+    jobs: List[Job] = []
+    read = 0
+    for read, row in enumerate(rows, 1):
+        text = template.text(row)
+        if text.strip():
+            jobs.append((first_line + read - 1, template.values(row), text))
+        if read % size == 0:
+            yield jobs, size
+            jobs = []
+    if read % size:
+        yield jobs, read % size
+
+def run(args) -> Dict[str, int]:
+    """Полный прогон: чтение, пул процессов, запись по порядку, контрольные точки"""
+    jsonl = args.output.lower().endswith((".jsonl", ".ndjson"))
+    checkpoint = Checkpoint(args.checkpoint or args.output + ".checkpoint", args.input)
+
+    header = None
+    if not args.no_header:
+        header = next(read_rows(args.input, encoding=args.encoding, sheet=args.sheet), None)
+        if header is None:
+            raise SystemExit("Входной файл пуст")
+    try:
+        template = RowTemplate.build(header, args.calc)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    start_row = 0 if args.no_header else 1   # строка входа (с 0), с которой начинаются данные
+
+    stats = {"rows": 0, "calculated": 0, "errors": 0}
+    done = 0
+    if args.resume and os.path.exists(checkpoint.path):
+        state = checkpoint.load()
+        done = state["rows"]
+        stats = {key: state.get(key, 0) for key in stats}
+        with open(args.output, "r+b") as f:
+            f.truncate(state["output_bytes"])
+        mode = "a"
+        print(f"Продолжение с контрольной точки: обработано строк {done}", file=sys.stderr)
+    elif args.resume:
+        raise SystemExit(f"Контрольной точки {checkpoint.path} нет: запустите без --resume")
+    else:
+        mode = "w"
+
+    columns = template.columns()
+    out = open(args.output, mode, newline="", encoding="utf-8")
+    writer = None if jsonl else csv.writer(out, delimiter=args.delimiter)
+    if mode == "w" and writer is not None:
+        writer.writerow(["строка", *columns, "команда", "расчет", "итого, руб", "ошибка", "результат"])
+
+    rows = read_rows(args.input, skip=start_row + done, encoding=args.encoding, sheet=args.sheet)
+    chunks = _chunks(rows, template, start_row + done + 1, args.chunk)
+    executor = ProcessPoolExecutor(max_workers=args.workers) if args.workers > 1 else None
+    pending: Deque[Tuple[Future, int, int]] = deque()
+    started = last_progress = time.monotonic()
+    session_rows = 0
+
+    def write(chunk: Tuple[List[Any], int], read: int, count: int) -> None:
+        nonlocal done, last_progress, session_rows
+        records, errors = chunk
+        if jsonl:
+            out.writelines(record + "\n" for record in records)
+        else:
+            writer.writerows(records)
+        out.flush()
+        os.fsync(out.fileno())
+        done += read
+        session_rows += read
+        stats["rows"] = done
+        stats["calculated"] += count
+        stats["errors"] += errors
+        checkpoint.save(done, out.tell(), stats)
+
+        now = time.monotonic()
+        if now - last_progress >= PROGRESS_INTERVAL:
+            last_progress = now
+            print(f"Строк: {done}, ошибок: {stats['errors']}, "
+                  f"{session_rows / (now - started):,.0f} строк/с", file=sys.stderr)
+
+    try:
+        for jobs, read in chunks:
+            if executor is None:
+                write(evaluate_chunk(jobs, jsonl, columns), read, len(jobs))
+                continue
+            pending.append((executor.submit(evaluate_chunk, jobs, jsonl, columns), read, len(jobs)))
+            # Запись строго по порядку; очередь ограничена - память постоянна
+            while len(pending) >= args.workers * IN_FLIGHT_PER_WORKER or (pending and pending[0][0].done()):
+                future, chunk_read, count = pending.popleft()
+                write(future.result(), chunk_read, count)
+        while pending:
+            future, chunk_read, count = pending.popleft()
+            write(future.result(), chunk_read, count)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        out.close()
+
+    checkpoint.remove()
+    elapsed = time.monotonic() - started
+    print(f"Готово: строк {stats['rows']}, расчетов {stats['calculated']}, ошибок {stats['errors']}, "
+          f"{elapsed:.1f} с -> {args.output}", file=sys.stderr)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Пакетный расчет строк CSV/XLSX калькуляторами бота")
+    parser.add_argument("input", help="входная таблица: .csv или .xlsx")
+    parser.add_argument("-o", "--output", required=True, help="результат: .csv или .jsonl")
+    parser.add_argument("--calc", help="калькулятор для всех строк (фундамент, стены, бетон...)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="процессов расчета; 1 - без пула")
+    parser.add_argument("--chunk", type=int, default=CHUNK_ROWS, help="строк в задании и между контрольными точками")
+    parser.add_argument("--resume", action="store_true", help="продолжить с контрольной точки")
+    parser.add_argument("--checkpoint", help="файл контрольной точки (по умолчанию <output>.checkpoint)")
+    parser.add_argument("--no-header", action="store_true",
+                        help="без строки заголовка: ячейки - параметры по порядку")
+    parser.add_argument("--sheet", help="лист XLSX (по умолчанию активный)")
+    parser.add_argument("--encoding", default="utf-8-sig", help="кодировка CSV (например, cp1251)")
+    parser.add_argument("--delimiter", default=";", help="разделитель выходного CSV")
+    args = parser.parse_args()
+    if args.workers < 1 or args.chunk < 1:
+        parser.error("--workers и --chunk должны быть положительными")
+
+    logging.basicConfig(level=logging.WARNING)
+    try:
+        run(args)
+    except KeyboardInterrupt:
+        print("\nПрервано: продолжите тем же запуском с --resume", file=sys.stderr)
+        sys.exit(130)
+
+if __name__ == "__main__":
+    main()
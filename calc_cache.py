@@ -0,0 +1,137 @@
+"""
+КЭШ РЕЗУЛЬТАТОВ КАЛЬКУЛЯТОРОВ v12.0
+LRU по нормализованным параметрам, лимит памяти, сброс при смене цен
+и норм
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from calc_results import CalcResult
+
+# Примерный размер служебных объектов записи: ключ, CalcResult, Value (байт)
+CACHE_ENTRY_OVERHEAD = 1024
+
+CacheKey = Tuple[str, Tuple[str, ...]]
+
+def canonical_param(token: str) -> str:
+    """
+    Нормализация параметра для ключа кэша
+
+    Числа, которые калькуляторы читают одинаково, дают один ключ:
+    "10" и "010" -> "10", "1.5", "1.50" и "15e-1" -> "1.5".
+    Целые и дробные записи не смешиваются ("2" и "2.0"), потому что
+    некоторые параметры (этажи, люди, фазы) читаются через int().
+    Текстовые параметры остаются как есть: часть калькуляторов
+    выводит их без изменения регистра.
+    """
+    try:
+        return str(int(token))
+    except ValueError:
+        pass
+    try:
+        return repr(float(token))
+    except ValueError:
+        return token
+
+class CalcCache:
+    """
+    Ограниченный кэш результатов калькуляторов
+
+    Записи вытесняются по LRU при превышении max_entries или max_bytes.
+    version() вызывается при каждом обращении: если значение изменилось
+    (например, поменялись нормы), кэш очищается целиком. depends -
+    отметка записи (например, прочитанные цены); запись, для которой
+    is_current(depends) ложно, удаляется при обращении.
+    """
+
+    def __init__(self, max_entries: int = 2000, max_bytes: int = 8 * 1024 * 1024,
+                 version: Optional[Callable[[], Hashable]] = None,
+                 is_current: Optional[Callable[[Any], bool]] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._version_fn = version or (lambda: None)
+        self._version = self._version_fn()
+        self._is_current = is_current or (lambda depends: True)
+        self._entries: "OrderedDict[CacheKey, Tuple[CalcResult, int, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evicted = 0
+        self._invalidations = 0
+        self._stale = 0
+
+    @staticmethod
+    def make_key(calc_type: str, params: List[str]) -> CacheKey:
+        return calc_type, tuple(canonical_param(p) for p in params)
+
+    def get(self, key: CacheKey) -> Optional[CalcResult]:
+        """Результат из кэша или None"""
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and not self._is_current(entry[2]):
+                del self._entries[key]
+                self._bytes -= entry[1]
+                self._stale += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: CacheKey, result: CalcResult, depends: Any = None) -> None:
+        """
+        Сохранить результат; depends - отметка для is_current
+
+        Размер записи оценивается по тексту результата. Текст все равно
+        понадобится при выдаче, поэтому рендер здесь не лишний.
+        """
+        size = CACHE_ENTRY_OVERHEAD + 4 * (len(result.render()) + sum(len(p) for p in key[1]))
+        with self._lock:
+            self._check_version()
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (result, size, depends)
+            self._bytes += size
+
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evicted += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _check_version(self) -> None:
+        version = self._version_fn()
+        if version != self._version:
+            self._version = version
+            self._entries.clear()
+            self._bytes = 0
+            self._invalidations += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика кэша"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evicted": self._evicted,
+                "invalidations": self._invalidations,
+                "stale": self._stale
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
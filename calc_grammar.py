@@ -0,0 +1,373 @@
+"""
+ГРАММАТИКА КОМАНД КАЛЬКУЛЯТОРОВ v12.0
+Декларативное описание команд, компилируется один раз при импорте.
+Именованные параметры, единицы измерения, десятичная запятая, синонимы
+"""
+
+import math
+import re
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from units import AREA, VOLUME, DIMENSION_NAMES, QUANTITY_RE, Quantity, UnitError, find_unit, get_unit, convert
+
+# Единица количества материала, которую ожидает калькулятор
+AMOUNT_UNITS = {AREA: "м²", VOLUME: "м³"}
+
+# Синонимы значений: слово -> каноническое значение калькулятора
+WORD_ALIASES = {
+    "лента": "ленточный",
+    "плита": "плитный",
+    "газоблок": "газобетон",
+    "пеноблок": "газобетон",
+    "брус": "дерево",
+    "бревно": "дерево",
+    "металл": "металлочерепица",
+    "гибкая": "мягкая",
+    "вальма": "вальмовая",
+    "шатер": "шатровая",
+    "односкат": "односкатная",
+    "мск": "москва",
+    "питер": "спб",
+    "минвата": "утеплитель",
+}
+
+class Param(NamedTuple):
+    """
+    Параметр команды
+
+    kind: number, int, word, raw (передается без разбора) или amount -
+    количество с обязательной единицей м² или м³, калькулятор получает
+    два значения: число и единицу.
+    unit - основная единица параметра (units.UNITS): число с другой единицей
+    той же величины пересчитывается, с единицей другой величины - ошибка.
+    aliases - другие имена для записи имя=значение.
+    repeat - параметр забирает все оставшиеся позиционные значения.
+    """
+    name: str
+    kind: str = "number"
+    unit: str = ""
+    aliases: Tuple[str, ...] = ()
+    required: bool = True
+    repeat: bool = False
+
+class Command(NamedTuple):
+    name: str
+    params: Tuple[Param, ...]
+    aliases: Tuple[str, ...] = ()
+
+def _length(name: str, *aliases: str) -> Param:
+    return Param(name, "number", "м", aliases)
+
+GRAMMAR: Tuple[Command, ...] = (
+    Command("фундамент", (
+        _length("длина"), _length("ширина"), _length("глубина"),
+        Param("тип", "word"),
+    ), ("фунд",)),
+    Command("стены", (
+        _length("периметр"), _length("высота"), _length("толщина"),
+        Param("материал", "word"),
+    ), ("стена", "стен")),
+    Command("крыша", (
+        _length("длина"), _length("ширина"),
+        Param("уклон", "number", "°", ("угол",)),
+        Param("материал", "word"),
+        Param("форма", "word", aliases=("тип",), required=False),
+    ), ("кровля",)),
+    Command("теплопотери", (
+        Param("площадь", "number", "м²"), Param("этажи", "int", aliases=("этажей", "этажность")),
+        Param("регион", "word", aliases=("город",)), Param("утепление", "word"),
+    ), ("тепло", "отопление")),
+    Command("подбор", (
+        Param("площадь", "number", "м²"), Param("этажи", "int", aliases=("этажей", "этажность")),
+        Param("регион", "word", aliases=("город",)),
+        Param("предел", "number", "кВт", aliases=("лимит",), required=False),
+    ), ("оптимум",)),
+    Command("стоимость", (
+        Param("работа", "word"), Param("площадь", "number", "м²"),
+        Param("материал", "word"), Param("качество", "word"),
+    ), ("цена",)),
+    Command("площадь", (
+        Param("фигура", "word"),
+        Param("размеры", "number", "м", repeat=True),
+    )),
+    Command("водоснабжение", (
+        Param("люди", "int", aliases=("жильцы",)),
+        Param("сантехника", "word"),
+        Param("расход", "number"),
+    ), ("вода",)),
+    Command("электрика", (
+        Param("мощность", "number", "кВт"), Param("напряжение", "number", "В"),
+        Param("фазы", "int", aliases=("фаз",)),
+    ), ("электричество",)),
+    Command("бетон", (
+        Param("объем", "number", "м³"), Param("марка", "word"),
+        Param("добавки", "raw", required=False, repeat=True),
+    )),
+    Command("материалы", (
+        Param("материал", "word"),
+        Param("количество", "amount"),
+        Param("толщина", "number", "мм", required=False),
+    ), ("материал",)),
+    Command("раскрой", (
+        Param("материал", "raw"),  # без синонимов: брус здесь не "дерево"
+        Param("детали", "raw", repeat=True),
+    ), ("распил",)),
+    Command("дом", (
+        _length("длина"), _length("ширина"),
+        Param("опции", "raw", required=False, repeat=True),
+    ), ("смета",)),
+    Command("разброс", (
+        _length("длина"), _length("ширина"),
+        Param("опции", "raw", required=False, repeat=True),
+    )),
+    Command("перебор", (
+        Param("параметры", "raw", repeat=True),
+    )),
+)
+
+# ==================== КОМПИЛЯЦИЯ ====================
+
+_TOKEN_RE = re.compile(r"\S+")
+# Число с необязательной единицей: 10, 1,5, -2.5e3, 400мм, 30м³
+_NUMBER_RE = QUANTITY_RE
+# Именованный параметр: длина=10, длина:10
+_NAMED_RE = re.compile(r"([^\W\d]\w*)[=:](.*)")
+
+class _CompiledCommand(NamedTuple):
+    command: Command
+    names: Dict[str, Param]   # имя и синонимы -> параметр (запись имя=значение)
+    spaced: Dict[str, Param]  # только основные имена (запись "длина 10")
+
+COMMANDS: Dict[str, _CompiledCommand] = {}
+for _command in GRAMMAR:
+    _compiled = _CompiledCommand(
+        _command,
+        {name: param for param in _command.params if not param.repeat for name in (param.name,) + param.aliases},
+        {param.name: param for param in _command.params if not param.repeat}
+    )
+    for _name in (_command.name,) + _command.aliases:
+        COMMANDS[_name] = _compiled
+
+COMMAND_NAMES = tuple(command.name for command in GRAMMAR)
+
+# ==================== РАЗБОР ====================
+
+class ParseError(ValueError):
+    """
+    Ошибка разбора команды с позицией в исходном тексте (с 1)
+
+    command - распознанная команда, если ошибка в ее параметрах
+    """
+
+    def __init__(self, message: str, position: int = 0, token: str = "", command: str = ""):
+        self.position = position
+        self.token = token
+        self.command = command
+        super().__init__(f"{message} (символ {position})" if position else message)
+
+class Arg(NamedTuple):
+    """Разобранный аргумент: значение в основной единице параметра"""
+    name: str
+    value: object
+    unit: str
+    token: str
+    position: int
+
+    @property
+    def quantity(self) -> Quantity:
+        return Quantity(self.value, self.unit)
+
+class ParsedCommand(NamedTuple):
+    """
+    Результат разбора
+
+    args - типизированные аргументы по именам параметров,
+    params - те же значения позиционными строками для калькуляторов.
+    """
+    command: str
+    args: Dict[str, Arg]
+    params: Tuple[str, ...]
+
+class _Token(NamedTuple):
+    text: str
+    position: int
+
+def _tokenize(text: str) -> List[_Token]:
+    """
+    Слова с позициями; отдельно стоящая единица после числа присоединяется к нему:
+    "30 м³" -> "30м³"
+    """
+    tokens: List[_Token] = []
+    for match in _TOKEN_RE.finditer(text):
+        word = match.group()
+        previous = _NUMBER_RE.fullmatch(tokens[-1].text) if tokens else None
+        if previous and not previous.group(2) and find_unit(word) is not None:
+            tokens[-1] = _Token(tokens[-1].text + word, tokens[-1].position)
+        else:
+            tokens.append(_Token(word, match.start() + 1))
+    return tokens
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if value == int(value) and abs(value) < 1e15 else repr(value)
+
+def _parse_value(param: Param, token: _Token) -> Arg:
+    """Значение одного параметра по его типу"""
+    if param.kind == "raw":
+        return Arg(param.name, token.text, "", token.text, token.position)
+    if param.kind == "word":
+        word = token.text.lower()
+        return Arg(param.name, WORD_ALIASES.get(word, word), "", token.text, token.position)
+
+    match = _NUMBER_RE.fullmatch(token.text)
+    if not match:
+        raise ParseError(f"Параметр «{param.name}»: ожидалось число, получено «{token.text}»",
+                         token.position, token.text)
+    number, symbol = match.groups()
+    value = float(number.replace(",", "."))
+    unit = find_unit(symbol) if symbol else None
+    if symbol and unit is None:
+        raise ParseError(f"Параметр «{param.name}»: неизвестная единица «{symbol}»", token.position, token.text)
+
+    if param.kind == "amount":
+        target = AMOUNT_UNITS.get(unit.dimension) if unit else None
+        if target is None:
+            raise ParseError(f"Параметр «{param.name}»: укажите единицу м² или м³", token.position, token.text)
+        value = _finite(param, token, convert(value, unit, target))
+        return Arg(param.name, value, target, token.text, token.position)
+
+    if unit is not None:
+        if not param.unit:
+            raise ParseError(f"Параметр «{param.name}» указывается без единиц", token.position, token.text)
+        try:
+            value = convert(value, unit, param.unit)
+        except UnitError:
+            base = get_unit(param.unit)
+            raise ParseError(
+                f"Параметр «{param.name}»: нужна величина «{DIMENSION_NAMES[base.dimension]}» "
+                f"({base.symbol}), а указано «{symbol}»", token.position, token.text
+            )
+    value = _finite(param, token, value)
+
+    if param.kind == "int":
+        if value != int(value):
+            raise ParseError(f"Параметр «{param.name}»: ожидалось целое число, получено «{token.text}»",
+                             token.position, token.text)
+        value = int(value)
+    return Arg(param.name, value, param.unit, token.text, token.position)
+
+def _finite(param: Param, token: _Token, value: float) -> float:
+    """1e400 читается как inf: калькуляторы такое число не посчитают, ошибка - здесь, с позицией"""
+    if not math.isfinite(value):
+        raise ParseError(f"Параметр «{param.name}»: слишком большое число «{token.text}»",
+                         token.position, token.text)
+    return value
+
+def _canonical(arg: Arg, param: Param) -> List[str]:
+    """Значение аргумента строками, которые калькулятор прочитает без ошибок"""
+    if param.kind == "int":
+        return [str(arg.value)]
+    if param.kind == "amount":
+        return [_format_number(arg.value), arg.unit]
+    if param.kind == "number":
+        # Число в привычной записи (без единиц и запятой) передается как есть
+        match = _NUMBER_RE.fullmatch(arg.token)
+        if not match.group(2) and "," not in arg.token:
+            return [arg.token]
+        return [_format_number(arg.value)]
+    return [arg.value]
+
+def _find_command(tokens: List[_Token]) -> Tuple[Optional[_CompiledCommand], int]:
+    """Команда - первое слово или первое слово-команда во фразе ("рассчитай фундамент ...")"""
+    for index, token in enumerate(tokens):
+        compiled = COMMANDS.get(token.text.lower())
+        if compiled is not None:
+            return compiled, index
+    return None, 0
+
+@lru_cache(maxsize=4096)
+def parse_command(text: str) -> ParsedCommand:
+    """
+    Разбор команды калькулятора
+
+    Позиционные значения заполняют параметры по порядку, именованные
+    (длина=10, длина:10, "длина 10") - свой параметр в любом месте.
+    Лишние позиционные значения передаются калькулятору без изменений.
+    Результат разбора одного и того же текста запоминается (ошибки - нет),
+    поэтому ParsedCommand не должен изменяться вызывающим кодом.
+    """
+    tokens = _tokenize(text)
+    if not tokens:
+        raise ParseError("Введите команду для калькулятора")
+
+    compiled, start = _find_command(tokens)
+    if compiled is None:
+        raise ParseError(
+            f"Неизвестный калькулятор: {tokens[0].text.lower()}. Используйте: {', '.join(COMMAND_NAMES)}",
+            tokens[0].position, tokens[0].text
+        )
+    try:
+        args, params = _parse_args(compiled, tokens[start + 1:])
+    except ParseError as e:
+        e.command = compiled.command.name
+        raise
+    return ParsedCommand(compiled.command.name, args, tuple(params))
+
+def _parse_args(compiled: _CompiledCommand, rest: List[_Token]) -> Tuple[Dict[str, Arg], List[str]]:
+    """Аргументы команды: сначала именованные, затем позиционные по порядку"""
+    command = compiled.command
+
+    named: Dict[str, Arg] = {}
+    positional: List[_Token] = []
+    i = 0
+    while i < len(rest):
+        token = rest[i]
+        match = _NAMED_RE.fullmatch(token.text)
+        if match:
+            param = compiled.names.get(match.group(1).lower())
+        else:
+            param = compiled.spaced.get(token.text.lower())
+        if param is None:
+            positional.append(token)
+            i += 1
+            continue
+
+        if match and match.group(2):
+            # длина=10
+            offset = token.text.index(match.group(2))
+            value_token = _Token(match.group(2), token.position + offset)
+            i += 1
+        elif i + 1 < len(rest):
+            # длина= 10, длина 10
+            value_token = rest[i + 1]
+            i += 2
+        else:
+            raise ParseError(f"Не указано значение параметра «{param.name}»", token.position, token.text)
+
+        if param.name in named:
+            raise ParseError(f"Параметр «{param.name}» указан дважды", token.position, token.text)
+        named[param.name] = _parse_value(param, value_token)
+
+    args: Dict[str, Arg] = dict(named)
+    params: List[str] = []
+    queue = iter(positional)
+    for param in command.params:
+        if param.repeat:
+            for token in queue:
+                arg = _parse_value(param, token)
+                args.setdefault(param.name, arg)
+                params.extend(_canonical(arg, param))
+            break
+        if param.name not in args:
+            token = next(queue, None)
+            if token is None:
+                if param.required:
+                    raise ParseError(
+                        f"Недостаточно параметров: не указан «{param.name}». "
+                        f"Формат: {command.name} {' '.join(p.name for p in command.params)}"
+                    )
+                break
+            args[param.name] = _parse_value(param, token)
+        params.extend(_canonical(args[param.name], param))
+    params.extend(token.text for token in queue)
+    return args, params
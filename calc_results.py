@@ -0,0 +1,138 @@
+"""
+РЕЗУЛЬТАТЫ РАСЧЕТОВ v12.0
+Калькуляторы возвращают числа и единицы, текст собирается только при выводе
+"""
+
+from typing import Any, Dict, List, Optional, Union
+
+class Value:
+    """Число с единицей измерения и форматом вывода"""
+
+    __slots__ = ("amount", "unit", "fmt")
+
+    def __init__(self, amount: Union[int, float], unit: str = "", fmt: str = ""):
+        self.amount = amount
+        self.unit = unit
+        self.fmt = fmt
+
+    def __str__(self) -> str:
+        text = format(self.amount, self.fmt)
+        if not self.unit:
+            return text
+        # Градусы пишутся слитно: 30°, 45°C
+        return f"{text}{'' if self.unit.startswith('°') else ' '}{self.unit}"
+
+    def __repr__(self) -> str:
+        return f"Value({self.amount!r}, {self.unit!r})"
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Value):
+            return NotImplemented
+        return (self.amount, self.unit, self.fmt) == (other.amount, other.unit, other.fmt)
+
+def money(amount: float, unit: str = "руб") -> Value:
+    """Денежная сумма: 1,234,567 руб"""
+    return Value(amount, unit, ",.0f")
+
+Item = Union[Value, str, int, float]
+
+class CalcResult:
+    """Результат калькулятора: разделы с сырыми значениями и ленивый рендер"""
+
+    __slots__ = ("type", "parameters", "materials", "cost", "results",
+                 "recommendations", "formula", "notes", "error", "_text")
+
+    # Разделы со значениями в порядке вывода
+    SECTIONS = (
+        ("parameters", "Параметры"),
+        ("materials", "Материалы"),
+        ("cost", "Стоимость"),
+        ("results", "Результаты"),
+    )
+
+    def __init__(self, type: str = "", parameters: Optional[Dict[str, Item]] = None,
+                 materials: Optional[Dict[str, Item]] = None, cost: Optional[Dict[str, Item]] = None,
+                 results: Optional[Dict[str, Item]] = None, recommendations: Optional[List[str]] = None,
+                 formula: Optional[str] = None, notes: Optional[List[str]] = None,
+                 error: Optional[str] = None):
+        self.type = type
+        self.parameters = parameters
+        self.materials = materials
+        self.cost = cost
+        self.results = results
+        self.recommendations = recommendations
+        self.formula = formula
+        self.notes = notes
+        self.error = error
+        self._text: Optional[str] = None
+
+    @classmethod
+    def failure(cls, message: str) -> "CalcResult":
+        return cls(error=message)
+
+    @property
+    def success(self) -> bool:
+        return self.error is None
+
+    @property
+    def total_cost(self) -> Optional[float]:
+        """Итоговая стоимость в рублях, если калькулятор ее считает"""
+        if not self.cost:
+            return None
+        total = self.cost.get("Итого")
+        return total.amount if isinstance(total, Value) else None
+
+    def to_dict(self, raw: bool = False) -> Dict[str, Any]:
+        """
+        Словарь в прежнем формате калькуляторов
+
+        raw=True - числа без форматирования (для экспорта и проектов)
+        """
+        if self.error is not None:
+            return {"error": self.error}
+
+        data: Dict[str, Any] = {"success": True, "type": self.type}
+        for section, _ in self.SECTIONS:
+            items = getattr(self, section)
+            if items is not None:
+                data[section] = {
+                    key: (value.amount if raw else str(value)) if isinstance(value, Value) else value
+                    for key, value in items.items()
+                }
+        for section in ("recommendations", "formula", "notes"):
+            if getattr(self, section) is not None:
+                data[section] = getattr(self, section)
+        return data
+
+    def render(self, calc_type: str = "") -> str:
+        """Текст для Telegram (Markdown), собирается один раз"""
+        if self._text is not None:
+            return self._text
+
+        if self.error is not None:
+            self._text = f"❌ *Ошибка:* {self.error}"
+            return self._text
+
+        parts = [f"🧮 *Результат расчета ({self.type or calc_type})*\n\n"]
+
+        for section, title in self.SECTIONS:
+            items = getattr(self, section)
+            if items is not None:
+                parts.append(f"*{title}:*\n")
+                parts.extend(f"• {key}: {value}\n" for key, value in items.items())
+                parts.append("\n")
+
+        if self.recommendations is not None:
+            parts.append("*Рекомендации:*\n")
+            parts.extend(f"{i}. {rec}\n" for i, rec in enumerate(self.recommendations, 1))
+            parts.append("\n")
+
+        if self.formula is not None:
+            parts.append(f"*Формула:* {self.formula}\n")
+
+        if self.notes is not None:
+            parts.append("\n*Примечания:*\n")
+            parts.extend(f"• {note}\n" for note in self.notes)
+
+        self._text = "".join(parts)
+        return self._text
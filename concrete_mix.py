@@ -0,0 +1,335 @@
+"""
+ПОДБОР СОСТАВА БЕТОНА v12.0
+Составы на 1 м³ заранее посчитаны сеткой по марке, крупности щебня,
+подвижности и пластификатору - поиск состава сводится к индексам
+массива. Для большой заливки - замесы по миксерам и график подачи
+"""
+
+import math
+import re
+from typing import Any, Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from config import CONCRETE_MAX_LOADS
+
+# Опорные составы на 1 м³ (цемент М500, щебень 20-40, П3): цемент, песок, щебень, вода.
+# М100-М350 - прежняя таблица калькулятора бетона, М400-М500 - ее продолжение
+BASE_GRADES = np.array([100, 150, 200, 250, 300, 350, 400, 450, 500], dtype=float)
+BASE_COMPOSITIONS = np.array([
+    [180, 840, 1050, 210],
+    [220, 780, 1080, 190],
+    [280, 740, 1100, 180],
+    [330, 700, 1120, 170],
+    [380, 645, 1080, 190],
+    [420, 590, 1090, 180],
+    [460, 570, 1090, 180],
+    [500, 540, 1090, 175],
+    [540, 510, 1090, 170]
+], dtype=float)
+COMPONENTS = ("cement", "sand", "gravel", "water")
+
+# Сетка марок: М100-М500 с шагом 5, промежуточные составы - интерполяция опорных
+GRADE_MIN, GRADE_MAX, GRADE_STEP = 100, 500, 5
+GRADES = np.arange(GRADE_MIN, GRADE_MAX + GRADE_STEP, GRADE_STEP)
+
+# Класс прочности -> марка (ГОСТ 26633)
+CLASS_TO_GRADE = {
+    "В7.5": 100, "В10": 150, "В12.5": 150, "В15": 200, "В20": 250, "В22.5": 300,
+    "В25": 350, "В30": 400, "В35": 450, "В40": 500,
+}
+
+AGGREGATE_SIZES = (10, 20, 40)              # наибольшая крупность щебня, мм
+AGGREGATE_FRACTIONS = {10: "5-10", 20: "5-20", 40: "20-40"}
+SLUMP_CLASSES = ("П1", "П2", "П3", "П4", "П5")
+REFERENCE_AGGREGATE = 40
+REFERENCE_SLUMP = "П3"
+
+# Водопотребность смеси на щебне, л/м³: крупность × подвижность П1..П5
+WATER_DEMAND = np.array([
+    [200, 210, 220, 230, 240],
+    [185, 195, 205, 215, 225],
+    [170, 180, 190, 200, 210]
+], dtype=float)
+
+# Поправка доли песка в заполнителе (по объему): мелкий щебень и
+# подвижная смесь требуют больше песка
+SAND_SHIFT_BY_AGGREGATE = np.array([0.09, 0.04, 0.0])
+SAND_SHIFT_PER_SLUMP_CLASS = 0.01
+
+# Плотность зерен, кг/л: цемент, песок, щебень, вода
+DENSITIES = np.array([3.1, 2.65, 2.7, 1.0])
+
+# Добавки: пластификатор снижает водопотребность, цемент уменьшается
+# в той же доле (В/Ц и прочность не меняются); дозировки - % от массы цемента
+PLASTICIZER_WATER_REDUCTION = 0.10
+PLASTICIZER_DOSAGE = 0.006
+ANTIFREEZE_DOSAGE = 0.02
+
+# Доставка миксерами
+SHIFT_START = 8.0           # ч, первая загрузка на заводе
+TRUCK_VOLUME = 7.0          # м³ в одном миксере
+TRUCK_FLEET = 4             # миксеров на заказе
+POUR_RATE = 20.0            # м³/ч, скорость укладки (насос, бригада)
+TRAVEL_TIME = 0.5           # ч, в одну сторону от завода
+LOADING_TIME = 0.25         # ч, загрузка на заводе
+MAX_MIX_AGE = 2.0           # ч от загрузки до конца выгрузки
+COLD_JOINT_GAP = 1.0        # ч простоя укладки, после которого возможен холодный шов
+
+def _build_table() -> np.ndarray:
+    """
+    Составы на всю сетку: марка × крупность × подвижность × пластификатор × компонент
+
+    Вода - по водопотребности относительно опорной смеси, цемент - в той
+    же пропорции (В/Ц задает прочность). Объем смеси остается как у
+    опорного состава: заполнитель занимает то, что не заняли цемент и
+    вода, и делится между песком и щебнем по доле песка.
+    """
+    base = np.stack([np.interp(GRADES, BASE_GRADES, BASE_COMPOSITIONS[:, i]) for i in range(4)], axis=-1)
+    cement, sand, gravel, water = (base[:, i, None, None, None] for i in range(4))
+
+    reference = WATER_DEMAND[AGGREGATE_SIZES.index(REFERENCE_AGGREGATE), SLUMP_CLASSES.index(REFERENCE_SLUMP)]
+    reduction = np.array([1.0, 1 - PLASTICIZER_WATER_REDUCTION])
+    factor = (WATER_DEMAND / reference)[None, :, :, None] * reduction[None, None, None, :]
+
+    sand_volume, gravel_volume = sand / DENSITIES[1], gravel / DENSITIES[2]
+    aggregate_volume = sand_volume + gravel_volume
+    # Прирост заполнителя - объем, освобожденный цементом и водой
+    aggregate_scale = (aggregate_volume - cement * (factor - 1) / DENSITIES[0]
+                       - water * (factor - 1) / DENSITIES[3]) / aggregate_volume
+
+    share = sand_volume / aggregate_volume
+    slump_shift = (np.arange(len(SLUMP_CLASSES)) - SLUMP_CLASSES.index(REFERENCE_SLUMP)) * SAND_SHIFT_PER_SLUMP_CLASS
+    new_share = share + SAND_SHIFT_BY_AGGREGATE[None, :, None, None] + slump_shift[None, None, :, None]
+
+    table = np.stack(np.broadcast_arrays(
+        cement * factor,
+        sand * aggregate_scale * (new_share / share),
+        gravel * aggregate_scale * ((1 - new_share) / (1 - share)),
+        water * factor
+    ), axis=-1)
+    table.setflags(write=False)
+    return table
+
+TABLE = _build_table()
+
+_GRADE_RE = re.compile(r"([МВ])(\d+(?:[.,]\d+)?)")
+# Латинские буквы, похожие на кириллические: M300, B25, P3
+_LATIN = str.maketrans("MBP", "МВП")
+
+def grade_value(grade: str) -> int:
+    """Марка числом: М300 -> 300, класс В25 -> 350; вне сетки - ValueError"""
+    text = grade.strip().upper().translate(_LATIN)
+    match = _GRADE_RE.fullmatch(text)
+    if match is None:
+        raise ValueError(f"Неизвестная марка бетона: {grade}. Марка М{GRADE_MIN}-М{GRADE_MAX} или класс В7.5-В40")
+    if match.group(1) == "В":
+        key = "В" + match.group(2).replace(",", ".")
+        if key not in CLASS_TO_GRADE:
+            raise ValueError(f"Неизвестный класс бетона: {grade}. Доступно: {', '.join(CLASS_TO_GRADE)}")
+        return CLASS_TO_GRADE[key]
+    value = float(match.group(2).replace(",", "."))
+    if not (GRADE_MIN <= value <= GRADE_MAX) or value % GRADE_STEP:
+        raise ValueError(f"Неизвестная марка бетона: {grade}. Марки М{GRADE_MIN}-М{GRADE_MAX} с шагом {GRADE_STEP}")
+    return int(value)
+
+def _index(values, parse) -> np.ndarray:
+    """Индексы сетки: каждое уникальное значение разбирается один раз"""
+    if np.ndim(values) == 0:
+        return np.intp(parse(str(values)))
+    keys, inverse = np.unique(np.asarray(values, dtype=str), return_inverse=True)
+    return np.array([parse(key) for key in keys], dtype=np.intp)[inverse].reshape(np.shape(values))
+
+def _aggregate_index(value: str) -> int:
+    try:
+        return AGGREGATE_SIZES.index(int(float(value)))
+    except ValueError:
+        raise ValueError(f"Крупность щебня: {', '.join(map(str, AGGREGATE_SIZES))} мм, указано {value}") from None
+
+def _slump_index(value: str) -> int:
+    key = value.strip().upper().translate(_LATIN)
+    if key not in SLUMP_CLASSES:
+        raise ValueError(f"Подвижность: {', '.join(SLUMP_CLASSES)}, указано {value}")
+    return SLUMP_CLASSES.index(key)
+
+def composition(grade, aggregate=REFERENCE_AGGREGATE, slump=REFERENCE_SLUMP, plasticizer=False) -> np.ndarray:
+    """
+    Состав на 1 м³ (цемент, песок, щебень кг; вода л) в последней оси
+
+    Все параметры могут быть массивами; состав - выборка из TABLE
+    по индексам, без расчета.
+    """
+    grade_index = _index(grade, lambda key: (grade_value(key) - GRADE_MIN) // GRADE_STEP)
+    aggregate_index = _index(aggregate, _aggregate_index)
+    slump_index = _index(slump, _slump_index)
+    plasticizer_index = np.asarray(plasticizer, dtype=bool).astype(np.intp)
+    return TABLE[grade_index, aggregate_index, slump_index, plasticizer_index]
+
+def additive_flags(additives: str) -> Tuple[bool, bool]:
+    """(пластификатор, противоморозная добавка) по тексту заказа"""
+    text = additives.lower()
+    return "пластификатор" in text, "противоморозн" in text
+
+class MixDesign(NamedTuple):
+    """Состав на 1 м³"""
+    grade: int
+    aggregate: int
+    slump: str
+    plasticizer: bool
+    antifreeze: bool
+    cement: float        # кг
+    sand: float          # кг
+    gravel: float        # кг
+    water: float         # л
+
+    @property
+    def label(self) -> str:
+        return f"М{self.grade}, щебень {AGGREGATE_FRACTIONS[self.aggregate]}, {self.slump}"
+
+    @property
+    def water_cement(self) -> float:
+        return self.water / self.cement
+
+    def batch(self, volume: float) -> Dict[str, float]:
+        """Закладка на объем volume, м³: кг, вода в л"""
+        batch = {name: getattr(self, name) * volume for name in COMPONENTS}
+        batch["plasticizer"] = self.cement * volume * PLASTICIZER_DOSAGE if self.plasticizer else 0.0
+        batch["antifreeze"] = self.cement * volume * ANTIFREEZE_DOSAGE if self.antifreeze else 0.0
+        return batch
+
+def design_mix(grade: str, aggregate: int = REFERENCE_AGGREGATE, slump: str = REFERENCE_SLUMP,
+               additives: str = "") -> MixDesign:
+    """Состав одной смеси; неизвестная марка, крупность или подвижность - ValueError"""
+    plasticizer, antifreeze = additive_flags(additives)
+    cement, sand, gravel, water = composition(grade, str(aggregate), slump, plasticizer).tolist()
+    return MixDesign(grade_value(grade), int(aggregate), slump.strip().upper().translate(_LATIN),
+                     plasticizer, antifreeze, cement, sand, gravel, water)
+
+class TruckLoad(NamedTuple):
+    """Рейс миксера: время в часах от начала смены"""
+    number: int
+    truck: int
+    volume: float
+    loading: float       # начало загрузки на заводе
+    arrival: float       # прибытие на объект
+    start: float         # начало выгрузки
+    finish: float        # конец выгрузки
+    batch: Dict[str, float]
+
+class DeliverySchedule(NamedTuple):
+    mix: MixDesign
+    volume: float
+    loads: List[TruckLoad]
+    trucks: int
+    pump_idle: float     # ч простоя укладки между миксерами
+    warnings: List[str]
+
+    @property
+    def duration(self) -> float:
+        """ч от первой загрузки до конца укладки"""
+        return self.loads[-1].finish - self.loads[0].loading if self.loads else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "mix": {**self.mix._asdict(), "label": self.mix.label},
+            "volume": self.volume,
+            "trucks": self.trucks,
+            "duration_h": self.duration,
+            "pump_idle_h": self.pump_idle,
+            "loads": [load._asdict() for load in self.loads],
+            "warnings": self.warnings
+        }
+
+def delivery_schedule(mix: MixDesign, volume: float, truck_volume: float = TRUCK_VOLUME,
+                      fleet: int = TRUCK_FLEET, pour_rate: float = POUR_RATE,
+                      travel: float = TRAVEL_TIME, loading: float = LOADING_TIME,
+                      start: float = 0.0) -> DeliverySchedule:
+    """
+    Разбивка заливки на рейсы и график подачи
+
+    Миксеры загружаются полностью, последний - остатком. Каждый следующий
+    миксер приходит к концу выгрузки предыдущего, если свободен; миксер
+    fleet рейсов назад должен успеть вернуться на завод и загрузиться.
+    Время выгрузки - объем / pour_rate. Предупреждения - простой укладки
+    дольше COLD_JOINT_GAP и смесь старше MAX_MIX_AGE к концу выгрузки.
+    Рейсов больше CONCRETE_MAX_LOADS - ValueError: график строится на
+    каждый рейс, и огромный объем занял бы бота на секунды.
+    """
+    if volume <= 0 or truck_volume <= 0 or pour_rate <= 0 or fleet < 1:
+        raise ValueError("Объем, вместимость миксера, скорость укладки и число миксеров должны быть положительными")
+    loads = volume / truck_volume
+    if not math.isfinite(loads) or loads > CONCRETE_MAX_LOADS:
+        raise ValueError(f"Слишком много рейсов миксеров (больше {CONCRETE_MAX_LOADS}): "
+                         f"увеличьте объем миксера или разбейте заливку на части")
+    count = math.ceil(loads - 1e-9)
+    volumes = [truck_volume] * (count - 1) + [volume - truck_volume * (count - 1)]
+
+    loads: List[TruckLoad] = []
+    finish = [0.0] * count
+    pump_idle, max_gap, max_age = 0.0, 0.0, 0.0
+    for k, load_volume in enumerate(volumes):
+        arrival = start + travel + loading if k == 0 else finish[k - 1]
+        if k >= fleet:
+            arrival = max(arrival, finish[k - fleet] + 2 * travel + loading)
+        if k:
+            gap = arrival - finish[k - 1]
+            pump_idle += gap
+            max_gap = max(max_gap, gap)
+        finish[k] = arrival + load_volume / pour_rate
+        load_start = arrival - travel - loading
+        max_age = max(max_age, finish[k] - load_start - loading)
+        loads.append(TruckLoad(k + 1, k % fleet + 1, load_volume, load_start, arrival, arrival,
+                               finish[k], mix.batch(load_volume)))
+
+    warnings = []
+    if max_gap > COLD_JOINT_GAP:
+        warnings.append(f"Перерыв укладки до {max_gap:.1f} ч - возможен холодный шов, добавьте миксеры")
+    if max_age > MAX_MIX_AGE:
+        warnings.append(f"Смесь в пути и на выгрузке до {max_age:.1f} ч (норма {MAX_MIX_AGE:g} ч) - "
+                        f"уменьшите миксер или увеличьте скорость укладки")
+    return DeliverySchedule(mix, volume, loads, min(fleet, count), pump_idle, warnings)
+
+def batch_sheet(schedule: DeliverySchedule) -> List[Dict[str, Any]]:
+    """Замесы по рейсам: одинаковые полные рейсы и остаток"""
+    rows: List[Dict[str, Any]] = []
+    for load in schedule.loads:
+        if rows and rows[-1]["volume"] == load.volume:
+            rows[-1]["loads"] += 1
+        else:
+            rows.append({"volume": load.volume, "loads": 1, **load.batch})
+    return rows
+
+def format_time(hours: float) -> str:
+    """Часы от полуночи первого дня: 8.5 -> 08:30, 33.25 -> 09:15 (+1 д)"""
+    minutes = int(round(hours * 60))
+    days, minutes = divmod(minutes, 24 * 60)
+    return f"{minutes // 60:02d}:{minutes % 60:02d}" + (f" (+{days} д)" if days else "")
+
+def parse_order(tokens: Sequence[str]) -> Dict[str, Any]:
+    """
+    Опции заказа из слов команды: П1-П5, фр10/фр20/фр40 (или щебень20),
+    миксер=9, машин=6, скорость=25, начало=8; остальное - добавки.
+    Неизвестная подвижность (П7) - ValueError
+    """
+    order: Dict[str, Any] = {"additives": []}
+    for token in tokens:
+        word = token.strip().lower()
+        slump = word.upper().translate(_LATIN)
+        if slump in SLUMP_CLASSES:
+            order["slump"] = slump
+            continue
+        if re.fullmatch(r"П\d+", slump):
+            raise ValueError(f"Подвижность: {', '.join(SLUMP_CLASSES)}, указано {token}")
+        match = re.fullmatch(r"(?:фр|щебень)[=:]?(\d+)(?:мм)?", word)
+        if match:
+            order["aggregate"] = int(match.group(1))
+            continue
+        match = re.fullmatch(r"(миксер|машин[ыа]?|скорость|начало)[=:]?(\d+(?:[.,]\d+)?)\S*", word)
+        if match:
+            key = {"миксер": "truck_volume", "скорость": "pour_rate", "начало": "start"}.get(match.group(1), "fleet")
+            value = float(match.group(2).replace(",", "."))
+            order[key] = int(value) if key == "fleet" else value
+            continue
+        order["additives"].append(token)
+    order["additives"] = " ".join(order["additives"])
+    return order
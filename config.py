@@ -65,7 +65,7 @@ CALCULATORS = {
     "fundament": {"name": "Фундамент", "emoji": "🧱", "formula": "V = Д × Ш × Г"},
     "walls": {"name": "Стены", "emoji": "🏠", "formula": "S = П × В"},
     "roof": {"name": "Крыша", "emoji": "🏠", "formula": "S = (Д × Ш) / cos(α)"},
-    "heat": {"name": "Теплопотери", "emoji": "🔥", "formula": "Q = (S × ΔT × k) / 1000"},
+    "heat": {"name": "Теплопотери", "emoji": "🔥", "formula": "Q = (Σ A×U + 0.34×n×V) × ΔT / 1000"},
     "cost": {"name": "Стоимость", "emoji": "💰", "formula": "Цена = S × Ц_м²"},
     "materials": {"name": "Материалы", "emoji": "📦", "formula": "Кол-во = S × Расход"},
     "area": {"name": "Площадь/объем", "emoji": "📏", "formula": "Разные формулы"},
@@ -90,4 +90,136 @@ PRICES = {
     "materials_beton": 4500,  # руб/м³
     "materials_kirpich": 35,  # руб/шт
     "materials_gasblock": 5000,  # руб/м³
-}
\ No newline at end of file
+    # Материалы и работы калькуляторов
+    "rebar": 45,              # руб/кг арматуры
+    "insulation": 350,        # руб/м² утеплителя
+    "insulation_xps": 450,    # руб/м² ЭППС 100 мм
+    "insulation_premium": 2000,  # руб/м² утепления "отлично"
+    "insulation_work": 250,   # руб/м² монтажа утеплителя
+    "vapor_barrier": 40,      # руб/м² пароизоляции
+    "waterproofing": 40,      # руб/м² гидроизоляции
+    "osb": 500,               # руб/м² ОСП
+    "drywall": 140,           # руб/м² гипсокартон
+    "gypsum_fiber": 260,      # руб/м² ГВЛ
+    "plywood": 700,           # руб/м² фанера
+    "gasblock": 150,          # руб/блок 600×300×200
+    "glue": 25,               # руб/кг клея для газоблока
+    "brick_piece": 30,        # руб/шт (калькулятор материалов)
+    "mortar": 3500,           # руб/м³ раствора
+    "beam": 6000,             # руб/брус 150×150×6000
+    "roof_work_metal": 800,   # руб/м² монтажа кровли
+    "roof_work_soft": 1000,
+    "septic": 30000,          # руб/м³ септика
+    "water_heater": 50,       # руб/л водонагревателя
+    "piping": 15000,          # руб/чел разводки труб
+    "cable": 800,             # руб/кВт мощности
+    "panel": 600,
+    "electric_work": 400,
+    "cement": 12.5,           # руб/кг
+    "sand": 0.8,
+    "gravel": 1.2,
+    "plasticizer": 500,       # руб/м³ бетона
+    "antifreeze": 800,
+    "concrete_material": 2500,  # руб/м³ (калькулятор материалов)
+    "concrete_work": 1500,    # руб/м³
+    "paint": 300,             # руб/л
+    "primer": 150,
+    # Калькулятор стоимости работ
+    "roof_turnkey_metal": 1300,   # руб/м² работа + материалы
+    "roof_turnkey_soft": 1700,
+    "rafters": 800,               # руб/м² стропильной системы
+    "roof_insulation": 500,       # руб/м² утепления кровли
+    "finish_work_economy": 2000,  # руб/м² чистовой отделки
+    "finish_work_standard": 3500,
+    "finish_work_premium": 6000,
+    "rough_finish": 1500,         # руб/м² черновой отделки
+    "plumbing": 1000,             # руб/м² сантехники
+    "wiring": 800,                # руб/м² электрики
+    # Укрупненная стоимость проекта по типу, руб/м²
+    "project_house": 35000,
+    "project_dacha": 25000,
+    "project_banya": 40000,
+    "project_garage": 20000,
+    "project_repair": 15000,
+    "project_flat": 20000,
+    "project_default": 25000,
+}
+
+# Регионы: разница температур зимой (°C) и коэффициент к ценам PRICES
+REGIONS = {
+    "москва": (45, 1.0),
+    "спб": (43, 0.95),
+    "екатеринбург": (47, 0.85),
+    "новосибирск": (50, 0.85),
+    "сочи": (30, 0.95),
+    "краснодар": (35, 0.85),
+    "казань": (46, 0.85),
+    "самара": (45, 0.8),
+    "ростов": (37, 0.8),
+    "воронеж": (44, 0.8),
+    "пермь": (48, 0.85),
+    "уфа": (47, 0.8),
+    "челябинск": (48, 0.8),
+    "омск": (50, 0.8),
+    "красноярск": (52, 0.9),
+    "иркутск": (53, 0.9),
+    "владивосток": (44, 1.0),
+    "мурманск": (47, 1.05),
+    "якутск": (72, 1.3),
+}
+DEFAULT_DELTA_T = 45   # для неизвестного региона
+
+# Прайс-лист (таблицы prices и regions в DB_PATH)
+PRICE_BOOK_DB_PATH = DB_PATH        # None - только цены из PRICES
+PRICE_BOOK_CHECK_INTERVAL = 30      # сек между проверками версии прайса
+
+# Параллельная обработка обновлений
+UPDATE_WORKERS = 8          # одновременно выполняемых обработчиков
+UPDATE_USER_QUEUE = 20      # максимум необработанных обновлений одного пользователя
+UPDATE_MAX_PENDING = 1000   # максимум обновлений в работе всего
+
+# Состояния пользователей (многошаговые сценарии)
+SESSION_MAX_USERS = 5000                 # записей в памяти
+SESSION_TTL = 24 * 3600                  # сек простоя до удаления
+SESSION_MAX_BYTES = 16 * 1024 * 1024     # лимит памяти
+SESSION_DB_PATH = DATA_DIR / "sessions.db"  # None - без сохранения
+SESSION_FLUSH_INTERVAL = 1.0             # сек между фоновыми записями в SQLite
+
+# Метрики (эндпоинт Prometheus, только локальный доступ)
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108        # None - не запускать эндпоинт
+
+# Логирование
+LOG_FILE = "construction_bot.log"
+LOG_MAX_BYTES = 10 * 1024 * 1024   # размер файла до ротации
+LOG_BACKUP_COUNT = 5               # сколько старых файлов хранить
+LOG_JSON = False                   # True - одна JSON-строка на запись
+
+# Кэш результатов калькуляторов
+CALC_CACHE_MAX_ENTRIES = 2000              # записей
+CALC_CACHE_MAX_BYTES = 8 * 1024 * 1024     # лимит памяти
+
+# Разброс стоимости (Монте-Карло)
+MONTE_CARLO_DRAWS = 20000                 # розыгрышей на одну смету
+MONTE_CARLO_PRICE_SPREAD = (0.85, 1.25)   # min/max цены относительно PRICES, если нет в справочнике
+MONTE_CARLO_CONSUMPTION = (0.97, 1.12)    # перерасход материалов по разделу сметы
+
+# Нормы расхода материалов (таблица consumption_norms в DB_PATH)
+NORMS_DB_PATH = DB_PATH           # None - только нормы по умолчанию
+NORMS_CHECK_INTERVAL = 30         # сек между проверками версии таблицы
+
+# Подбор стен (утеплители из таблицы materials в DB_PATH)
+WALL_OPTIMIZER_DB_PATH = DB_PATH      # None - только утеплители из прайс-листа
+WALL_OPTIMIZER_CHECK_INTERVAL = 300   # сек между чтениями каталога
+
+# Бетон: рейсов миксеров в графике подачи в ответе чата
+CONCRETE_SCHEDULE_ROWS = 12
+CONCRETE_MAX_LOADS = 1000     # рейсов в одном графике: 500 м³ даже миксерами по 0.5 м³
+
+# Длинные результаты калькуляторов: итог в сообщении, полная разбивка - файлом
+DOCUMENT_INLINE_LIMIT = 3500               # символов; длиннее - итог + документ (лимит Telegram 4096)
+DOCUMENT_INLINE_LINES = 45                 # строк; длиннее - итог + документ
+DOCUMENT_FORMAT = "html"                   # html, csv или pdf (pdf - нужен reportlab)
+DOCUMENT_PDF_FONT = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"  # шрифт с кириллицей для PDF
+DOCUMENT_CACHE_MAX_ENTRIES = 500           # документов
+DOCUMENT_CACHE_MAX_BYTES = 32 * 1024 * 1024  # лимит памяти
\ No newline at end of file
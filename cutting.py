@@ -0,0 +1,371 @@
+"""
+РАСКРОЙ МАТЕРИАЛОВ v12.0
+Раскрой хлыстов (арматура, доска, брус, профиль) и листов (гипсокартон,
+ОСП, фанера): первый подходящий по убыванию размеров, точный перебор
+для небольших заданий; количество заготовок и доля отходов
+"""
+
+import math
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+EPS = 1e-9
+
+# Длина хлыста, м
+LINEAR_STOCK = {
+    "арматура": 11.7,
+    "доска": 6.0,
+    "брус": 6.0,
+    "профиль": 3.0,
+    "труба": 6.0,
+}
+
+# Лист: ширина × высота, м
+SHEET_STOCK = {
+    "гипсокартон": (1.2, 2.5),
+    "гвл": (1.2, 2.5),
+    "осп": (1.25, 2.5),
+    "фанера": (1.22, 2.44),
+}
+
+# Ширина пропила, м (арматура и гипсокартон режутся без потерь)
+KERF = {
+    "доска": 0.004,
+    "брус": 0.004,
+    "осп": 0.004,
+    "фанера": 0.004,
+}
+
+EXACT_PIECES = 30          # точный перебор для хлыстов, если деталей не больше
+EXACT_NODE_LIMIT = 200000  # предел перебора; не уложились - остается эвристика
+DEFAULT_COVER_HEIGHT = 2.7 # м, высота обшиваемой стены по умолчанию
+COMPACT_EVERY = 64         # через сколько групп деталей убирать заполненные полосы
+
+class CutPlan(NamedTuple):
+    stock: Tuple[float, ...]    # длина хлыста (м) или ширина и высота листа (м)
+    count: int                  # заготовок
+    patterns: List[Tuple[Tuple, int]]  # (детали одной заготовки, сколько таких заготовок)
+    used: float                 # длина или площадь деталей
+    purchased: float            # длина или площадь заготовок
+    optimal: bool               # заготовок не больше нельзя (нижняя граница или точный перебор)
+
+    @property
+    def waste(self) -> float:
+        """Доля отходов от купленного материала"""
+        return 1 - self.used / self.purchased if self.purchased else 0.0
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "stock": self.stock,
+            "count": self.count,
+            "used": self.used,
+            "purchased": self.purchased,
+            "waste": self.waste,
+            "optimal": self.optimal,
+            "patterns": [{"pieces": list(pieces), "repeat": repeat} for pieces, repeat in self.patterns]
+        }
+
+def _group(sizes: np.ndarray, quantities: Optional[Sequence[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """Одинаковые детали в группы: размеры по убыванию и количества"""
+    if quantities is None:
+        quantities = np.ones(len(sizes), dtype=np.int64)
+    quantities = np.asarray(quantities, dtype=np.int64)
+    if np.any(quantities < 0):
+        raise ValueError("Количество деталей не может быть отрицательным")
+    keep = quantities > 0
+    unique, inverse = np.unique(np.round(sizes[keep], 6), axis=0, return_inverse=True)
+    counts = np.bincount(inverse.ravel(), weights=quantities[keep], minlength=len(unique)).astype(np.int64)
+    return unique, counts
+
+def _patterns(bins: List[List]) -> List[Tuple[Tuple, int]]:
+    patterns: Dict[Tuple, int] = {}
+    for pieces in bins:
+        key = tuple(sorted(pieces, reverse=True))
+        patterns[key] = patterns.get(key, 0) + 1
+    return sorted(patterns.items(), key=lambda item: -item[1])
+
+# ==================== ХЛЫСТЫ ====================
+
+def cut_linear(lengths: Sequence[float], quantities: Optional[Sequence[int]] = None,
+               stock: float = 6.0, kerf: float = 0.0, exact: bool = True) -> CutPlan:
+    """
+    Раскрой хлыстов длиной stock на детали lengths (м)
+
+    Первый подходящий по убыванию: одинаковые детали кладутся пачкой -
+    в первый хлыст, где остаток позволяет, сколько поместится, остальные
+    в новые хлысты по целому числу деталей. Каждый рез съедает kerf.
+    Если деталей не больше EXACT_PIECES и эвристика не достигла нижней
+    границы, хлысты распределяются точным перебором с отсечениями.
+    """
+    if stock <= 0:
+        raise ValueError("Длина хлыста должна быть положительной")
+    sizes, counts = _group(np.asarray(lengths, dtype=float), quantities)
+    if np.any(sizes <= 0):
+        raise ValueError("Длина детали должна быть положительной")
+    if len(sizes) and sizes.max() > stock + EPS:
+        raise ValueError(f"Деталь {sizes.max():g} м длиннее хлыста {stock:g} м")
+    order = np.argsort(-sizes, kind="stable")
+    sizes, counts = sizes[order], counts[order]
+
+    # С пропилом: деталь занимает size + kerf, в хлысте stock + kerf (последний рез не нужен)
+    capacity = stock + kerf
+    need = sizes + kerf
+    used = float(np.dot(sizes, counts))
+
+    remaining = np.empty(0)
+    contents: List[List[float]] = []
+    for size, width, count in zip(sizes, need, counts):
+        # Открытые хлысты по порядку: сколько деталей влезет в каждый
+        fits = np.floor((remaining + EPS) / width).astype(np.int64)
+        take = np.minimum(fits, np.maximum(0, count - (np.cumsum(fits) - fits)))
+        for i in np.flatnonzero(take):
+            contents[i].extend([float(size)] * int(take[i]))
+        remaining = remaining - take * width
+        count -= int(take.sum())
+
+        if count:
+            per_bar = int((capacity + EPS) // width)
+            bars, last = divmod(int(count), per_bar)
+            fresh = [per_bar] * bars + ([last] if last else [])
+            remaining = np.concatenate([remaining, capacity - np.array(fresh) * width])
+            contents.extend([[float(size)] * n for n in fresh])
+
+    lower = math.ceil(float(np.dot(need, counts)) / capacity - EPS) if len(sizes) else 0
+    optimal = len(contents) <= lower
+    if exact and not optimal and counts.sum() <= EXACT_PIECES:
+        pieces = np.repeat(sizes, counts)
+        bins, optimal = _exact_bins(pieces, kerf, capacity, len(contents), lower)
+        if bins is not None:
+            contents = bins
+
+    count = len(contents)
+    return CutPlan((stock,), count, _patterns(contents), used, count * stock, optimal)
+
+def _exact_bins(pieces: np.ndarray, kerf: float, capacity: float,
+                upper: int, lower: int) -> Tuple[Optional[List[List[float]]], bool]:
+    """
+    Наименьшее число хлыстов перебором с отсечениями
+
+    Детали по убыванию, каждая - в открытый хлыст (хлысты с одинаковым
+    остатком равноценны, пробуется один) или в новый. Ветка отсекается,
+    если даже плотная укладка остатка не даст меньше хлыстов, чем в
+    лучшем решении. Возвращает раскладку лучше upper (или None) и
+    признак доказанной оптимальности: перебор не прерван пределом узлов.
+    """
+    need = [float(p) + kerf for p in pieces]
+    suffix = np.concatenate([np.cumsum(need[::-1])[::-1], [0.0]])
+    best: List[Optional[List[List[float]]]] = [None]
+    limit = [upper]
+    nodes = [0]
+    remaining: List[float] = []
+    contents: List[List[float]] = []
+
+    def place(i: int) -> bool:
+        """True - перебор можно прекращать"""
+        nodes[0] += 1
+        if nodes[0] > EXACT_NODE_LIMIT:
+            return True
+        if i == len(need):
+            best[0] = [list(bin_) for bin_ in contents]
+            limit[0] = len(contents)
+            return limit[0] <= lower
+        # Свободное место открытых хлыстов не покроет остаток деталей
+        extra = max(0, math.ceil((suffix[i] - sum(remaining)) / capacity - EPS))
+        if len(contents) + extra >= limit[0]:
+            return False
+        tried = set()
+        for b, free in enumerate(remaining):
+            key = round(free, 6)
+            if free + EPS >= need[i] and key not in tried:
+                tried.add(key)
+                remaining[b] -= need[i]
+                contents[b].append(float(pieces[i]))
+                done = place(i + 1)
+                contents[b].pop()
+                remaining[b] += need[i]
+                if done:
+                    return True
+        if len(contents) + 1 < limit[0]:
+            remaining.append(capacity - need[i])
+            contents.append([float(pieces[i])])
+            done = place(i + 1)
+            contents.pop()
+            remaining.pop()
+            if done:
+                return True
+        return False
+
+    place(0)
+    return best[0], nodes[0] <= EXACT_NODE_LIMIT
+
+# ==================== ЛИСТЫ ====================
+
+def cut_sheets(pieces: Sequence[Tuple[float, float]], quantities: Optional[Sequence[int]] = None,
+               sheet: Tuple[float, float] = (1.2, 2.5), kerf: float = 0.0, rotate: bool = True) -> CutPlan:
+    """
+    Раскрой листов sheet (ширина, высота) на прямоугольные детали
+
+    Полосы по убыванию высоты (гильотинный раскрой): деталь ставится
+    в первую полосу любого листа, где хватает высоты и остатка ширины,
+    иначе открывает новую полосу в первом листе с запасом высоты.
+    При rotate деталь кладется длинной стороной поперек листа, если
+    так помещается (полосы ниже), а не поместившаяся - повернутой
+    в остаток открытых полос. Одинаковые детали кладутся пачкой.
+    Оптимальность - только по нижней границе площади.
+    """
+    width, height = sheet
+    dims = np.asarray(pieces, dtype=float).reshape(-1, 2)
+    if np.any(dims <= 0):
+        raise ValueError("Размеры детали должны быть положительными")
+    if rotate:
+        # Длинная сторона поперек листа, если помещается, иначе вдоль
+        long_short = np.sort(dims, axis=1)[:, ::-1]
+        dims = np.where(long_short[:, :1] <= width + EPS, long_short, long_short[:, ::-1])
+    too_big = (dims[:, 0] > width + EPS) | (dims[:, 1] > height + EPS)
+    if np.any(too_big):
+        w, h = dims[np.argmax(too_big)]
+        raise ValueError(f"Деталь {w:g}×{h:g} м больше листа {width:g}×{height:g} м")
+
+    sizes, counts = _group(dims, quantities)
+    # По убыванию высоты, при равной - ширины
+    order = np.lexsort((-sizes[:, 0], -sizes[:, 1]))
+    sizes, counts = sizes[order], counts[order]
+    used = float(np.dot(sizes[:, 0] * sizes[:, 1], counts))
+
+    packer = _ShelfPacker(width + kerf, height + kerf, int(counts.sum()))
+    # Самая узкая из оставшихся деталей - для отбрасывания заполненных полос
+    narrowest = np.minimum.accumulate((sizes.min(axis=1) if rotate else sizes[:, 0])[::-1])[::-1] + kerf
+    for g, ((w, h), count) in enumerate(zip(sizes, counts)):
+        if g % COMPACT_EVERY == 0:
+            packer.compact(narrowest[g])
+        piece = (float(w), float(h))
+        count = packer.fill(piece, w + kerf, h + kerf, int(count))
+        # Повернутая деталь в свободный остаток открытых полос
+        if count and rotate and w != h and h <= width + EPS and w <= height + EPS:
+            count = packer.fill((float(h), float(w)), h + kerf, w + kerf, count)
+        if count:
+            packer.open(piece, w + kerf, h + kerf, count)
+    contents = packer.contents
+
+    count = len(contents)
+    lower = math.ceil(used / (width * height) - EPS) if used else 0
+    return CutPlan((width, height), count, _patterns(contents), used, count * width * height, count <= lower)
+
+class _ShelfPacker:
+    """Полосы и листы в массивах: поиск первой подходящей полосы - одно векторное сравнение"""
+
+    def __init__(self, width: float, height: float, size: int):
+        self.width = width
+        self.shelf_sheet = np.zeros(size, dtype=np.intp)
+        self.shelf_height = np.zeros(size)
+        self.shelf_free = np.zeros(size)
+        self.shelves = 0
+        self.sheet_free = np.full(size, height)   # остаток высоты листа
+        self.contents: List[List[Tuple[float, float]]] = []
+
+    def fill(self, piece: Tuple[float, float], need_w: float, need_h: float, count: int) -> int:
+        """Детали в открытые полосы по порядку; возвращает, сколько не поместилось"""
+        n = self.shelves
+        if not n:
+            return count
+        fits = (self.shelf_height[:n] + EPS >= need_h) & (self.shelf_free[:n] + EPS >= need_w)
+        if count == 1:
+            s = int(fits.argmax())
+            if not fits[s]:
+                return 1
+            self.contents[self.shelf_sheet[s]].append(piece)
+            self.shelf_free[s] -= need_w
+            return 0
+        fits = np.where(fits, np.floor((self.shelf_free[:n] + EPS) / need_w), 0).astype(np.int64)
+        take = np.minimum(fits, np.maximum(0, count - (np.cumsum(fits) - fits)))
+        for s in np.flatnonzero(take):
+            self.contents[self.shelf_sheet[s]].extend([piece] * int(take[s]))
+        self.shelf_free[:n] -= take * need_w
+        return count - int(take.sum())
+
+    def compact(self, min_width: float) -> None:
+        """Убрать из поиска полосы, в остаток которых не влезет ни одна из оставшихся деталей"""
+        n = self.shelves
+        alive = np.flatnonzero(self.shelf_free[:n] + EPS >= min_width)
+        if len(alive) == n:
+            return
+        for array in (self.shelf_sheet, self.shelf_height, self.shelf_free):
+            array[:len(alive)] = array[alive]
+        self.shelves = len(alive)
+
+    def open(self, piece: Tuple[float, float], need_w: float, need_h: float, count: int) -> None:
+        """Новые полосы: в первом листе с запасом высоты, иначе в новом листе"""
+        per_shelf = int((self.width + EPS) // need_w)
+        while count:
+            sheets = len(self.contents)
+            room = np.flatnonzero(self.sheet_free[:sheets] + EPS >= need_h)
+            if len(room):
+                target = int(room[0])
+            else:
+                target = sheets
+                self.contents.append([])
+            shelves = min(int((self.sheet_free[target] + EPS) // need_h), math.ceil(count / per_shelf))
+            for _ in range(shelves):
+                n = min(count, per_shelf)
+                s = self.shelves
+                self.shelf_sheet[s] = target
+                self.shelf_height[s] = need_h
+                self.shelf_free[s] = self.width - n * need_w
+                self.shelves += 1
+                self.sheet_free[target] -= need_h
+                self.contents[target].extend([piece] * n)
+                count -= n
+
+def wall_pieces(length: float, height: float, sheet: Tuple[float, float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Детали обшивки стены length × height листами, поставленными вертикально
+
+    Целые листы, доборы по высоте в каждом ряду листов, доборная полоса
+    по длине стены и угловой добор. Возвращает размеры и количества.
+    """
+    width, sheet_height = sheet
+    columns, rest_w = divmod(length, width)
+    rows, rest_h = divmod(height, sheet_height)
+    columns, rows = int(columns), int(rows)
+    rest_w = rest_w if rest_w > 1e-6 else 0.0
+    rest_h = rest_h if rest_h > 1e-6 else 0.0
+    candidates = [
+        ((width, sheet_height), columns * rows),
+        ((width, rest_h), columns if rest_h else 0),
+        ((rest_w, sheet_height), rows if rest_w else 0),
+        ((rest_w, rest_h), 1 if rest_w and rest_h else 0),
+    ]
+    candidates = [(size, n) for size, n in candidates if n]
+    return (np.array([size for size, _ in candidates], dtype=float).reshape(-1, 2),
+            np.array([n for _, n in candidates], dtype=np.int64))
+
+def cover_area(area: float, material: str, height: float = DEFAULT_COVER_HEIGHT) -> CutPlan:
+    """Листы на обшивку площади area (м²) стеной высотой height с раскроем доборов"""
+    sheet = SHEET_STOCK[material]
+    if area <= 0 or height <= 0:
+        raise ValueError("Площадь и высота должны быть положительными")
+    pieces, counts = wall_pieces(area / height, height, sheet)
+    return cut_sheets(pieces, counts, sheet, KERF.get(material, 0.0))
+
+def stock_for(name: str) -> Tuple[Optional[str], Optional[str]]:
+    """Вид раскроя (linear / sheet) и ключ материала по названию, иначе (None, None)"""
+    name = (name or "").lower()
+    for key in SHEET_STOCK:
+        if key in name:
+            return "sheet", key
+    for key in LINEAR_STOCK:
+        if key in name:
+            return "linear", key
+    return None, None
+
+def describe_pattern(pieces: Sequence) -> str:
+    """Схема заготовки строкой: 2.4 ×2 + 0.8, 0.6×0.4 ×3 + 1.2×0.2"""
+    grouped: Dict[object, int] = {}
+    for piece in pieces:
+        grouped[piece] = grouped.get(piece, 0) + 1
+    parts = []
+    for piece, n in grouped.items():
+        label = "×".join(f"{v:g}" for v in piece) if isinstance(piece, tuple) else f"{piece:g}"
+        parts.append(f"{label} ×{n}" if n > 1 else label)
+    return " + ".join(parts)
@@ -0,0 +1,234 @@
+"""
+ЭЛЕКТРОСНАБЖЕНИЕ ДОМА v12.0
+Групповые линии щитка: расчетные токи с коэффициентами спроса, выбор
+автомата и кабеля двоичным поиском по таблицам, падение напряжения
+и распределение однофазных линий по фазам
+"""
+
+import heapq
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+PHASE_VOLTAGE = 230.0          # В
+LINE_VOLTAGE = 400.0           # В
+COPPER_RESISTIVITY = 0.0175    # Ом·мм²/м
+VOLTAGE_DROP_LIMIT = 5.0       # %, от щитка до потребителя
+SQRT3 = np.sqrt(3)
+
+# Номиналы автоматических выключателей, А
+BREAKER_RATINGS = np.array([6, 10, 13, 16, 20, 25, 32, 40, 50, 63, 80, 100, 125, 160, 200], dtype=float)
+
+# Медный кабель, три жилы в трубе (ПУЭ, табл. 1.3.4): сечение, мм² -> допустимый ток, А
+CABLE_SECTIONS = np.array([1.5, 2.5, 4, 6, 10, 16, 25, 35, 50, 70, 95], dtype=float)
+CABLE_AMPACITY = np.array([17, 25, 35, 42, 60, 80, 100, 125, 170, 210, 255], dtype=float)
+
+def select_protection(current, length=0.0, phases=1, voltage=PHASE_VOLTAGE,
+                      drop_limit: float = VOLTAGE_DROP_LIMIT) -> Dict[str, np.ndarray]:
+    """
+    Автомат и сечение кабеля для расчетного тока
+
+    Автомат - ближайший номинал не меньше тока, кабель - наименьшее
+    сечение, допустимый ток которого не меньше номинала автомата и
+    падение напряжения на длине length (м) не больше drop_limit.
+    Все параметры могут быть массивами; выбор - np.searchsorted.
+    voltage - фазное напряжение для однофазных линий, линейное для трехфазных.
+    Ток больше максимального номинала - ValueError.
+    """
+    current, length, phases, voltage = np.broadcast_arrays(
+        *[np.asarray(v, dtype=float) for v in (current, length, phases, voltage)]
+    )
+    breaker_index = np.searchsorted(BREAKER_RATINGS, current, side="left")
+    if np.any(breaker_index >= len(BREAKER_RATINGS)):
+        raise ValueError(f"Расчетный ток больше {BREAKER_RATINGS[-1]:.0f} А: разделите нагрузку")
+    breaker = BREAKER_RATINGS[breaker_index]
+
+    # Падение напряжения: ΔU = k × ρ × L × I / S, k = 2 для 1 фазы и √3 для 3 фаз
+    k = np.where(phases == 3, SQRT3, 2.0)
+    min_section = k * COPPER_RESISTIVITY * length * current / (voltage * drop_limit / 100)
+    section_index = np.maximum(
+        np.searchsorted(CABLE_AMPACITY, breaker, side="left"),
+        np.searchsorted(CABLE_SECTIONS, min_section, side="left")
+    )
+    if np.any(section_index >= len(CABLE_SECTIONS)):
+        raise ValueError(f"Нужно сечение больше {CABLE_SECTIONS[-1]:g} мм²: сократите длину или нагрузку линии")
+    section = CABLE_SECTIONS[section_index]
+
+    return {
+        "breaker": breaker,
+        "cable_section": section,
+        "ampacity": CABLE_AMPACITY[section_index],
+        "cores": np.where(phases == 3, 5, 3),
+        "voltage_drop": k * COPPER_RESISTIVITY * length * current / section / voltage * 100
+    }
+
+def line_current(power, phases=1, voltage=None, cos_phi=0.9):
+    """Ток линии, А: I = P / (U × cosφ) или P / (√3 × U × cosφ); power в кВт"""
+    power, phases, cos_phi = np.broadcast_arrays(*[np.asarray(v, dtype=float) for v in (power, phases, cos_phi)])
+    if voltage is None:
+        voltage = np.where(phases == 3, LINE_VOLTAGE, PHASE_VOLTAGE)
+    return np.where(phases == 3, power * 1000 / (SQRT3 * voltage * cos_phi), power * 1000 / (voltage * cos_phi))
+
+@dataclass
+class Load:
+    name: str
+    power: float                 # кВт одного прибора
+    quantity: int = 1
+    demand_factor: float = 1.0   # доля времени работы на полную мощность
+
+@dataclass
+class Circuit:
+    """Групповая линия щитка"""
+    name: str
+    loads: List[Load] = field(default_factory=list)
+    length: float = 15.0         # м от щитка до дальнего потребителя
+    phases: int = 1
+    demand_factor: float = 1.0   # одновременность нагрузок линии
+    cos_phi: float = 0.9
+    phase: Optional[int] = None  # закрепить однофазную линию за фазой 1..3
+
+    def add_load(self, name: str, power: float, quantity: int = 1, demand_factor: float = 1.0) -> Load:
+        load = Load(name, power, quantity, demand_factor)
+        self.loads.append(load)
+        return load
+
+def balance_phases(power: np.ndarray, phases: np.ndarray, pinned: Sequence[Optional[int]]) -> np.ndarray:
+    """
+    Распределение однофазных линий по фазам 1..3
+
+    Закрепленные линии ставятся первыми, остальные по убыванию мощности
+    на наименее загруженную фазу. Трехфазные линии нагружают все фазы
+    поровну и получают номер 0.
+    """
+    assigned = np.zeros(len(power), dtype=np.intp)
+    load = [0.0, 0.0, 0.0]
+    for i in np.flatnonzero(phases == 3):
+        for p in range(3):
+            load[p] += power[i] / 3
+    free = []
+    for i in np.flatnonzero(phases != 3):
+        if pinned[i]:
+            if pinned[i] not in (1, 2, 3):
+                raise ValueError(f"Номер фазы: 1, 2 или 3, указано {pinned[i]}")
+            assigned[i] = pinned[i]
+            load[pinned[i] - 1] += power[i]
+        else:
+            free.append(i)
+
+    heap = [(value, p) for p, value in enumerate(load)]
+    heapq.heapify(heap)
+    for i in sorted(free, key=lambda i: -power[i]):
+        value, p = heapq.heappop(heap)
+        assigned[i] = p + 1
+        heapq.heappush(heap, (value + power[i], p))
+    return assigned
+
+class PanelDesign:
+    """Расчет щитка: массивы по линиям и итоги по фазам и вводу"""
+
+    __slots__ = ("circuits", "supply_phases", "installed", "power", "current", "breaker", "cable_section",
+                 "cores", "voltage_drop", "phase", "phase_power", "input")
+
+    def __init__(self, circuits: Sequence[Circuit], supply_phases: int, installed: np.ndarray,
+                 power: np.ndarray, current: np.ndarray, protection: Dict[str, np.ndarray],
+                 phase: np.ndarray, phase_power: np.ndarray, input_line: Dict[str, float]):
+        self.circuits = list(circuits)
+        self.supply_phases = supply_phases
+        self.installed = installed
+        self.power = power
+        self.current = current
+        self.breaker = protection["breaker"]
+        self.cable_section = protection["cable_section"]
+        self.cores = protection["cores"]
+        self.voltage_drop = protection["voltage_drop"]
+        self.phase = phase
+        self.phase_power = phase_power
+        self.input = input_line
+
+    @property
+    def imbalance(self) -> float:
+        """Перекос фаз: (max - min) / max"""
+        if self.supply_phases != 3 or not self.phase_power.max():
+            return 0.0
+        return float((self.phase_power.max() - self.phase_power.min()) / self.phase_power.max())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "circuits": [
+                {
+                    "name": circuit.name,
+                    "installed_kw": float(self.installed[i]),
+                    "power_kw": float(self.power[i]),
+                    "current_a": float(self.current[i]),
+                    "breaker_a": float(self.breaker[i]),
+                    "cable": f"{int(self.cores[i])}×{self.cable_section[i]:g} мм²",
+                    "voltage_drop_pct": float(self.voltage_drop[i]),
+                    "phase": int(self.phase[i]) or "L1-L3"
+                }
+                for i, circuit in enumerate(self.circuits)
+            ],
+            "phase_power_kw": [float(p) for p in self.phase_power],
+            "imbalance": self.imbalance,
+            "input": self.input
+        }
+
+def design_panel(circuits: Sequence[Circuit], supply_phases: int = 3, panel_demand: float = 0.8,
+                 input_length: float = 20.0, drop_limit: float = VOLTAGE_DROP_LIMIT) -> PanelDesign:
+    """
+    Расчет щитка за один проход по всем линиям
+
+    Мощность линии - сумма P × количество × Кс нагрузок, умноженная
+    на Кс линии; ввод считается по самой загруженной фазе с общим
+    коэффициентом одновременности panel_demand.
+    """
+    if supply_phases not in (1, 3):
+        raise ValueError("Ввод: 1 или 3 фазы")
+    if not circuits:
+        raise ValueError("Нет ни одной линии")
+    if supply_phases == 1 and any(circuit.phases == 3 for circuit in circuits):
+        raise ValueError("Трехфазная линия при однофазном вводе")
+
+    # Нагрузки всех линий одним массивом, суммы по линиям - bincount
+    owner = np.array([i for i, circuit in enumerate(circuits) for _ in circuit.loads], dtype=np.intp)
+    loads = [load for circuit in circuits for load in circuit.loads]
+    nominal = np.array([load.power * load.quantity for load in loads], dtype=float)
+    demand = np.array([load.demand_factor for load in loads], dtype=float)
+    installed = np.bincount(owner, weights=nominal, minlength=len(circuits))
+    power = np.bincount(owner, weights=nominal * demand, minlength=len(circuits))
+    power = power * np.array([circuit.demand_factor for circuit in circuits], dtype=float)
+
+    phases = np.array([circuit.phases for circuit in circuits], dtype=float)
+    cos_phi = np.array([circuit.cos_phi for circuit in circuits], dtype=float)
+    length = np.array([circuit.length for circuit in circuits], dtype=float)
+    voltage = np.where(phases == 3, LINE_VOLTAGE, PHASE_VOLTAGE)
+
+    current = line_current(power, phases, voltage, cos_phi)
+    try:
+        protection = select_protection(current, length, phases, voltage, drop_limit)
+    except ValueError as e:
+        names = [circuit.name for circuit, i in zip(circuits, current) if i > BREAKER_RATINGS[-1]]
+        raise ValueError(f"{e}{': ' + ', '.join(names) if names else ''}") from None
+
+    if supply_phases == 3:
+        phase = balance_phases(power, phases, [circuit.phase for circuit in circuits])
+        phase_power = np.array([
+            power[phase == p].sum() + power[phase == 0].sum() / 3 for p in (1, 2, 3)
+        ])
+        input_current = phase_power.max() * panel_demand * 1000 / (PHASE_VOLTAGE * cos_phi.mean())
+    else:
+        phase = np.ones(len(circuits), dtype=np.intp)
+        phase_power = np.array([power.sum()])
+        input_current = phase_power[0] * panel_demand * 1000 / (PHASE_VOLTAGE * cos_phi.mean())
+
+    main = select_protection(input_current, input_length, supply_phases,
+                             LINE_VOLTAGE if supply_phases == 3 else PHASE_VOLTAGE, drop_limit)
+    input_line = {
+        "power_kw": float(power.sum() * panel_demand),
+        "current_a": float(input_current),
+        "breaker_a": float(main["breaker"]),
+        "cable": f"{int(main['cores'])}×{float(main['cable_section']):g} мм²",
+        "voltage_drop_pct": float(main["voltage_drop"])
+    }
+    return PanelDesign(circuits, supply_phases, installed, power, current, protection,
+                       phase, phase_power, input_line)
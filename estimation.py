@@ -0,0 +1,304 @@
+"""
+СМЕТА ДОМА ЦЕЛИКОМ v12.0
+Общая геометрия считается один раз, калькуляторы выполняются
+по графу зависимостей и сводятся в единую ведомость объемов и стоимости
+"""
+
+import math
+from dataclasses import dataclass
+from graphlib import TopologicalSorter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from batch_calculators import (BatchCalculators, ArrayLike, WALL_MATERIALS, ROOF_MATERIALS,
+                               FOUNDATION_TYPES, to_scalars)
+from calc_results import CalcResult, Value, money
+from price_book import price_book
+
+@dataclass
+class HouseSpec:
+    """
+    Описание дома для сметы
+
+    Любое поле может быть массивом NumPy: тогда смета считается
+    сразу для всех вариантов (перебор, Монте-Карло).
+    """
+    length: ArrayLike
+    width: ArrayLike
+    floors: ArrayLike = 1
+    floor_height: ArrayLike = 3.0            # м
+    wall_material: ArrayLike = "газобетон"
+    wall_thickness: ArrayLike = 0.4          # м
+    foundation_type: ArrayLike = "ленточный"
+    foundation_depth: ArrayLike = 1.5        # м
+    roof_angle: ArrayLike = 30               # градусы
+    roof_material: ArrayLike = "металлочерепица"
+    region: ArrayLike = "москва"
+    insulation: ArrayLike = "хорошее"
+    people: ArrayLike = 4
+    daily_water: ArrayLike = 200             # л/чел/сутки
+    power: Optional[ArrayLike] = None        # кВт, None - по площади
+    concrete_grade: ArrayLike = "М300"
+
+# Электрическая нагрузка по умолчанию, кВт на м² общей площади
+POWER_PER_M2 = 0.1
+# Выше этой мощности дом подключается к трем фазам, кВт
+THREE_PHASE_FROM = 15
+
+# ==================== ШАГИ ====================
+
+def _geometry(spec: HouseSpec, ctx: Dict[str, Any], prices: Optional[Dict]) -> Dict[str, np.ndarray]:
+    length, width, floors, floor_height = np.broadcast_arrays(
+        *[np.asarray(v, dtype=float) for v in (spec.length, spec.width, spec.floors, spec.floor_height)]
+    )
+    perimeter = (length + width) * 2
+    footprint = length * width
+    wall_height = floor_height * floors
+    return {
+        "length": length,
+        "width": width,
+        "floors": floors,
+        "perimeter": perimeter,
+        "footprint": footprint,
+        "total_area": footprint * floors,
+        "wall_height": wall_height,
+        "wall_area": perimeter * wall_height
+    }
+
+def _foundation(spec: HouseSpec, ctx: Dict[str, Any], prices: Optional[Dict]) -> np.ndarray:
+    g = ctx["geometry"]
+    return BatchCalculators.foundation(g["length"], g["width"], spec.foundation_depth, spec.foundation_type, prices)
+
+def _walls(spec: HouseSpec, ctx: Dict[str, Any], prices: Optional[Dict]) -> np.ndarray:
+    g = ctx["geometry"]
+    return BatchCalculators.walls(g["perimeter"], g["wall_height"], spec.wall_thickness, spec.wall_material, prices)
+
+def _roof(spec: HouseSpec, ctx: Dict[str, Any], prices: Optional[Dict]) -> np.ndarray:
+    g = ctx["geometry"]
+    return BatchCalculators.roof(g["length"], g["width"], spec.roof_angle, spec.roof_material, prices)
+
+def _heat_loss(spec: HouseSpec, ctx: Dict[str, Any], prices: Optional[Dict]) -> np.ndarray:
+    g = ctx["geometry"]
+    return BatchCalculators.heat_loss(g["total_area"], g["floors"], spec.region, spec.insulation, prices,
+                                      spec.floor_height)
+
+def _electric(spec: HouseSpec, ctx: Dict[str, Any], prices: Optional[Dict]) -> np.ndarray:
+    g = ctx["geometry"]
+    power = g["total_area"] * POWER_PER_M2 if spec.power is None else np.asarray(spec.power, dtype=float)
+    three_phase = power > THREE_PHASE_FROM
+    return BatchCalculators.electric(power, np.where(three_phase, 380, 220), np.where(three_phase, 3, 1), prices)
+
+def _water(spec: HouseSpec, ctx: Dict[str, Any], prices: Optional[Dict]) -> np.ndarray:
+    return BatchCalculators.water_supply(spec.people, spec.daily_water, prices)
+
+def _concrete(spec: HouseSpec, ctx: Dict[str, Any], prices: Optional[Dict]) -> np.ndarray:
+    # Состав замеса на объем бетона фундамента
+    return BatchCalculators.concrete(ctx["foundation"]["concrete"], spec.concrete_grade, "", prices)
+
+# Граф расчета: шаг -> (зависимости, функция)
+STEPS: Dict[str, Tuple[Tuple[str, ...], Callable]] = {
+    "geometry": ((), _geometry),
+    "foundation": (("geometry",), _foundation),
+    "walls": (("geometry",), _walls),
+    "roof": (("geometry",), _roof),
+    "heat_loss": (("geometry",), _heat_loss),
+    "electric": (("geometry",), _electric),
+    "water": ((), _water),
+    "concrete": (("foundation",), _concrete),
+}
+
+# Порядок выполнения вычисляется один раз при импорте
+PIPELINE_ORDER = tuple(TopologicalSorter({name: deps for name, (deps, _) in STEPS.items()}).static_order())
+
+# Разделы сметы: шаг, название, поле стоимости. Бетон фундамента уже посчитан
+# как товарный в разделе "Фундамент", состав замеса идет только в ведомость.
+COST_SECTIONS = (
+    ("foundation", "Фундамент", "total_cost"),
+    ("walls", "Стены", "total_cost"),
+    ("roof", "Кровля", "total_cost"),
+    ("heat_loss", "Утепление", "insulation_cost"),
+    ("electric", "Электрика", "total_cost"),
+    ("water", "Водоснабжение и канализация", "total_cost"),
+)
+
+# Ведомость объемов: шаг -> (поле, наименование, единица, формат)
+BILL_ITEMS = {
+    "foundation": (
+        ("concrete", "Бетон М300 (фундамент)", "м³", ".1f"),
+        ("rebar", "Арматура фундамента", "кг", ".0f"),
+        ("formwork", "Опалубка", "м²", ".1f"),
+        ("insulation", "Утеплитель под плиту", "м²", ".1f"),
+    ),
+    "walls": (
+        ("blocks", "Газоблок D500 600×300×200", "шт", ".0f"),
+        ("bricks", "Кирпич М150", "шт", ".0f"),
+        ("beams", "Брус 150×150×6000", "шт", ".0f"),
+        ("glue", "Клей для газобетона", "кг", ".0f"),
+        ("mortar", "Раствор М100", "м³", ".1f"),
+        ("rebar", "Арматура Ø8 (стены)", "м", ".0f"),
+        ("insulation", "Утеплитель стен", "м²", ".0f"),
+        ("windproof", "Ветрозащита", "м²", ".0f"),
+    ),
+    "roof": (
+        ("roofing", "Кровельное покрытие", "м²", ".1f"),
+        ("waterproofing", "Гидроизоляция", "м²", ".1f"),
+        ("osb", "ОСП-3 9мм", "м²", ".1f"),
+        ("insulation", "Утеплитель кровли", "м²", ".1f"),
+        ("battens", "Обрешетка", "м²", ".1f"),
+    ),
+    "concrete": (
+        ("cement", "Цемент М500 (при замесе на месте)", "кг", ".0f"),
+        ("sand", "Песок", "кг", ".0f"),
+        ("gravel", "Щебень 20-40", "кг", ".0f"),
+    ),
+    "water": (
+        ("septic_volume", "Септик", "м³", ".1f"),
+        ("boiler_volume", "Водонагреватель", "л", ".0f"),
+    ),
+}
+
+class HouseEstimate:
+    """Результат сметы: результаты шагов, разделы стоимости и итог"""
+
+    __slots__ = ("spec", "steps", "section_costs", "total_cost", "shape")
+
+    def __init__(self, spec: HouseSpec, steps: Dict[str, Any]):
+        self.spec = spec
+        self.steps = steps
+        self.section_costs = {title: steps[step][field] for step, title, field in COST_SECTIONS}
+        self.total_cost = sum(self.section_costs.values())
+        self.shape = np.shape(self.total_cost)
+
+    @property
+    def geometry(self) -> Dict[str, np.ndarray]:
+        return self.steps["geometry"]
+
+    def _at(self, value: np.ndarray, index: Tuple) -> Any:
+        """Значение варианта index с учетом broadcasting (часть шагов может быть скалярной)"""
+        return np.broadcast_to(value, self.shape)[index]
+
+    def bill(self, index: Tuple = ()) -> List[Tuple[str, float, str, str]]:
+        """Ведомость объемов одного варианта: (наименование, количество, единица, формат)"""
+        lines = []
+        for step, items in BILL_ITEMS.items():
+            row = self._at(self.steps[step], index)
+            for field, title, unit, fmt in items:
+                amount = float(row[field])
+                if amount > 0:
+                    lines.append((title, amount, unit, fmt))
+        return lines
+
+    def to_dict(self, index: Tuple = ()) -> Dict[str, Any]:
+        """Один вариант сметы числами (для проектов и экспорта)"""
+        geometry = {key: float(self._at(value, index)) for key, value in self.geometry.items()}
+        total = float(self._at(self.total_cost, index))
+        heat = self._at(self.steps["heat_loss"], index)
+        return {
+            "geometry": geometry,
+            "sections": {title: float(self._at(cost, index)) for title, cost in self.section_costs.items()},
+            "bill": [{"name": title, "quantity": amount, "unit": unit}
+                     for title, amount, unit, _ in self.bill(index)],
+            "heat_loss_kw": float(heat["heat_loss"]),
+            "boiler_power_kw": float(heat["boiler_power"]),
+            "total_cost": total,
+            "cost_per_m2": total / geometry["total_area"]
+        }
+
+    def to_calc_result(self) -> CalcResult:
+        """Смета одного дома в формате калькуляторов для чата"""
+        g = {key: float(value) for key, value in self.geometry.items()}
+        spec = self.spec
+        heat = to_scalars(self.steps["heat_loss"])
+        electric = to_scalars(self.steps["electric"])
+        total = float(self.total_cost)
+
+        cost = {title: money(float(value)) for title, value in self.section_costs.items()}
+        cost["Итого"] = money(total)
+
+        return CalcResult(
+            type=f"Смета дома {g['length']:g}×{g['width']:g} м, этажей: {g['floors']:g}",
+            parameters={
+                "Периметр": Value(g["perimeter"], "м", ".1f"),
+                "Площадь застройки": Value(g["footprint"], "м²", ".1f"),
+                "Общая площадь": Value(g["total_area"], "м²", ".1f"),
+                "Площадь стен": Value(g["wall_area"], "м²", ".1f"),
+                "Стены": f"{spec.wall_material}, {float(spec.wall_thickness):g} м",
+                "Фундамент": f"{spec.foundation_type}, {float(spec.foundation_depth):g} м",
+                "Кровля": f"{spec.roof_material}, {float(spec.roof_angle):g}°",
+                "Регион": str(spec.region).capitalize()
+            },
+            materials={title: Value(amount, unit, fmt) for title, amount, unit, fmt in self.bill()},
+            cost=cost,
+            results={
+                "Теплопотери": Value(heat["heat_loss"], "кВт", ".1f"),
+                "Мощность котла": Value(heat["boiler_power"], "кВт", ".1f"),
+                "Ввод электричества": f"{electric['current']:.1f} А, кабель {electric['cores']:.0f}×{electric['cable_section']:g} мм², "
+                                      f"автомат {electric['breaker']:.0f}А",
+                "Цена за м²": money(total / g["total_area"], "руб/м²")
+            },
+            recommendations=[
+                f"Котел {math.ceil(heat['boiler_power'])} кВт с запасом 20%",
+                "Бетон для фундамента выгоднее заказывать товарный, состав замеса приведен для справки",
+                "Смета ориентировочная: уточните цены у поставщиков вашего региона"
+            ]
+        )
+
+def estimate_house(spec: HouseSpec, prices: Optional[Dict[str, Any]] = None) -> HouseEstimate:
+    """
+    Смета дома по графу шагов
+
+    prices - цены вместо прайс-листа; значения могут быть массивами
+    одной формы с параметрами (Монте-Карло). По умолчанию - цены
+    прайс-листа для региона дома.
+    """
+    if prices is None:
+        prices = price_book.regional(spec.region)
+    steps: Dict[str, Any] = {}
+    for name in PIPELINE_ORDER:
+        steps[name] = STEPS[name][1](spec, steps, prices)
+    return HouseEstimate(spec, steps)
+
+def parse_house_command(params: List[str]) -> HouseSpec:
+    """
+    Разбор команды "дом"
+
+    Формат: длина ширина [этажи] [материал стен] [кровля] [фундамент] [регион] [утепление]
+    Необязательные слова распознаются по значению и могут идти в любом порядке.
+    Ошибки - ValueError с понятным текстом.
+    """
+    if len(params) < 2:
+        raise ValueError("Недостаточно параметров. Формат: длина ширина [этажи] [материал] [регион]")
+
+    try:
+        length = float(params[0])
+        width = float(params[1])
+    except ValueError:
+        raise ValueError("Некорректные числовые значения")
+    if length <= 0 or width <= 0:
+        raise ValueError("Размеры дома должны быть больше нуля")
+
+    options: Dict[str, Any] = {}
+    insulation_levels = ("нет", "слабое", "среднее", "хорошее", "отличное")
+
+    for token in params[2:]:
+        word = token.lower()
+        if word.isdigit():
+            options["floors"] = int(word)
+        elif word in WALL_MATERIALS:
+            options["wall_material"] = word
+        elif word in ROOF_MATERIALS:
+            options["roof_material"] = word
+        elif word in FOUNDATION_TYPES:
+            options["foundation_type"] = word
+        elif word in insulation_levels:
+            options["insulation"] = word
+        elif word in price_book.delta_t():
+            options["region"] = word
+        else:
+            raise ValueError(f"Непонятный параметр: {token}")
+
+    if not 1 <= options.get("floors", 1) <= 5:
+        raise ValueError("Количество этажей: от 1 до 5")
+
+    return HouseSpec(length, width, **options)
@@ -0,0 +1,273 @@
+"""
+ГЕОМЕТРИЯ v12.0
+Реестр фигур с объявленными параметрами и векторные формулы площади,
+периметра и объема: массив размеров считается одним вызовом.
+Многоугольники (формула шнурования) упаковываются в общие массивы -
+план из сотен помещений считается без цикла по фигурам
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+import numpy as np
+
+# ==================== ФОРМУЛЫ ====================
+
+def rectangle_area(length, width):
+    return np.multiply(length, width)
+
+def rectangle_perimeter(length, width):
+    return (np.add(length, width)) * 2
+
+def triangle_area(base, height):
+    return np.multiply(base, height) / 2
+
+def circle_area(radius):
+    return np.pi * np.square(radius)
+
+def circle_length(radius):
+    return 2 * np.pi * np.asarray(radius)
+
+def box_volume(length, width, height):
+    return np.multiply(np.multiply(length, width), height)
+
+def box_surface(length, width, height):
+    a, b, c = np.asarray(length), np.asarray(width), np.asarray(height)
+    return 2 * (a * b + a * c + b * c)
+
+def cylinder_volume(radius, height):
+    return np.pi * np.square(radius) * np.asarray(height)
+
+def cylinder_surface(radius, height):
+    r = np.asarray(radius)
+    return 2 * np.pi * r * (r + np.asarray(height))
+
+def signed_area(points: np.ndarray) -> float:
+    """Площадь многоугольника со знаком: > 0 при обходе против часовой стрелки"""
+    x, y = points[:, 0], points[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+class PolygonSet(NamedTuple):
+    """Площади и периметры многоугольников, посчитанные одним проходом"""
+    area: np.ndarray        # м², без знака
+    perimeter: np.ndarray   # м
+    signed: np.ndarray      # со знаком: < 0 - обход по часовой стрелке
+
+    @property
+    def total_area(self) -> float:
+        return float(self.area.sum())
+
+def polygons(shapes: Sequence[np.ndarray]) -> PolygonSet:
+    """
+    Площади и периметры списка многоугольников (массивы вершин N×2,
+    у вершин N×3 берутся x и y)
+
+    Вершины всех фигур склеиваются в один массив, следующая вершина для
+    замыкания берется сдвигом внутри своей фигуры; суммы по фигурам -
+    np.add.reduceat. Фигура с меньше чем 3 вершинами - ValueError.
+    """
+    if not len(shapes):
+        empty = np.zeros(0)
+        return PolygonSet(empty, empty, empty)
+    counts = np.array([len(points) for points in shapes], dtype=np.intp)
+    if np.any(counts < 3):
+        raise ValueError("У многоугольника должно быть не меньше 3 вершин")
+    points = np.concatenate([np.asarray(points, dtype=float)[:, :2] for points in shapes])
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    # Индекс следующей вершины: i + 1, а для последней вершины фигуры - ее первая
+    following = np.arange(len(points)) + 1
+    following[starts + counts - 1] = starts
+    x, y = points[:, 0], points[:, 1]
+    cross = x * y[following] - y * x[following]
+    edges = np.hypot(x[following] - x, y[following] - y)
+
+    signed = np.add.reduceat(cross, starts) / 2
+    return PolygonSet(np.abs(signed), np.add.reduceat(edges, starts), signed)
+
+def polygon_area(points) -> float:
+    return float(polygons([np.asarray(points, dtype=float)]).area[0])
+
+# ==================== ФИГУРЫ ====================
+
+class Metric(NamedTuple):
+    """Строка результата: название, показатель фигуры, единица, формат"""
+    label: str
+    name: str
+    unit: str
+    fmt: str = ""
+
+class Shape:
+    """
+    Фигура калькулятора площади и объема
+
+    params - (название, подпись) размеров по порядку; metrics - строки
+    результата; формулы - векторные функции от массивов размеров.
+    Подклассы регистрируются декоратором register.
+    """
+
+    name = ""
+    title = ""
+    aliases: Tuple[str, ...] = ()
+    params: Tuple[Tuple[str, str], ...] = ()
+    metrics: Tuple[Metric, ...] = ()
+    formula = ""
+    missing = ""            # сообщение, если размеров не хватает
+    variadic = False        # размеры - произвольный список (многоугольник)
+
+    @classmethod
+    def evaluate(cls, *values) -> Dict[str, np.ndarray]:
+        """Показатели фигуры для массивов размеров"""
+        raise NotImplementedError
+
+    @classmethod
+    def validate(cls, values: Sequence[float]) -> Optional[str]:
+        """Сообщение об ошибке или None; по умолчанию - все размеры положительные"""
+        if any(value <= 0 for value in values):
+            return "Размеры должны быть положительными"
+        return None
+
+    @classmethod
+    def parameters(cls, values: Sequence[float]) -> List[Tuple[str, float]]:
+        return [(label, value) for (_, label), value in zip(cls.params, values)]
+
+SHAPES: Dict[str, Type[Shape]] = {}
+
+def register(shape: Type[Shape]) -> Type[Shape]:
+    for name in (shape.name,) + shape.aliases:
+        SHAPES[name] = shape
+    return shape
+
+def shape_names() -> List[str]:
+    """Основные имена зарегистрированных фигур в порядке регистрации"""
+    return list(dict.fromkeys(shape.name for shape in SHAPES.values()))
+
+@register
+class Rectangle(Shape):
+    name = "прямоугольник"
+    title = "Прямоугольник"
+    params = (("length", "Длина"), ("width", "Ширина"))
+    metrics = (Metric("Площадь", "area", "м²"), Metric("Периметр", "perimeter", "м"))
+    formula = "S = a × b, P = (a + b) × 2"
+    missing = "Для прямоугольника нужны длина и ширина"
+
+    @classmethod
+    def evaluate(cls, length, width):
+        return {"area": rectangle_area(length, width), "perimeter": rectangle_perimeter(length, width)}
+
+@register
+class Triangle(Shape):
+    name = "треугольник"
+    title = "Треугольник"
+    params = (("base", "Основание"), ("height", "Высота"))
+    metrics = (Metric("Площадь", "area", "м²"),)
+    formula = "S = (a × h) / 2"
+    missing = "Для треугольника нужны основание и высота"
+
+    @classmethod
+    def evaluate(cls, base, height):
+        return {"area": triangle_area(base, height)}
+
+@register
+class Circle(Shape):
+    name = "круг"
+    title = "Круг"
+    params = (("radius", "Радиус"),)
+    metrics = (Metric("Площадь", "area", "м²", ".2f"), Metric("Длина окружности", "perimeter", "м", ".2f"))
+    formula = "S = π × r², C = 2 × π × r"
+    missing = "Для круга нужен радиус"
+
+    @classmethod
+    def evaluate(cls, radius):
+        return {"area": circle_area(radius), "perimeter": circle_length(radius)}
+
+@register
+class Box(Shape):
+    name = "параллелепипед"
+    title = "Параллелепипед (прямоугольный)"
+    params = (("length", "Длина"), ("width", "Ширина"), ("height", "Высота"))
+    metrics = (Metric("Объем", "volume", "м³"), Metric("Площадь поверхности", "surface", "м²"))
+    formula = "V = a × b × c, S = 2 × (ab + ac + bc)"
+    missing = "Для параллелепипеда нужны длина, ширина и высота"
+
+    @classmethod
+    def evaluate(cls, length, width, height):
+        return {"volume": box_volume(length, width, height), "surface": box_surface(length, width, height)}
+
+@register
+class Cylinder(Shape):
+    name = "цилиндр"
+    title = "Цилиндр"
+    params = (("radius", "Радиус"), ("height", "Высота"))
+    metrics = (Metric("Объем", "volume", "м³", ".2f"), Metric("Площадь поверхности", "surface", "м²", ".2f"))
+    formula = "V = π × r² × h, S = 2 × π × r × (r + h)"
+    missing = "Для цилиндра нужны радиус и высота"
+
+    @classmethod
+    def evaluate(cls, radius, height):
+        return {"volume": cylinder_volume(radius, height), "surface": cylinder_surface(radius, height)}
+
+@register
+class LShape(Shape):
+    """Г-образный план: прямоугольник без вырезанного угла"""
+    name = "г-образный"
+    title = "Г-образный план"
+    aliases = ("г-образная", "угловой")
+    params = (("length", "Длина"), ("width", "Ширина"), ("cut_length", "Вырез по длине"),
+              ("cut_width", "Вырез по ширине"))
+    metrics = (Metric("Площадь", "area", "м²", ".2f"), Metric("Периметр", "perimeter", "м", ".2f"))
+    formula = "S = a × b - c × d, P = (a + b) × 2"
+    missing = "Для г-образного плана нужны длина, ширина и размеры выреза"
+
+    @classmethod
+    def evaluate(cls, length, width, cut_length, cut_width):
+        # Вырезанный угол не меняет периметр: стороны выреза заменяют отрезанные
+        return {
+            "area": rectangle_area(length, width) - rectangle_area(cut_length, cut_width),
+            "perimeter": rectangle_perimeter(length, width)
+        }
+
+    @classmethod
+    def validate(cls, values):
+        error = super().validate(values)
+        if error is None and (values[2] >= values[0] or values[3] >= values[1]):
+            error = "Вырез должен быть меньше длины и ширины"
+        return error
+
+@register
+class Polygon(Shape):
+    """Многоугольник по координатам вершин x1 y1 x2 y2 ... (формула шнурования)"""
+    name = "многоугольник"
+    title = "Многоугольник"
+    aliases = ("контур",)
+    metrics = (Metric("Площадь", "area", "м²", ".2f"), Metric("Периметр", "perimeter", "м", ".2f"),
+               Metric("Вершин", "vertices", "", ".0f"))
+    formula = "S = |Σ (xᵢ × yᵢ₊₁ - xᵢ₊₁ × yᵢ)| / 2"
+    missing = "Для многоугольника нужны координаты хотя бы 3 вершин: x1 y1 x2 y2 x3 y3"
+    variadic = True
+
+    @classmethod
+    def evaluate(cls, *coordinates):
+        measured = polygons([np.asarray(coordinates, dtype=float).reshape(-1, 2)])
+        return {"area": measured.area[0], "perimeter": measured.perimeter[0], "vertices": len(coordinates) // 2}
+
+    @classmethod
+    def validate(cls, values):
+        if len(values) < 6 or len(values) % 2:
+            return "Координаты вершин задаются парами x y, нужно не меньше 3 вершин"
+        if polygons([np.asarray(values, dtype=float).reshape(-1, 2)]).area[0] <= 0:
+            return "Вершины лежат на одной прямой: площадь равна нулю"
+        return None
+
+    @classmethod
+    def parameters(cls, values):
+        vertices = np.asarray(values, dtype=float).reshape(-1, 2)
+        return [("Вершины", " → ".join(f"({x:g}; {y:g})" for x, y in vertices))]
+
+def measure(shape: str, *values) -> Dict[str, np.ndarray]:
+    """Показатели фигуры по имени; размеры - числа или массивы одной формы"""
+    if shape not in SHAPES:
+        raise ValueError(f"Неизвестная фигура: {shape}. Доступно: {', '.join(shape_names())}")
+    cls = SHAPES[shape]
+    if not cls.variadic and len(values) != len(cls.params):
+        raise ValueError(cls.missing)
+    return cls.evaluate(*values)
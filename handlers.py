@@ -11,24 +11,53 @@ from typing import Optional
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ContextTypes, CallbackContext
 
-from config import TOKEN, ADMIN_ID
+from config import (TOKEN, ADMIN_ID, SESSION_MAX_USERS, SESSION_TTL,
+                    SESSION_MAX_BYTES, SESSION_DB_PATH, SESSION_FLUSH_INTERVAL,
+                    DOCUMENT_FORMAT)
 from database import HybridDatabase
 from keyboards import Keyboards
-from calculators import ConstructionCalculators
+from keyboards import CALCULATORS, ConstructionCalculators
+from calc_results import CalcResult
+from result_documents import DocumentError, document_cache, needs_document, summary
 from materials import MaterialsManager
 from projects import ProjectsManager
+from sessions import SessionStore
+from metrics import metrics
+from monte_carlo import price_spreads
 
 logger = logging.getLogger(__name__)
 
+# Создание проекта по шагам: состояние сценария -> вопрос пользователю
+PROJECT_TYPES = ("дом", "дача", "баня", "гараж", "ремонт")
+PROJECT_PROMPTS = {
+    "project_name": "📋 *Новый проект*\n\nШаг 1 из 4. Введите название проекта:",
+    "project_type": f"Шаг 2 из 4. Тип проекта: {', '.join(PROJECT_TYPES)}",
+    "project_area": "Шаг 3 из 4. Площадь, м²:",
+    "project_budget": "Шаг 4 из 4. Бюджет, руб:"
+}
+
 class BotHandlers:
     """Класс обработчиков команд бота"""
     
     def __init__(self):
-        self.db = HybridDatabase()
+        self.db = metrics.timed(HybridDatabase(), "db")  # время запросов к БД в метриках
         self.calculators = ConstructionCalculators()
         self.materials = MaterialsManager(self.db)
         self.projects = ProjectsManager(self.db)
-        self.user_states = {}  # Для хранения состояний пользователей
+        # Диапазоны цен для разброса сметы - из справочника материалов
+        try:
+            loaded = price_spreads.load_from_materials(self.materials)
+            logger.info(f"Диапазоны цен для разброса сметы: {loaded} из справочника")
+        except Exception as e:
+            logger.warning(f"Диапазоны цен не загружены, используются стандартные: {e}")
+        # Состояния пользователей: ограничены по числу, памяти и времени простоя
+        self.user_states = SessionStore(
+            max_sessions=SESSION_MAX_USERS,
+            ttl=SESSION_TTL,
+            max_bytes=SESSION_MAX_BYTES,
+            persist_path=str(SESSION_DB_PATH) if SESSION_DB_PATH else None,
+            flush_interval=SESSION_FLUSH_INTERVAL
+        )
     
     # ==================== ОСНОВНЫЕ КОМАНДЫ ====================
     
@@ -115,6 +144,8 @@ class BotHandlers:
 /history - История запросов
 /favorites - Избранное
 /projects - Мои проекты
+/newproject - Новый проект
+/cancel - Отменить начатое действие
 
 *Дополнительно:*
 /tip - Совет дня
@@ -190,9 +221,8 @@ class BotHandlers:
         if any(word in query.lower() for word in ['посчитай', 'рассчитай', 'расчет', 'сколько нужно', 'как рассчитать']):
             calc_type, params, result = ConstructionCalculators.parse_calc_command(query)
             
-            if "error" not in result:
-                formatted_result = ConstructionCalculators.format_result(calc_type, result)
-                await update.message.reply_text(formatted_result, parse_mode='Markdown')
+            if result.success:
+                await self.send_calc_result(update, calc_type, result)
                 return
         
         # Ищем в базе знаний
@@ -200,6 +230,7 @@ class BotHandlers:
         exact_answer = self.db.get_answer_by_hash(question_hash)
         
         response_time = time.time() - start_time
+        metrics.observe("search_lookup_seconds", response_time, found=bool(exact_answer))
         
         if exact_answer:
             # Найден точный ответ
@@ -309,15 +340,14 @@ class BotHandlers:
             query = ' '.join(context.args)
             calc_type, params, result = ConstructionCalculators.parse_calc_command(query)
             
-            if "error" in result:
+            if not result.success:
                 await update.message.reply_text(
-                    f"❌ *Ошибка:* {result['error']}\n\n"
+                    f"❌ *Ошибка:* {result.error}\n\n"
                     f"Используйте /calculate для выбора калькулятора",
                     parse_mode='Markdown'
                 )
             else:
-                formatted_result = ConstructionCalculators.format_result(calc_type, result)
-                await update.message.reply_text(formatted_result, parse_mode='Markdown')
+                await self.send_calc_result(update, calc_type, result)
         else:
             # Показать меню калькуляторов
             await update.message.reply_text(
@@ -330,6 +360,28 @@ class BotHandlers:
         """Обработчик команды /calc (короткая версия)"""
         await self.calculate(update, context)
     
+    async def send_calc_result(self, update: Update, calc_type: str, result: CalcResult) -> None:
+        """
+        Результат расчета в чат: целиком, если помещается в сообщение,
+        иначе краткий итог и файл с полной разбивкой
+        """
+        formatted_result = ConstructionCalculators.format_result(calc_type, result)
+        if not result.success or not needs_document(formatted_result):
+            await update.message.reply_text(formatted_result, parse_mode='Markdown')
+            return
+        
+        await update.message.reply_text(summary(calc_type, result), parse_mode='Markdown')
+        try:
+            document = await document_cache.build(calc_type, result, DOCUMENT_FORMAT)
+        except DocumentError as e:
+            logger.warning(f"Документ {DOCUMENT_FORMAT} не построен, отправляется HTML: {e}")
+            document = await document_cache.build(calc_type, result, "html")
+        await update.message.reply_document(
+            document=document.data,
+            filename=document.filename,
+            caption="📎 Полный расчет"
+        )
+    
     # ==================== МАТЕРИАЛЫ ====================
     
     async def materials(self, update: Update, context: CallbackContext) -> None:
@@ -684,6 +736,9 @@ class BotHandlers:
 *Размер базы:* ~{(stats.get('qa_pairs', 0) + stats.get('materials', 0)) // 1000}K записей
 *Последнее обновление:* {datetime.now().strftime('%d.%m.%Y %H:%M')}
 
+*Производительность обработчиков:*
+{metrics.summary()}
+
 Выберите действие:
 """
         
@@ -713,6 +768,101 @@ class BotHandlers:
             logger.error(f"Ошибка резервного копирования: {e}")
             await update.message.reply_text(f"❌ Ошибка создания резервной копии: {e}")
     
+    # ==================== МНОГОШАГОВЫЕ СЦЕНАРИИ ====================
+    
+    async def new_project(self, update: Update, context: CallbackContext) -> None:
+        """Обработчик команды /newproject: создание проекта по шагам"""
+        self.user_states.set(update.effective_user.id, "project_name")
+        await update.message.reply_text(
+            PROJECT_PROMPTS["project_name"] + "\n\n/cancel - отмена",
+            parse_mode='Markdown'
+        )
+    
+    async def cancel(self, update: Update, context: CallbackContext) -> None:
+        """Обработчик команды /cancel: прервать начатый сценарий"""
+        if self.user_states.clear(update.effective_user.id):
+            text = "✖️ Действие отменено"
+        else:
+            text = "Нет начатых действий"
+        await update.message.reply_text(text, reply_markup=Keyboards.back_to_menu())
+    
+    async def continue_flow(self, update: Update, session) -> bool:
+        """
+        Следующий шаг сценария: сообщение - ответ на вопрос бота
+        
+        Состояние хранится в user_states, поэтому после перезапуска бота
+        сценарий продолжается с того же шага. False - сообщение не относится
+        к сценарию и обрабатывается как обычно.
+        """
+        user_id = update.effective_user.id
+        text = update.message.text.strip()
+        data = session.data
+        
+        if session.state == "calc":
+            calc_type, params, result = ConstructionCalculators.parse_calc_command(f"{data['calc_type']} {text}")
+            if result.success:
+                self.user_states.clear(user_id)
+                await self.send_calc_result(update, calc_type, result)
+            else:
+                await update.message.reply_text(
+                    f"❌ *Ошибка:* {result.error}\n\nИсправьте параметры или отправьте /cancel",
+                    parse_mode='Markdown'
+                )
+            return True
+        
+        if session.state == "project_name":
+            next_state, data = "project_type", {"name": text[:100]}
+        
+        elif session.state == "project_type":
+            if text.lower() not in PROJECT_TYPES:
+                await update.message.reply_text(f"❌ Тип проекта: {', '.join(PROJECT_TYPES)}")
+                return True
+            next_state, data = "project_area", dict(data, type=text.lower())
+        
+        elif session.state == "project_area":
+            area = self._parse_number(text)
+            if area is None or area <= 0:
+                await update.message.reply_text("❌ Площадь - положительное число, например 120")
+                return True
+            next_state, data = "project_budget", dict(data, area=area)
+        
+        elif session.state == "project_budget":
+            budget = self._parse_number(text)
+            if budget is None or budget < 0:
+                await update.message.reply_text("❌ Бюджет - число в рублях, например 3 500 000")
+                return True
+            project = self.projects.create_project_with_steps(
+                user_id, data["name"], data["type"], data["area"], budget
+            )
+            self.user_states.clear(user_id)
+            await update.message.reply_text(
+                f"✅ *Проект создан: {project['name']}*\n\n"
+                f"Тип: {project['type']}\n"
+                f"Площадь: {project['area']:g} м²\n"
+                f"Бюджет: {project['budget']:,.0f} руб\n"
+                f"Этапов: {len(project['stages'])}",
+                reply_markup=Keyboards.projects_menu(),
+                parse_mode='Markdown'
+            )
+            return True
+        
+        else:
+            # Состояние, которое текущая версия бота не знает
+            self.user_states.clear(user_id)
+            return False
+        
+        self.user_states.set(user_id, next_state, data)
+        await update.message.reply_text(PROJECT_PROMPTS[next_state], parse_mode='Markdown')
+        return True
+    
+    @staticmethod
+    def _parse_number(text: str) -> Optional[float]:
+        """Число из ответа пользователя: допускаются пробелы между разрядами и запятая"""
+        try:
+            return float(text.replace(" ", "").replace(",", "."))
+        except ValueError:
+            return None
+    
     # ==================== ОБРАБОТЧИК ВСЕХ СООБЩЕНИЙ ====================
     
     async def handle_message(self, update: Update, context: CallbackContext) -> None:
@@ -728,13 +878,17 @@ class BotHandlers:
         # Обновляем активность пользователя
         self.db.update_user_activity(user_id)
         
+        # Ответ на шаг начатого сценария (проект, калькулятор)
+        session = self.user_states.get(user_id)
+        if session and await self.continue_flow(update, session):
+            return
+        
         # Проверяем, не является ли сообщение командой к калькулятору
         if any(word in message_text.lower() for word in ['посчитай', 'рассчитай', 'расчет', 'сколько нужно', 'как рассчитать']):
             calc_type, params, result = ConstructionCalculators.parse_calc_command(message_text)
             
-            if "error" not in result:
-                formatted_result = ConstructionCalculators.format_result(calc_type, result)
-                await update.message.reply_text(formatted_result, parse_mode='Markdown')
+            if result.success:
+                await self.send_calc_result(update, calc_type, result)
                 return
         
         # Проверяем, не является ли сообщение запросом материала
@@ -800,6 +954,10 @@ class BotHandlers:
                     await query.edit_message_text(help_text, parse_mode='Markdown')
                 else:
                     help_text = ConstructionCalculators.get_calc_help(calc_type)
+                    if calc_type in CALCULATORS:
+                        # Параметры придут следующим сообщением
+                        self.user_states.set(query.from_user.id, "calc", {"calc_type": calc_type})
+                        help_text += "\n\nОтправьте параметры следующим сообщением, /cancel - отмена"
                     await query.edit_message_text(help_text, parse_mode='Markdown')
             
             # Материалы
@@ -869,6 +1027,13 @@ class BotHandlers:
             elif data == "projects_main":
                 await self.projects(query, context)
             
+            elif data == "project_new":
+                self.user_states.set(query.from_user.id, "project_name")
+                await query.edit_message_text(
+                    PROJECT_PROMPTS["project_name"] + "\n\n/cancel - отмена",
+                    parse_mode='Markdown'
+                )
+            
             # Статистика
             elif data == "stats_main" or data == "stats_refresh":
                 await self.stats(query, context)
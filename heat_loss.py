@@ -0,0 +1,316 @@
+"""
+ТЕПЛОПОТЕРИ ПО ПОМЕЩЕНИЯМ v12.0
+Модель здания из помещений и ограждающих конструкций: потери через
+ограждения и на вентиляцию считаются одним векторным проходом по всем
+элементам и суммируются по помещениям, этажам и зданиям
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import DEFAULT_DELTA_T
+from price_book import price_book
+
+# Теплоемкость воздуха, Вт·ч/(м³·К)
+AIR_HEAT_CAPACITY = 0.34
+# Расчетная температура внутри, °C (ΔT регионов задана от нее)
+INDOOR_TEMPERATURE = 20.0
+# Запас мощности котла
+BOILER_RESERVE = 1.2
+
+ELEMENT_KINDS = ("стена", "окно", "дверь", "крыша", "пол")
+
+# Доля ΔT, которая приходится на элемент, по тому, что за ним
+ADJACENT_FACTORS = {
+    "улица": 1.0,
+    "грунт": 0.6,
+    "неотапливаемое": 0.5,
+    "отапливаемое": 0.0
+}
+
+# Коэффициент теплопередачи U типовых конструкций, Вт/(м²·К)
+MATERIAL_U = {
+    "газобетон": 0.35,           # D500, 400 мм
+    "кирпич": 1.1,               # 510 мм без утепления
+    "кирпич утепленный": 0.3,    # 380 мм + 100 мм минваты
+    "брус": 0.55,                # 150 мм
+    "каркас": 0.22,              # 200 мм минваты
+    "сэндвич": 0.3,              # панель 150 мм
+    "однокамерный": 2.8,         # стеклопакет
+    "двухкамерный": 1.4,
+    "энергосберегающий": 1.0,
+    "дверь": 1.8,                # металлическая утепленная
+    "кровля утепленная": 0.2,    # 200 мм минваты
+    "перекрытие": 0.3,           # чердачное, 150 мм утеплителя
+    "пол по грунту": 0.3,
+    "плита": 0.4                 # утепленная плита фундамента
+}
+
+# U элементов по уровню утепления (для укрупненного расчета без модели)
+INSULATION_U = {
+    "нет": {"стена": 1.5, "окно": 2.8, "крыша": 1.2, "пол": 1.0},
+    "слабое": {"стена": 0.9, "окно": 2.0, "крыша": 0.7, "пол": 0.7},
+    "среднее": {"стена": 0.5, "окно": 1.4, "крыша": 0.35, "пол": 0.45},
+    "хорошее": {"стена": 0.3, "окно": 1.1, "крыша": 0.2, "пол": 0.3},
+    "отличное": {"стена": 0.18, "окно": 0.8, "крыша": 0.12, "пол": 0.2}
+}
+DEFAULT_INSULATION = "среднее"
+
+# Укрупненная модель: доля окон в площади стен и кратность воздухообмена
+WINDOW_SHARE = 0.15
+AIR_CHANGES = 0.5   # 1/ч
+
+@dataclass
+class Room:
+    name: str
+    floor: int = 1
+    area: float = 0.0              # м² пола
+    height: float = 2.7            # м
+    temperature: float = INDOOR_TEMPERATURE
+    air_changes: float = AIR_CHANGES
+
+@dataclass
+class Element:
+    """Ограждающая конструкция помещения; U задается явно или по материалу"""
+    room: str
+    kind: str
+    area: float
+    material: Optional[str] = None
+    u_value: Optional[float] = None
+    adjacent: str = "улица"
+
+    def resolved_u(self) -> float:
+        if self.u_value is not None:
+            return self.u_value
+        if self.material is None or self.material.lower() not in MATERIAL_U:
+            raise ValueError(
+                f"{self.kind} ({self.room}): укажите U или материал из: {', '.join(MATERIAL_U)}"
+            )
+        return MATERIAL_U[self.material.lower()]
+
+@dataclass
+class BuildingModel:
+    """Здание: помещения и их ограждения"""
+    name: str = ""
+    rooms: List[Room] = field(default_factory=list)
+    elements: List[Element] = field(default_factory=list)
+
+    def add_room(self, name: str, floor: int = 1, area: float = 0.0, **options) -> Room:
+        room = Room(name, floor, area, **options)
+        self.rooms.append(room)
+        return room
+
+    def add_element(self, room: str, kind: str, area: float, material: Optional[str] = None,
+                    u_value: Optional[float] = None, adjacent: str = "улица") -> Element:
+        element = Element(room, kind, area, material, u_value, adjacent)
+        self.elements.append(element)
+        return element
+
+class _Arrays:
+    """Модели в виде массивов: одна строка на помещение и на элемент"""
+
+    __slots__ = ("room_building", "room_floor", "room_volume", "room_temperature", "room_air_changes",
+                 "element_room", "element_area", "element_u", "element_factor", "element_kind")
+
+    def __init__(self, models: Sequence[BuildingModel]):
+        room_index: Dict[tuple, int] = {}
+        rooms = []
+        for b, model in enumerate(models):
+            for room in model.rooms:
+                if (b, room.name) in room_index:
+                    raise ValueError(f"Повторяется помещение: {room.name}")
+                room_index[(b, room.name)] = len(rooms)
+                rooms.append((b, room))
+
+        self.room_building = np.array([b for b, _ in rooms], dtype=np.intp)
+        self.room_floor = np.array([room.floor for _, room in rooms], dtype=np.intp)
+        self.room_volume = np.array([room.area * room.height for _, room in rooms], dtype=float)
+        self.room_temperature = np.array([room.temperature for _, room in rooms], dtype=float)
+        self.room_air_changes = np.array([room.air_changes for _, room in rooms], dtype=float)
+
+        element_room, area, u, factor, kind = [], [], [], [], []
+        for b, model in enumerate(models):
+            for element in model.elements:
+                if (b, element.room) not in room_index:
+                    raise ValueError(f"Нет помещения '{element.room}' для элемента {element.kind}")
+                if element.kind not in ELEMENT_KINDS:
+                    raise ValueError(f"Неизвестный элемент: {element.kind}. Доступно: {', '.join(ELEMENT_KINDS)}")
+                if element.adjacent not in ADJACENT_FACTORS:
+                    raise ValueError(f"Неизвестное окружение: {element.adjacent}. "
+                                     f"Доступно: {', '.join(ADJACENT_FACTORS)}")
+                element_room.append(room_index[(b, element.room)])
+                area.append(element.area)
+                u.append(element.resolved_u())
+                factor.append(ADJACENT_FACTORS[element.adjacent])
+                kind.append(ELEMENT_KINDS.index(element.kind))
+
+        self.element_room = np.array(element_room, dtype=np.intp)
+        self.element_area = np.array(area, dtype=float)
+        self.element_u = np.array(u, dtype=float)
+        self.element_factor = np.array(factor, dtype=float)
+        self.element_kind = np.array(kind, dtype=np.intp)
+
+class HeatLossResult:
+    """Потери здания, Вт: по элементам, помещениям и этажам"""
+
+    __slots__ = ("model", "outdoor_temperature", "element_loss", "element_kind", "room_transmission",
+                 "room_ventilation", "floors", "floor_loss")
+
+    def __init__(self, model: BuildingModel, outdoor_temperature: float,
+                 element_loss: np.ndarray, element_kind: np.ndarray,
+                 room_transmission: np.ndarray, room_ventilation: np.ndarray,
+                 floors: np.ndarray, floor_loss: np.ndarray):
+        self.model = model
+        self.outdoor_temperature = outdoor_temperature
+        self.element_loss = element_loss
+        self.element_kind = element_kind
+        self.room_transmission = room_transmission
+        self.room_ventilation = room_ventilation
+        self.floors = floors
+        self.floor_loss = floor_loss
+
+    @property
+    def room_loss(self) -> np.ndarray:
+        return self.room_transmission + self.room_ventilation
+
+    @property
+    def transmission(self) -> float:
+        return float(self.room_transmission.sum())
+
+    @property
+    def ventilation(self) -> float:
+        return float(self.room_ventilation.sum())
+
+    @property
+    def total(self) -> float:
+        return self.transmission + self.ventilation
+
+    @property
+    def boiler_power(self) -> float:
+        """Мощность котла с запасом, кВт"""
+        return self.total * BOILER_RESERVE / 1000
+
+    def by_kind(self) -> Dict[str, float]:
+        """Потери через стены, окна, крышу... (Вт)"""
+        totals = np.bincount(self.element_kind, weights=self.element_loss, minlength=len(ELEMENT_KINDS))
+        return {kind: float(value) for kind, value in zip(ELEMENT_KINDS, totals) if value}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "building": self.model.name,
+            "outdoor_temperature": self.outdoor_temperature,
+            "rooms": [
+                {
+                    "name": room.name,
+                    "floor": room.floor,
+                    "transmission_w": float(transmission),
+                    "ventilation_w": float(ventilation),
+                    "total_w": float(transmission + ventilation),
+                    "w_per_m2": float((transmission + ventilation) / room.area) if room.area else None
+                }
+                for room, transmission, ventilation in zip(
+                    self.model.rooms, self.room_transmission, self.room_ventilation
+                )
+            ],
+            "floors": {int(floor): float(loss) for floor, loss in zip(self.floors, self.floor_loss)},
+            "elements": self.by_kind(),
+            "transmission_w": self.transmission,
+            "ventilation_w": self.ventilation,
+            "total_w": self.total,
+            "boiler_power_kw": self.boiler_power
+        }
+
+def outdoor_temperature(region: Optional[str] = None) -> float:
+    """Расчетная температура снаружи по ΔT региона из прайс-листа"""
+    delta_t = price_book.delta_t().get((region or "").lower(), DEFAULT_DELTA_T)
+    return INDOOR_TEMPERATURE - delta_t
+
+def calculate_many(models: Sequence[BuildingModel], region: Optional[str] = None,
+                   outdoor: Optional[float] = None) -> List[HeatLossResult]:
+    """
+    Теплопотери нескольких зданий за один проход
+
+    Все помещения и элементы всех зданий сводятся в общие массивы,
+    суммы по помещениям, этажам и зданиям - np.bincount.
+    outdoor - температура снаружи, °C; по умолчанию - по региону.
+    """
+    t_out = outdoor_temperature(region) if outdoor is None else outdoor
+    arrays = _Arrays(models)
+
+    # Через ограждения: A × U × b × (t_in - t_out)
+    room_delta = arrays.room_temperature - t_out
+    element_loss = (arrays.element_area * arrays.element_u * arrays.element_factor
+                    * room_delta[arrays.element_room])
+    n_rooms = len(arrays.room_volume)
+    room_transmission = np.bincount(arrays.element_room, weights=element_loss, minlength=n_rooms)
+
+    # На нагрев приточного воздуха: 0.34 × n × V × (t_in - t_out)
+    room_ventilation = AIR_HEAT_CAPACITY * arrays.room_air_changes * arrays.room_volume * room_delta
+
+    # Этажи: пары (здание, этаж) нумеруются подряд
+    room_loss = room_transmission + room_ventilation
+    pairs, floor_index = np.unique(np.stack([arrays.room_building, arrays.room_floor]), axis=1,
+                                   return_inverse=True)
+    floor_loss = np.bincount(floor_index.ravel(), weights=room_loss, minlength=pairs.shape[1])
+
+    # Помещения, элементы и этажи каждого здания идут подряд
+    room_bounds = np.cumsum([0] + [len(model.rooms) for model in models])
+    element_bounds = np.cumsum([0] + [len(model.elements) for model in models])
+    floor_bounds = np.searchsorted(pairs[0], np.arange(len(models) + 1))
+    results = []
+    for b, model in enumerate(models):
+        rooms = slice(room_bounds[b], room_bounds[b + 1])
+        elements = slice(element_bounds[b], element_bounds[b + 1])
+        floors = slice(floor_bounds[b], floor_bounds[b + 1])
+        results.append(HeatLossResult(
+            model, t_out,
+            element_loss[elements], arrays.element_kind[elements],
+            room_transmission[rooms], room_ventilation[rooms],
+            pairs[1][floors], floor_loss[floors]
+        ))
+    return results
+
+def calculate(model: BuildingModel, region: Optional[str] = None,
+              outdoor: Optional[float] = None) -> HeatLossResult:
+    """Теплопотери одного здания"""
+    return calculate_many([model], region, outdoor)[0]
+
+def box_house(area, floors, insulation, floor_height=2.7, wall_u=None) -> Dict[str, np.ndarray]:
+    """
+    Укрупненный расчет без модели помещений: дом-куб
+
+    Квадратный план площадью area / floors, окна - WINDOW_SHARE площади
+    стен, пол по грунту, утепленная крыша. wall_u - U стен вместо уровня
+    утепления (подбор конструкции стен). Все параметры могут быть
+    массивами; возвращает удельные потери H (Вт/К) по видам и площадь
+    оболочки.
+    """
+    area, floors, floor_height = np.broadcast_arrays(
+        *[np.asarray(v, dtype=float) for v in (area, floors, floor_height)]
+    )
+    insulation = np.char.lower(np.asarray(insulation, dtype=str))
+    levels, inverse = np.unique(insulation, return_inverse=True)
+    u = {
+        kind: np.array([
+            INSULATION_U.get(str(level), INSULATION_U[DEFAULT_INSULATION])[kind] for level in levels
+        ])[inverse].reshape(insulation.shape)
+        for kind in ("стена", "окно", "крыша", "пол")
+    }
+    if wall_u is not None:
+        u["стена"] = np.asarray(wall_u, dtype=float)
+
+    footprint = area / floors
+    walls_gross = 4 * np.sqrt(footprint) * floor_height * floors
+    windows = walls_gross * WINDOW_SHARE
+    walls = walls_gross - windows
+
+    transmission = (walls * u["стена"] + windows * u["окно"] + footprint * u["крыша"]
+                    + footprint * u["пол"] * ADJACENT_FACTORS["грунт"])
+    ventilation = AIR_HEAT_CAPACITY * AIR_CHANGES * area * floor_height
+    return {
+        "envelope_area": walls_gross + 2 * footprint,
+        "transmission": transmission,
+        "ventilation": ventilation
+    }
@@ -6,464 +6,421 @@
 import math
 import re
 from typing import Dict, List, Tuple, Optional
-from config import PRICES, CATEGORIES
+from config import CATEGORIES, CALC_CACHE_MAX_ENTRIES, CALC_CACHE_MAX_BYTES, CONCRETE_SCHEDULE_ROWS
+from calc_cache import CalcCache
+from norms import consumption_norms
+from price_book import price_book
+from calc_grammar import ParseError, parse_command
+from estimation import estimate_house, parse_house_command
+from monte_carlo import simulate_house
+from sweep import parse_sweep_command, sweep, sweep_to_calc_result
+from calc_results import CalcResult, Value, money
+from units import UnitError, convert
+from roof_geometry import ROOF_FORMS, SHINGLE_PACK_AREA, rectangular_roof
+from wall_optimizer import optimize_walls
+from cutting import (LINEAR_STOCK, SHEET_STOCK, KERF, DEFAULT_COVER_HEIGHT, cover_area, cut_linear, cut_sheets,
+                     describe_pattern)
+from batch_calculators import (BatchCalculators, to_scalars, FOUNDATION_TYPES, WALL_MATERIALS,
+                               ROOF_MATERIALS, MATERIAL_TYPES)
+from geometry import SHAPES, shape_names
+from concrete_mix import (AGGREGATE_FRACTIONS, SHIFT_START, TRUCK_VOLUME, TRUCK_FLEET, POUR_RATE,
+                          batch_sheet, delivery_schedule, design_mix, format_time, parse_order)
+
+# Общий кэш результатов: сбрасывается целиком при смене версии норм расхода;
+# при смене цен устаревают только записи, прочитавшие изменившиеся цены
+calc_cache = CalcCache(
+    max_entries=CALC_CACHE_MAX_ENTRIES,
+    max_bytes=CALC_CACHE_MAX_BYTES,
+    version=lambda: consumption_norms.version,
+    is_current=price_book.is_current
+)
+
+# Ключ прайс-листа (руб/м²) для листовых материалов
+SHEET_PRICE_KEYS = {
+    "гипсокартон": "drywall",
+    "гвл": "gypsum_fiber",
+    "осп": "osb",
+    "фанера": "plywood",
+}
 
 class ConstructionCalculators:
     """Класс калькуляторов для строительства"""
     
     @staticmethod
-    def calculate_foundation(params: List[str]) -> Dict[str, any]:
+    def calculate_foundation(params: List[str]) -> CalcResult:
         """
         Калькулятор фундамента
         Формат: длина ширина глубина тип
         Пример: 10 8 1.5 ленточный
         """
         if len(params) < 4:
-            return {"error": "Недостаточно параметров. Формат: длина ширина глубина тип"}
+            return CalcResult.failure("Недостаточно параметров. Формат: длина ширина глубина тип")
         
         try:
             length = float(params[0])  # м
             width = float(params[1])   # м
             depth = float(params[2])   # м
             f_type = params[3].lower()  # тип
-            
-            # Расчет объема
-            volume = length * width * depth  # м³
-            
-            # Расчет материалов
-            if f_type == "ленточный":
-                # Для ленточного: периметр × ширина × глубина
-                perimeter = (length + width) * 2
-                volume = perimeter * 0.5 * depth  # ширина ленты 0.5 м
-                
-                # Материалы
-                concrete = volume * 1.05  # +5% на потери
-                rebar = volume * 100  # кг/м³
-                formwork = perimeter * depth * 2  # м²
-                
-                # Стоимость
-                concrete_cost = concrete * PRICES.get("materials_beton", 4500)
-                rebar_cost = rebar * 45  # 45 руб/кг
-                work_cost = volume * PRICES.get("fundament_lenta", 3500)
-                
-                total_cost = concrete_cost + rebar_cost + work_cost
-                
-                return {
-                    "success": True,
-                    "type": "Ленточный фундамент",
-                    "parameters": {
-                        "Длина": f"{length} м",
-                        "Ширина": f"{width} м", 
-                        "Глубина": f"{depth} м",
-                        "Периметр": f"{perimeter} м"
-                    },
-                    "materials": {
-                        "Бетон М300": f"{concrete:.1f} м³",
-                        "Арматура Ø12": f"{rebar:.0f} кг",
-                        "Опалубка": f"{formwork:.1f} м²"
-                    },
-                    "cost": {
-                        "Бетон": f"{concrete_cost:,.0f} руб",
-                        "Арматура": f"{rebar_cost:,.0f} руб",
-                        "Работа": f"{work_cost:,.0f} руб",
-                        "Итого": f"{total_cost:,.0f} руб"
-                    },
-                    "formula": "V = П × Ш × Г, где П - периметр, Ш - ширина ленты, Г - глубина"
-                }
-                
-            elif f_type == "плитный":
-                # Для плитного: площадь × толщина
-                area = length * width
-                volume = area * 0.3  # толщина плиты 0.3 м
-                
-                # Материалы
-                concrete = volume * 1.05
-                rebar = volume * 120  # больше арматуры для плиты
-                insulation = area  # м² утеплителя
-                
-                # Стоимость
-                concrete_cost = concrete * PRICES.get("materials_beton", 4500)
-                rebar_cost = rebar * 45
-                insulation_cost = insulation * 350  # руб/м²
-                work_cost = volume * PRICES.get("fundament_plita", 4500)
-                
-                total_cost = concrete_cost + rebar_cost + insulation_cost + work_cost
-                
-                return {
-                    "success": True,
-                    "type": "Плитный фундамент (УШП)",
-                    "parameters": {
-                        "Длина": f"{length} м",
-                        "Ширина": f"{width} м",
-                        "Толщина": "0.3 м",
-                        "Площадь": f"{area:.1f} м²"
-                    },
-                    "materials": {
-                        "Бетон М300": f"{concrete:.1f} м³",
-                        "Арматура Ø12-16": f"{rebar:.0f} кг",
-                        "Утеплитель 100 мм": f"{insulation:.1f} м²"
-                    },
-                    "cost": {
-                        "Бетон": f"{concrete_cost:,.0f} руб",
-                        "Арматура": f"{rebar_cost:,.0f} руб",
-                        "Утеплитель": f"{insulation_cost:,.0f} руб",
-                        "Работа": f"{work_cost:,.0f} руб",
-                        "Итого": f"{total_cost:,.0f} руб"
-                    },
-                    "formula": "V = Д × Ш × Т, где Т - толщина плиты"
-                }
-                
-            else:
-                return {"error": f"Неизвестный тип фундамента: {f_type}. Доступно: ленточный, плитный"}
-                
         except ValueError:
-            return {"error": "Некорректные числовые значения"}
+            return CalcResult.failure("Некорректные числовые значения")
+        
+        if f_type not in FOUNDATION_TYPES:
+            return CalcResult.failure(f"Неизвестный тип фундамента: {f_type}. Доступно: ленточный, плитный")
+        
+        r = to_scalars(BatchCalculators.foundation(length, width, depth, f_type))
+        
+        if f_type == "ленточный":
+            return CalcResult(
+                type="Ленточный фундамент",
+                parameters={
+                    "Длина": Value(length, "м"),
+                    "Ширина": Value(width, "м"), 
+                    "Глубина": Value(depth, "м"),
+                    "Периметр": Value(r['perimeter'], "м")
+                },
+                materials={
+                    "Бетон М300": Value(r['concrete'], "м³", ".1f"),
+                    "Арматура Ø12": Value(r['rebar'], "кг", ".0f"),
+                    "Опалубка": Value(r['formwork'], "м²", ".1f")
+                },
+                cost={
+                    "Бетон": money(r['concrete_cost']),
+                    "Арматура": money(r['rebar_cost']),
+                    "Работа": money(r['work_cost']),
+                    "Итого": money(r['total_cost'])
+                },
+                formula="V = П × Ш × Г, где П - периметр, Ш - ширина ленты, Г - глубина"
+            )
+        
+        return CalcResult(
+            type="Плитный фундамент (УШП)",
+            parameters={
+                "Длина": Value(length, "м"),
+                "Ширина": Value(width, "м"),
+                "Толщина": "0.3 м",
+                "Площадь": Value(r['area'], "м²", ".1f")
+            },
+            materials={
+                "Бетон М300": Value(r['concrete'], "м³", ".1f"),
+                "Арматура Ø12-16": Value(r['rebar'], "кг", ".0f"),
+                "Утеплитель 100 мм": Value(r['insulation'], "м²", ".1f")
+            },
+            cost={
+                "Бетон": money(r['concrete_cost']),
+                "Арматура": money(r['rebar_cost']),
+                "Утеплитель": money(r['insulation_cost']),
+                "Работа": money(r['work_cost']),
+                "Итого": money(r['total_cost'])
+            },
+            formula="V = Д × Ш × Т, где Т - толщина плиты"
+        )
     
     @staticmethod
-    def calculate_walls(params: List[str]) -> Dict[str, any]:
+    def calculate_walls(params: List[str]) -> CalcResult:
         """
         Калькулятор стен
         Формат: периметр высота толщина материал
         Пример: 40 3 0.4 газобетон
         """
         if len(params) < 4:
-            return {"error": "Недостаточно параметров. Формат: периметр высота толщина материал"}
+            return CalcResult.failure("Недостаточно параметров. Формат: периметр высота толщина материал")
         
         try:
             perimeter = float(params[0])  # м
             height = float(params[1])     # м
             thickness = float(params[2])  # м
             material = params[3].lower()  # материал
-            
-            # Расчет площади стен
-            area = perimeter * height  # м²
-            
-            # Расчет материалов в зависимости от материала
-            if material == "газобетон":
-                # Газоблок 600×300×200 мм = 0.036 м³
-                block_volume = 0.6 * 0.3 * 0.2  # м³
-                blocks_per_m2 = thickness / 0.3  # количество блоков в толщине
-                blocks_count = area * blocks_per_m2
-                
-                # Материалы
-                blocks = blocks_count
-                glue = area * 0.03  # кг/м²
-                rebar = perimeter / 0.5 * 4 * height  # м арматуры для армирования
-                
-                # Стоимость
-                blocks_cost = blocks * 150  # руб/блок
-                glue_cost = glue * 25  # руб/кг
-                work_cost = area * PRICES.get("walls_gas", 1800)
-                
-                total_cost = blocks_cost + glue_cost + work_cost
-                
-                return {
-                    "success": True,
-                    "type": "Стены из газобетона",
-                    "parameters": {
-                        "Периметр": f"{perimeter} м",
-                        "Высота": f"{height} м",
-                        "Толщина": f"{thickness} м",
-                        "Площадь": f"{area:.1f} м²"
-                    },
-                    "materials": {
-                        "Газоблок D500 600×300×200": f"{blocks:.0f} шт",
-                        "Клей для газобетона": f"{glue:.0f} кг",
-                        "Арматура Ø8": f"{rebar:.0f} м"
-                    },
-                    "cost": {
-                        "Газоблоки": f"{blocks_cost:,.0f} руб",
-                        "Клей": f"{glue_cost:,.0f} руб",
-                        "Работа": f"{work_cost:,.0f} руб",
-                        "Итого": f"{total_cost:,.0f} руб"
-                    },
-                    "formula": "Кол-во = S / (0.6×0.3) × (Т/0.3), где S - площадь, Т - толщина"
-                }
-                
-            elif material == "кирпич":
-                # Кирпич 250×120×65 мм
-                # Кладка в 2 кирпича = 510 мм
-                bricks_per_m2 = 102  # шт/м² при толщине 510 мм
-                bricks_count = area * bricks_per_m2 * (thickness / 0.51)
-                
-                # Материалы
-                bricks = bricks_count
-                mortar = area * 0.25 * (thickness / 0.51)  # м³ раствора
-                
-                # Стоимость
-                bricks_cost = bricks * PRICES.get("materials_kirpich", 35)
-                mortar_cost = mortar * 3500  # руб/м³ раствора
-                work_cost = area * PRICES.get("walls_brick", 2500)
-                
-                total_cost = bricks_cost + mortar_cost + work_cost
-                
-                return {
-                    "success": True,
-                    "type": "Кирпичные стены",
-                    "parameters": {
-                        "Периметр": f"{perimeter} м",
-                        "Высота": f"{height} м",
-                        "Толщина": f"{thickness} м",
-                        "Площадь": f"{area:.1f} м²"
-                    },
-                    "materials": {
-                        "Кирпич М150": f"{bricks:.0f} шт",
-                        "Раствор М100": f"{mortar:.1f} м³"
-                    },
-                    "cost": {
-                        "Кирпич": f"{bricks_cost:,.0f} руб",
-                        "Раствор": f"{mortar_cost:,.0f} руб",
-                        "Работа": f"{work_cost:,.0f} руб",
-                        "Итого": f"{total_cost:,.0f} руб"
-                    },
-                    "formula": "Кол-во = S × 102 × (Т/0.51), где 102 - кирпичей в м² при толщине 510 мм"
-                }
-                
-            elif material == "дерево":
-                # Брус 150×150 мм
-                beam_length = perimeter * height / (0.15 * 0.15)  # м погонных
-                beams_count = beam_length / 6  # 6м брусья
-                
-                # Материалы
-                beams = beams_count
-                insulation = area  # м² утеплителя
-                windproof = area  # м² ветрозащиты
-                
-                # Стоимость
-                beams_cost = beams * 6000  # руб/брус 6м
-                insulation_cost = insulation * 350  # руб/м²
-                work_cost = area * PRICES.get("walls_wood", 3000)
-                
-                total_cost = beams_cost + insulation_cost + work_cost
-                
-                return {
-                    "success": True,
-                    "type": "Деревянные стены (брус)",
-                    "parameters": {
-                        "Периметр": f"{perimeter} м",
-                        "Высота": f"{height} м",
-                        "Толщина": f"{thickness} м",
-                        "Площадь": f"{area:.1f} м²"
-                    },
-                    "materials": {
-                        "Брус 150×150×6000": f"{beams:.0f} шт",
-                        "Утеплитель 150 мм": f"{insulation:.0f} м²",
-                        "Ветрозащита": f"{windproof:.0f} м²"
-                    },
-                    "cost": {
-                        "Брус": f"{beams_cost:,.0f} руб",
-                        "Утеплитель": f"{insulation_cost:,.0f} руб",
-                        "Работа": f"{work_cost:,.0f} руб",
-                        "Итого": f"{total_cost:,.0f} руб"
-                    },
-                    "formula": "Кол-во = (П × В) / (0.15×0.15) / 6, где 0.15 - сечение бруса, 6 - длина бруса"
-                }
-                
-            else:
-                return {"error": f"Неизвестный материал: {material}. Доступно: газобетон, кирпич, дерево"}
-                
         except ValueError:
-            return {"error": "Некорректные числовые значения"}
+            return CalcResult.failure("Некорректные числовые значения")
+        
+        if material not in WALL_MATERIALS:
+            return CalcResult.failure(f"Неизвестный материал: {material}. Доступно: газобетон, кирпич, дерево")
+        
+        r = to_scalars(BatchCalculators.walls(perimeter, height, thickness, material))
+        parameters = {
+            "Периметр": Value(perimeter, "м"),
+            "Высота": Value(height, "м"),
+            "Толщина": Value(thickness, "м"),
+            "Площадь": Value(r['area'], "м²", ".1f")
+        }
+        
+        if material == "газобетон":
+            return CalcResult(
+                type="Стены из газобетона",
+                parameters=parameters,
+                materials={
+                    "Газоблок D500 600×300×200": Value(r['blocks'], "шт", ".0f"),
+                    "Клей для газобетона": Value(r['glue'], "кг", ".0f"),
+                    "Арматура Ø8": Value(r['rebar'], "м", ".0f")
+                },
+                cost={
+                    "Газоблоки": money(r['blocks_cost']),
+                    "Клей": money(r['glue_cost']),
+                    "Работа": money(r['work_cost']),
+                    "Итого": money(r['total_cost'])
+                },
+                formula="Кол-во = S / (0.6×0.3) × (Т/0.3), где S - площадь, Т - толщина"
+            )
+        
+        if material == "кирпич":
+            return CalcResult(
+                type="Кирпичные стены",
+                parameters=parameters,
+                materials={
+                    "Кирпич М150": Value(r['bricks'], "шт", ".0f"),
+                    "Раствор М100": Value(r['mortar'], "м³", ".1f")
+                },
+                cost={
+                    "Кирпич": money(r['bricks_cost']),
+                    "Раствор": money(r['mortar_cost']),
+                    "Работа": money(r['work_cost']),
+                    "Итого": money(r['total_cost'])
+                },
+                formula="Кол-во = S × 102 × (Т/0.51), где 102 - кирпичей в м² при толщине 510 мм"
+            )
+        
+        return CalcResult(
+            type="Деревянные стены (брус)",
+            parameters=parameters,
+            materials={
+                "Брус 150×150×6000": Value(r['beams'], "шт", ".0f"),
+                "Утеплитель 150 мм": Value(r['insulation'], "м²", ".0f"),
+                "Ветрозащита": Value(r['windproof'], "м²", ".0f")
+            },
+            cost={
+                "Брус": money(r['beams_cost']),
+                "Утеплитель": money(r['insulation_cost']),
+                "Работа": money(r['work_cost']),
+                "Итого": money(r['total_cost'])
+            },
+            formula="Кол-во = (П × В) / (0.15×0.15) / 6, где 0.15 - сечение бруса, 6 - длина бруса"
+        )
     
     @staticmethod
-    def calculate_roof(params: List[str]) -> Dict[str, any]:
+    def calculate_roof(params: List[str]) -> CalcResult:
         """
         Калькулятор крыши
-        Формат: длина ширина уклон материал
-        Пример: 10 8 30 металлочерепица
+        Формат: длина ширина уклон материал [форма]
+        Пример: 10 8 30 металлочерепица вальмовая
         """
         if len(params) < 4:
-            return {"error": "Недостаточно параметров. Формат: длина ширина уклон материал"}
+            return CalcResult.failure("Недостаточно параметров. Формат: длина ширина уклон материал")
         
         try:
             length = float(params[0])  # м
             width = float(params[1])   # м
             angle = float(params[2])   # градусы
             material = params[3].lower()  # материал
-            
-            # Расчет площади крыши с учетом уклона
-            roof_length = width / (2 * math.cos(math.radians(angle)))  # длина ската
-            area = length * roof_length * 2  # площадь двух скатов
-            
-            # Расчет материалов кровли
-            if material == "металлочерепица":
-                # Материалы
-                roofing = area * 1.1  # +10% на нахлест
-                waterproofing = area  # м²
-                insulation = area  # м² утеплителя
-                battens = area * 1.2  # м² обрешетки
-                
-                # Стоимость
-                roofing_cost = roofing * PRICES.get("roof_metal", 450)
-                waterproofing_cost = waterproofing * 40  # руб/м²
-                insulation_cost = insulation * 350  # руб/м²
-                work_cost = area * 800  # руб/м²
-                
-                total_cost = roofing_cost + waterproofing_cost + insulation_cost + work_cost
-                
-                return {
-                    "success": True,
-                    "type": "Крыша из металлочерепицы",
-                    "parameters": {
-                        "Длина": f"{length} м",
-                        "Ширина": f"{width} м",
-                        "Уклон": f"{angle}°",
-                        "Площадь крыши": f"{area:.1f} м²",
-                        "Длина ската": f"{roof_length:.1f} м"
-                    },
-                    "materials": {
-                        "Металлочерепица": f"{roofing:.1f} м²",
-                        "Гидроизоляция": f"{waterproofing:.1f} м²",
-                        "Утеплитель 200 мм": f"{insulation:.1f} м²",
-                        "Обрешетка": f"{battens:.1f} м²"
-                    },
-                    "cost": {
-                        "Металлочерепица": f"{roofing_cost:,.0f} руб",
-                        "Гидроизоляция": f"{waterproofing_cost:,.0f} руб",
-                        "Утеплитель": f"{insulation_cost:,.0f} руб",
-                        "Работа": f"{work_cost:,.0f} руб",
-                        "Итого": f"{total_cost:,.0f} руб"
-                    },
-                    "formula": "S = Д × (Ш / (2 × cos(α))) × 2, где α - угол уклона"
-                }
-                
-            elif material == "мягкая":
-                # Для мягкой кровли
-                roofing = area * 1.15  # +15% на нахлест
-                osb = area  # м² ОСП
-                insulation = area  # м² утеплителя
-                
-                # Стоимость
-                roofing_cost = roofing * PRICES.get("roof_soft", 550)
-                osb_cost = osb * 500  # руб/м²
-                insulation_cost = insulation * 350
-                work_cost = area * 1000  # руб/м²
-                
-                total_cost = roofing_cost + osb_cost + insulation_cost + work_cost
-                
-                return {
-                    "success": True,
-                    "type": "Мягкая кровля (битумная черепица)",
-                    "parameters": {
-                        "Длина": f"{length} м",
-                        "Ширина": f"{width} м",
-                        "Уклон": f"{angle}°",
-                        "Площадь крыши": f"{area:.1f} м²"
-                    },
-                    "materials": {
-                        "Битумная черепица": f"{roofing:.1f} м²",
-                        "ОСП-3 9мм": f"{osb:.1f} м²",
-                        "Утеплитель": f"{insulation:.1f} м²"
-                    },
-                    "cost": {
-                        "Черепица": f"{roofing_cost:,.0f} руб",
-                        "ОСП": f"{osb_cost:,.0f} руб",
-                        "Утеплитель": f"{insulation_cost:,.0f} руб",
-                        "Работа": f"{work_cost:,.0f} руб",
-                        "Итого": f"{total_cost:,.0f} руб"
-                    },
-                    "formula": "Мягкая кровля требует сплошного основания из ОСП"
-                }
-                
-            else:
-                return {"error": f"Неизвестный материал: {material}. Доступно: металлочерепица, мягкая"}
-                
         except ValueError:
-            return {"error": "Некорректные числовые значения"}
+            return CalcResult.failure("Некорректные числовые значения")
+        form = params[4].lower() if len(params) > 4 else "двускатная"
+        
+        if material not in ROOF_MATERIALS:
+            return CalcResult.failure(f"Неизвестный материал: {material}. Доступно: металлочерепица, мягкая")
+        if form not in ROOF_FORMS:
+            return CalcResult.failure(f"Неизвестная форма крыши: {form}. Доступно: {', '.join(ROOF_FORMS)}")
+        if length <= 0 or width <= 0 or not 0 < angle < 90:
+            return CalcResult.failure("Размеры должны быть положительными, уклон - от 0 до 90°")
+        
+        # Площадь прямоугольной крыши при одном уклоне не зависит от формы:
+        # основание, утеплитель и работу считает пакетный калькулятор, линии
+        # и кровельный материал - геометрия (раскладка листов, упаковки)
+        r = to_scalars(BatchCalculators.roof(length, width, angle, material))
+        prices = price_book.prices()
+        geometry = rectangular_roof(length, width, angle, form)
+        lines = geometry.lengths()
+        # Односкатная крыша - один скат на всю ширину
+        slope_length = r['roof_length'] * (2 if form == "односкатная" else 1)
+        line_values = {
+            name: Value(lines[kind], "м", ".1f")
+            for name, kind in (("Конек", "конек"), ("Ребра", "ребро"), ("Карнизы", "карниз"),
+                               ("Фронтоны", "фронтон"), ("Верхний край", "верхний край"))
+            if lines[kind]
+        }
+        
+        if material == "металлочерепица":
+            try:
+                layout = geometry.sheets(material)
+            except ValueError as e:
+                return CalcResult.failure(str(e))
+            roofing_cost = layout.ordered_area * prices["roof_metal"]
+            return CalcResult(
+                type=f"Крыша из металлочерепицы ({form})",
+                parameters={
+                    "Длина": Value(length, "м"),
+                    "Ширина": Value(width, "м"),
+                    "Уклон": Value(angle, "°"),
+                    "Площадь крыши": Value(r['area'], "м²", ".1f"),
+                    "Длина ската": Value(slope_length, "м", ".1f"),
+                    **line_values
+                },
+                materials={
+                    "Металлочерепица": Value(layout.ordered_area, "м²", ".1f"),
+                    "Листов по раскладке": Value(layout.sheets, "шт"),
+                    "Отходы раскладки": Value(layout.waste * 100, "%", ".0f"),
+                    "Гидроизоляция": Value(r['waterproofing'], "м²", ".1f"),
+                    "Утеплитель 200 мм": Value(r['insulation'], "м²", ".1f"),
+                    "Обрешетка": Value(r['battens'], "м²", ".1f")
+                },
+                cost={
+                    "Металлочерепица": money(roofing_cost),
+                    "Гидроизоляция": money(r['waterproofing_cost']),
+                    "Утеплитель": money(r['insulation_cost']),
+                    "Работа": money(r['work_cost']),
+                    "Итого": money(r['total_cost'] - r['roofing_cost'] + roofing_cost)
+                },
+                formula="S = Sплана / cos(α), где α - угол уклона; листы - полосами от карниза, длина кратна шагу волны"
+            )
+        
+        shingles = geometry.shingles()
+        shingle_area = shingles['packs'] * SHINGLE_PACK_AREA
+        roofing_cost = shingle_area * prices["roof_soft"]
+        return CalcResult(
+            type=f"Мягкая кровля (битумная черепица, {form})",
+            parameters={
+                "Длина": Value(length, "м"),
+                "Ширина": Value(width, "м"),
+                "Уклон": Value(angle, "°"),
+                "Площадь крыши": Value(r['area'], "м²", ".1f"),
+                **line_values
+            },
+            materials={
+                "Битумная черепица": Value(shingle_area, "м²", ".1f"),
+                "Упаковок черепицы": Value(shingles['packs'], "шт"),
+                "Коньково-карнизная черепица": Value(shingles['ridge_packs'], "уп"),
+                "ОСП-3 9мм": Value(r['osb'], "м²", ".1f"),
+                "Утеплитель": Value(r['insulation'], "м²", ".1f")
+            },
+            cost={
+                "Черепица": money(roofing_cost),
+                "ОСП": money(r['osb_cost']),
+                "Утеплитель": money(r['insulation_cost']),
+                "Работа": money(r['work_cost']),
+                "Итого": money(r['total_cost'] - r['roofing_cost'] + roofing_cost)
+            },
+            formula="Мягкая кровля требует сплошного основания из ОСП"
+        )
     
     @staticmethod
-    def calculate_heat_loss(params: List[str]) -> Dict[str, any]:
+    def calculate_heat_loss(params: List[str]) -> CalcResult:
         """
         Калькулятор теплопотерь
         Формат: площадь этажи регион утепление
         Пример: 150 2 москва хорошее
         """
         if len(params) < 4:
-            return {"error": "Недостаточно параметров. Формат: площадь этажи регион утепление"}
+            return CalcResult.failure("Недостаточно параметров. Формат: площадь этажи регион утепление")
         
         try:
             area = float(params[0])  # м²
             floors = int(params[1])  # этажи
             region = params[2].lower()  # регион
             insulation = params[3].lower()  # качество утепления
-            
-            # Коэффициенты для регионов (Вт/м²·°C)
-            region_coefficients = {
-                "москва": 45,  # разница температур зимой
-                "спб": 43,
-                "екатеринбург": 47,
-                "новосибирск": 50,
-                "сочи": 30,
-                "краснодар": 35
-            }
-            
-            # Коэффициенты утепления
-            insulation_coefficients = {
-                "нет": 2.0,
-                "слабое": 1.5,
-                "среднее": 1.2,
-                "хорошее": 0.9,
-                "отличное": 0.7
-            }
-            
-            # Расчет
-            delta_t = region_coefficients.get(region, 45)  # разница температур
-            k = insulation_coefficients.get(insulation, 1.2)  # коэффициент теплопотерь
-            
-            # Общая площадь ограждающих конструкций
-            # Приблизительно: стены = периметр × высота × этажи
-            # Для упрощения: умножаем площадь на коэффициент
-            envelope_area = area * 3.5  # примерный коэффициент
-            
-            # Теплопотери
-            heat_loss = envelope_area * delta_t * k / 1000  # кВт
-            
-            # Мощность котла с запасом 20%
-            boiler_power = heat_loss * 1.2
-            
-            # Расчет стоимости утепления
-            insulation_cost = 0
-            if insulation == "хорошее":
-                insulation_cost = area * PRICES.get("heat_loss", 1500)
-            elif insulation == "отличное":
-                insulation_cost = area * 2000
-            
-            return {
-                "success": True,
-                "type": "Расчет теплопотерь",
-                "parameters": {
-                    "Площадь дома": f"{area} м²",
-                    "Этажи": floors,
-                    "Регион": region.capitalize(),
-                    "Качество утепления": insulation,
-                    "ΔT (разница температур)": f"{delta_t}°C",
-                    "Коэффициент k": k
-                },
-                "results": {
-                    "Теплопотери дома": f"{heat_loss:.1f} кВт",
-                    "Рекомендуемая мощность котла": f"{boiler_power:.1f} кВт",
-                    "Стоимость утепления": f"{insulation_cost:,.0f} руб" if insulation_cost > 0 else "Не требуется"
-                },
-                "recommendations": [
-                    f"Для дома {area} м² в {region} рекомендуется котел {math.ceil(boiler_power)} кВт",
-                    f"Ежемесячные затраты на отопление: ~{heat_loss * 0.1 * 720 * 30 / 1000:,.0f} руб/мес (газ)",
-                    "Установите терморегуляторы для экономии 10-15%"
-                ],
-                "formula": "Q = S × ΔT × k / 1000, где Q - теплопотери (кВт), S - площадь (м²), ΔT - разница температур, k - коэффициент"
-            }
-            
         except ValueError:
-            return {"error": "Некорректные числовые значения"}
+            return CalcResult.failure("Некорректные числовые значения")
+        
+        if area <= 0 or floors < 1:
+            return CalcResult.failure("Площадь должна быть больше нуля, этажей - не меньше 1")
+        
+        r = to_scalars(BatchCalculators.heat_loss(area, floors, region, insulation))
+        heat_loss = r["heat_loss"]
+        boiler_power = r["boiler_power"]
+        insulation_cost = r["insulation_cost"]
+        
+        return CalcResult(
+            type="Расчет теплопотерь",
+            parameters={
+                "Площадь дома": Value(area, "м²"),
+                "Этажи": floors,
+                "Регион": region.capitalize(),
+                "Качество утепления": insulation,
+                "ΔT (разница температур)": Value(r['delta_t'], "°C", "g"),
+                "Площадь оболочки": Value(r["envelope_area"], "м²", ".0f"),
+                "Средний U оболочки": Value(r["k"], "Вт/(м²·К)", ".2f")
+            },
+            results={
+                "Через ограждения": Value(r["transmission"], "кВт", ".1f"),
+                "На вентиляцию": Value(r["ventilation"], "кВт", ".1f"),
+                "Теплопотери дома": Value(heat_loss, "кВт", ".1f"),
+                "Рекомендуемая мощность котла": Value(boiler_power, "кВт", ".1f"),
+                "Стоимость утепления": money(insulation_cost) if insulation_cost > 0 else "Не требуется"
+            },
+            recommendations=[
+                f"Для дома {area} м² в {region} рекомендуется котел {math.ceil(boiler_power)} кВт",
+                f"Ежемесячные затраты на отопление: ~{r['monthly_heating_cost']:,.0f} руб/мес (газ)",
+                "Установите терморегуляторы для экономии 10-15%"
+            ],
+            formula="Q = (Σ A×U + 0.34×n×V) × ΔT / 1000, где A, U - площадь и теплопередача стен, окон, "
+                    "крыши и пола, n - воздухообмен (1/ч), V - объем дома (м³), ΔT - разница температур"
+        )
     
     @staticmethod
-    def calculate_cost(params: List[str]) -> Dict[str, any]:
+    def calculate_wall_choice(params: List[str]) -> CalcResult:
+        """
+        Самые дешевые стены при ограничении теплопотерь
+        Формат: площадь этажи регион [предел, кВт]
+        Пример: 150 2 москва 9
+        """
+        if len(params) < 3:
+            return CalcResult.failure("Недостаточно параметров. Формат: площадь этажи регион [предел]")
+        
+        try:
+            area = float(params[0])       # м²
+            floors = int(params[1])
+            region = params[2].lower()
+            limit = float(params[3]) if len(params) > 3 else None  # кВт
+        except ValueError:
+            return CalcResult.failure("Некорректные числовые значения")
+        
+        try:
+            search = optimize_walls(area, floors, region, limit)
+        except ValueError as e:
+            return CalcResult.failure(str(e))
+        if search.best is None:
+            return CalcResult.failure(
+                f"Ни одна конструкция стен не укладывается в {limit:g} кВт: "
+                "теплопотери окон, крыши, пола и вентиляции уже больше"
+            )
+        
+        # Фронт целиком может быть длинным: в чат - до 8 вариантов от дешевого к теплому
+        front = search.front
+        shown = sorted({round(i * (len(front) - 1) / 7) for i in range(8)}) if len(front) > 8 else range(len(front))
+        best = search.best
+        return CalcResult(
+            type="Подбор стен: стоимость и теплопотери",
+            parameters={
+                "Площадь дома": Value(area, "м²"),
+                "Этажей": floors,
+                "Регион": region,
+                "Предел теплопотерь": Value(limit, "кВт") if limit is not None else "не задан"
+            },
+            results={
+                front[i].label: f"{money(front[i].cost)} · {Value(front[i].heat_loss, 'кВт', '.1f')}"
+                for i in shown
+            },
+            cost={
+                "Стены с утеплением": money(best.cost)
+            },
+            recommendations=[
+                f"Дешевле всего{' в пределе' if limit is not None else ''}: {best.label}, "
+                f"U = {best.u:.2f} Вт/(м²·К), теплопотери дома {best.heat_loss:.1f} кВт"
+            ],
+            formula="U = 1 / (Rв + Σ d/λ + Rн); в списке - варианты, которые нельзя удешевить без роста теплопотерь",
+            notes=[
+                f"Посчитано вариантов: {search.evaluated}, отсечено невыгодных слоев утеплителя: {search.pruned}",
+                "Окна, крыша и пол - со средним утеплением"
+            ]
+        )
+    
+    @staticmethod
+    def calculate_cost(params: List[str]) -> CalcResult:
         """
         Калькулятор стоимости работ
         Формат: работа площадь материал качество
         Пример: фундамент 100 ленточный стандарт
         """
         if len(params) < 4:
-            return {"error": "Недостаточно параметров. Формат: работа площадь материал качество"}
+            return CalcResult.failure("Недостаточно параметров. Формат: работа площадь материал качество")
         
         work = params[0].lower()
         area = float(params[1])
@@ -478,120 +435,120 @@ class ConstructionCalculators:
         }
         
         quality_coef = quality_coefficients.get(quality, 1.0)
+        prices = price_book.prices()
         
         if work == "фундамент":
             if material == "ленточный":
-                base_price = PRICES.get("fundament_lenta", 3500)
+                base_price = prices["fundament_lenta"]
             elif material == "плитный":
-                base_price = PRICES.get("fundament_plita", 4500)
+                base_price = prices["fundament_plita"]
             else:
-                return {"error": f"Неизвестный тип фундамента: {material}"}
+                return CalcResult.failure(f"Неизвестный тип фундамента: {material}")
             
             total_cost = area * base_price * quality_coef
             
-            return {
-                "success": True,
-                "type": f"Стоимость {work} ({material})",
-                "parameters": {
-                    "Площадь/объем": f"{area} м²/м³",
+            return CalcResult(
+                type=f"Стоимость {work} ({material})",
+                parameters={
+                    "Площадь/объем": Value(area, "м²/м³"),
                     "Материал": material,
                     "Качество": quality,
                     "Коэффициент": quality_coef
                 },
-                "cost": {
-                    "Базовая цена": f"{base_price} руб/ед.",
-                    "Общая стоимость": f"{total_cost:,.0f} руб",
-                    "Стоимость с материалами": f"{total_cost * 1.5:,.0f} руб (материалы + работа)"
+                cost={
+                    "Базовая цена": Value(base_price, "руб/ед."),
+                    "Общая стоимость": money(total_cost),
+                    "Стоимость с материалами": money(total_cost * 1.5, "руб (материалы + работа)")
                 }
-            }
+            )
         
         elif work == "стены":
             if material == "кирпич":
-                base_price = PRICES.get("walls_brick", 2500)
+                base_price = prices["walls_brick"]
             elif material == "газобетон":
-                base_price = PRICES.get("walls_gas", 1800)
+                base_price = prices["walls_gas"]
             elif material == "дерево":
-                base_price = PRICES.get("walls_wood", 3000)
+                base_price = prices["walls_wood"]
             else:
-                return {"error": f"Неизвестный материал стен: {material}"}
+                return CalcResult.failure(f"Неизвестный материал стен: {material}")
             
             total_cost = area * base_price * quality_coef
             
-            return {
-                "success": True,
-                "type": f"Стоимость {work} ({material})",
-                "parameters": {
-                    "Площадь стен": f"{area} м²",
+            return CalcResult(
+                type=f"Стоимость {work} ({material})",
+                parameters={
+                    "Площадь стен": Value(area, "м²"),
                     "Материал": material,
                     "Качество": quality
                 },
-                "cost": {
-                    "Базовая цена": f"{base_price} руб/м²",
-                    "Работа": f"{total_cost:,.0f} руб",
-                    "Материалы": f"{total_cost * 1.8:,.0f} руб",
-                    "Итого": f"{total_cost * 2.8:,.0f} руб"
+                cost={
+                    "Базовая цена": Value(base_price, "руб/м²"),
+                    "Работа": money(total_cost),
+                    "Материалы": money(total_cost * 1.8),
+                    "Итого": money(total_cost * 2.8)
                 }
-            }
+            )
         
         elif work == "крыша":
             if material == "металлочерепица":
-                base_price = 1300  # работа + материалы
+                base_price = prices["roof_turnkey_metal"]  # работа + материалы
             elif material == "мягкая":
-                base_price = 1700
+                base_price = prices["roof_turnkey_soft"]
             else:
-                return {"error": f"Неизвестный материал кровли: {material}"}
+                return CalcResult.failure(f"Неизвестный материал кровли: {material}")
             
             total_cost = area * base_price * quality_coef
+            rafters_cost = area * prices["rafters"]
+            insulation_cost = area * prices["roof_insulation"]
             
-            return {
-                "success": True,
-                "type": f"Стоимость {work} ({material})",
-                "parameters": {
-                    "Площадь крыши": f"{area} м²",
+            return CalcResult(
+                type=f"Стоимость {work} ({material})",
+                parameters={
+                    "Площадь крыши": Value(area, "м²"),
                     "Материал": material,
                     "Качество": quality
                 },
-                "cost": {
-                    "Работа + материалы": f"{total_cost:,.0f} руб",
-                    "Стропильная система": f"{area * 800:,.0f} руб",
-                    "Утепление": f"{area * 500:,.0f} руб",
-                    "Итого": f"{total_cost + area * 1300:,.0f} руб"
+                cost={
+                    "Работа + материалы": money(total_cost),
+                    "Стропильная система": money(rafters_cost),
+                    "Утепление": money(insulation_cost),
+                    "Итого": money(total_cost + rafters_cost + insulation_cost)
                 }
-            }
+            )
         
         elif work == "отделка":
             if quality == "эконом":
-                base_price = 2000
-            elif quality == "стандарт":
-                base_price = 3500
+                base_price = prices["finish_work_economy"]
             elif quality == "премиум":
-                base_price = 6000
+                base_price = prices["finish_work_premium"]
             else:
-                base_price = 3500
+                base_price = prices["finish_work_standard"]
             
             total_cost = area * base_price
+            rough_cost = area * prices["rough_finish"]
+            plumbing_cost = area * prices["plumbing"]
+            wiring_cost = area * prices["wiring"]
             
-            return {
-                "success": True,
-                "type": f"Стоимость {work} ({quality})",
-                "parameters": {
-                    "Площадь": f"{area} м²",
+            return CalcResult(
+                type=f"Стоимость {work} ({quality})",
+                parameters={
+                    "Площадь": Value(area, "м²"),
                     "Качество": quality
                 },
-                "cost": {
-                    "Черновая отделка": f"{area * 1500:,.0f} руб",
-                    "Чистовая отделка": f"{total_cost:,.0f} руб",
-                    "Сантехника": f"{area * 1000:,.0f} руб",
-                    "Электрика": f"{area * 800:,.0f} руб",
-                    "Итого": f"{total_cost + area * 3300:,.0f} руб"
+                cost={
+                    "Черновая отделка": money(rough_cost),
+                    "Чистовая отделка": money(total_cost),
+                    "Сантехника": money(plumbing_cost),
+                    "Электрика": money(wiring_cost),
+                    "Итого": money(total_cost + rough_cost + plumbing_cost + wiring_cost)
                 }
-            }
+            )
         
         else:
-            return {"error": f"Неизвестный тип работ: {work}. Доступно: фундамент, стены, крыша, отделка"}
+            return CalcResult.failure(f"Неизвестный тип работ: {work}. Доступно: фундамент, стены, крыша, отделка")
     
     @staticmethod
-    def calculate_area_volume(params: List[str]) -> Dict[str, any]:
+    def calculate_area_volume(params: List[str]) -> CalcResult:
         """
         Калькулятор площади и объема
         Формат: фигура параметры
@@ -601,355 +558,243 @@ class ConstructionCalculators:
           круг 3
           параллелепипед 5 4 3
           цилиндр 2 5
+          г-образный 12 10 4 5
+          многоугольник 0 0 8 0 8 6 0 6
+        Фигуры и формулы - реестр geometry.SHAPES
         """
         if len(params) < 2:
-            return {"error": "Недостаточно параметров. Формат: фигура параметры"}
+            return CalcResult.failure("Недостаточно параметров. Формат: фигура параметры")
         
         shape = params[0].lower()
+        if shape not in SHAPES:
+            return CalcResult.failure(f"Неизвестная фигура: {shape}. Доступно: {', '.join(shape_names())}")
+        figure = SHAPES[shape]
         
         try:
-            if shape == "прямоугольник":
-                if len(params) < 3:
-                    return {"error": "Для прямоугольника нужны длина и ширина"}
-                
-                a = float(params[1])
-                b = float(params[2])
-                area = a * b
-                perimeter = (a + b) * 2
-                
-                return {
-                    "success": True,
-                    "type": "Прямоугольник",
-                    "parameters": {
-                        "Длина": f"{a} м",
-                        "Ширина": f"{b} м"
-                    },
-                    "results": {
-                        "Площадь": f"{area} м²",
-                        "Периметр": f"{perimeter} м"
-                    },
-                    "formula": "S = a × b, P = (a + b) × 2"
-                }
-            
-            elif shape == "треугольник":
-                if len(params) < 3:
-                    return {"error": "Для треугольника нужны основание и высота"}
-                
-                a = float(params[1])  # основание
-                h = float(params[2])  # высота
-                area = (a * h) / 2
-                
-                return {
-                    "success": True,
-                    "type": "Треугольник",
-                    "parameters": {
-                        "Основание": f"{a} м",
-                        "Высота": f"{h} м"
-                    },
-                    "results": {
-                        "Площадь": f"{area} м²"
-                    },
-                    "formula": "S = (a × h) / 2"
-                }
-            
-            elif shape == "круг":
-                r = float(params[1])
-                area = math.pi * r ** 2
-                circumference = 2 * math.pi * r
-                
-                return {
-                    "success": True,
-                    "type": "Круг",
-                    "parameters": {
-                        "Радиус": f"{r} м"
-                    },
-                    "results": {
-                        "Площадь": f"{area:.2f} м²",
-                        "Длина окружности": f"{circumference:.2f} м"
-                    },
-                    "formula": "S = π × r², C = 2 × π × r"
-                }
-            
-            elif shape == "параллелепипед":
-                if len(params) < 4:
-                    return {"error": "Для параллелепипеда нужны длина, ширина и высота"}
-                
-                a = float(params[1])
-                b = float(params[2])
-                c = float(params[3])
-                volume = a * b * c
-                surface_area = 2 * (a*b + a*c + b*c)
-                
-                return {
-                    "success": True,
-                    "type": "Параллелепипед (прямоугольный)",
-                    "parameters": {
-                        "Длина": f"{a} м",
-                        "Ширина": f"{b} м",
-                        "Высота": f"{c} м"
-                    },
-                    "results": {
-                        "Объем": f"{volume} м³",
-                        "Площадь поверхности": f"{surface_area} м²"
-                    },
-                    "formula": "V = a × b × c, S = 2 × (ab + ac + bc)"
-                }
-            
-            elif shape == "цилиндр":
-                if len(params) < 3:
-                    return {"error": "Для цилиндра нужны радиус и высота"}
-                
-                r = float(params[1])
-                h = float(params[2])
-                volume = math.pi * r ** 2 * h
-                surface_area = 2 * math.pi * r * (r + h)
-                
-                return {
-                    "success": True,
-                    "type": "Цилиндр",
-                    "parameters": {
-                        "Радиус": f"{r} м",
-                        "Высота": f"{h} м"
-                    },
-                    "results": {
-                        "Объем": f"{volume:.2f} м³",
-                        "Площадь поверхности": f"{surface_area:.2f} м²"
-                    },
-                    "formula": "V = π × r² × h, S = 2 × π × r × (r + h)"
-                }
-            
-            else:
-                return {"error": f"Неизвестная фигура: {shape}. Доступно: прямоугольник, треугольник, круг, параллелепипед, цилиндр"}
-                
+            values = [float(p) for p in params[1:]]
         except ValueError:
-            return {"error": "Некорректные числовые значения"}
+            return CalcResult.failure("Некорректные числовые значения")
+        if not figure.variadic:
+            if len(values) < len(figure.params):
+                return CalcResult.failure(figure.missing)
+            values = values[:len(figure.params)]
+        
+        error = figure.validate(values)
+        if error:
+            return CalcResult.failure(error)
+        
+        measured = figure.evaluate(*values)
+        return CalcResult(
+            type=figure.title,
+            parameters={
+                label: value if isinstance(value, str) else Value(value, "м")
+                for label, value in figure.parameters(values)
+            },
+            results={
+                metric.label: Value(float(measured[metric.name]), metric.unit, metric.fmt)
+                for metric in figure.metrics
+            },
+            formula=figure.formula
+        )
     
     @staticmethod
-    def calculate_water_supply(params: List[str]) -> Dict[str, any]:
+    def calculate_water_supply(params: List[str]) -> CalcResult:
         """
         Калькулятор водоснабжения
         Формат: люди сантехника расход
         Пример: 4 ванна+душ 200
         """
         if len(params) < 3:
-            return {"error": "Недостаточно параметров. Формат: люди сантехника расход"}
+            return CalcResult.failure("Недостаточно параметров. Формат: люди сантехника расход")
         
         try:
             people = int(params[0])
             plumbing = params[1].lower()
             daily_use = float(params[2])  # л/сутки на человека
-            
-            # Расчет потребления
-            total_daily = people * daily_use  # л/сутки
-            
-            # Расчет септика
-            # Объем септика = суточный расход × 3 дня отстоя
-            septic_volume = total_daily * 3 / 1000  # м³
-            
-            # Расчет водонагревателя
-            # Для семьи 4 человек: 80-100 литров
-            boiler_volume = max(50, people * 20)  # литров
-            
-            # Стоимость
-            septic_cost = septic_volume * 30000  # 30 тыс руб/м³
-            boiler_cost = boiler_volume * 50  # 50 руб/литр
-            piping_cost = people * 15000  # разводка труб
-            
-            total_cost = septic_cost + boiler_cost + piping_cost
-            
-            return {
-                "success": True,
-                "type": "Расчет водоснабжения и канализации",
-                "parameters": {
-                    "Количество человек": people,
-                    "Сантехника": plumbing,
-                    "Норма расхода": f"{daily_use} л/чел/сутки"
-                },
-                "results": {
-                    "Суточное потребление": f"{total_daily} л/сутки",
-                    "Объем септика": f"{septic_volume:.1f} м³",
-                    "Объем водонагревателя": f"{boiler_volume} л",
-                    "Рекомендуемый насос": "Насосная станция 60-80 Вт" if people <= 4 else "Насосная станция 100-150 Вт"
-                },
-                "cost": {
-                    "Септик": f"{septic_cost:,.0f} руб",
-                    "Водонагреватель": f"{boiler_cost:,.0f} руб",
-                    "Разводка труб": f"{piping_cost:,.0f} руб",
-                    "Итого": f"{total_cost:,.0f} руб"
-                },
-                "recommendations": [
-                    f"Для {people} человек рекомендуем септик объемом {math.ceil(septic_volume)} м³",
-                    f"Водонагреватель на {boiler_volume} л (электрический или газовый)",
-                    "Установите фильтры грубой и тонкой очистки"
-                ]
-            }
-            
         except ValueError:
-            return {"error": "Некорректные числовые значения"}
+            return CalcResult.failure("Некорректные числовые значения")
+        
+        r = to_scalars(BatchCalculators.water_supply(people, daily_use))
+        septic_volume = r["septic_volume"]
+        boiler_volume = int(r["boiler_volume"])
+        
+        return CalcResult(
+            type="Расчет водоснабжения и канализации",
+            parameters={
+                "Количество человек": people,
+                "Сантехника": plumbing,
+                "Норма расхода": Value(daily_use, "л/чел/сутки")
+            },
+            results={
+                "Суточное потребление": Value(r["total_daily"], "л/сутки"),
+                "Объем септика": Value(septic_volume, "м³", ".1f"),
+                "Объем водонагревателя": Value(boiler_volume, "л"),
+                "Рекомендуемый насос": "Насосная станция 60-80 Вт" if people <= 4 else "Насосная станция 100-150 Вт"
+            },
+            cost={
+                "Септик": money(r["septic_cost"]),
+                "Водонагреватель": money(r["boiler_cost"]),
+                "Разводка труб": money(r["piping_cost"]),
+                "Итого": money(r["total_cost"])
+            },
+            recommendations=[
+                f"Для {people} человек рекомендуем септик объемом {math.ceil(septic_volume)} м³",
+                f"Водонагреватель на {boiler_volume} л (электрический или газовый)",
+                "Установите фильтры грубой и тонкой очистки"
+            ]
+        )
     
     @staticmethod
-    def calculate_electric(params: List[str]) -> Dict[str, any]:
+    def calculate_electric(params: List[str]) -> CalcResult:
         """
         Калькулятор электрики
         Формат: мощность напряжение фазы
         Пример: 15 220 1
         """
         if len(params) < 3:
-            return {"error": "Недостаточно параметров. Формат: мощность напряжение фазы"}
+            return CalcResult.failure("Недостаточно параметров. Формат: мощность напряжение фазы")
         
         try:
             power = float(params[0])  # кВт
             voltage = float(params[1])  # В
             phases = int(params[2])  # 1 или 3
-            
-            # Расчет тока
-            if phases == 1:
-                # Однофазная сеть: I = P / (U × cosφ)
-                cos_phi = 0.9  # коэффициент мощности
-                current = (power * 1000) / (voltage * cos_phi)  # А
-            else:
-                # Трехфазная сеть: I = P / (√3 × U × cosφ)
-                cos_phi = 0.85
-                current = (power * 1000) / (1.732 * voltage * cos_phi)
-            
-            # Выбор сечения провода по току
-            if current <= 16:
-                cable = "3×1.5 мм²"
-                breaker = "10А" if current <= 10 else "16А"
-            elif current <= 25:
-                cable = "3×2.5 мм²"
-                breaker = "16А" if current <= 16 else "20А"
-            elif current <= 32:
-                cable = "3×4 мм²"
-                breaker = "25А" if current <= 25 else "32А"
-            elif current <= 40:
-                cable = "3×6 мм²"
-                breaker = "32А"
-            else:
-                cable = "3×10 мм²"
-                breaker = "40А"
-            
-            # Стоимость
-            cable_cost = power * 800  # руб/кВт
-            panel_cost = power * 600  # руб/кВт
-            work_cost = power * 400   # руб/кВт
-            
-            total_cost = cable_cost + panel_cost + work_cost
-            
-            return {
-                "success": True,
-                "type": "Расчет электрики",
-                "parameters": {
-                    "Мощность": f"{power} кВт",
-                    "Напряжение": f"{voltage} В",
-                    "Фаз": phases
-                },
-                "results": {
-                    "Расчетный ток": f"{current:.1f} А",
-                    "Сечение кабеля": cable,
-                    "Автоматический выключатель": breaker,
-                    "Рекомендуемый счетчик": f"{power * 1.5:.0f} А"
-                },
-                "cost": {
-                    "Кабели и провода": f"{cable_cost:,.0f} руб",
-                    "Щиток и автоматы": f"{panel_cost:,.0f} руб",
-                    "Работа": f"{work_cost:,.0f} руб",
-                    "Итого": f"{total_cost:,.0f} руб"
-                },
-                "formula": "I = P / (U × cosφ) для 1 фазы, I = P / (√3 × U × cosφ) для 3 фаз"
-            }
-            
         except ValueError:
-            return {"error": "Некорректные числовые значения"}
+            return CalcResult.failure("Некорректные числовые значения")
+        
+        if voltage <= 0:
+            return CalcResult.failure("Напряжение должно быть больше нуля")
+        if phases not in (1, 3):
+            return CalcResult.failure("Фаз может быть 1 или 3")
+        
+        try:
+            r = to_scalars(BatchCalculators.electric(power, voltage, phases))
+        except ValueError as e:
+            return CalcResult.failure(str(e))
+        
+        return CalcResult(
+            type="Расчет электрики",
+            parameters={
+                "Мощность": Value(power, "кВт"),
+                "Напряжение": Value(voltage, "В"),
+                "Фаз": phases
+            },
+            results={
+                "Расчетный ток": Value(r["current"], "А", ".1f"),
+                "Сечение кабеля": f"{r['cores']:.0f}×{r['cable_section']:g} мм²",
+                "Автоматический выключатель": f"{r['breaker']:.0f}А",
+                "Рекомендуемый счетчик": Value(r["meter"], "А", ".0f")
+            },
+            cost={
+                "Кабели и провода": money(r["cable_cost"]),
+                "Щиток и автоматы": money(r["panel_cost"]),
+                "Работа": money(r["work_cost"]),
+                "Итого": money(r["total_cost"])
+            },
+            formula="I = P / (U × cosφ) для 1 фазы, I = P / (√3 × U × cosφ) для 3 фаз"
+        )
     
     @staticmethod
-    def calculate_concrete(params: List[str]) -> Dict[str, any]:
+    def calculate_concrete(params: List[str]) -> CalcResult:
         """
         Калькулятор бетона
-        Формат: объем марка добавки
+        Формат: объем марка [подвижность] [щебень] [добавки] [миксер=м³] [машин=N]
         Пример: 10 М300 пластификатор
         """
         if len(params) < 2:
-            return {"error": "Недостаточно параметров. Формат: объем марка [добавки]"}
+            return CalcResult.failure("Недостаточно параметров. Формат: объем марка [добавки]")
         
         try:
             volume = float(params[0])  # м³
-            grade = params[1].upper()  # М100, М200, М300
-            additives = params[2] if len(params) > 2 else None
-            
-            # Состав бетона на 1 м³
-            compositions = {
-                "М100": {"цемент": 180, "песок": 840, "щебень": 1050, "вода": 210},
-                "М150": {"цемент": 220, "песок": 780, "щебень": 1080, "вода": 190},
-                "М200": {"цемент": 280, "песок": 740, "щебень": 1100, "вода": 180},
-                "М250": {"цемент": 330, "песок": 700, "щебень": 1120, "вода": 170},
-                "М300": {"цемент": 380, "песок": 645, "щебень": 1080, "вода": 190},
-                "М350": {"цемент": 420, "песок": 590, "щебень": 1090, "вода": 180}
-            }
-            
-            if grade not in compositions:
-                return {"error": f"Неизвестная марка бетона: {grade}. Доступно: {', '.join(compositions.keys())}"}
-            
-            comp = compositions[grade]
-            
-            # Расчет материалов
-            cement = comp["цемент"] * volume
-            sand = comp["песок"] * volume
-            gravel = comp["щебень"] * volume
-            water = comp["вода"] * volume
-            
-            # Стоимость
-            cement_cost = cement * 12.5  # 12.5 руб/кг
-            sand_cost = sand * 0.8  # 0.8 руб/кг
-            gravel_cost = gravel * 1.2  # 1.2 руб/кг
-            additives_cost = 0
-            
-            if additives:
-                if "пластификатор" in additives.lower():
-                    additives_cost = volume * 500  # руб/м³
-                elif "противоморозный" in additives.lower():
-                    additives_cost = volume * 800
-            
-            material_cost = cement_cost + sand_cost + gravel_cost + additives_cost
-            work_cost = volume * 1500  # руб/м³ работы
-            
-            total_cost = material_cost + work_cost
-            
-            return {
-                "success": True,
-                "type": f"Расчет бетона {grade}",
-                "parameters": {
-                    "Объем": f"{volume} м³",
-                    "Марка": grade,
-                    "Добавки": additives if additives else "нет"
-                },
-                "materials": {
-                    "Цемент М500": f"{cement:.0f} кг",
-                    "Песок": f"{sand:.0f} кг",
-                    "Щебень 20-40": f"{gravel:.0f} кг",
-                    "Вода": f"{water:.0f} л"
-                },
-                "cost": {
-                    "Цемент": f"{cement_cost:,.0f} руб",
-                    "Песок": f"{sand_cost:,.0f} руб",
-                    "Щебень": f"{gravel_cost:,.0f} руб",
-                    "Добавки": f"{additives_cost:,.0f} руб" if additives_cost > 0 else "0 руб",
-                    "Работа": f"{work_cost:,.0f} руб",
-                    "Итого": f"{total_cost:,.0f} руб",
-                    "Цена за м³": f"{total_cost/volume:,.0f} руб"
-                },
-                "notes": [
-                    "Все пропорции указаны в кг на 1 м³ готового бетона",
-                    "Для точного расчета нужны лабораторные испытания",
-                    "Готовый товарный бетон стоит 4500-5500 руб/м³"
-                ]
-            }
-            
         except ValueError:
-            return {"error": "Некорректные числовые значения"}
+            return CalcResult.failure("Некорректные числовые значения")
+        if volume <= 0:
+            return CalcResult.failure("Объем должен быть положительным")
+        
+        try:
+            order = parse_order(params[2:])
+            mix = design_mix(params[1], order.get("aggregate", 40), order.get("slump", "П3"), order["additives"])
+            schedule = delivery_schedule(
+                mix, volume, order.get("truck_volume", TRUCK_VOLUME), order.get("fleet", TRUCK_FLEET),
+                order.get("pour_rate", POUR_RATE), start=order.get("start", SHIFT_START)
+            )
+        except ValueError as e:
+            return CalcResult.failure(str(e))
+        
+        grade = params[1].upper()  # М300 или класс В22.5
+        additives = order["additives"]
+        
+        r = to_scalars(BatchCalculators.concrete(volume, grade, additives, aggregate=mix.aggregate, slump=mix.slump))
+        batch = mix.batch(volume)
+        
+        parameters = {
+            "Объем": Value(volume, "м³"),
+            "Марка": grade if grade == f"М{mix.grade}" else f"{grade} (М{mix.grade})",
+            "Добавки": additives if additives else "нет"
+        }
+        if (mix.aggregate, mix.slump) != (40, "П3"):
+            parameters["Подвижность"] = mix.slump
+            parameters["Щебень"] = f"{AGGREGATE_FRACTIONS[mix.aggregate]} мм"
+        materials = {
+            "Цемент М500": Value(r['cement'], "кг", ".0f"),
+            "Песок": Value(r['sand'], "кг", ".0f"),
+            f"Щебень {AGGREGATE_FRACTIONS[mix.aggregate]}": Value(r['gravel'], "кг", ".0f"),
+            "Вода": Value(r['water'], "л", ".0f")
+        }
+        if mix.plasticizer:
+            materials["Пластификатор"] = Value(batch['plasticizer'], "кг", ".1f")
+        if mix.antifreeze:
+            materials["Противоморозная добавка"] = Value(batch['antifreeze'], "кг", ".1f")
+        
+        # Доставка: замесы по миксерам и график, если нужен не один рейс
+        results = None
+        recommendations = None
+        if len(schedule.loads) > 1:
+            results = {
+                "Рейсов": len(schedule.loads),
+                "Миксеров": schedule.trucks,
+                "Начало заливки": format_time(schedule.loads[0].arrival),
+                "Конец заливки": format_time(schedule.loads[-1].finish),
+                "Простой укладки": Value(schedule.pump_idle, "ч", ".1f")
+            }
+            recommendations = [
+                f"{row['loads']} × {row['volume']:g} м³: цемент {row['cement']:.0f} кг, песок {row['sand']:.0f} кг, "
+                f"щебень {row['gravel']:.0f} кг, вода {row['water']:.0f} л"
+                for row in batch_sheet(schedule)
+            ]
+            shown = schedule.loads[:CONCRETE_SCHEDULE_ROWS]
+            recommendations += [
+                f"Рейс {load.number} (миксер {load.truck}, {load.volume:g} м³): загрузка {format_time(load.loading)}, "
+                f"выгрузка {format_time(load.start)}-{format_time(load.finish)}"
+                for load in shown
+            ]
+            if len(schedule.loads) > len(shown):
+                recommendations.append(f"... еще {len(schedule.loads) - len(shown)} рейсов в том же ритме")
+        
+        return CalcResult(
+            type=f"Расчет бетона {grade}",
+            parameters=parameters,
+            materials=materials,
+            cost={
+                "Цемент": money(r['cement_cost']),
+                "Песок": money(r['sand_cost']),
+                "Щебень": money(r['gravel_cost']),
+                "Добавки": money(r['additives_cost']),
+                "Работа": money(r['work_cost']),
+                "Итого": money(r['total_cost']),
+                "Цена за м³": money(r['cost_per_m3'])
+            },
+            results=results,
+            recommendations=recommendations,
+            notes=[
+                *schedule.warnings,
+                "Все пропорции указаны в кг на 1 м³ готового бетона",
+                "Для точного расчета нужны лабораторные испытания",
+                "Готовый товарный бетон стоит 4500-5500 руб/м³"
+            ]
+        )
     
     @staticmethod
-    def calculate_materials(params: List[str]) -> Dict[str, any]:
+    def calculate_materials(params: List[str]) -> CalcResult:
         """
         Универсальный калькулятор материалов
         Формат: материал площадь/объем толщина
@@ -957,244 +802,294 @@ class ConstructionCalculators:
           бетон 30 м³ фундамент
           кирпич 100 м² стена
           утеплитель 50 м² 100 мм
+          гипсокартон 40 м²
         """
         if len(params) < 3:
-            return {"error": "Недостаточно параметров. Формат: материал количество единица [толщина]"}
+            return CalcResult.failure("Недостаточно параметров. Формат: материал количество единица [толщина]")
         
         material = params[0].lower()
-        quantity = float(params[1])
         unit = params[2].lower()
         
         try:
-            if material == "бетон":
-                # Бетон в м³
-                if unit != "м³":
-                    return {"error": "Для бетона используйте м³"}
-                
-                cement = quantity * 380  # кг
-                sand = quantity * 645    # кг
-                gravel = quantity * 1080 # кг
-                
-                return {
-                    "success": True,
-                    "type": "Расчет материалов для бетона М300",
-                    "parameters": {
-                        "Объем": f"{quantity} м³",
-                        "Марка": "М300"
-                    },
-                    "materials": {
-                        "Цемент М500": f"{cement:.0f} кг",
-                        "Песок": f"{sand:.0f} кг", 
-                        "Щебень 20-40": f"{gravel:.0f} кг",
-                        "Вода": f"{quantity * 190:.0f} л"
-                    },
-                    "cost": {
-                        "Материалы": f"{quantity * 2500:,.0f} руб",
-                        "Работа": f"{quantity * 1500:,.0f} руб",
-                        "Итого": f"{quantity * 4000:,.0f} руб"
-                    }
-                }
+            quantity = float(params[1])
+            thickness = 0.0
             
-            elif material == "кирпич":
-                # Кирпич для стен
-                if unit != "м²":
-                    return {"error": "Для кирпича используйте м²"}
-                
-                # Кирпичей в м² при толщине 510 мм (2 кирпича)
-                bricks = quantity * 102
-                mortar = quantity * 0.05  # м³ раствора
-                
-                return {
-                    "success": True,
-                    "type": "Расчет кирпича для стен",
-                    "parameters": {
-                        "Площадь стен": f"{quantity} м²",
-                        "Толщина": "510 мм (2 кирпича)"
-                    },
-                    "materials": {
-                        "Кирпич М150": f"{bricks:.0f} шт",
-                        "Раствор М100": f"{mortar:.2f} м³"
-                    },
-                    "cost": {
-                        "Кирпич": f"{bricks * 30:,.0f} руб",
-                        "Раствор": f"{mortar * 3500:,.0f} руб",
-                        "Итого": f"{bricks * 30 + mortar * 3500:,.0f} руб"
-                    }
-                }
+            if material not in MATERIAL_TYPES and material not in SHEET_STOCK:
+                return CalcResult.failure(
+                    f"Неизвестный материал: {material}. Доступно: бетон, кирпич, утеплитель, краска, "
+                    f"{', '.join(SHEET_STOCK)}"
+                )
+            
+            # Единица измерения и название в родительном падеже
+            expected_unit, genitive = {
+                "бетон": ("м³", "бетона"),
+                "кирпич": ("м²", "кирпича"),
+                "утеплитель": ("м²", "утеплителя"),
+                "краска": ("м²", "краски"),
+                **dict.fromkeys(SHEET_STOCK, ("м²", "листовых материалов"))
+            }[material]
+            try:
+                quantity = convert(quantity, unit, expected_unit)
+            except UnitError:
+                return CalcResult.failure(f"Для {genitive} используйте {expected_unit}")
+            if quantity <= 0:
+                return CalcResult.failure("Количество должно быть положительным")
             
-            elif material == "утеплитель":
-                # Утеплитель
-                if unit != "м²":
-                    return {"error": "Для утеплителя используйте м²"}
-                
+            if material in SHEET_STOCK:
+                thickness = float(params[3]) if len(params) > 3 else 0.0  # мм, для справки
+            
+            if material == "утеплитель":
                 if len(params) < 4:
-                    return {"error": "Для утеплителя укажите толщину (мм)"}
-                
+                    return CalcResult.failure("Для утеплителя укажите толщину (мм)")
                 thickness = float(params[3])  # мм
-                volume = quantity * thickness / 1000  # м³ утеплителя
-                
-                # Для минваты плотностью 30 кг/м³
-                weight = volume * 30  # кг
-                
-                return {
-                    "success": True,
-                    "type": "Расчет утеплителя",
-                    "parameters": {
-                        "Площадь": f"{quantity} м²",
-                        "Толщина": f"{thickness} мм",
-                        "Объем": f"{volume:.2f} м³"
-                    },
-                    "materials": {
-                        "Минеральная вата": f"{weight:.0f} кг",
-                        "Пароизоляция": f"{quantity:.0f} м²",
-                        "Крепеж": f"{quantity * 6:.0f} шт дюбелей"
-                    },
-                    "cost": {
-                        "Утеплитель": f"{quantity * 350:,.0f} руб",
-                        "Пароизоляция": f"{quantity * 40:,.0f} руб",
-                        "Работа": f"{quantity * 250:,.0f} руб",
-                        "Итого": f"{quantity * 640:,.0f} руб"
-                    }
+        except ValueError:
+            return CalcResult.failure("Некорректные числовые значения")
+        
+        if material in SHEET_STOCK:
+            # Листы считаются раскроем стены стандартной высоты, а не нормой на м²
+            plan = cover_area(quantity, material)
+            width, height = SHEET_STOCK[material]
+            norm = consumption_norms.get(material)
+            parameters = {
+                "Площадь обшивки": Value(quantity, "м²"),
+                "Лист": f"{width:g}×{height:g} м" + (f", {thickness:g} мм" if thickness else ""),
+                "Высота стен": Value(DEFAULT_COVER_HEIGHT, "м")
+            }
+            materials = {
+                "Листов": Value(plan.count, "шт"),
+                "Площадь листов": Value(plan.purchased, "м²", ".1f"),
+                "Отходы раскроя": Value(plan.waste * 100, "%", ".0f")
+            }
+            if norm and norm.base_unit == "м²":
+                materials["По норме расхода"] = Value(quantity * norm.per_unit, norm.unit, ".1f")
+            sheets_cost = plan.purchased * price_book.prices()[SHEET_PRICE_KEYS[material]]
+            return CalcResult(
+                type=f"Раскрой листов: {material}",
+                parameters=parameters,
+                materials=materials,
+                cost={
+                    "Листы": money(sheets_cost),
+                    "Итого": money(sheets_cost)
+                },
+                formula="Целые листы по сетке стены, доборы раскраиваются из общих листов"
+            )
+        
+        r = to_scalars(BatchCalculators.materials(material, quantity, thickness))
+        
+        if material == "бетон":
+            return CalcResult(
+                type="Расчет материалов для бетона М300",
+                parameters={
+                    "Объем": Value(quantity, "м³"),
+                    "Марка": "М300"
+                },
+                materials={
+                    "Цемент М500": Value(r['cement'], "кг", ".0f"),
+                    "Песок": Value(r['sand'], "кг", ".0f"), 
+                    "Щебень 20-40": Value(r['gravel'], "кг", ".0f"),
+                    "Вода": Value(r['water'], "л", ".0f")
+                },
+                cost={
+                    "Материалы": money(r['materials_cost']),
+                    "Работа": money(r['work_cost']),
+                    "Итого": money(r['total_cost'])
                 }
-            
-            elif material == "краска":
-                # Краска для стен
-                if unit != "м²":
-                    return {"error": "Для краски используйте м²"}
-                
-                # Расход краски 1 л на 10 м² в 2 слоя
-                paint = quantity * 0.2  # литров
-                
-                return {
-                    "success": True,
-                    "type": "Расчет краски для стен",
-                    "parameters": {
-                        "Площадь": f"{quantity} м²",
-                        "Слоев": "2"
-                    },
-                    "materials": {
-                        "Водоэмульсионная краска": f"{paint:.1f} л",
-                        "Грунтовка": f"{quantity * 0.1:.1f} л",
-                        "Валики, кисти": "1 набор"
-                    },
-                    "cost": {
-                        "Краска": f"{paint * 300:,.0f} руб",
-                        "Грунтовка": f"{quantity * 0.1 * 150:,.0f} руб",
-                        "Итого": f"{paint * 300 + quantity * 15:,.0f} руб"
-                    }
+            )
+        
+        if material == "кирпич":
+            return CalcResult(
+                type="Расчет кирпича для стен",
+                parameters={
+                    "Площадь стен": Value(quantity, "м²"),
+                    "Толщина": "510 мм (2 кирпича)"
+                },
+                materials={
+                    "Кирпич М150": Value(r['bricks'], "шт", ".0f"),
+                    "Раствор М100": Value(r['mortar'], "м³", ".2f")
+                },
+                cost={
+                    "Кирпич": money(r['bricks_cost']),
+                    "Раствор": money(r['mortar_cost']),
+                    "Итого": money(r['total_cost'])
                 }
-            
+            )
+        
+        if material == "утеплитель":
+            return CalcResult(
+                type="Расчет утеплителя",
+                parameters={
+                    "Площадь": Value(quantity, "м²"),
+                    "Толщина": Value(thickness, "мм"),
+                    "Объем": Value(r['volume'], "м³", ".2f")
+                },
+                materials={
+                    "Минеральная вата": Value(r['weight'], "кг", ".0f"),
+                    "Пароизоляция": Value(r['vapor_barrier'], "м²", ".0f"),
+                    "Крепеж": Value(r['fasteners'], "шт дюбелей", ".0f")
+                },
+                cost={
+                    "Утеплитель": money(r['insulation_cost']),
+                    "Пароизоляция": money(r['vapor_barrier_cost']),
+                    "Работа": money(r['work_cost']),
+                    "Итого": money(r['total_cost'])
+                }
+            )
+        
+        return CalcResult(
+            type="Расчет краски для стен",
+            parameters={
+                "Площадь": Value(quantity, "м²"),
+                "Слоев": "2"
+            },
+            materials={
+                "Водоэмульсионная краска": Value(r['paint'], "л", ".1f"),
+                "Грунтовка": Value(r['primer'], "л", ".1f"),
+                "Валики, кисти": "1 набор"
+            },
+            cost={
+                "Краска": money(r['paint_cost']),
+                "Грунтовка": money(r['primer_cost']),
+                "Итого": money(r['total_cost'])
+            }
+        )
+    
+    @staticmethod
+    def calculate_cutting(params: List[str]) -> CalcResult:
+        """
+        Раскрой хлыстов и листов
+        Формат: материал детали (длина×количество или ширина×высота×количество)
+        Примеры:
+          доска 2.4x10 1.5x7 0.8x12
+          фанера 0.6x0.4x20 1.2x0.5x6
+        """
+        if len(params) < 2:
+            return CalcResult.failure("Недостаточно параметров. Формат: материал детали")
+        
+        material = params[0].lower()
+        if material in LINEAR_STOCK:
+            dims = 1
+        elif material in SHEET_STOCK:
+            dims = 2
+        else:
+            return CalcResult.failure(
+                f"Неизвестный материал: {material}. Доступно: {', '.join(list(LINEAR_STOCK) + list(SHEET_STOCK))}"
+            )
+        
+        sizes, quantities = [], []
+        for token in params[1:]:
+            try:
+                numbers = [float(part) for part in re.split(r"[x×х*]", token.lower().replace(",", "."))]
+            except ValueError:
+                return CalcResult.failure(f"Некорректная деталь: {token}")
+            if len(numbers) not in (dims, dims + 1) or (len(numbers) > dims and numbers[-1] != int(numbers[-1])):
+                example = "2.4x10" if dims == 1 else "0.6x0.4x20"
+                return CalcResult.failure(f"Некорректная деталь: {token}. Пример: {example}")
+            sizes.append(numbers[:dims])
+            quantities.append(int(numbers[dims]) if len(numbers) > dims else 1)
+        
+        kerf = KERF.get(material, 0.0)
+        try:
+            if dims == 1:
+                stock = LINEAR_STOCK[material]
+                plan = cut_linear([size[0] for size in sizes], quantities, stock, kerf)
+                stock_name, stock_text, unit = "Хлыстов", f"{stock:g} м", "м"
             else:
-                return {"error": f"Неизвестный материал: {material}. Доступно: бетон, кирпич, утеплитель, краска"}
-                
-        except ValueError:
-            return {"error": "Некорректные числовые значения"}
+                width, height = SHEET_STOCK[material]
+                plan = cut_sheets(sizes, quantities, (width, height), kerf)
+                stock_name, stock_text, unit = "Листов", f"{width:g}×{height:g} м", "м²"
+        except ValueError as e:
+            return CalcResult.failure(str(e))
+        
+        materials = {
+            stock_name: Value(plan.count, "шт"),
+            "Материала в деталях": Value(plan.used, unit, ".2f"),
+            "Отходы": Value(plan.waste * 100, "%", ".1f")
+        }
+        for i, (pieces, repeat) in enumerate(plan.patterns[:5], 1):
+            materials[f"Схема {i} (×{repeat})"] = describe_pattern(pieces)
+        if len(plan.patterns) > 5:
+            materials["Других схем"] = str(len(plan.patterns) - 5)
+        
+        return CalcResult(
+            type=f"Раскрой: {material}",
+            parameters={
+                "Заготовка": stock_text,
+                "Деталей": Value(sum(quantities), "шт"),
+                "Пропил": Value(kerf * 1000, "мм", ".0f")
+            },
+            materials=materials,
+            formula="Первый подходящий по убыванию размеров"
+                    + ("; заготовок меньше не бывает" if plan.optimal else "; возможен раскрой на заготовку меньше")
+        )
     
     @staticmethod
-    def parse_calc_command(text: str) -> Tuple[str, List[str], Optional[Dict]]:
+    def calculate_house(params: List[str]) -> CalcResult:
+        """
+        Смета дома целиком: фундамент, стены, кровля, отопление, электрика, вода
+        Формат: длина ширина [этажи] [материал] [регион]
+        Пример: 10 10 2 газобетон москва
+        """
+        try:
+            spec = parse_house_command(params)
+            return estimate_house(spec).to_calc_result()
+        except ValueError as e:
+            return CalcResult.failure(str(e))
+    
+    @staticmethod
+    def calculate_house_risk(params: List[str]) -> CalcResult:
+        """
+        Разброс сметы дома: цены и перерасход разыгрываются в своих диапазонах
+        Формат: как у сметы дома
+        Пример: 10 10 2 газобетон москва
+        """
+        try:
+            spec = parse_house_command(params)
+            # Фиксированное зерно: одна и та же команда дает один и тот же ответ
+            return simulate_house(spec, seed=0).to_calc_result()
+        except ValueError as e:
+            return CalcResult.failure(str(e))
+    
+    @staticmethod
+    def calculate_sweep(params: List[str]) -> CalcResult:
+        """
+        Перебор вариантов и чувствительность: калькулятор и параметры с диапазонами
+        Формат: калькулятор параметры (a..b, a..b:шаги или a/b/c)
+        Пример: стены 40 3 0.3..0.5 газобетон/кирпич
+        """
+        try:
+            calc, base, grid = parse_sweep_command(params)
+            return sweep_to_calc_result(sweep(calc, base, grid))
+        except ValueError as e:
+            return CalcResult.failure(str(e))
+    
+    @staticmethod
+    def parse_calc_command(text: str) -> Tuple[str, List[str], CalcResult]:
         """
         Парсит команду калькулятора и возвращает результат
+        
+        Разбор по грамматике calc_grammar: калькулятор получает параметры
+        уже приведенными к основным единицам, ошибки - с позицией в тексте.
         """
-        parts = text.strip().split()
-        
-        if not parts:
-            return "empty", [], {"error": "Введите команду для калькулятора"}
-        
-        calc_type = parts[0].lower()
-        params = parts[1:] if len(parts) > 1 else []
-        
-        calculators = {
-            "фундамент": ConstructionCalculators.calculate_foundation,
-            "стены": ConstructionCalculators.calculate_walls,
-            "крыша": ConstructionCalculators.calculate_roof,
-            "теплопотери": ConstructionCalculators.calculate_heat_loss,
-            "стоимость": ConstructionCalculators.calculate_cost,
-            "площадь": ConstructionCalculators.calculate_area_volume,
-            "водоснабжение": ConstructionCalculators.calculate_water_supply,
-            "электрика": ConstructionCalculators.calculate_electric,
-            "бетон": ConstructionCalculators.calculate_concrete,
-            "материалы": ConstructionCalculators.calculate_materials,
-            "фундамент": ConstructionCalculators.calculate_foundation,
-            "крыша": ConstructionCalculators.calculate_roof,
-            "тепло": ConstructionCalculators.calculate_heat_loss,
-            "цена": ConstructionCalculators.calculate_cost,
-            "вода": ConstructionCalculators.calculate_water_supply,
-            "электрика": ConstructionCalculators.calculate_electric,
-            "бетон": ConstructionCalculators.calculate_concrete
-        }
+        try:
+            parsed = parse_command(text)
+        except ParseError as e:
+            calc_type = e.command or ("unknown" if text.strip() else "empty")
+            return calc_type, [], CalcResult.failure(str(e))
         
-        if calc_type in calculators:
-            result = calculators[calc_type](params)
-            return calc_type, params, result
-        else:
-            # Пробуем определить тип калькулятора по параметрам
-            if any(word in text.lower() for word in ['длина', 'ширина', 'глубина', 'периметр']):
-                if any(word in text.lower() for word in ['фундамент', 'бетон']):
-                    result = ConstructionCalculators.calculate_foundation(params)
-                    return "фундамент", params, result
-                elif any(word in text.lower() for word in ['стен', 'кирпич', 'газобетон']):
-                    result = ConstructionCalculators.calculate_walls(params)
-                    return "стены", params, result
-            
-            return "unknown", params, {"error": f"Неизвестный калькулятор: {calc_type}. Используйте: фундамент, стены, крыша, теплопотери, стоимость, площадь, водоснабжение, электрика, бетон, материалы"}
+        # Одинаковые расчеты из чата и /calculate считаются один раз
+        key = calc_cache.make_key(parsed.command, parsed.params)
+        result = calc_cache.get(key)
+        if result is None:
+            with price_book.recording() as reads:
+                result = CALCULATORS[parsed.command](list(parsed.params))
+            calc_cache.put(key, result, depends=reads)
+        
+        return parsed.command, list(parsed.params), result
     
     @staticmethod
-    def format_result(calc_type: str, result: Dict) -> str:
+    def format_result(calc_type: str, result: CalcResult) -> str:
         """Форматирует результат расчета в читаемый текст"""
-        if "error" in result:
-            return f"❌ *Ошибка:* {result['error']}"
-        
-        if not result.get("success", False):
-            return "❌ *Ошибка расчета*"
-        
-        response = f"🧮 *Результат расчета ({result.get('type', calc_type)})*\n\n"
-        
-        # Параметры
-        if "parameters" in result:
-            response += "*Параметры:*\n"
-            for key, value in result["parameters"].items():
-                response += f"• {key}: {value}\n"
-            response += "\n"
-        
-        # Материалы
-        if "materials" in result:
-            response += "*Материалы:*\n"
-            for material, amount in result["materials"].items():
-                response += f"• {material}: {amount}\n"
-            response += "\n"
-        
-        # Стоимость
-        if "cost" in result:
-            response += "*Стоимость:*\n"
-            for item, cost in result["cost"].items():
-                response += f"• {item}: {cost}\n"
-            response += "\n"
-        
-        # Результаты
-        if "results" in result:
-            response += "*Результаты:*\n"
-            for key, value in result["results"].items():
-                response += f"• {key}: {value}\n"
-            response += "\n"
-        
-        # Рекомендации
-        if "recommendations" in result:
-            response += "*Рекомендации:*\n"
-            for i, rec in enumerate(result["recommendations"], 1):
-                response += f"{i}. {rec}\n"
-            response += "\n"
-        
-        # Формула
-        if "formula" in result:
-            response += f"*Формула:* {result['formula']}\n"
-        
-        # Примечания
-        if "notes" in result:
-            response += "\n*Примечания:*\n"
-            for note in result["notes"]:
-                response += f"• {note}\n"
-        
-        return response
+        return result.render(calc_type)
     
     @staticmethod
     def get_calc_help(calc_type: str = None) -> str:
@@ -1203,14 +1098,19 @@ class ConstructionCalculators:
             helps = {
                 "фундамент": "🧱 *Калькулятор фундамента*\nФормат: `длина ширина глубина тип`\nПример: `10 8 1.5 ленточный`\nТипы: ленточный, плитный",
                 "стены": "🏠 *Калькулятор стен*\nФормат: `периметр высота толщина материал`\nПример: `40 3 0.4 газобетон`\nМатериалы: газобетон, кирпич, дерево",
-                "крыша": "🏠 *Калькулятор крыши*\nФормат: `длина ширина уклон материал`\nПример: `10 8 30 металлочерепица`\nМатериалы: металлочерепица, мягкая",
+                "крыша": "🏠 *Калькулятор крыши*\nФормат: `длина ширина уклон материал [форма]`\nПример: `10 8 30 металлочерепица вальмовая`\nМатериалы: металлочерепица, мягкая\nФормы: двускатная (по умолчанию), вальмовая, шатровая, односкатная",
                 "теплопотери": "🔥 *Калькулятор теплопотерь*\nФормат: `площадь этажи регион утепление`\nПример: `150 2 москва хорошее`\nРегионы: москва, спб, екатеринбург",
+                "подбор": "🧭 *Подбор стен*\nФормат: `площадь этажи регион [предел кВт]`\nПример: `150 2 москва 9`\nПеребирает газобетон, кирпич и брус разной толщины с утеплителями из прайса и каталога, показывает варианты от дешевого к теплому",
                 "стоимость": "💰 *Калькулятор стоимости*\nФормат: `работа площадь материал качество`\nПример: `фундамент 100 ленточный стандарт`\nКачество: эконом, стандарт, премиум",
-                "площадь": "📏 *Калькулятор площади/объема*\nФормат: `фигура параметры`\nПримеры:\n`прямоугольник 10 5`\n`круг 3`\n`параллелепипед 5 4 3`",
+                "площадь": "📏 *Калькулятор площади/объема*\nФормат: `фигура параметры`\nПримеры:\n`прямоугольник 10 5`\n`круг 3`\n`параллелепипед 5 4 3`\n`г-образный 12 10 4 5` - длина, ширина и вырезанный угол\n`многоугольник 0 0 8 0 8 6 0 6` - координаты вершин x y по порядку обхода",
                 "водоснабжение": "💧 *Калькулятор водоснабжения*\nФормат: `люди сантехника расход`\nПример: `4 ванна+душ 200`",
                 "электрика": "⚡ *Калькулятор электрики*\nФормат: `мощность напряжение фазы`\nПример: `15 220 1`",
-                "бетон": "🧱 *Калькулятор бетона*\nФормат: `объем марка добавки`\nПример: `10 М300 пластификатор`",
-                "материалы": "📦 *Калькулятор материалов*\nФормат: `материал площадь/объем толщина`\nПримеры:\n`бетон 30 м³`\n`кирпич 100 м²`\n`утеплитель 50 м² 100`"
+                "бетон": "🧱 *Калькулятор бетона*\nФормат: `объем марка [подвижность] [щебень] [добавки]`\nПример: `10 М300 пластификатор`\nМарки М100-М500 (шаг 5) или классы В7.5-В40, подвижность П1-П5, щебень фр10/фр20/фр40\nБольшая заливка: `500 В25 П4 миксер=9 машин=6` - замесы по миксерам и график подачи",
+                "материалы": "📦 *Калькулятор материалов*\nФормат: `материал площадь/объем толщина`\nПримеры:\n`бетон 30 м³`\n`кирпич 100 м²`\n`утеплитель 50 м² 100`\n`гипсокартон 40 м²`",
+                "раскрой": "🪚 *Раскрой материалов*\nФормат: `материал детали`\nДеталь хлыста - `длина×количество`, листа - `ширина×высота×количество` (м)\nПримеры:\n`доска 2.4x10 1.5x7`\n`фанера 0.6x0.4x20`\nХлысты: арматура, доска, брус, профиль, труба\nЛисты: гипсокартон, гвл, осп, фанера",
+                "дом": "🏡 *Смета дома целиком*\nФормат: `длина ширина [этажи] [материал] [регион]`\nПример: `10 10 2 газобетон москва`\nМожно добавить кровлю, тип фундамента и утепление: `12 9 1 кирпич мягкая плитный спб`",
+                "перебор": "📊 *Перебор вариантов*\nФормат: `калькулятор параметры`, вместо числа - диапазон или список\nПример: `стены 40 3 0.3..0.5 газобетон/кирпич`\n`0.3..0.5` - 5 шагов, `0.3..0.5:3` - 3 шага, `а/б/в` - список\nКалькуляторы: фундамент, стены, крыша, теплопотери, бетон, дом",
+                "разброс": "🎲 *Разброс сметы дома*\nФормат: как у сметы дома `длина ширина [этажи] [материал] [регион]`\nПример: `10 10 2 газобетон москва`\nЦены и перерасход разыгрываются 20 000 раз, итог - P10/P50/P90"
             }
             
             return helps.get(calc_type, f"Справка по калькулятору '{calc_type}' не найдена")
@@ -1251,6 +1151,26 @@ class ConstructionCalculators:
 10. 📦 *Материалы* - расчет количества материалов
     Команда: `материалы бетон 30 м³`
 
+11. 🏡 *Дом* - смета дома целиком одной командой
+    Команда: `дом 10 10 2 газобетон москва`
+
+12. 📊 *Перебор* - сравнение вариантов и влияние параметров
+    Команда: `перебор стены 40 3 0.3..0.5 газобетон/кирпич`
+
+13. 🎲 *Разброс* - смета дома с диапазоном цен P10/P50/P90
+    Команда: `разброс 10 10 2 газобетон москва`
+
+14. 🪚 *Раскрой* - хлысты и листы на детали с минимумом отходов
+    Команда: `раскрой доска 2.4x10 1.5x7 0.8x12`
+
+15. 🧭 *Подбор* - самые дешевые стены в пределе теплопотерь
+    Команда: `подбор 150 2 москва 9`
+
+*Как вводить параметры:*
+• Единицы пересчитываются сами: `400мм`, `150 см`, `30 м³`, `1500Вт`
+• Дробные числа можно писать с запятой: `1,5`
+• Параметры можно называть по имени: `фундамент длина=10 ширина=8 глубина=1.5 ленточный`
+
 *Примечание:*
 • Все расчеты приблизительные
 • Для точных расчетов нужен проект
@@ -1258,9 +1178,30 @@ class ConstructionCalculators:
 • Учитывайте региональные коэффициенты
 
 *Пример полного расчета дома 100 м²:*
+дом 10 10 1 газобетон москва
+или по отдельности:
 фундамент 10 10 1.5 ленточный
 стены 40 3 0.4 газобетон
 крыша 10 10 30 металлочерепица
 теплопотери 100 1 москва хорошее
 """
-        return help_text
\ No newline at end of file
+        return help_text
+
+# Калькулятор по каноническому имени команды из calc_grammar.GRAMMAR
+CALCULATORS = {
+    "фундамент": ConstructionCalculators.calculate_foundation,
+    "стены": ConstructionCalculators.calculate_walls,
+    "крыша": ConstructionCalculators.calculate_roof,
+    "теплопотери": ConstructionCalculators.calculate_heat_loss,
+    "подбор": ConstructionCalculators.calculate_wall_choice,
+    "стоимость": ConstructionCalculators.calculate_cost,
+    "площадь": ConstructionCalculators.calculate_area_volume,
+    "водоснабжение": ConstructionCalculators.calculate_water_supply,
+    "электрика": ConstructionCalculators.calculate_electric,
+    "бетон": ConstructionCalculators.calculate_concrete,
+    "материалы": ConstructionCalculators.calculate_materials,
+    "раскрой": ConstructionCalculators.calculate_cutting,
+    "дом": ConstructionCalculators.calculate_house,
+    "разброс": ConstructionCalculators.calculate_house_risk,
+    "перебор": ConstructionCalculators.calculate_sweep
+}
\ No newline at end of file
@@ -0,0 +1,340 @@
+"""
+НАГРУЗОЧНОЕ ТЕСТИРОВАНИЕ БОТА v12.0
+Локальный эмулятор Telegram Bot API и генератор синтетической нагрузки
+
+Запуск:
+    python loadtest.py --concurrency 1 4 16 --requests 300 --api-delay 0.05
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import re
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from telegram import Update
+
+from config import DB_PATH
+from keyboards import ConstructionCalculators
+
+logger = logging.getLogger(__name__)
+
+# Токен-заглушка: запросы никогда не уходят в настоящий Telegram
+FAKE_TOKEN = "123456:LOADTEST"
+
+# Вопросы на случай пустой базы знаний
+FALLBACK_QUESTIONS = [
+    "Какой глубины должен быть фундамент?",
+    "Сколько стоит залить ленточный фундамент 10×10 м?",
+    "Что лучше газобетон или кирпич?",
+    "Как рассчитать стропила для крыши?",
+    "Какое сечение провода для розеток?",
+    "Сколько сохнет фундамент перед кладкой стен?"
+]
+
+# Кнопки главных разделов
+CALLBACK_DATA = [
+    "menu_main", "search_main", "knowledge_base", "calculators_main",
+    "calc_help", "calc_фундамент", "calc_стены", "calc_крыша", "calc_теплопотери",
+    "materials_main", "favorites_main", "stats_main"
+]
+
+# Сценарий -> обработчик в main.build_application()
+SCENARIO_HANDLERS = {
+    "start": "start",
+    "question": "handle_message",
+    "calc": "calculate",
+    "button": "button_handler"
+}
+
+# ==================== ЭМУЛЯТОР BOT API ====================
+
+class FakeBotAPI:
+    """HTTP-сервер, отвечающий как Telegram Bot API и записывающий отправленные сообщения"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay: float = 0.0):
+        self.delay = delay
+        self.sent: List[Dict[str, Any]] = []
+        self.calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._message_id = 0
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/bot"
+
+    def start(self) -> "FakeBotAPI":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _make_handler(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = self.rfile.read(length).decode("utf-8", "replace") if length else ""
+                params = {k: v[0] for k, v in parse_qs(body).items()}
+                method = self.path.rstrip("/").rsplit("/", 1)[-1]
+
+                if api.delay:
+                    time.sleep(api.delay)
+
+                payload = json.dumps({"ok": True, "result": api.respond(method, params)}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def respond(self, method: str, params: Dict[str, str]) -> Any:
+        """Ответ на вызов метода Bot API"""
+        with self._lock:
+            self.calls[method] = self.calls.get(method, 0) + 1
+
+            if method == "getMe":
+                return {"id": 1, "is_bot": True, "first_name": "LoadTest", "username": "loadtest_bot",
+                        "can_join_groups": True, "can_read_all_group_messages": False,
+                        "supports_inline_queries": False}
+
+            if method in ("sendMessage", "editMessageText", "sendDocument"):
+                self._message_id += 1
+                self.sent.append({"method": method, "chat_id": params.get("chat_id"),
+                                  "text": params.get("text", ""), "time": time.time()})
+                chat_id = int(params.get("chat_id") or 1)
+                return {"message_id": self._message_id, "date": int(time.time()),
+                        "chat": {"id": chat_id, "type": "private"}, "text": params.get("text", "")}
+
+            return True
+
+# ==================== ГЕНЕРАТОР НАГРУЗКИ ====================
+
+def load_questions(limit: int = 500) -> List[str]:
+    """Вопросы из базы знаний (заполняется load_real_qa)"""
+    try:
+        conn = sqlite3.connect(str(DB_PATH))
+        rows = conn.execute("SELECT question FROM qa_pairs ORDER BY RANDOM() LIMIT ?", (limit,)).fetchall()
+        conn.close()
+        questions = [row[0] for row in rows]
+    except sqlite3.Error as e:
+        logger.warning(f"База знаний недоступна: {e}")
+        questions = []
+
+    return questions or FALLBACK_QUESTIONS
+
+def load_calc_commands() -> List[str]:
+    """Команды калькуляторов из справки get_calc_help"""
+    help_text = ConstructionCalculators.get_calc_help()
+    return re.findall(r"Команда: `([^`]+)`", help_text)
+
+class LoadGenerator:
+    """Генератор синтетических обновлений Telegram"""
+
+    def __init__(self, mix: Dict[str, float], seed: Optional[int] = None):
+        self.rng = random.Random(seed)
+        self.scenarios = list(mix.keys())
+        self.weights = list(mix.values())
+        self.questions = load_questions()
+        self.calc_commands = load_calc_commands()
+        self._update_id = 0
+
+    def _jitter(self, command: str) -> str:
+        """Случайно меняет числовые параметры, сохраняя формат команды"""
+        def repl(match):
+            value = float(match.group(0)) * self.rng.uniform(0.5, 1.5)
+            return f"{value:.1f}" if "." in match.group(0) else str(max(1, round(value)))
+
+        calc_type, _, params = command.partition(" ")
+        # Марки бетона (М300) не меняем
+        params = re.sub(r"(?<![\w.])\d+(?:\.\d+)?", repl, params)
+        return f"{calc_type} {params}"
+
+    def _message(self, user_id: int, text: str) -> Dict[str, Any]:
+        message = {
+            "message_id": self._update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"},
+            "text": text
+        }
+        if text.startswith("/"):
+            command = text.split()[0]
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(command)}]
+        return message
+
+    def next_update(self, user_id: int) -> Dict[str, Any]:
+        """Следующее обновление: {"scenario": ..., "update": dict}"""
+        self._update_id += 1
+        scenario = self.rng.choices(self.scenarios, self.weights)[0]
+
+        if scenario == "start":
+            data = {"message": self._message(user_id, "/start")}
+        elif scenario == "question":
+            data = {"message": self._message(user_id, self.rng.choice(self.questions))}
+        elif scenario == "calc":
+            command = self._jitter(self.rng.choice(self.calc_commands))
+            data = {"message": self._message(user_id, f"/calculate {command}")}
+        else:
+            data = {"callback_query": {
+                "id": str(self._update_id),
+                "from": {"id": user_id, "is_bot": False, "first_name": f"User{user_id}"},
+                "chat_instance": str(user_id),
+                "data": self.rng.choice(CALLBACK_DATA),
+                "message": self._message(user_id, "🏗️ Главное меню")
+            }}
+
+        data["update_id"] = self._update_id
+        return {"scenario": scenario, "update": data}
+
+# ==================== ПРОГОН ====================
+
+def percentile(values: List[float], p: float) -> float:
+    """Перцентиль отсортированного списка"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, math.ceil(p / 100 * len(values)) - 1))
+    return values[index]
+
+async def run_level(application, generator: LoadGenerator, concurrency: int, requests: int) -> Dict[str, Any]:
+    """Прогон одного уровня параллельности"""
+    latencies: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    scenario_by_update: Dict[int, str] = {}
+
+    async def on_error(update, context):
+        if isinstance(update, Update):
+            scenario = scenario_by_update.get(update.update_id, "unknown")
+            errors[scenario] = errors.get(scenario, 0) + 1
+
+    application.add_error_handler(on_error)
+    processor = application.update_processor
+
+    per_user = max(1, requests // concurrency)
+    base_user = 1_000_000 * concurrency
+
+    async def virtual_user(user_id: int):
+        for _ in range(per_user):
+            item = generator.next_update(user_id)
+            update = Update.de_json(item["update"], application.bot)
+            scenario_by_update[update.update_id] = item["scenario"]
+
+            start = time.perf_counter()
+            await processor.process_update(update, application.process_update(update))
+            elapsed = time.perf_counter() - start
+            latencies.setdefault(item["scenario"], []).append(elapsed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(virtual_user(base_user + i) for i in range(concurrency)))
+    duration = time.perf_counter() - started
+
+    application.remove_error_handler(on_error)
+
+    total = sum(len(v) for v in latencies.values())
+    report = {
+        "concurrency": concurrency,
+        "requests": total,
+        "duration": duration,
+        "throughput": total / duration if duration else 0.0,
+        "handlers": {}
+    }
+    for scenario, values in latencies.items():
+        values.sort()
+        report["handlers"][SCENARIO_HANDLERS[scenario]] = {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "error_rate": errors.get(scenario, 0) / len(values)
+        }
+    return report
+
+def print_report(report: Dict[str, Any]) -> None:
+    """Вывод отчета по уровню"""
+    print("=" * 70)
+    print(f"Параллельность: {report['concurrency']} | запросов: {report['requests']} | "
+          f"{report['throughput']:.1f} запр/сек за {report['duration']:.2f} сек")
+    print(f"{'Обработчик':<16}{'кол-во':>8}{'p50 мс':>10}{'p95 мс':>10}{'p99 мс':>10}{'ошибки':>10}")
+    for name, stats in sorted(report["handlers"].items()):
+        print(f"{name:<16}{stats['count']:>8}{stats['p50'] * 1000:>10.1f}{stats['p95'] * 1000:>10.1f}"
+              f"{stats['p99'] * 1000:>10.1f}{stats['error_rate'] * 100:>9.1f}%")
+
+def parse_mix(text: str) -> Dict[str, float]:
+    """Разбор смеси сценариев: start=1,question=4,calc=3,button=2"""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIO_HANDLERS:
+            raise argparse.ArgumentTypeError(f"Неизвестный сценарий: {name}. Доступно: {', '.join(SCENARIO_HANDLERS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+async def run(args) -> List[Dict[str, Any]]:
+    """Полный прогон по всем уровням параллельности"""
+    from main import build_application
+
+    api = FakeBotAPI(delay=args.api_delay).start()
+    application = build_application(token=FAKE_TOKEN, base_url=api.base_url)
+    generator = LoadGenerator(args.mix, seed=args.seed)
+
+    reports = []
+    try:
+        async with application:
+            for concurrency in args.concurrency:
+                report = await run_level(application, generator, concurrency, args.requests)
+                print_report(report)
+                reports.append(report)
+    finally:
+        api.stop()
+
+    print("=" * 70)
+    print(f"Отправлено сообщений через эмулятор: {len(api.sent)}")
+    print(f"Вызовы Bot API: {api.calls}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+
+    return reports
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочное тестирование строительного бота")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16],
+                        help="уровни параллельности (виртуальных пользователей)")
+    parser.add_argument("--requests", type=int, default=200, help="запросов на уровень")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("start=1,question=4,calc=3,button=2"),
+                        help="веса сценариев")
+    parser.add_argument("--api-delay", type=float, default=0.0,
+                        help="задержка ответа эмулятора Bot API, сек (имитация сети)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", help="сохранить отчет в JSON")
+    args = parser.parse_args()
+
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,62 @@
+"""
+НАСТРОЙКА ЛОГИРОВАНИЯ v12.0
+Записи кладутся в очередь, а на диск их пишет отдельный поток
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+from datetime import datetime
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+class JsonFormatter(logging.Formatter):
+    """Форматирование записи в одну строку JSON"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName
+        }
+        if record.exc_info:
+            data["exception"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+def setup_logging(log_file: str, level: int = logging.INFO, max_bytes: int = 10 * 1024 * 1024,
+                  backup_count: int = 5, json_lines: bool = False,
+                  console: bool = True) -> logging.handlers.QueueListener:
+    """
+    Настройка корневого логгера через QueueHandler
+
+    Вызовы logger.* на event loop только кладут запись в очередь,
+    файл с ротацией и консоль обслуживаются фоновым потоком QueueListener.
+    """
+    file_handler = logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+    )
+    file_handler.setFormatter(JsonFormatter() if json_lines else logging.Formatter(LOG_FORMAT))
+    handlers = [file_handler]
+
+    if console:
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers.append(stream_handler)
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    root.setLevel(level)
+
+    listener.start()
+    # Дописываем оставшиеся записи при завершении процесса
+    atexit.register(listener.stop)
+    return listener
\ No newline at end of file
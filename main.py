@@ -5,67 +5,120 @@
 import logging
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, CallbackQueryHandler
 
-from config import TOKEN
+from config import (TOKEN, UPDATE_WORKERS, UPDATE_USER_QUEUE, UPDATE_MAX_PENDING,
+                    METRICS_HOST, METRICS_PORT, LOG_FILE, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_JSON)
 from handlers import BotHandlers
+from keyboards import calc_cache
+from result_documents import document_cache
+from price_book import price_book
+from norms import consumption_norms
 from database import HybridDatabase
+from scheduler import PerUserUpdateProcessor
+from metrics import metrics, TimedRequest
+from log_setup import setup_logging
 
-# Настройка логирования
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+# Настройка логирования: запись на диск в фоновом потоке, с ротацией
+setup_logging(
+    LOG_FILE,
     level=logging.INFO,
-    handlers=[
-        logging.FileHandler('construction_bot.log', encoding='utf-8'),
-        logging.StreamHandler()
-    ]
+    max_bytes=LOG_MAX_BYTES,
+    backup_count=LOG_BACKUP_COUNT,
+    json_lines=LOG_JSON
 )
 logger = logging.getLogger(__name__)
 
-def main():
-    """Основная функция запуска бота"""
+async def post_init(application: Application) -> None:
+    """Фоновые задачи после запуска"""
+    application.create_task(metrics.monitor_event_loop())
+
+def build_application(token: str = TOKEN, base_url: str = None) -> Application:
+    """Создает приложение и регистрирует все обработчики"""
     
-    # Создаем приложение
-    application = Application.builder().token(TOKEN).build()
+    # Создаем приложение: разные пользователи обрабатываются параллельно,
+    # сообщения одного пользователя - строго по порядку
+    update_processor = PerUserUpdateProcessor(
+        workers=UPDATE_WORKERS,
+        max_user_queue=UPDATE_USER_QUEUE,
+        max_pending=UPDATE_MAX_PENDING
+    )
+    builder = (
+        Application.builder()
+        .token(token)
+        .concurrent_updates(update_processor)
+        .request(TimedRequest(metrics, connection_pool_size=256))  # время отправки в Telegram
+        .post_init(post_init)
+    )
+    if base_url:
+        # Нагрузочное тестирование на локальном эмуляторе Bot API
+        builder = builder.base_url(base_url)
+    application = builder.build()
     
     # Инициализируем обработчики
     handlers = BotHandlers()
     
+    # Состояния пишутся в SQLite фоновым потоком: при остановке дописываем очередь
+    async def close_sessions(app: Application) -> None:
+        handlers.user_states.close()
+    application.post_shutdown = close_sessions
+    
+    # Все обработчики оборачиваются для сбора метрик
+    instrument = metrics.instrument
+    metrics.add_collector(lambda: {f"updates_{k}": v for k, v in update_processor.get_stats().items()})
+    metrics.add_collector(lambda: {f"sessions_{k}": v for k, v in handlers.user_states.get_stats().items()})
+    metrics.add_collector(lambda: {f"calc_cache_{k}": v for k, v in calc_cache.get_stats().items()})
+    metrics.add_collector(lambda: {f"documents_{k}": v for k, v in document_cache.get_stats().items()})
+    metrics.add_collector(lambda: {f"price_book_{k}": v for k, v in price_book.get_stats().items()})
+    metrics.add_collector(lambda: {f"norms_{k}": v for k, v in consumption_norms.get_stats().items()})
+    
     # Регистрируем обработчики команд
-    application.add_handler(CommandHandler("start", handlers.start))
-    application.add_handler(CommandHandler("help", handlers.help_command))
-    application.add_handler(CommandHandler("menu", handlers.main_menu))
+    application.add_handler(CommandHandler("start", instrument("start", handlers.start)))
+    application.add_handler(CommandHandler("help", instrument("help", handlers.help_command)))
+    application.add_handler(CommandHandler("menu", instrument("menu", handlers.main_menu)))
     
     # Поиск и информация
-    application.add_handler(CommandHandler("search", handlers.search))
-    application.add_handler(CommandHandler("ask", handlers.ask))
-    application.add_handler(CommandHandler("topics", handlers.topics))
-    application.add_handler(CommandHandler("materials", handlers.materials))
+    application.add_handler(CommandHandler("search", instrument("search", handlers.search)))
+    application.add_handler(CommandHandler("ask", instrument("ask", handlers.ask)))
+    application.add_handler(CommandHandler("topics", instrument("topics", handlers.topics)))
+    application.add_handler(CommandHandler("materials", instrument("materials", handlers.materials)))
     
     # Калькуляторы
-    application.add_handler(CommandHandler("calculate", handlers.calculate))
-    application.add_handler(CommandHandler("calc", handlers.calc))
+    application.add_handler(CommandHandler("calculate", instrument("calculate", handlers.calculate)))
+    application.add_handler(CommandHandler("calc", instrument("calc", handlers.calc)))
     
     # Личный кабинет
-    application.add_handler(CommandHandler("profile", handlers.profile))
-    application.add_handler(CommandHandler("history", handlers.history))
-    application.add_handler(CommandHandler("favorites", handlers.favorites))
-    application.add_handler(CommandHandler("projects", handlers.projects))
+    application.add_handler(CommandHandler("profile", instrument("profile", handlers.profile)))
+    application.add_handler(CommandHandler("history", instrument("history", handlers.history)))
+    application.add_handler(CommandHandler("favorites", instrument("favorites", handlers.favorites)))
+    application.add_handler(CommandHandler("projects", instrument("projects", handlers.projects)))
+    application.add_handler(CommandHandler("newproject", instrument("newproject", handlers.new_project)))
+    application.add_handler(CommandHandler("cancel", instrument("cancel", handlers.cancel)))
     
     # Дополнительные команды
-    application.add_handler(CommandHandler("tip", handlers.tip))
-    application.add_handler(CommandHandler("articles", handlers.articles))
-    application.add_handler(CommandHandler("courses", handlers.courses))
-    application.add_handler(CommandHandler("contractors", handlers.contractors))
-    application.add_handler(CommandHandler("stats", handlers.stats))
+    application.add_handler(CommandHandler("tip", instrument("tip", handlers.tip)))
+    application.add_handler(CommandHandler("articles", instrument("articles", handlers.articles)))
+    application.add_handler(CommandHandler("courses", instrument("courses", handlers.courses)))
+    application.add_handler(CommandHandler("contractors", instrument("contractors", handlers.contractors)))
+    application.add_handler(CommandHandler("stats", instrument("stats", handlers.stats)))
     
     # Админ команды
-    application.add_handler(CommandHandler("admin", handlers.admin))
-    application.add_handler(CommandHandler("backup", handlers.backup))
+    application.add_handler(CommandHandler("admin", instrument("admin", handlers.admin)))
+    application.add_handler(CommandHandler("backup", instrument("backup", handlers.backup)))
     
     # Обработчик кнопок
-    application.add_handler(CallbackQueryHandler(handlers.button_handler))
+    application.add_handler(CallbackQueryHandler(instrument("button", handlers.button_handler)))
     
     # Обработчик всех текстовых сообщений
-    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handlers.handle_message))
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, instrument("message", handlers.handle_message)))
+    
+    return application
+
+def main():
+    """Основная функция запуска бота"""
+    
+    application = build_application()
+    
+    if METRICS_PORT:
+        metrics.start_http_server(METRICS_HOST, METRICS_PORT)
     
     # Запускаем бота
     print("=" * 70)
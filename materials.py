@@ -4,6 +4,9 @@
 
 from typing import List, Dict, Optional
 from config import MATERIAL_CATEGORIES
+from units import AREA, VOLUME, COUNT, MASS, Quantity, find_unit
+from norms import consumption_norms
+from cutting import cover_area, stock_for
 
 class MaterialsManager:
     """Класс для работы с материалами"""
@@ -89,45 +92,44 @@ class MaterialsManager:
             "calculations": {}
         }
         
-        # Расчет в зависимости от единицы измерения
+        # Количество в единице материала: площадь и толщина пересчитываются
+        # через единую таблицу единиц, непонятная единица - по площади
         unit = material['unit']
-        
-        if unit == "м²":
-            quantity = area
-            if thickness and material.get('density'):
+        material_unit = find_unit(unit) if unit else None
+        dimension = material_unit.dimension if material_unit else None
+        surface = Quantity(area, "м²")
+        layer = surface * Quantity(thickness, "мм") if thickness else None  # м³
+        kind, stock = stock_for(material['name'])
+        
+        if kind == "sheet" and dimension in (AREA, COUNT):
+            # Листы с раскроем доборов вместо нормы на м²
+            plan = cover_area(area, stock)
+            quantity = plan.count if dimension == COUNT else Quantity(plan.purchased, "м²").magnitude(material_unit)
+            result['calculations']['sheets'] = f"{plan.count} листов"
+            result['calculations']['waste'] = f"{plan.waste * 100:.0f}%"
+        
+        elif dimension == AREA:
+            quantity = surface.magnitude(material_unit)
+            if layer is not None and material.get('density'):
                 # Для утеплителей и т.п.
-                volume = area * thickness / 1000  # м³
-                weight = volume * material['density']  # кг
-                result['calculations']['volume'] = f"{volume:.2f} м³"
-                result['calculations']['weight'] = f"{weight:.0f} кг"
-        
-        elif unit == "м³":
-            if thickness:
-                volume = area * thickness / 1000
-                quantity = volume
-            else:
-                quantity = area  # предполагаем, что area уже в м³
-        
-        elif unit == "шт":
-            # Для кирпича, блоков и т.п.
-            if "кирпич" in material['name'].lower():
-                # 102 шт/м² при толщине 510 мм
-                quantity = area * 102
-            elif "газоблок" in material['name'].lower():
-                # 8.33 шт/м² для блоков 600×300×200
-                quantity = area * 8.33
-            else:
-                quantity = area  # по умолчанию
-        
-        elif unit == "кг":
-            if material.get('density') and thickness:
-                volume = area * thickness / 1000
-                quantity = volume * material['density']
-            else:
-                quantity = area  # по умолчанию
+                weight = layer * Quantity(material['density'], "кг/м³")
+                result['calculations']['volume'] = f"{layer.value:.2f} м³"
+                result['calculations']['weight'] = f"{weight.value:.0f} кг"
+        
+        elif dimension == VOLUME:
+            # Без толщины считаем, что area уже в м³
+            quantity = (layer if layer is not None else Quantity(area, "м³")).magnitude(material_unit)
+        
+        elif dimension == COUNT:
+            # Для кирпича, блоков и т.п.: штук на м² кладки
+            norm = consumption_norms.for_material_id(material_id)
+            quantity = area * (norm.per_unit if norm and norm.base_unit == "м²" else 1)
+        
+        elif dimension == MASS and material.get('density') and layer is not None:
+            quantity = (layer * Quantity(material['density'], "кг/м³")).magnitude(material_unit)
         
         else:
-            quantity = area
+            quantity = area  # по умолчанию
         
         result['calculations']['quantity'] = f"{quantity:.2f} {unit}"
         
@@ -0,0 +1,316 @@
+"""
+МЕТРИКИ И ИНСТРУМЕНТИРОВАНИЕ v12.0
+Гистограммы задержек обработчиков, счетчики ошибок, лаг event loop
+и эндпоинт в текстовом формате Prometheus
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from telegram.request import HTTPXRequest
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм (сек)
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Объекты, которые прокси отдает тоже через прокси: запросы через
+# db.cursor.execute(...) и db.conn.commit() учитываются в той же фазе
+TIMED_TYPES = (sqlite3.Connection, sqlite3.Cursor)
+
+# Время фаз текущего обработчика: {"db": сек, "send": сек}
+_phases: contextvars.ContextVar[Optional[Dict[str, float]]] = contextvars.ContextVar("phases", default=None)
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами"""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля линейной интерполяцией внутри корзины"""
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for i, bound in enumerate(self.buckets):
+            if seen + self.counts[i] >= rank:
+                fraction = (rank - seen) / self.counts[i] if self.counts[i] else 0
+                return lower + (bound - lower) * fraction
+            seen += self.counts[i]
+            lower = bound
+        return self.buckets[-1]
+
+class MetricsRegistry:
+    """Реестр метрик бота"""
+
+    def __init__(self, prefix: str = "bot"):
+        self.prefix = prefix
+        self.histograms: Dict[Tuple[str, Tuple], Histogram] = {}
+        self.counters: Dict[Tuple[str, Tuple], float] = {}
+        self.collectors: List[Callable[[], Dict[str, Any]]] = []
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    # ==================== ЗАПИСЬ ====================
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Добавить значение в гистограмму"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels) -> None:
+        """Увеличить счетчик"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def add_collector(self, collector: Callable[[], Dict[str, Any]]) -> None:
+        """Источник текущих значений (gauge), опрашивается при выдаче метрик"""
+        self.collectors.append(collector)
+
+    @staticmethod
+    def add_phase_time(phase: str, seconds: float) -> None:
+        """Учесть время фазы (db, send) в текущем обработчике"""
+        phases = _phases.get()
+        if phases is not None:
+            phases[phase] = phases.get(phase, 0.0) + seconds
+
+    # ==================== ИНСТРУМЕНТИРОВАНИЕ ====================
+
+    def instrument(self, name: str, callback: Callable) -> Callable:
+        """Обертка обработчика: задержка, ошибки и разбивка по фазам"""
+
+        @functools.wraps(callback)
+        async def wrapper(update, context, *args, **kwargs):
+            handler = name
+            if update is not None and getattr(update, "callback_query", None):
+                # Для кнопок метрики ведутся по маршруту: calc_фундамент -> button:calc
+                data = update.callback_query.data or ""
+                handler = f"{name}:{data.split('_')[0]}"
+
+            phases = {}
+            token = _phases.set(phases)
+            start = time.perf_counter()
+            try:
+                return await callback(update, context, *args, **kwargs)
+            except Exception:
+                self.inc("handler_errors_total", handler=handler)
+                raise
+            finally:
+                total = time.perf_counter() - start
+                _phases.reset(token)
+                db = phases.get("db", 0.0)
+                send = phases.get("send", 0.0)
+                self.inc("handler_calls_total", handler=handler)
+                self.observe("handler_latency_seconds", total, handler=handler)
+                self.observe("handler_phase_seconds", db, handler=handler, phase="db")
+                self.observe("handler_phase_seconds", send, handler=handler, phase="send")
+                self.observe("handler_phase_seconds", max(0.0, total - db - send), handler=handler, phase="render")
+
+        return wrapper
+
+    def timed(self, obj: Any, phase: str) -> "TimedProxy":
+        """Прокси, учитывающий время вызовов методов объекта как фазу"""
+        return TimedProxy(obj, phase, self)
+
+    async def monitor_event_loop(self, interval: float = 0.5) -> None:
+        """Фоновая задача: измеряет задержку пробуждения event loop"""
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag = time.perf_counter() - start - interval
+            self.observe("event_loop_lag_seconds", max(0.0, lag))
+
+    # ==================== ВЫДАЧА ====================
+
+    @staticmethod
+    def _format_labels(labels: Tuple, extra: Tuple = ()) -> str:
+        items = list(labels) + list(extra)
+        if not items:
+            return ""
+        body = ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in items)
+        return "{" + body + "}"
+
+    def render_prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus"""
+        lines = []
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            counters = sorted(self.counters.items())
+
+        typed = set()
+        for (name, labels), histogram in histograms:
+            metric = f"{self.prefix}_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f"{metric}_bucket{self._format_labels(labels, (('le', bound),))} {cumulative}")
+            lines.append(f"{metric}_bucket{self._format_labels(labels, (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{metric}_sum{self._format_labels(labels)} {histogram.sum}")
+            lines.append(f"{metric}_count{self._format_labels(labels)} {histogram.count}")
+
+        for (name, labels), value in counters:
+            metric = f"{self.prefix}_{name}"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f"{metric}{self._format_labels(labels)} {value}")
+
+        for collector in self.collectors:
+            try:
+                values = collector()
+            except Exception as e:
+                logger.error(f"Ошибка сбора метрик: {e}")
+                continue
+            for key, value in values.items():
+                if isinstance(value, (int, float)):
+                    metric = f"{self.prefix}_{key}"
+                    lines.append(f"# TYPE {metric} gauge")
+                    lines.append(f"{metric} {float(value)}")
+
+        return "\n".join(lines) + "\n"
+
+    def summary(self, limit: int = 10) -> str:
+        """Краткая сводка для /admin"""
+        with self._lock:
+            latencies = [(dict(labels)["handler"], h.count, h.quantile(0.5), h.quantile(0.95))
+                         for (name, labels), h in self.histograms.items()
+                         if name == "handler_latency_seconds"]
+            errors = {dict(labels)["handler"]: value for (name, labels), value in self.counters.items()
+                      if name == "handler_errors_total"}
+            lag = self.histograms.get(("event_loop_lag_seconds", ()))
+
+        if not latencies:
+            return "Нет данных"
+
+        lines = []
+        for handler, count, p50, p95 in sorted(latencies, key=lambda x: -x[1])[:limit]:
+            lines.append(f"`{handler}`: {count} выз., p50 {p50 * 1000:.0f} мс, "
+                         f"p95 {p95 * 1000:.0f} мс, ошибок {errors.get(handler, 0):.0f}")
+        if lag:
+            lines.append(f"Лаг event loop: p95 {lag.quantile(0.95) * 1000:.1f} мс")
+        return "\n".join(lines)
+
+    def start_http_server(self, host: str = "127.0.0.1", port: int = 9108) -> None:
+        """Запуск эндпоинта /metrics в фоновом потоке"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                payload = registry.render_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        logger.info(f"Метрики доступны на http://{host}:{port}/metrics")
+
+class TimedProxy:
+    """
+    Прокси объекта: время вызова каждого метода учитывается как фаза обработчика
+
+    Атрибуты и результаты вызовов типов TIMED_TYPES (курсор и соединение
+    SQLite) тоже оборачиваются; их методы в метриках - "cursor.execute".
+    """
+
+    def __init__(self, obj: Any, phase: str, registry: MetricsRegistry, prefix: str = ""):
+        object.__setattr__(self, "_obj", obj)
+        object.__setattr__(self, "_phase", phase)
+        object.__setattr__(self, "_registry", registry)
+        object.__setattr__(self, "_prefix", prefix)
+
+    def _wrap(self, value: Any, name: str) -> Any:
+        if isinstance(value, TIMED_TYPES):
+            return TimedProxy(value, self._phase, self._registry, f"{name}.")
+        return value
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._obj, name)
+        method = self._prefix + name
+        # Соединение SQLite тоже callable: проверяется до методов
+        if isinstance(attr, TIMED_TYPES) or not callable(attr):
+            return self._wrap(attr, method)
+
+        phase = self._phase
+        registry = self._registry
+
+        @functools.wraps(attr)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = attr(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                registry.add_phase_time(phase, elapsed)
+                registry.observe(f"{phase}_call_seconds", elapsed, method=method)
+            # execute() возвращает курсор: fetchone() по цепочке тоже учитывается
+            return self._wrap(result, "cursor")
+
+        return wrapper
+
+    def __iter__(self):
+        return iter(self._obj)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._obj, name, value)
+
+class TimedRequest(HTTPXRequest):
+    """HTTP-клиент Bot API, учитывающий время запросов к Telegram как фазу send"""
+
+    def __init__(self, registry: MetricsRegistry, **kwargs):
+        super().__init__(**kwargs)
+        self._registry = registry
+
+    async def do_request(self, url: str, method: str, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await super().do_request(url, method, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            self._registry.add_phase_time("send", elapsed)
+            self._registry.observe("telegram_request_seconds", elapsed, method=url.rsplit("/", 1)[-1])
+
+# Общий реестр метрик
+metrics = MetricsRegistry()
\ No newline at end of file
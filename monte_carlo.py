@@ -0,0 +1,207 @@
+"""
+РАЗБРОС СТОИМОСТИ (МОНТЕ-КАРЛО) v12.0
+Цены и перерасход материалов выбираются из диапазонов, все розыгрыши
+считаются одним векторным вызовом сметы, итог - P10/P50/P90
+"""
+
+import logging
+import threading
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+from config import PRICES, MONTE_CARLO_DRAWS, MONTE_CARLO_PRICE_SPREAD, MONTE_CARLO_CONSUMPTION
+from calc_results import CalcResult, Value, money
+from estimation import HouseSpec, estimate_house
+from price_book import price_book
+
+logger = logging.getLogger(__name__)
+
+# Ограничение на один запрос из чата
+MAX_DRAWS = 200_000
+
+# Материал в справочнике, диапазон цен которого задает разброс цены PRICES.
+# В справочнике цены могут быть в других единицах (за мешок, за поддон),
+# поэтому используется только относительный разброс min/среднее/max.
+PRICE_MATERIALS = {
+    "fundament_lenta": "бетон м300",
+    "fundament_plita": "бетон м300",
+    "materials_beton": "бетон м300",
+    "walls_brick": "кирпич",
+    "walls_gas": "газобетон",
+    "walls_wood": "брус",
+    "materials_kirpich": "кирпич",
+    "materials_gasblock": "газобетон",
+    "roof_metal": "металлочерепица",
+    "roof_soft": "мягкая кровля",
+    "roof_prof": "профнастил",
+    "heat_loss": "минеральная вата",
+}
+
+PERCENTILES = (10, 50, 90)
+
+Spread = Tuple[float, float]  # (min, max) относительно точечной цены
+
+class PriceSpreads:
+    """
+    Относительные диапазоны цен по ключам PRICES
+
+    По умолчанию для всех ключей используется MONTE_CARLO_PRICE_SPREAD,
+    после load_from_materials - диапазоны price_min/price_max справочника.
+    """
+
+    def __init__(self, default: Spread = MONTE_CARLO_PRICE_SPREAD):
+        self.default = default
+        self._spreads: Dict[str, Spread] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Spread:
+        with self._lock:
+            return self._spreads.get(key, self.default)
+
+    def set(self, key: str, low: float, high: float) -> None:
+        if not 0 < low <= 1 <= high:
+            raise ValueError(f"Некорректный разброс цены {key}: {low}..{high}")
+        with self._lock:
+            self._spreads[key] = (low, high)
+
+    def load_from_materials(self, materials_manager) -> int:
+        """Диапазоны из справочника материалов; возвращает число найденных ключей"""
+        loaded = 0
+        for key, name in PRICE_MATERIALS.items():
+            rows = materials_manager.search_materials_advanced(name, limit=1)
+            if not rows or not rows[0].get("price_min") or not rows[0].get("price_max"):
+                continue
+            low, high = float(rows[0]["price_min"]), float(rows[0]["price_max"])
+            middle = (low + high) / 2
+            if low <= 0 or high < low:
+                logger.warning(f"Пропущен диапазон цен '{name}': {low}..{high}")
+                continue
+            self.set(key, low / middle, high / middle)
+            loaded += 1
+        return loaded
+
+    def snapshot(self) -> Dict[str, Spread]:
+        with self._lock:
+            return {key: self._spreads.get(key, self.default) for key in PRICES}
+
+price_spreads = PriceSpreads()
+
+def _triangular(rng: np.random.Generator, low: float, mode: float, high: float, size: int) -> np.ndarray:
+    if high <= low:
+        return np.full(size, mode, dtype=float)
+    return rng.triangular(low, mode, high, size)
+
+def sample_prices(draws: int, rng: np.random.Generator,
+                  spreads: Optional[Dict[str, Spread]] = None,
+                  base: Optional[Mapping[str, float]] = None) -> Dict[str, np.ndarray]:
+    """
+    Розыгрыш цен: треугольное распределение min - точечная цена - max
+
+    base - точечные цены (по умолчанию базовый прайс-лист). Возвращает
+    словарь тех же ключей со значениями-массивами длины draws;
+    пакетные калькуляторы принимают его как есть.
+    """
+    spreads = spreads or price_spreads.snapshot()
+    base = base or price_book.prices()
+    prices = {}
+    for key, point in base.items():
+        low, high = spreads.get(key, price_spreads.default)
+        prices[key] = _triangular(rng, point * low, point, point * high, draws)
+    return prices
+
+class SimulationResult:
+    """Разыгранные итоги сметы и разделов"""
+
+    __slots__ = ("estimate", "draws", "totals", "sections", "point_total")
+
+    def __init__(self, estimate, draws: int, totals: np.ndarray, sections: Dict[str, np.ndarray],
+                 point_total: float):
+        self.estimate = estimate
+        self.draws = draws
+        self.totals = totals
+        self.sections = sections
+        self.point_total = point_total
+
+    def percentiles(self, values: Optional[np.ndarray] = None) -> Dict[int, float]:
+        values = self.totals if values is None else values
+        return dict(zip(PERCENTILES, np.percentile(values, PERCENTILES).tolist()))
+
+    def probability_within(self, budget: float) -> float:
+        """Вероятность уложиться в бюджет"""
+        return float(np.mean(self.totals <= budget))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "draws": self.draws,
+            "point_total": self.point_total,
+            "total": {f"p{p}": v for p, v in self.percentiles().items()},
+            "sections": {
+                title: {f"p{p}": v for p, v in self.percentiles(values).items()}
+                for title, values in self.sections.items()
+            }
+        }
+
+    def to_calc_result(self) -> CalcResult:
+        g = {key: float(value) for key, value in self.estimate.geometry.items()}
+        total = self.percentiles()
+
+        cost = {}
+        for title, values in self.sections.items():
+            p = self.percentiles(values)
+            cost[title] = f"{p[10]:,.0f} - {p[90]:,.0f} руб"
+        cost["Итого P10"] = money(total[10])
+        cost["Итого P50"] = money(total[50])
+        cost["Итого P90"] = money(total[90])
+
+        spread = (total[90] - total[10]) / total[50] if total[50] else 0.0
+        return CalcResult(
+            type=f"Разброс сметы дома {g['length']:g}×{g['width']:g} м, этажей: {g['floors']:g}",
+            parameters={
+                "Общая площадь": Value(g["total_area"], "м²", ".1f"),
+                "Стены": str(self.estimate.spec.wall_material),
+                "Регион": str(self.estimate.spec.region).capitalize(),
+                "Розыгрышей": Value(self.draws, "", ",")
+            },
+            cost=cost,
+            results={
+                "Смета по текущим ценам": money(self.point_total),
+                "Медиана (P50)": money(total[50]),
+                "Разброс P10-P90": f"{spread:.0%}",
+                "Цена за м² (P50)": money(total[50] / g["total_area"], "руб/м²")
+            },
+            recommendations=[
+                f"Закладывайте бюджет не ниже P90: {total[90]:,.0f} руб",
+                f"С вероятностью 50% смета превысит {total[50]:,.0f} руб",
+                "Зафиксируйте цены крупных позиций договором, чтобы сузить разброс"
+            ],
+            notes=[
+                "P10/P50/P90 - итог, который не будет превышен с вероятностью 10/50/90%",
+                "Цены разыгрываются в диапазонах справочника материалов, "
+                "перерасход - в пределах нормы на подрезку и бой"
+            ]
+        )
+
+def simulate_house(spec: HouseSpec, draws: int = MONTE_CARLO_DRAWS, seed: Optional[int] = None,
+                   spreads: Optional[Dict[str, Spread]] = None) -> SimulationResult:
+    """
+    Розыгрыш сметы дома
+
+    spec - один вариант дома (скалярные поля). Цены разыгрываются для всех
+    ключей прайс-листа региона, перерасход материалов - отдельно для каждого раздела.
+    """
+    if not 1 <= draws <= MAX_DRAWS:
+        raise ValueError(f"Количество розыгрышей: от 1 до {MAX_DRAWS:,}")
+
+    rng = np.random.default_rng(seed)
+    estimate = estimate_house(spec, sample_prices(draws, rng, spreads, price_book.regional(spec.region)))
+    low, high = MONTE_CARLO_CONSUMPTION
+
+    sections = {}
+    for title, cost in estimate.section_costs.items():
+        consumption = _triangular(rng, low, 1.0, high, draws)
+        sections[title] = np.broadcast_to(cost, (draws,)) * consumption
+    totals = sum(sections.values())
+
+    point = estimate_house(spec)
+    return SimulationResult(point, draws, totals, sections, float(point.total_cost))
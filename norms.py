@@ -0,0 +1,229 @@
+"""
+НОРМЫ РАСХОДА МАТЕРИАЛОВ v12.0
+Таблица норм в базе данных, в памяти - индексы по материалу, применению
+и id справочника материалов. Версия таблицы растет при каждом изменении,
+кэш перечитывается без перезапуска бота
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from config import NORMS_DB_PATH, NORMS_CHECK_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+class Norm(NamedTuple):
+    material: str              # ключ материала: кирпич, цемент, краска...
+    application: str           # применение: кладка, покраска...; "" - общая норма
+    per_unit: float            # расход на единицу основания
+    unit: str                  # единица расхода
+    base_unit: str             # единица основания (м², м³)
+    notes: str = ""
+    material_id: Optional[int] = None  # явная привязка к справочнику материалов
+
+# Нормы по умолчанию: засеваются в пустую таблицу и остаются запасными,
+# если строку удалили из базы
+DEFAULT_NORMS: Tuple[Norm, ...] = (
+    # Общие нормы (оценка количества по площади)
+    Norm("кирпич", "", 102, "шт", "м²", "При толщине 510 мм (2 кирпича)"),
+    Norm("газоблок", "", 8.33, "шт", "м²", "Блоки 600×300×200 мм"),
+    Norm("бетон", "", 0.3, "м³", "м²", "Для фундамента толщиной 300 мм"),
+    Norm("утеплитель", "", 1.1, "м²", "м²", "+10% на отходы"),
+    Norm("краска", "", 0.2, "л", "м²", "В 2 слоя"),
+    Norm("плитка", "", 1.1, "м²", "м²", "+10% на подрезку"),
+    Norm("гипсокартон", "", 0.33, "лист", "м²", "Лист 1.2×2.5 м = 3 м²"),
+    Norm("доска", "", 0.015, "м³", "м²", "Доска 25×150 мм с шагом 400 мм"),
+    # Кладка кирпича на 1 м² стены
+    Norm("кирпич", "кладка", 102, "шт", "м²", "При толщине 510 мм"),
+    Norm("раствор", "кладка", 0.05, "м³", "м²"),
+    # Утепление на 1 м²
+    Norm("утеплитель", "плотность", 30, "кг", "м³", "Минвата"),
+    Norm("пароизоляция", "утепление", 1, "м²", "м²"),
+    Norm("крепеж", "утепление", 6, "шт", "м²", "Дюбели-грибки"),
+    # Покраска на 1 м²
+    Norm("краска", "покраска", 0.2, "л", "м²", "1 л на 10 м² в 2 слоя"),
+    Norm("грунтовка", "покраска", 0.1, "л", "м²"),
+)
+
+NormKey = Tuple[str, str]
+
+class NormsTable:
+    """
+    Нормы расхода из таблицы consumption_norms
+
+    Поиск - обращение к словарю в памяти. Раз в check_interval секунд
+    сверяется номер версии в базе (его увеличивают триггеры на любое
+    изменение таблицы), при изменении индексы строятся заново.
+    Без db_path работает только на нормах по умолчанию.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, check_interval: float = 30.0):
+        self.db_path = db_path
+        self.check_interval = check_interval
+        self.conn = None
+        self._lock = threading.Lock()
+        self._version = 0
+        self._checked = 0.0
+        self._by_key: Dict[NormKey, Norm] = {}
+        self._by_material_id: Dict[Tuple[int, str], Norm] = {}
+        self._reloads = 0
+        self._build(list(DEFAULT_NORMS), [])
+
+    # ==================== ПОИСК ====================
+
+    def get(self, material: str, application: str = "") -> Optional[Norm]:
+        """Норма материала для применения; если такой нет - общая норма материала"""
+        self._refresh()
+        by_key = self._by_key
+        return by_key.get((material, application)) or by_key.get((material, ""))
+
+    def rate(self, material: str, application: str = "") -> float:
+        """Расход на единицу основания; неизвестная норма - KeyError"""
+        norm = self.get(material, application)
+        if norm is None:
+            raise KeyError(f"Нет нормы расхода: {material} ({application or 'общая'})")
+        return norm.per_unit
+
+    def for_material_id(self, material_id: int, application: str = "") -> Optional[Norm]:
+        """Норма для строки справочника материалов"""
+        self._refresh()
+        by_id = self._by_material_id
+        return by_id.get((material_id, application)) or by_id.get((material_id, ""))
+
+    @property
+    def version(self) -> int:
+        """Номер версии таблицы (для сброса зависящих от норм кэшей)"""
+        self._refresh()
+        return self._version
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "norms": len(self._by_key),
+            "linked_materials": len({material_id for material_id, _ in self._by_material_id}),
+            "version": self._version,
+            "reloads": self._reloads
+        }
+
+    # ==================== ИЗМЕНЕНИЕ ====================
+
+    def set_norm(self, norm: Norm) -> None:
+        """Добавить или изменить норму в базе; кэш обновится сразу"""
+        conn = self._connect()
+        if conn is None:
+            raise RuntimeError("Таблица норм работает без базы данных")
+        with self._lock:
+            conn.execute('''
+            INSERT INTO consumption_norms (material, application, per_unit, unit, base_unit, notes, material_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (material, application) DO UPDATE SET
+                per_unit = excluded.per_unit, unit = excluded.unit, base_unit = excluded.base_unit,
+                notes = excluded.notes, material_id = excluded.material_id
+            ''', norm)
+            conn.commit()
+        self._refresh(force=True)
+
+    # ==================== ЗАГРУЗКА ====================
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self.conn is not None or not self.db_path:
+            return self.conn
+        with self._lock:
+            if self.conn is None:
+                conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                conn.executescript('''
+                CREATE TABLE IF NOT EXISTS consumption_norms (
+                    id INTEGER PRIMARY KEY,
+                    material TEXT NOT NULL,
+                    application TEXT NOT NULL DEFAULT '',
+                    per_unit REAL NOT NULL,
+                    unit TEXT NOT NULL,
+                    base_unit TEXT NOT NULL,
+                    notes TEXT DEFAULT '',
+                    material_id INTEGER,
+                    UNIQUE (material, application)
+                );
+                CREATE TABLE IF NOT EXISTS norms_version (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    version INTEGER NOT NULL
+                );
+                INSERT OR IGNORE INTO norms_version (id, version) VALUES (1, 1);
+                CREATE TRIGGER IF NOT EXISTS norms_insert AFTER INSERT ON consumption_norms
+                BEGIN UPDATE norms_version SET version = version + 1 WHERE id = 1; END;
+                CREATE TRIGGER IF NOT EXISTS norms_update AFTER UPDATE ON consumption_norms
+                BEGIN UPDATE norms_version SET version = version + 1 WHERE id = 1; END;
+                CREATE TRIGGER IF NOT EXISTS norms_delete AFTER DELETE ON consumption_norms
+                BEGIN UPDATE norms_version SET version = version + 1 WHERE id = 1; END;
+                ''')
+                if conn.execute("SELECT COUNT(*) FROM consumption_norms").fetchone()[0] == 0:
+                    conn.executemany('''
+                    INSERT INTO consumption_norms (material, application, per_unit, unit, base_unit, notes, material_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', DEFAULT_NORMS)
+                conn.commit()
+                self.conn = conn
+        return self.conn
+
+    def _refresh(self, force: bool = False) -> None:
+        """Сверка версии не чаще раза в check_interval секунд"""
+        now = time.monotonic()
+        if not self.db_path or (not force and now - self._checked < self.check_interval):
+            return
+        self._checked = now
+        try:
+            conn = self._connect()
+            version = conn.execute("SELECT version FROM norms_version WHERE id = 1").fetchone()[0]
+            if version == self._version and not force:
+                return
+            with self._lock:
+                rows = [Norm(*row) for row in conn.execute('''
+                SELECT material, application, per_unit, unit, base_unit, COALESCE(notes, ''), material_id
+                FROM consumption_norms
+                ''')]
+                materials = self._materials(conn)
+                self._build(rows, materials)
+                self._version = version
+                self._reloads += 1
+            logger.info(f"Нормы расхода загружены: {len(rows)}, версия {version}")
+        except Exception as e:
+            logger.error(f"Ошибка загрузки норм расхода, используются прежние: {e}")
+
+    @staticmethod
+    def _materials(conn: sqlite3.Connection) -> List[Tuple[int, str]]:
+        """id и названия справочника материалов (если таблица есть)"""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'materials'"
+        ).fetchone()
+        return list(conn.execute("SELECT id, name FROM materials")) if exists else []
+
+    def _build(self, rows: List[Norm], materials: List[Tuple[int, str]]) -> None:
+        """
+        Индексы строятся целиком и подменяются одним присваиванием
+
+        Материал справочника привязывается к норме явно (material_id)
+        или по ключу нормы в названии - один раз при загрузке,
+        а не при каждом расчете.
+        """
+        by_key = {(norm.material, norm.application): norm for norm in DEFAULT_NORMS}
+        by_key.update({(norm.material, norm.application): norm for norm in rows})
+
+        by_material_id: Dict[Tuple[int, str], Norm] = {}
+        general = [norm for norm in by_key.values() if not norm.application]
+        for material_id, name in materials:
+            name = (name or "").lower()
+            for norm in general:
+                if norm.material in name:
+                    by_material_id.setdefault((material_id, ""), norm)
+        for norm in by_key.values():
+            if norm.material_id is not None:
+                by_material_id[(norm.material_id, norm.application)] = norm
+
+        self._by_key = by_key
+        self._by_material_id = by_material_id
+
+consumption_norms = NormsTable(
+    str(NORMS_DB_PATH) if NORMS_DB_PATH else None,
+    check_interval=NORMS_CHECK_INTERVAL
+)
@@ -0,0 +1,310 @@
+"""
+ПРАЙС-ЛИСТ v12.0
+Цены по регионам и датам вступления в силу. Калькуляторы читают
+неизменяемый снимок без блокировок; при изменении таблиц снимок
+строится заново и подменяется одним присваиванием
+"""
+
+import contextvars
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Mapping, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from config import PRICES, REGIONS, PRICE_BOOK_DB_PATH, PRICE_BOOK_CHECK_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+class Region(NamedTuple):
+    name: str
+    delta_t: float       # разница температур зимой, °C
+    coefficient: float   # множитель к базовым ценам
+
+# Зависимость результата от прайса: (регион, ключ цены) или (None, регион) для ΔT
+Dependency = Tuple[Optional[str], str]
+
+# Прочитанные значения в текущем контексте (см. PriceBook.recording)
+_reads: contextvars.ContextVar = contextvars.ContextVar("price_reads", default=None)
+
+class _TrackedMapping(Mapping):
+    """Словарь снимка, который запоминает прочитанные ключи"""
+
+    __slots__ = ("_data", "_section", "_reads")
+
+    def __init__(self, data: Mapping, section: Optional[str], reads: Dict[Dependency, Any]):
+        self._data = data
+        self._section = section
+        self._reads = reads
+
+    def __getitem__(self, key: str):
+        value = self._data.get(key)
+        self._reads[(self._section, key)] = value
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class PriceSnapshot:
+    """
+    Цены на дату as_of для базового прайса ("") и каждого региона
+
+    Региональная цена - явная строка прайса для региона, иначе базовая
+    цена с коэффициентом региона. Неизвестный регион - базовые цены.
+    """
+
+    __slots__ = ("version", "as_of", "regions", "_prices", "_delta_t")
+
+    def __init__(self, version: int, as_of: str, base: Dict[str, float],
+                 overrides: Dict[str, Dict[str, float]], regions: Dict[str, Region]):
+        self.version = version
+        self.as_of = as_of
+        self.regions = MappingProxyType(dict(regions))
+
+        prices = {"": MappingProxyType(dict(base))}
+        for name in set(regions) | set(overrides):
+            coefficient = regions[name].coefficient if name in regions else 1.0
+            regional = {key: value * coefficient for key, value in base.items()}
+            regional.update(overrides.get(name, {}))
+            prices[name] = MappingProxyType(regional)
+        self._prices = prices
+        self._delta_t = MappingProxyType({name: region.delta_t for name, region in regions.items()})
+
+    def prices(self, region: str = "") -> Mapping[str, float]:
+        region = region.lower()
+        data = self._prices.get(region) or self._prices[""]
+        reads = _reads.get()
+        return data if reads is None else _TrackedMapping(data, region, reads)
+
+    def delta_t(self) -> Mapping[str, float]:
+        """Разница температур по регионам"""
+        reads = _reads.get()
+        return self._delta_t if reads is None else _TrackedMapping(self._delta_t, None, reads)
+
+    def regional(self, region) -> Mapping[str, Any]:
+        """
+        Цены для региона или массива регионов
+
+        Для массива значения - массивы той же формы, пакетные
+        калькуляторы принимают их как есть.
+        """
+        region = np.char.lower(np.asarray(region, dtype=str))
+        if region.ndim == 0:
+            return self.prices(str(region))
+        names, inverse = np.unique(region, return_inverse=True)
+        tables = [self.prices(str(name)) for name in names]
+        return {
+            key: np.array([table[key] for table in tables])[inverse].reshape(region.shape)
+            for key in self._prices[""]
+        }
+
+    def lookup(self, dependency: Dependency) -> Any:
+        section, key = dependency
+        data = self._delta_t if section is None else (self._prices.get(section) or self._prices[""])
+        return data.get(key)
+
+class PriceReads:
+    """Снимок и прочитанные из него значения - отметка для кэша результатов"""
+
+    __slots__ = ("snapshot", "values")
+
+    def __init__(self, snapshot: PriceSnapshot):
+        self.snapshot = snapshot
+        self.values: Dict[Dependency, Any] = {}
+
+class PriceBook:
+    """
+    Прайс-лист из таблиц prices и regions
+
+    Строка prices действует с effective_from (ISO-дата, "" - всегда);
+    из нескольких строк ключа берется последняя вступившая в силу.
+    Раз в check_interval секунд сверяется номер версии (его увеличивают
+    триггеры на любое изменение таблиц) и дата; при изменении снимок
+    строится заново. Без db_path работает на PRICES и REGIONS из config.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, check_interval: float = 30.0):
+        self.db_path = db_path
+        self.check_interval = check_interval
+        self.conn = None
+        self._lock = threading.Lock()
+        self._checked = 0.0
+        self._reloads = 0
+        self._snapshot = self._build(0, date.today().isoformat(), [], [])
+
+    # ==================== ЧТЕНИЕ ====================
+
+    def snapshot(self) -> PriceSnapshot:
+        """Текущий снимок; все чтения одного расчета лучше делать из одного снимка"""
+        self._refresh()
+        return self._snapshot
+
+    def prices(self, region: str = "") -> Mapping[str, float]:
+        return self.snapshot().prices(region)
+
+    def regional(self, region) -> Mapping[str, Any]:
+        return self.snapshot().regional(region)
+
+    def delta_t(self) -> Mapping[str, float]:
+        return self.snapshot().delta_t()
+
+    @contextmanager
+    def recording(self) -> Iterator[PriceReads]:
+        """
+        Запись цен, прочитанных внутри блока
+
+        Результат с такой отметкой остается верным, пока не изменились
+        именно прочитанные цены (см. is_current).
+        """
+        reads = PriceReads(self.snapshot())
+        token = _reads.set(reads.values)
+        try:
+            yield reads
+        finally:
+            _reads.reset(token)
+
+    def is_current(self, reads: PriceReads) -> bool:
+        snapshot = self.snapshot()
+        if snapshot is reads.snapshot:
+            return True
+        return all(snapshot.lookup(dependency) == value for dependency, value in reads.values.items())
+
+    def get_stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            "prices": len(snapshot.prices()),
+            "regions": len(snapshot.regions),
+            "version": snapshot.version,
+            "as_of": snapshot.as_of,
+            "reloads": self._reloads
+        }
+
+    # ==================== ИЗМЕНЕНИЕ ====================
+
+    def set_price(self, key: str, price: float, region: str = "", effective_from: str = "") -> None:
+        """Добавить или изменить цену; снимок обновится сразу"""
+        self._execute('''
+        INSERT INTO prices (key, region, effective_from, price) VALUES (?, ?, ?, ?)
+        ON CONFLICT (key, region, effective_from) DO UPDATE SET price = excluded.price
+        ''', (key, region.lower(), effective_from, price))
+
+    def set_region(self, name: str, delta_t: float, coefficient: float) -> None:
+        if coefficient <= 0:
+            raise ValueError(f"Некорректный коэффициент региона {name}: {coefficient}")
+        self._execute('''
+        INSERT INTO regions (name, delta_t, coefficient) VALUES (?, ?, ?)
+        ON CONFLICT (name) DO UPDATE SET delta_t = excluded.delta_t, coefficient = excluded.coefficient
+        ''', (name.lower(), delta_t, coefficient))
+
+    def _execute(self, sql: str, params: tuple) -> None:
+        conn = self._connect()
+        if conn is None:
+            raise RuntimeError("Прайс-лист работает без базы данных")
+        with self._lock:
+            conn.execute(sql, params)
+            conn.commit()
+        self._refresh(force=True)
+
+    # ==================== ЗАГРУЗКА ====================
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self.conn is not None or not self.db_path:
+            return self.conn
+        with self._lock:
+            if self.conn is None:
+                conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                conn.executescript('''
+                CREATE TABLE IF NOT EXISTS prices (
+                    key TEXT NOT NULL,
+                    region TEXT NOT NULL DEFAULT '',
+                    effective_from TEXT NOT NULL DEFAULT '',
+                    price REAL NOT NULL,
+                    PRIMARY KEY (key, region, effective_from)
+                );
+                CREATE TABLE IF NOT EXISTS regions (
+                    name TEXT PRIMARY KEY,
+                    delta_t REAL NOT NULL,
+                    coefficient REAL NOT NULL DEFAULT 1
+                );
+                CREATE TABLE IF NOT EXISTS price_book_version (
+                    id INTEGER PRIMARY KEY CHECK (id = 1),
+                    version INTEGER NOT NULL
+                );
+                INSERT OR IGNORE INTO price_book_version (id, version) VALUES (1, 1);
+                ''')
+                for table in ("prices", "regions"):
+                    for event in ("INSERT", "UPDATE", "DELETE"):
+                        conn.execute(f'''
+                        CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()} AFTER {event} ON {table}
+                        BEGIN UPDATE price_book_version SET version = version + 1 WHERE id = 1; END
+                        ''')
+                if conn.execute("SELECT COUNT(*) FROM prices").fetchone()[0] == 0:
+                    conn.executemany(
+                        "INSERT INTO prices (key, price) VALUES (?, ?)", PRICES.items()
+                    )
+                if conn.execute("SELECT COUNT(*) FROM regions").fetchone()[0] == 0:
+                    conn.executemany(
+                        "INSERT INTO regions (name, delta_t, coefficient) VALUES (?, ?, ?)",
+                        [(name, delta_t, coefficient) for name, (delta_t, coefficient) in REGIONS.items()]
+                    )
+                conn.commit()
+                self.conn = conn
+        return self.conn
+
+    def _refresh(self, force: bool = False) -> None:
+        """Сверка версии и даты не чаще раза в check_interval секунд"""
+        now = time.monotonic()
+        if not force and now - self._checked < self.check_interval:
+            return
+        self._checked = now
+        today = date.today().isoformat()
+        if not self.db_path:
+            if today != self._snapshot.as_of:
+                self._snapshot = self._build(0, today, [], [])
+            return
+        try:
+            conn = self._connect()
+            version = conn.execute("SELECT version FROM price_book_version WHERE id = 1").fetchone()[0]
+            if not force and version == self._snapshot.version and today == self._snapshot.as_of:
+                return
+            with self._lock:
+                rows = list(conn.execute('''
+                SELECT key, region, price FROM prices
+                WHERE effective_from <= ? ORDER BY effective_from
+                ''', (today,)))
+                regions = list(conn.execute("SELECT name, delta_t, coefficient FROM regions"))
+                self._snapshot = self._build(version, today, rows, regions)
+                self._reloads += 1
+            logger.info(f"Прайс-лист загружен: {len(rows)} цен, {len(regions)} регионов, версия {version}")
+        except Exception as e:
+            logger.error(f"Ошибка загрузки прайс-листа, используется прежний снимок: {e}")
+
+    @staticmethod
+    def _build(version: int, as_of: str, rows: list, regions: list) -> PriceSnapshot:
+        """Строки прайса идут по возрастанию даты: более поздняя перекрывает раннюю"""
+        base = dict(PRICES)
+        overrides: Dict[str, Dict[str, float]] = {}
+        for key, region, price in rows:
+            # REAL из базы: целые цены остаются целыми, как в PRICES
+            price = int(price) if float(price).is_integer() else price
+            (overrides.setdefault(region, {}) if region else base)[key] = price
+
+        by_name = {name: Region(name, delta_t, coefficient)
+                   for name, (delta_t, coefficient) in REGIONS.items()}
+        by_name.update({name: Region(name, delta_t, coefficient) for name, delta_t, coefficient in regions})
+        return PriceSnapshot(version, as_of, base, overrides, by_name)
+
+price_book = PriceBook(
+    str(PRICE_BOOK_DB_PATH) if PRICE_BOOK_DB_PATH else None,
+    check_interval=PRICE_BOOK_CHECK_INTERVAL
+)
@@ -2,9 +2,23 @@
 МЕНЕДЖЕР ПРОЕКТОВ v12.0
 """
 
+import math
 from typing import List, Dict, Optional
 from datetime import datetime
 
+from estimation import HouseSpec, estimate_house
+from price_book import price_book
+
+# Ключ прайс-листа с укрупненной ценой м² по типу проекта
+PROJECT_PRICE_KEYS = {
+    "дом": "project_house",
+    "дача": "project_dacha",
+    "баня": "project_banya",
+    "гараж": "project_garage",
+    "ремонт": "project_repair",
+    "квартира": "project_flat"
+}
+
 class ProjectsManager:
     """Класс для работы с проектами"""
     
@@ -84,17 +98,11 @@ class ProjectsManager:
         area = project['area']
         project_type = project['type']
         
-        # Расчет стоимости по типу проекта
-        cost_per_m2 = {
-            "дом": 35000,      # руб/м²
-            "дача": 25000,
-            "баня": 40000,
-            "гараж": 20000,
-            "ремонт": 15000,
-            "квартира": 20000
-        }
+        # Расчет стоимости по типу проекта, руб/м²
+        prices = price_book.prices()
+        cost_per_m2 = prices[PROJECT_PRICE_KEYS.get(project_type.lower(), "project_default")]
         
-        base_cost = area * cost_per_m2.get(project_type.lower(), 25000)
+        base_cost = area * cost_per_m2
         
         # Детализация по категориям
         categories = {
@@ -112,12 +120,48 @@ class ProjectsManager:
         
         return {
             "project": project,
-            "base_cost_per_m2": cost_per_m2.get(project_type.lower(), 25000),
+            "base_cost_per_m2": cost_per_m2,
             "total_estimated": base_cost,
             "detailed": detailed_cost,
             "difference": project['budget'] - base_cost if project['budget'] else 0
         }
     
+    def estimate_house(self, length: float, width: float, floors: int = 1, **options) -> Dict:
+        """
+        Смета дома одним вызовом: геометрия, объемы и стоимость по разделам
+        options - остальные поля HouseSpec (wall_material, region, roof_material...)
+        """
+        try:
+            estimate = estimate_house(HouseSpec(length, width, floors, **options))
+        except (TypeError, ValueError) as e:
+            return {"error": str(e)}
+        return estimate.to_dict()
+    
+    def estimate_project(self, project_id: int, floors: int = 1, **options) -> Dict:
+        """Смета по площади проекта: квадратный дом с заданной этажностью"""
+        if floors < 1:
+            return {"error": "Этажей должно быть не меньше 1"}
+        
+        project = self.db.cursor.execute(
+            "SELECT * FROM projects WHERE id = ?", (project_id,)
+        ).fetchone()
+        
+        if not project:
+            return {"error": "Проект не найден"}
+        
+        project = dict(project)
+        if not project['area'] or project['area'] <= 0:
+            return {"error": "У проекта не указана площадь"}
+        
+        side = math.sqrt(project['area'] / floors)
+        estimate = self.estimate_house(side, side, floors, **options)
+        if "error" in estimate:
+            return estimate
+        
+        estimate["project"] = project
+        estimate["difference"] = project['budget'] - estimate["total_cost"] if project['budget'] else 0
+        return estimate
+    
     def update_project_progress(self, project_id: int, stage: str, progress: int) -> bool:
         """Обновить прогресс проекта"""
         project = self.db.cursor.execute(
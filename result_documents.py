@@ -0,0 +1,273 @@
+"""
+ДОКУМЕНТЫ С РЕЗУЛЬТАТАМИ РАСЧЕТОВ v12.0
+Длинный результат калькулятора уходит в чат кратким итогом, полная
+разбивка - файлом CSV, HTML или PDF. Файл строится в пуле потоков,
+одинаковые результаты (по хэшу) строятся один раз
+"""
+
+import asyncio
+import csv
+import hashlib
+import html
+import io
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, NamedTuple, Optional, Tuple
+
+from config import (DOCUMENT_INLINE_LIMIT, DOCUMENT_INLINE_LINES, DOCUMENT_FORMAT, DOCUMENT_PDF_FONT,
+                    DOCUMENT_CACHE_MAX_ENTRIES, DOCUMENT_CACHE_MAX_BYTES)
+from calc_results import CalcResult, Value
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_FORMATS = ("html", "csv", "pdf")
+MIME_TYPES = {"html": "text/html", "csv": "text/csv", "pdf": "application/pdf"}
+
+# Краткий итог в чате: строк из раздела
+SUMMARY_ITEMS = 6
+
+class DocumentError(Exception):
+    """Документ в этом формате построить нельзя (нет библиотеки, шрифта)"""
+
+class Document(NamedTuple):
+    filename: str
+    data: bytes
+    mime: str
+
+def needs_document(text: str, limit: int = DOCUMENT_INLINE_LIMIT, lines: int = DOCUMENT_INLINE_LINES) -> bool:
+    """Текст не помещается в одно сообщение с запасом на разметку или слишком длинный для чтения в чате"""
+    return len(text) > limit or text.count("\n") > lines
+
+def result_hash(calc_type: str, result: CalcResult) -> str:
+    """Хэш содержимого результата: одинаковые расчеты дают один документ"""
+    payload = json.dumps([calc_type, result.to_dict(raw=True)], ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def summary(calc_type: str, result: CalcResult, items: int = SUMMARY_ITEMS) -> str:
+    """
+    Краткий итог для чата: заголовок, итоговая стоимость и первые
+    строки результатов; остальное - в документе
+    """
+    parts = [f"🧮 *Результат расчета ({result.type or calc_type})*\n\n"]
+    if result.total_cost is not None:
+        parts.append(f"💰 *Итого:* {result.cost['Итого']}\n\n")
+    for section, title in CalcResult.SECTIONS:
+        values = getattr(result, section)
+        if section == "cost" or not values:
+            continue
+        shown = list(values.items())[:items]
+        parts.append(f"*{title}:*\n")
+        parts.extend(f"• {key}: {value}\n" for key, value in shown)
+        if len(values) > len(shown):
+            parts.append(f"• ... еще {len(values) - len(shown)}\n")
+        parts.append("\n")
+    parts.append("📎 Полный расчет - в файле ниже")
+    return "".join(parts)
+
+# ==================== ФОРМАТЫ ====================
+
+Row = Tuple[str, str, str, Any, str]   # раздел, показатель, значение текстом, число, единица
+
+def _rows(result: CalcResult) -> Iterator[Row]:
+    """Все строки результата по разделам, в порядке вывода в чате"""
+    for section, title in CalcResult.SECTIONS:
+        for key, value in (getattr(result, section) or {}).items():
+            if isinstance(value, Value):
+                yield title, key, str(value), value.amount, value.unit
+            else:
+                yield title, key, str(value), value if isinstance(value, (int, float)) else "", ""
+    for i, text in enumerate(result.recommendations or (), 1):
+        yield "Рекомендации", str(i), text, "", ""
+    if result.formula is not None:
+        yield "Формула", "", result.formula, "", ""
+    for text in result.notes or ():
+        yield "Примечания", "", text, "", ""
+
+def _render_csv(calc_type: str, result: CalcResult) -> bytes:
+    # BOM и ";" - файл открывается в Excel с русской локалью без мастера импорта
+    buffer = io.StringIO()
+    buffer.write("\ufeff")
+    writer = csv.writer(buffer, delimiter=";")
+    writer.writerow(["раздел", "показатель", "значение", "число", "единица"])
+    writer.writerows(_rows(result))
+    return buffer.getvalue().encode("utf-8")
+
+_HTML_STYLE = (
+    "body{font-family:sans-serif;max-width:60em;margin:1em auto;padding:0 1em;color:#222}"
+    "table{border-collapse:collapse;width:100%;margin-bottom:1.5em}"
+    "td{border-bottom:1px solid #ddd;padding:.3em .5em}td.v{text-align:right;white-space:nowrap}"
+    "h2{font-size:1.1em;margin-top:1.5em}"
+)
+
+def _render_html(calc_type: str, result: CalcResult) -> bytes:
+    title = html.escape(result.type or calc_type)
+    parts = [f"<!DOCTYPE html><html lang=\"ru\"><head><meta charset=\"utf-8\">"
+             f"<meta name=\"viewport\" content=\"width=device-width\"><title>{title}</title>"
+             f"<style>{_HTML_STYLE}</style></head><body><h1>{title}</h1>"]
+    section = None
+    for name, key, text, _, _ in _rows(result):
+        if name != section:
+            if section is not None:
+                parts.append("</table>")
+            parts.append(f"<h2>{html.escape(name)}</h2><table>")
+            section = name
+        if key and name != "Рекомендации":
+            parts.append(f"<tr><td>{html.escape(key)}</td><td class=\"v\">{html.escape(text)}</td></tr>")
+        else:
+            parts.append(f"<tr><td colspan=\"2\">{html.escape((key + '. ' if key else '') + text)}</td></tr>")
+    if section is not None:
+        parts.append("</table>")
+    parts.append("</body></html>")
+    return "".join(parts).encode("utf-8")
+
+def _render_pdf(calc_type: str, result: CalcResult) -> bytes:
+    """PDF через reportlab (необязательная зависимость) со шрифтом DOCUMENT_PDF_FONT"""
+    try:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import getSampleStyleSheet
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+        from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table
+    except ImportError:
+        raise DocumentError("Для PDF нужен reportlab: pip install reportlab") from None
+    try:
+        pdfmetrics.registerFont(TTFont("DocumentFont", DOCUMENT_PDF_FONT))
+    except Exception as e:
+        raise DocumentError(f"Шрифт для PDF не загружен ({DOCUMENT_PDF_FONT}): {e}") from None
+
+    styles = getSampleStyleSheet()
+    for style in ("Title", "Heading2", "BodyText"):
+        styles[style].fontName = "DocumentFont"
+
+    story = [Paragraph(html.escape(result.type or calc_type), styles["Title"])]
+    section, rows = None, []
+
+    def flush() -> None:
+        if rows:
+            table = Table(rows, colWidths=("65%", "35%"))
+            table.setStyle([("FONTNAME", (0, 0), (-1, -1), "DocumentFont"), ("ALIGN", (1, 0), (1, -1), "RIGHT")])
+            story.extend([table, Spacer(0, 8)])
+            rows.clear()
+
+    for name, key, text, _, _ in _rows(result):
+        if name != section:
+            flush()
+            story.append(Paragraph(html.escape(name), styles["Heading2"]))
+            section = name
+        if key and name != "Рекомендации":
+            rows.append([Paragraph(html.escape(key), styles["BodyText"]), text])
+        else:
+            story.append(Paragraph(html.escape((key + ". " if key else "") + text), styles["BodyText"]))
+    flush()
+
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=A4, title=result.type or calc_type).build(story)
+    return buffer.getvalue()
+
+_RENDERERS = {"html": _render_html, "csv": _render_csv, "pdf": _render_pdf}
+
+def render_document(calc_type: str, result: CalcResult, fmt: str = DOCUMENT_FORMAT,
+                    digest: Optional[str] = None) -> Document:
+    """Документ с полным результатом; неизвестный или недоступный формат - DocumentError"""
+    if fmt not in _RENDERERS:
+        raise DocumentError(f"Неизвестный формат документа: {fmt}. Доступно: {', '.join(DOCUMENT_FORMATS)}")
+    digest = digest or result_hash(calc_type, result)
+    return Document(f"расчет_{calc_type}_{digest[:8]}.{fmt}", _RENDERERS[fmt](calc_type, result), MIME_TYPES[fmt])
+
+# ==================== КЭШ ====================
+
+class DocumentCache:
+    """
+    Готовые документы по (хэш результата, формат)
+
+    LRU с лимитом числа записей и суммарного размера; одновременные
+    запросы одного документа ждут одну сборку.
+    """
+
+    def __init__(self, max_entries: int = 500, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple[str, str], Document]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._building: Dict[Tuple[str, str], "asyncio.Future[Document]"] = {}
+        self._hits = 0
+        self._built = 0
+        self._evicted = 0
+
+    def get(self, key: Tuple[str, str]) -> Optional[Document]:
+        with self._lock:
+            document = self._entries.get(key)
+            if document is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+            return document
+
+    def put(self, key: Tuple[str, str], document: Document) -> None:
+        size = len(document.data)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.data)
+            self._entries[key] = document
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted.data)
+                self._evicted += 1
+
+    async def build(self, calc_type: str, result: CalcResult, fmt: str = DOCUMENT_FORMAT) -> Document:
+        """
+        Документ из кэша или собранный в пуле потоков (не блокирует
+        цикл событий); повторный запрос во время сборки ждет ее же
+        """
+        digest = result_hash(calc_type, result)
+        key = (digest, fmt)
+        document = self.get(key)
+        if document is not None:
+            return document
+
+        pending = self._building.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._building[key] = future
+        try:
+            document = await asyncio.to_thread(render_document, calc_type, result, fmt, digest)
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # ошибку получит вызывающий; ожидающих может не быть
+            raise
+        else:
+            with self._lock:
+                self._built += 1
+            self.put(key, document)
+            future.set_result(document)
+        finally:
+            self._building.pop(key, None)
+            if not future.done():
+                # Сборку отменили (CancelledError - не Exception): ожидающие не должны висеть
+                future.cancel()
+        return document
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self._hits,
+                "built": self._built,
+                "evicted": self._evicted
+            }
+
+document_cache = DocumentCache(DOCUMENT_CACHE_MAX_ENTRIES, DOCUMENT_CACHE_MAX_BYTES)
@@ -0,0 +1,457 @@
+"""
+ГЕОМЕТРИЯ КРОВЛИ v12.0
+Скаты по контуру дома и уклонам каждой стороны: площади, коньки, ребра,
+ендовы, раскладка листов с подбором смещения под минимум отходов
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from geometry import polygons, signed_area as _area
+
+EPS = 1e-9
+
+# Виды линий кровли
+EAVE, RAKE, RIDGE, HIP, VALLEY, ABUTMENT = "карниз", "фронтон", "конек", "ребро", "ендова", "примыкание"
+TOP = "верхний край"   # горизонтальная кромка односкатной крыши
+LINE_KINDS = (EAVE, RAKE, RIDGE, HIP, VALLEY, ABUTMENT, TOP)
+
+class SheetProfile(NamedTuple):
+    width: float          # полная ширина листа, м
+    effective: float      # рабочая ширина с учетом нахлеста, м
+    step: float           # кратность длины (шаг волны), м
+    max_length: float     # наибольшая длина листа, м
+    overlap: float        # нахлест листов по длине, м
+
+SHEET_PROFILES = {
+    "металлочерепица": SheetProfile(1.18, 1.10, 0.35, 6.0, 0.15),
+    "профнастил": SheetProfile(1.15, 1.10, 0.05, 12.0, 0.20),
+}
+
+# Гибкая черепица
+SHINGLE_PACK_AREA = 3.0       # м² в упаковке
+SHINGLE_WASTE = 0.05          # подрезка на плоскости
+SHINGLE_CUT_WIDTH = 0.15      # м подрезки вдоль ребер и ендов
+RIDGE_PACK_LENGTH = 20.0      # м коньково-карнизной черепицы в упаковке
+VALLEY_ROLL_LENGTH = 10.0     # м ендовного ковра в рулоне
+
+# Сколько смещений раскладки перебирать на скат
+LAYOUT_OFFSETS = 8
+# Полос листов на скат: ~2 км карниза; массивы раскладки растут с числом полос
+MAX_SHEET_STRIPS = 2000
+
+ROOF_FORMS = ("двускатная", "вальмовая", "шатровая", "односкатная")
+
+@dataclass
+class RoofSection:
+    """
+    Часть кровли над выпуклым контуром
+
+    footprint - вершины контура (м), pitches - уклон ската от стороны
+    i (вершина i -> i+1) в градусах, None - фронтон. Несколько секций
+    (основная кровля, крылья, слуховые окна) пересекаются: видна
+    верхняя поверхность, на стыках образуются ендовы.
+    """
+    footprint: Sequence[Tuple[float, float]]
+    pitches: Sequence[Optional[float]]
+    eave_height: float = 0.0
+
+# Многоугольник с метками сторон: сторона j идет от вершины j к j + 1
+Polygon = Tuple[np.ndarray, List[tuple]]
+
+def _clip(polygon: Polygon, line: np.ndarray, tag: tuple) -> Optional[Polygon]:
+    """
+    Часть многоугольника, где a·x + b·y + c <= 0 (Сазерленд-Ходжман)
+
+    Новая сторона вдоль прямой получает метку tag.
+    """
+    points, tags = polygon
+    values = points @ line[:2] + line[2]
+    if np.all(values <= EPS):
+        return polygon
+    if np.all(values >= -EPS):
+        return None
+
+    out_points, out_tags = [], []
+    n = len(points)
+    for j in range(n):
+        k = (j + 1) % n
+        inside_j, inside_k = values[j] <= EPS, values[k] <= EPS
+        if inside_j:
+            out_points.append(points[j])
+            out_tags.append(tags[j])
+        if inside_j != inside_k:
+            t = values[j] / (values[j] - values[k])
+            out_points.append(points[j] + t * (points[k] - points[j]))
+            # После выхода за прямую следующая сторона идет вдоль нее
+            out_tags.append(tag if inside_j else tags[j])
+    if len(out_points) < 3:
+        return None
+    result = (np.array(out_points), out_tags)
+    return result if _area(result[0]) > EPS else None
+
+def _subtract(polygon: Polygon, lines: np.ndarray, tags: List[tuple]) -> List[Polygon]:
+    """Многоугольник минус выпуклая область ∩ {line <= 0}: выпуклые куски"""
+    pieces = []
+    rest = polygon
+    for line, tag in zip(lines, tags):
+        outside = _clip(rest, -line, tag)
+        if outside is not None:
+            pieces.append(outside)
+        rest = _clip(rest, line, tag)
+        if rest is None:
+            break
+    return pieces
+
+class _Section:
+    """Секция, приведенная к обходу против часовой стрелки, и плоскости ее скатов"""
+
+    def __init__(self, index: int, section: RoofSection):
+        points = np.asarray(section.footprint, dtype=float)
+        pitches = list(section.pitches)
+        n = len(points)
+        if n < 3 or len(pitches) != n:
+            raise ValueError("Для секции нужны не меньше 3 вершин и уклон для каждой стороны")
+        if _area(points) < 0:
+            points = points[::-1].copy()
+            pitches = [pitches[(n - 2 - j) % n] for j in range(n)]
+
+        edges = np.roll(points, -1, axis=0) - points
+        cross = edges[:, 0] * np.roll(edges[:, 1], -1) - edges[:, 1] * np.roll(edges[:, 0], -1)
+        if np.any(cross < -EPS):
+            raise ValueError("Контур секции должен быть выпуклым: разбейте кровлю на секции")
+        if all(p is None for p in pitches):
+            raise ValueError("Хотя бы одна сторона секции должна иметь скат")
+        for pitch in pitches:
+            if pitch is not None and not 0 < pitch < 90:
+                raise ValueError(f"Уклон ската: от 0 до 90°, указано {pitch}")
+
+        self.index = index
+        self.points = points
+        self.pitches = pitches
+        self.eave_height = section.eave_height
+
+        # Внутренние нормали и прямые сторон: a·x + b·y + c <= 0 внутри контура
+        length = np.hypot(edges[:, 0], edges[:, 1])
+        self.normals = np.stack([-edges[:, 1], edges[:, 0]], axis=1) / length[:, None]
+        self.edge_lines = np.column_stack([-self.normals, np.einsum("ij,ij->i", self.normals, points)])
+
+        # Плоскость ската стороны e: z = a·x + b·y + c
+        self.faces = [e for e, pitch in enumerate(pitches) if pitch is not None]
+        tangent = np.tan(np.radians([pitches[e] for e in self.faces]))
+        normals = self.normals[self.faces]
+        self.planes = np.column_stack([
+            tangent[:, None] * normals,
+            section.eave_height - tangent * np.einsum("ij,ij->i", normals, points[self.faces])
+        ])
+
+    def polygon(self) -> Polygon:
+        return self.points.copy(), [("edge", self.index, e) for e in range(len(self.points))]
+
+    def height(self, xy: np.ndarray) -> np.ndarray:
+        """Высота кровли секции в точках (без учета других секций)"""
+        return (xy @ self.planes[:, :2].T + self.planes[:, 2]).min(axis=1)
+
+class Face(NamedTuple):
+    section: int
+    edge: int                 # сторона контура, от которой поднимается скат
+    pitch: float
+    pieces: List[np.ndarray]  # выпуклые куски видимой части (план)
+    plan_area: float
+    area: float
+
+class Line(NamedTuple):
+    kind: str
+    length: float
+    start: Tuple[float, float, float]
+    end: Tuple[float, float, float]
+
+class SheetLayout(NamedTuple):
+    sheets: int
+    ordered_area: float   # м² заказанных листов
+    waste: float          # доля отходов от заказанной площади
+
+class RoofGeometry:
+    """Скаты и линии кровли; количество листов и черепицы по ним"""
+
+    __slots__ = ("faces", "lines", "_sections")
+
+    def __init__(self, faces: List[Face], lines: List[Line], sections: List[_Section]):
+        self.faces = faces
+        self.lines = lines
+        self._sections = sections
+
+    @property
+    def area(self) -> float:
+        return sum(face.area for face in self.faces)
+
+    @property
+    def plan_area(self) -> float:
+        return sum(face.plan_area for face in self.faces)
+
+    def lengths(self) -> Dict[str, float]:
+        """Суммарная длина линий по видам, м"""
+        totals = dict.fromkeys(LINE_KINDS, 0.0)
+        for line in self.lines:
+            totals[line.kind] += line.length
+        return totals
+
+    def sheets(self, material: str = "металлочерепица") -> SheetLayout:
+        """
+        Раскладка листов: полосы рабочей ширины от карниза к коньку
+
+        Для каждого ската перебирается LAYOUT_OFFSETS смещений первой
+        полосы и выбирается дающее наименьшую заказанную площадь.
+        Длина листа округляется вверх до шага волны. Скат длиннее
+        MAX_SHEET_STRIPS полос - ValueError.
+        """
+        profile = SHEET_PROFILES.get(material)
+        if profile is None:
+            raise ValueError(f"Раскладка листов: {', '.join(SHEET_PROFILES)}")
+        sheets, ordered = 0, 0.0
+        for face in self.faces:
+            count, length = _layout_face(self._sections[face.section], face, profile)
+            sheets += count
+            ordered += length * profile.width
+        waste = 1 - self.area / ordered if ordered else 0.0
+        return SheetLayout(sheets, ordered, waste)
+
+    def shingles(self) -> Dict[str, float]:
+        """Гибкая черепица: упаковки, коньково-карнизная черепица, ендовный ковер"""
+        lengths = self.lengths()
+        cut_area = (lengths[HIP] + lengths[VALLEY]) * SHINGLE_CUT_WIDTH
+        area = self.area * (1 + SHINGLE_WASTE) + cut_area
+        ridge_eave = lengths[RIDGE] + lengths[HIP] + lengths[EAVE]
+        return {
+            "packs": math.ceil(area / SHINGLE_PACK_AREA),
+            "ridge_packs": math.ceil(ridge_eave / RIDGE_PACK_LENGTH) if ridge_eave else 0,
+            "valley_rolls": math.ceil(lengths[VALLEY] * 1.1 / VALLEY_ROLL_LENGTH) if lengths[VALLEY] else 0,
+            "waste": 1 - self.area / area if area else 0.0
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "area": self.area,
+            "plan_area": self.plan_area,
+            "faces": [{"section": f.section, "edge": f.edge, "pitch": f.pitch, "area": f.area} for f in self.faces],
+            "lines": self.lengths()
+        }
+
+def _layout_face(section: _Section, face: Face, profile: SheetProfile) -> Tuple[int, float]:
+    """Листы одного ската: (количество, суммарная длина)"""
+    start = section.points[face.edge]
+    direction = section.points[(face.edge + 1) % len(section.points)] - start
+    direction = direction / np.hypot(*direction)
+    normal = section.normals[face.edge]
+    slope = 1 / math.cos(math.radians(face.pitch))
+
+    # Координаты ската: u - вдоль карниза, v - по плану вверх по скату
+    local = [np.column_stack([(piece - start) @ direction, (piece - start) @ normal]) for piece in face.pieces]
+    u_min = min(points[:, 0].min() for points in local)
+    u_max = max(points[:, 0].max() for points in local)
+
+    # Все смещения первой полосы сразу: строка k - раскладка со смещением k
+    first = u_min - profile.effective * np.arange(LAYOUT_OFFSETS) / LAYOUT_OFFSETS
+    strips = (u_max - first.min()) / profile.effective
+    if not strips <= MAX_SHEET_STRIPS:
+        raise ValueError(f"Скат слишком длинный для раскладки листов: больше {MAX_SHEET_STRIPS} полос")
+    strips = int(math.ceil(strips - EPS))
+    count = np.zeros(LAYOUT_OFFSETS)
+    total = np.zeros(LAYOUT_OFFSETS)
+    for points in local:
+        low, high = _strip_extents(points, first, profile.effective, strips)
+        spans = np.where(np.isfinite(low) & np.isfinite(high), (high - low) * slope, 0.0)
+        used = spans > EPS
+        # Длинный скат - несколько листов с нахлестом
+        pieces = np.maximum(1, np.ceil((spans - profile.overlap) / (profile.max_length - profile.overlap)))
+        lengths = np.ceil((spans + (pieces - 1) * profile.overlap) / profile.step - EPS) * profile.step
+        count += np.where(used, pieces, 0).sum(axis=1)
+        total += np.where(used, lengths, 0).sum(axis=1)
+    best = int(np.argmin(total))
+    return int(count[best]), float(total[best])
+
+def _envelope(points: np.ndarray, samples: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Нижняя и верхняя граница v выпуклого многоугольника на вертикалях u = samples"""
+    u0, v0 = points[:, 0], points[:, 1]
+    u1, v1 = np.roll(u0, -1), np.roll(v0, -1)
+    du = u1 - u0
+    vertical = np.abs(du) <= EPS
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = (samples[:, None] - u0) / du
+        values = v0 + t * (v1 - v0)
+    on_edge = (t >= -EPS) & (t <= 1 + EPS) & ~vertical
+    # Вертикальная сторона дает обе вершины
+    at_vertical = vertical & (np.abs(samples[:, None] - u0) <= EPS)
+    high = np.maximum(np.where(on_edge, values, -np.inf).max(axis=1),
+                      np.where(at_vertical, np.maximum(v0, v1), -np.inf).max(axis=1))
+    low = np.minimum(np.where(on_edge, values, np.inf).min(axis=1),
+                     np.where(at_vertical, np.minimum(v0, v1), np.inf).min(axis=1))
+    return low, high
+
+def _strip_extents(points: np.ndarray, first: np.ndarray, width: float,
+                   strips: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Границы v многоугольника в полосах first[k] + width·[i, i + 1]
+
+    Экстремумы в полосе - на ее границах или в вершинах внутри нее:
+    границы многоугольника считаются сразу во всех этих точках.
+    Результат - массивы (смещения × полосы), пустая полоса - ±inf.
+    """
+    boundaries = first[:, None] + width * np.arange(strips + 1)
+    low_b, high_b = _envelope(points, boundaries.ravel())
+    low_b, high_b = low_b.reshape(boundaries.shape), high_b.reshape(boundaries.shape)
+    high = np.maximum(high_b[:, :-1], high_b[:, 1:])
+    low = np.minimum(low_b[:, :-1], low_b[:, 1:])
+
+    low_v, high_v = _envelope(points, points[:, 0])
+    strip = np.clip(np.floor((points[:, 0] - first[:, None]) / width).astype(np.intp), 0, strips - 1)
+    rows = np.broadcast_to(np.arange(len(first))[:, None], strip.shape)
+    np.maximum.at(high, (rows, strip), np.broadcast_to(high_v, strip.shape))
+    np.minimum.at(low, (rows, strip), np.broadcast_to(low_v, strip.shape))
+    return low, high
+
+def build_roof(sections: Sequence[RoofSection]) -> RoofGeometry:
+    """
+    Скаты и линии кровли из секций
+
+    Скат стороны - часть контура, где его плоскость ниже плоскостей
+    остальных скатов секции (выпуклый многоугольник, отсечение
+    полуплоскостями). Из него вычитаются части, закрытые более высокими
+    секциями. Линии классифицируются по меткам сторон кусков
+    (метка - прямая, которой отсечена сторона).
+    """
+    prepared = [_Section(i, section) for i, section in enumerate(sections)]
+    faces: List[Face] = []
+    lines_found: List[Line] = []
+
+    for section in prepared:
+        planes = section.planes
+        for f, edge in enumerate(section.faces):
+            # Плоскость f не выше остальных: (plane_f - plane_g)·(x, y, 1) <= 0
+            polygon = section.polygon()
+            for g, other in enumerate(section.faces):
+                if g == f:
+                    continue
+                line = planes[f] - planes[g]
+                if np.all(np.abs(line) <= EPS):
+                    if g < f:
+                        polygon = None   # совпадающая плоскость уже учтена
+                        break
+                    continue
+                polygon = _clip(polygon, line, ("face", section.index, other))
+                if polygon is None:
+                    break
+            if polygon is None:
+                continue
+
+            pieces = [polygon]
+            for hider in prepared:
+                if hider is section:
+                    continue
+                # Закрыто: внутри контура hider и его кровля выше ската.
+                # Контур проверяется первым: вне его скат остается целым куском
+                bias = EPS if hider.index < section.index else -EPS
+                lines = np.vstack([hider.edge_lines, planes[f] - hider.planes])
+                lines[len(hider.points):, 2] -= bias
+                tags = ([("wall", hider.index, e) for e in range(len(hider.points))]
+                        + [("face", hider.index, e) for e in hider.faces])
+                pieces = [part for piece in pieces for part in _subtract(piece, lines, tags)]
+            if not pieces:
+                continue
+
+            pitch = section.pitches[edge]
+            plan_area = float(polygons([points for points, _ in pieces]).signed.sum())
+            faces.append(Face(section.index, edge, pitch, [points for points, _ in pieces],
+                              plan_area, plan_area / math.cos(math.radians(pitch))))
+
+            for tag, start, end in _outline(pieces, planes[f]):
+                kind, shared = _classify(section, edge, tag, start[2], end[2])
+                length = math.dist(start, end)
+                # Общие линии двух скатов встречаются дважды
+                lines_found.append(Line(kind, length / 2 if shared else length, start, end))
+
+    return RoofGeometry(faces, lines_found, prepared)
+
+def _outline(pieces: List[Polygon], plane: np.ndarray) -> List[Tuple[tuple, tuple, tuple]]:
+    """
+    Внешние стороны ската, составленного из выпуклых кусков
+
+    Шов между кусками лежит на одной прямой с одной меткой и проходится
+    в противоположных направлениях - остается симметрическая разность
+    отрезков прямой, пройденных в одну и в другую сторону.
+    """
+    by_tag: Dict[tuple, List[Tuple[np.ndarray, np.ndarray]]] = {}
+    for points, tags in pieces:
+        for j, tag in enumerate(tags):
+            by_tag.setdefault(tag, []).append((points[j], points[(j + 1) % len(points)]))
+
+    outline = []
+    for tag, segments in by_tag.items():
+        origin = segments[0][0]
+        direction = segments[0][1] - origin
+        direction = direction / max(np.hypot(*direction), EPS)
+        forward, backward = [], []
+        for a, b in segments:
+            ta, tb = float((a - origin) @ direction), float((b - origin) @ direction)
+            if abs(tb - ta) <= 1e-6:
+                continue
+            (forward if tb > ta else backward).append((min(ta, tb), max(ta, tb)))
+        if not backward:
+            kept = [(a, b, 1) for a, b in forward]
+        else:
+            kept = _symmetric_difference(forward, backward)
+        for a, b, sign in kept:
+            if sign < 0:
+                a, b = b, a
+            points = origin + np.outer([a, b], direction)
+            z = points @ plane[:2] + plane[2]
+            outline.append((tag, (*points[0], z[0]), (*points[1], z[1])))
+    return outline
+
+def _symmetric_difference(forward: List[Tuple[float, float]],
+                          backward: List[Tuple[float, float]]) -> List[Tuple[float, float, int]]:
+    """Отрезки, покрытые ровно одним из наборов; знак - направление обхода"""
+    breaks = sorted({t for a, b in forward + backward for t in (a, b)})
+    result: List[Tuple[float, float, int]] = []
+    for a, b in zip(breaks, breaks[1:]):
+        middle = (a + b) / 2
+        in_forward = any(lo < middle < hi for lo, hi in forward)
+        in_backward = any(lo < middle < hi for lo, hi in backward)
+        if in_forward == in_backward:
+            continue
+        sign = 1 if in_forward else -1
+        if result and result[-1][2] == sign and abs(result[-1][1] - a) <= 1e-9:
+            result[-1] = (result[-1][0], b, sign)
+        else:
+            result.append((a, b, sign))
+    return result
+
+def _classify(section: _Section, edge: int, tag: tuple, z_start: float, z_end: float) -> Tuple[str, bool]:
+    """Вид линии по метке стороны куска; второй элемент - линия общая для двух скатов"""
+    kind, index, number = tag
+    level = abs(z_start - z_end) <= 1e-6
+    if kind == "edge":
+        if number == edge or section.pitches[number] is not None:
+            return EAVE, False
+        return (TOP if level and z_start > section.eave_height + 1e-6 else RAKE), False
+    if kind == "wall":
+        return ABUTMENT, False
+    if index == section.index:
+        return (RIDGE if level else HIP), True
+    return VALLEY, True
+
+def rectangular_roof(length: float, width: float, pitch: float, form: str = "двускатная") -> RoofGeometry:
+    """Кровля прямоугольного дома: двускатная, вальмовая (шатровая) или односкатная"""
+    footprint = [(0, 0), (length, 0), (length, width), (0, width)]
+    if form == "двускатная":
+        pitches = [pitch, None, pitch, None]
+    elif form in ("вальмовая", "шатровая"):
+        pitches = [pitch] * 4
+    elif form == "односкатная":
+        pitches = [pitch, None, None, None]
+    else:
+        raise ValueError(f"Неизвестная форма крыши: {form}. Доступно: {', '.join(ROOF_FORMS)}")
+    return build_roof([RoofSection(footprint, pitches)])
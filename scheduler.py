@@ -0,0 +1,134 @@
+"""
+ПЛАНИРОВЩИК ОБНОВЛЕНИЙ v12.0
+Параллельная обработка разных пользователей, последовательная - одного пользователя
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Dict, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """
+    Обработчик очереди обновлений с гарантией порядка для каждого пользователя
+
+    Обновления разных пользователей выполняются параллельно (не более workers
+    одновременно), обновления одного пользователя - строго по очереди.
+    Если у пользователя накопилось больше max_user_queue необработанных
+    обновлений, новые отбрасываются.
+    """
+
+    def __init__(self, workers: int = 8, max_user_queue: int = 20, max_pending: int = 1000):
+        # Семафор базового класса ограничивает общее число обновлений в работе,
+        # собственный семафор - число одновременно выполняемых обработчиков
+        super().__init__(max_concurrent_updates=max_pending)
+
+        if workers < 1:
+            raise ValueError("workers must be a positive integer")
+        if max_user_queue < 1:
+            raise ValueError("max_user_queue must be a positive integer")
+
+        self.workers = workers
+        self.max_user_queue = max_user_queue
+        self._workers_semaphore: Optional[asyncio.Semaphore] = None
+        self._user_locks: Dict[int, asyncio.Lock] = {}
+        self._user_pending: Dict[int, int] = {}
+
+        # Метрики
+        self._active = 0
+        self._processed = 0
+        self._dropped = 0
+        self._failed = 0
+        self._max_user_depth = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    async def initialize(self) -> None:
+        """Создание примитивов синхронизации в текущем event loop"""
+        self._workers_semaphore = asyncio.Semaphore(self.workers)
+
+    async def shutdown(self) -> None:
+        """Очистка состояния"""
+        self._user_locks.clear()
+        self._user_pending.clear()
+
+    @staticmethod
+    def _user_key(update: object) -> Optional[int]:
+        """Ключ очереди: id пользователя, иначе обновление не упорядочивается"""
+        if isinstance(update, Update) and update.effective_user:
+            return update.effective_user.id
+        return None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        """Обработка обновления в очереди пользователя"""
+        if self._workers_semaphore is None:
+            await self.initialize()
+
+        user_id = self._user_key(update)
+        enqueued = time.monotonic()
+
+        if user_id is None:
+            await self._run(coroutine, enqueued)
+            return
+
+        depth = self._user_pending.get(user_id, 0)
+        if depth >= self.max_user_queue:
+            self._dropped += 1
+            # Закрываем корутину, чтобы не было предупреждения "never awaited"
+            if asyncio.iscoroutine(coroutine):
+                coroutine.close()
+            logger.warning(f"Очередь пользователя {user_id} переполнена ({depth}), обновление отброшено")
+            return
+
+        self._user_pending[user_id] = depth + 1
+        self._max_user_depth = max(self._max_user_depth, depth + 1)
+        lock = self._user_locks.setdefault(user_id, asyncio.Lock())
+
+        try:
+            async with lock:
+                await self._run(coroutine, enqueued)
+        finally:
+            remaining = self._user_pending[user_id] - 1
+            if remaining:
+                self._user_pending[user_id] = remaining
+            else:
+                # Пользователь без очереди не должен занимать память
+                del self._user_pending[user_id]
+                self._user_locks.pop(user_id, None)
+
+    async def _run(self, coroutine: Awaitable[Any], enqueued: float) -> None:
+        """Выполнение обработчика в одном из рабочих слотов"""
+        async with self._workers_semaphore:
+            wait = time.monotonic() - enqueued
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+            self._active += 1
+            try:
+                await coroutine
+            except Exception as e:
+                self._failed += 1
+                logger.error(f"Ошибка обработки обновления: {e}")
+            finally:
+                self._active -= 1
+                self._processed += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Метрики очередей и ожидания"""
+        processed = self._processed or 1
+        return {
+            "workers": self.workers,
+            "active": self._active,
+            "queued_users": len(self._user_pending),
+            "queue_depth": sum(self._user_pending.values()),
+            "max_user_depth": self._max_user_depth,
+            "processed": self._processed,
+            "dropped": self._dropped,
+            "failed": self._failed,
+            "wait_avg": self._wait_total / processed,
+            "wait_max": self._wait_max
+        }
\ No newline at end of file
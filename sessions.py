@@ -0,0 +1,320 @@
+"""
+ХРАНИЛИЩЕ СОСТОЯНИЙ ПОЛЬЗОВАТЕЛЕЙ v12.0
+LRU + TTL вытеснение, лимит памяти, опциональное сохранение в SQLite
+(отложенная запись фоновым потоком)
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Примерный размер служебных полей записи в памяти (байт)
+SESSION_OVERHEAD = 256
+
+# Строка таблицы user_sessions; None в очереди записи - удаление
+Row = Tuple[int, str, str, float, float]
+
+class UserSession:
+    """Состояние многошагового диалога пользователя"""
+
+    __slots__ = ("user_id", "state", "data", "created", "last_seen", "size")
+
+    def __init__(self, user_id: int, state: str, data: Optional[Dict[str, Any]] = None,
+                 created: float = None, last_seen: float = None):
+        now = time.time()
+        self.user_id = user_id
+        self.state = state
+        self.data = data or {}
+        self.created = created or now
+        self.last_seen = last_seen or now
+        self.size = 0
+
+    def __repr__(self) -> str:
+        return f"UserSession(user_id={self.user_id}, state={self.state!r})"
+
+class SessionStore:
+    """
+    Ограниченное хранилище состояний пользователей
+
+    Записи вытесняются по LRU при превышении max_sessions или max_bytes
+    и удаляются после ttl секунд простоя. Если указан persist_path,
+    состояния сохраняются в SQLite, и после перезапуска бота незавершенные
+    сценарии (создание проекта, калькуляторы) продолжаются.
+
+    Запись на диск не выполняется в вызывающем потоке (event loop):
+    изменения копятся в очереди (последнее на пользователя) и пишутся
+    фоновым потоком одной транзакцией. Переход сценария на новый шаг
+    (set) и его завершение (clear) будят поток сразу, дополнение данных
+    шага и отметка активности - не реже раза в flush_interval секунд.
+    """
+
+    def __init__(self, max_sessions: int = 5000, ttl: float = 86400,
+                 max_bytes: int = 16 * 1024 * 1024, persist_path: Optional[str] = None,
+                 flush_interval: float = 1.0):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.flush_interval = flush_interval
+        self._sessions: "OrderedDict[int, UserSession]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._evicted = 0
+        self._expired = 0
+
+        # Очередь записи: user_id -> строка или None (удалить)
+        self._pending: Dict[int, Optional[Row]] = {}
+        self._inflight: Dict[int, Optional[Row]] = {}
+        self._purge_before: Optional[float] = None
+        self._db_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._writes = 0
+        self._flushes = 0
+
+        self.conn = None
+        self._writer = None
+        if persist_path:
+            self.conn = sqlite3.connect(persist_path, check_same_thread=False)
+            # WAL: чтение не ждет записи, коммит без fsync каждой транзакции
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS user_sessions (
+                user_id INTEGER PRIMARY KEY,
+                state TEXT NOT NULL,
+                data TEXT,
+                created REAL,
+                last_seen REAL
+            )
+            ''')
+            self.conn.commit()
+            self._writer = threading.Thread(target=self._write_loop, name="sessions-writer", daemon=True)
+            self._writer.start()
+
+    # ==================== ОСНОВНЫЕ ОПЕРАЦИИ ====================
+
+    def get(self, user_id: int) -> Optional[UserSession]:
+        """Получить состояние пользователя (None если нет или истекло)"""
+        with self._lock:
+            session = self._sessions.get(user_id)
+
+            if session is None and self.conn:
+                session = self._load(user_id)
+                if session:
+                    self._insert(session)
+                    self._enforce_limits()
+
+            if session is None:
+                return None
+
+            now = time.time()
+            if now - session.last_seen > self.ttl:
+                self._expired += 1
+                self._remove(user_id)
+                return None
+
+            session.last_seen = now
+            self._sessions.move_to_end(user_id)
+            self._save(session, urgent=False)
+            return session
+
+    def set(self, user_id: int, state: str, data: Optional[Dict[str, Any]] = None) -> UserSession:
+        """Установить состояние пользователя"""
+        with self._lock:
+            old = self._sessions.pop(user_id, None)
+            if old:
+                self._bytes -= old.size
+            elif self.conn:
+                # Запись вытеснена из памяти или бот перезапущен: начало
+                # сценария берется из SQLite, если запись еще не истекла
+                old = self._load(user_id)
+                if old and time.time() - old.last_seen > self.ttl:
+                    old = None
+
+            session = UserSession(user_id, state, data, created=old.created if old else None)
+            self._insert(session)
+            self._save(session, urgent=True)
+            self._enforce_limits()
+            return session
+
+    def update(self, user_id: int, **data) -> Optional[UserSession]:
+        """Дополнить данные текущего шага"""
+        with self._lock:
+            session = self.get(user_id)
+            if session is None:
+                return None
+
+            session.data.update(data)
+            self._bytes -= session.size
+            session.size = self._measure(session)
+            self._bytes += session.size
+            self._save(session, urgent=False)
+            self._enforce_limits()
+            return session
+
+    def clear(self, user_id: int) -> bool:
+        """Завершить сценарий пользователя"""
+        with self._lock:
+            return self._remove(user_id)
+
+    def evict_expired(self) -> int:
+        """Удалить все записи с истекшим TTL"""
+        with self._lock:
+            deadline = time.time() - self.ttl
+            expired = [uid for uid, s in self._sessions.items() if s.last_seen < deadline]
+            for uid in expired:
+                self._remove(uid, persist=False)
+            self._expired += len(expired)
+
+            if self.conn:
+                self._purge_before = deadline
+                self._wake.set()
+
+            return len(expired)
+
+    def flush(self) -> None:
+        """Записать очередь изменений сейчас (остановка бота, тесты)"""
+        if not self.conn:
+            return
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            purge, self._purge_before = self._purge_before, None
+            # Пока транзакция не завершена, _load читает строки отсюда
+            self._inflight = pending
+        if not pending and purge is None:
+            return
+
+        rows = [row for row in pending.values() if row is not None]
+        removed = [(user_id,) for user_id, row in pending.items() if row is None]
+        with self._db_lock:
+            try:
+                with self.conn:
+                    if purge is not None:
+                        # Удаляются только записи, которых нет в этой очереди
+                        self.conn.execute("DELETE FROM user_sessions WHERE last_seen < ?", (purge,))
+                    self.conn.executemany('''
+                    INSERT OR REPLACE INTO user_sessions (user_id, state, data, created, last_seen)
+                    VALUES (?, ?, ?, ?, ?)
+                    ''', rows)
+                    self.conn.executemany("DELETE FROM user_sessions WHERE user_id = ?", removed)
+                self._writes += len(pending)
+                self._flushes += 1
+            except Exception as e:
+                logger.error(f"Ошибка сохранения состояний пользователей ({len(pending)}): {e}")
+        with self._lock:
+            self._inflight = {}
+
+    def close(self) -> None:
+        """Остановить фоновую запись и сохранить все изменения"""
+        if not self.conn or self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._writer.join()
+        self.flush()
+        self.conn.close()
+        self.conn = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика хранилища"""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "max_sessions": self.max_sessions,
+                "max_bytes": self.max_bytes,
+                "evicted": self._evicted,
+                "expired": self._expired,
+                "persistent": self.conn is not None,
+                "pending_writes": len(self._pending),
+                "writes": self._writes,
+                "flushes": self._flushes
+            }
+
+    def __contains__(self, user_id: int) -> bool:
+        return self.get(user_id) is not None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    # ==================== ВСПОМОГАТЕЛЬНЫЕ МЕТОДЫ ====================
+
+    @staticmethod
+    def _measure(session: UserSession) -> int:
+        """Оценка занимаемой памяти"""
+        return SESSION_OVERHEAD + len(session.state) + len(json.dumps(session.data, ensure_ascii=False, default=str))
+
+    def _insert(self, session: UserSession) -> None:
+        session.size = self._measure(session)
+        self._sessions[session.user_id] = session
+        self._bytes += session.size
+
+    def _remove(self, user_id: int, persist: bool = True) -> bool:
+        session = self._sessions.pop(user_id, None)
+        if session:
+            self._bytes -= session.size
+
+        if persist and self.conn:
+            self._pending[user_id] = None
+            self._wake.set()
+
+        return session is not None
+
+    def _enforce_limits(self) -> None:
+        """Вытеснение самых старых записей при превышении лимитов"""
+        while self._sessions and (len(self._sessions) > self.max_sessions or self._bytes > self.max_bytes):
+            _, session = self._sessions.popitem(last=False)
+            self._bytes -= session.size
+            self._evicted += 1
+            # В SQLite запись остается и будет поднята при следующем обращении
+
+    def _save(self, session: UserSession, urgent: bool) -> None:
+        """Поставить запись в очередь; urgent - граница шага, записать без ожидания"""
+        if not self.conn:
+            return
+        # Данные сериализуются сейчас: дальнейшие изменения словаря попадут со следующей записью
+        self._pending[session.user_id] = (
+            session.user_id, session.state, json.dumps(session.data, ensure_ascii=False, default=str),
+            session.created, session.last_seen
+        )
+        if urgent:
+            self._wake.set()
+
+    def _write_loop(self) -> None:
+        """Фоновый поток: запись очереди по сигналу или раз в flush_interval"""
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def _load(self, user_id: int) -> Optional[UserSession]:
+        # Еще не записанное изменение новее строки в базе
+        queued = self._pending if user_id in self._pending else self._inflight
+        if user_id in queued:
+            row = queued[user_id]
+            if row is None:
+                return None
+            _, state, data, created, last_seen = row
+            return UserSession(user_id, state, json.loads(data), created, last_seen)
+
+        try:
+            with self._db_lock:
+                row = self.conn.execute(
+                    "SELECT state, data, created, last_seen FROM user_sessions WHERE user_id = ?",
+                    (user_id,)
+                ).fetchone()
+        except Exception as e:
+            logger.error(f"Ошибка загрузки состояния пользователя {user_id}: {e}")
+            return None
+
+        if not row:
+            return None
+
+        state, data, created, last_seen = row
+        return UserSession(user_id, state, json.loads(data) if data else {}, created, last_seen)
\ No newline at end of file
@@ -0,0 +1,291 @@
+"""
+ПЕРЕБОР ПАРАМЕТРОВ И ЧУВСТВИТЕЛЬНОСТЬ v12.0
+Вся сетка вариантов считается одним векторным вызовом,
+влияние параметров ранжируется по размаху итога (tornado)
+"""
+
+from typing import Any, Callable, Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from batch_calculators import BatchCalculators
+from calc_results import CalcResult, Value, money
+from estimation import HouseSpec, estimate_house
+
+# Ограничения, чтобы один запрос из чата не занял сервер
+MAX_SWEEP_VARIANTS = 100_000
+MAX_RANGE_STEPS = 50
+DEFAULT_RANGE_STEPS = 5
+
+class SweepParam(NamedTuple):
+    name: str      # имя аргумента пакетного калькулятора
+    label: str     # название для вывода
+    numeric: bool
+    required: bool = True
+
+class SweepSchema(NamedTuple):
+    evaluate: Callable[..., np.ndarray]   # аргументы -> массив показателя
+    params: Tuple[SweepParam, ...]
+    metric: str                           # название показателя
+    unit: str                             # "руб" - денежный показатель
+
+def _field(calc: Callable, field: str) -> Callable[..., np.ndarray]:
+    return lambda **kwargs: calc(**kwargs)[field]
+
+def _house_total(**kwargs) -> np.ndarray:
+    return np.asarray(estimate_house(HouseSpec(**kwargs)).total_cost)
+
+SWEEP_SCHEMAS: Dict[str, SweepSchema] = {
+    "фундамент": SweepSchema(
+        _field(BatchCalculators.foundation, "total_cost"),
+        (SweepParam("length", "длина", True), SweepParam("width", "ширина", True),
+         SweepParam("depth", "глубина", True), SweepParam("f_type", "тип", False)),
+        "Стоимость", "руб"
+    ),
+    "стены": SweepSchema(
+        _field(BatchCalculators.walls, "total_cost"),
+        (SweepParam("perimeter", "периметр", True), SweepParam("height", "высота", True),
+         SweepParam("thickness", "толщина", True), SweepParam("material", "материал", False)),
+        "Стоимость", "руб"
+    ),
+    "крыша": SweepSchema(
+        _field(BatchCalculators.roof, "total_cost"),
+        (SweepParam("length", "длина", True), SweepParam("width", "ширина", True),
+         SweepParam("angle", "уклон", True), SweepParam("material", "материал", False)),
+        "Стоимость", "руб"
+    ),
+    "теплопотери": SweepSchema(
+        _field(BatchCalculators.heat_loss, "heat_loss"),
+        (SweepParam("area", "площадь", True), SweepParam("floors", "этажи", True),
+         SweepParam("region", "регион", False), SweepParam("insulation", "утепление", False)),
+        "Теплопотери", "кВт"
+    ),
+    "бетон": SweepSchema(
+        _field(BatchCalculators.concrete, "total_cost"),
+        (SweepParam("volume", "объем", True), SweepParam("grade", "марка", False),
+         SweepParam("additives", "добавки", False, False), SweepParam("slump", "подвижность", False, False),
+         SweepParam("aggregate", "щебень", True, False)),
+        "Стоимость", "руб"
+    ),
+    "дом": SweepSchema(
+        _house_total,
+        (SweepParam("length", "длина", True), SweepParam("width", "ширина", True),
+         SweepParam("floors", "этажи", True, False), SweepParam("wall_material", "материал", False, False),
+         SweepParam("region", "регион", False, False)),
+        "Стоимость", "руб"
+    ),
+}
+
+SWEEP_ALIASES = {"тепло": "теплопотери", "смета": "дом"}
+
+class TornadoBar(NamedTuple):
+    """
+    Влияние одного параметра: наибольший размах показателя вдоль его оси
+    по всей сетке (остальные параметры - в сочетании, где размах больше всего)
+    """
+    param: SweepParam
+    low_value: Any
+    low: float
+    high_value: Any
+    high: float
+
+    @property
+    def swing(self) -> float:
+        return self.high - self.low
+
+class SweepResult:
+    """Сетка значений показателя и рейтинг чувствительности"""
+
+    __slots__ = ("calc", "schema", "base", "grid", "values", "tornado")
+
+    def __init__(self, calc: str, schema: SweepSchema, base: Dict[str, Any],
+                 grid: Dict[str, np.ndarray], values: np.ndarray, tornado: List[TornadoBar]):
+        self.calc = calc
+        self.schema = schema
+        self.base = base
+        self.grid = grid
+        self.values = values
+        self.tornado = tornado
+
+    def variants(self) -> List[Tuple[Dict[str, Any], float]]:
+        """Все варианты: (значения перебираемых параметров, показатель)"""
+        names = list(self.grid)
+        result = []
+        for index in np.ndindex(self.values.shape):
+            combo = {name: self.grid[name][i].item() for name, i in zip(names, index)}
+            result.append((combo, float(self.values[index])))
+        return result
+
+    def best(self, n: int = 5) -> List[Tuple[Dict[str, Any], float]]:
+        """n вариантов с наименьшим показателем"""
+        flat = self.values.ravel()
+        order = np.argsort(flat, kind="stable")[:n]
+        names = list(self.grid)
+        rows = []
+        for position in order:
+            index = np.unravel_index(position, self.values.shape)
+            rows.append(({name: self.grid[name][i].item() for name, i in zip(names, index)}, float(flat[position])))
+        return rows
+
+def _format_value(value: Any) -> str:
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+def sweep(calc: str, base: Dict[str, Any], grid: Dict[str, Sequence]) -> SweepResult:
+    """
+    Перебор параметров калькулятора
+
+    base - значения неперебираемых параметров,
+    grid - списки значений перебираемых параметров.
+    """
+    calc = SWEEP_ALIASES.get(calc, calc)
+    schema = SWEEP_SCHEMAS.get(calc)
+    if schema is None:
+        raise ValueError(f"Перебор недоступен для: {calc}. Доступно: {', '.join(SWEEP_SCHEMAS)}")
+
+    names = {p.name for p in schema.params}
+    required = {p.name for p in schema.params if p.required}
+    unknown = (set(base) | set(grid)) - names
+    if unknown:
+        raise ValueError(f"Неизвестные параметры: {', '.join(sorted(unknown))}")
+    if not grid:
+        raise ValueError("Укажите хотя бы один параметр для перебора")
+
+    axes = {name: np.asarray(values) for name, values in grid.items()}
+    size = int(np.prod([axis.size for axis in axes.values()]))
+    if size > MAX_SWEEP_VARIANTS:
+        raise ValueError(f"Слишком много вариантов: {size:,}. Максимум {MAX_SWEEP_VARIANTS:,}")
+
+    base = {name: value for name, value in base.items() if name not in axes}
+    missing = required - set(base) - set(axes)
+    if missing:
+        raise ValueError(f"Не заданы параметры: {', '.join(sorted(missing))}")
+
+    # Вся сетка одним вызовом
+    mesh = np.meshgrid(*axes.values(), indexing="ij")
+    args = dict(base)
+    args.update({name: m.ravel() for name, m in zip(axes, mesh)})
+    values = np.broadcast_to(schema.evaluate(**args), (size,)).reshape(mesh[0].shape)
+
+    # Чувствительность по уже посчитанной сетке: для каждой оси - размах
+    # показателя вдоль нее при каждом сочетании остальных, берется наибольший.
+    # Базовый уровень не нужен: влияние категории или диапазона не зависит
+    # от того, какое значение другой оси оказалось в середине списка
+    labels = {p.name: p for p in schema.params}
+    tornado = []
+    for position, (name, axis) in enumerate(axes.items()):
+        lines = np.moveaxis(values, position, 0).reshape(axis.size, -1)
+        line = lines[:, int(np.argmax(np.ptp(lines, axis=0)))]
+        low, high = int(np.argmin(line)), int(np.argmax(line))
+        tornado.append(TornadoBar(labels[name], axis[low].item(), float(line[low]),
+                                  axis[high].item(), float(line[high])))
+    tornado.sort(key=lambda bar: -bar.swing)
+
+    return SweepResult(calc, schema, base, axes, values, tornado)
+
+def parse_sweep_axis(token: str, numeric: bool) -> np.ndarray:
+    """
+    Значения перебираемого параметра из команды
+
+    0.3..0.5    - 5 равных шагов
+    0.3..0.5:3  - 3 шага
+    0.3/0.4/0.6 - список (для слов: газобетон/кирпич)
+    """
+    if ".." in token:
+        if not numeric:
+            raise ValueError(f"Диапазон возможен только для чисел: {token}")
+        bounds, _, steps = token.partition(":")
+        start, _, stop = bounds.partition("..")
+        try:
+            start, stop = float(start), float(stop)
+            steps = int(steps) if steps else DEFAULT_RANGE_STEPS
+        except ValueError:
+            raise ValueError(f"Некорректный диапазон: {token}")
+        if not 2 <= steps <= MAX_RANGE_STEPS:
+            raise ValueError(f"Количество шагов: от 2 до {MAX_RANGE_STEPS}")
+        return np.linspace(start, stop, steps)
+
+    values = [v for v in token.split("/") if v]
+    if numeric:
+        try:
+            return np.array([float(v) for v in values])
+        except ValueError:
+            raise ValueError(f"Некорректные числовые значения: {token}")
+    return np.array(values)
+
+def parse_sweep_command(params: List[str]) -> Tuple[str, Dict[str, Any], Dict[str, np.ndarray]]:
+    """Разбор команды: калькулятор и позиционные параметры с диапазонами"""
+    if not params:
+        raise ValueError(f"Укажите калькулятор: {', '.join(SWEEP_SCHEMAS)}")
+
+    calc = SWEEP_ALIASES.get(params[0].lower(), params[0].lower())
+    schema = SWEEP_SCHEMAS.get(calc)
+    if schema is None:
+        raise ValueError(f"Перебор недоступен для: {calc}. Доступно: {', '.join(SWEEP_SCHEMAS)}")
+
+    tokens = params[1:]
+    required = [p for p in schema.params if p.required]
+    if len(tokens) < len(required):
+        raise ValueError(f"Недостаточно параметров. Формат: {calc} {' '.join(p.label for p in schema.params)}")
+
+    base: Dict[str, Any] = {}
+    grid: Dict[str, np.ndarray] = {}
+    for param, token in zip(schema.params, tokens):
+        if ".." in token or "/" in token:
+            grid[param.name] = parse_sweep_axis(token, param.numeric)
+        elif param.numeric:
+            try:
+                base[param.name] = float(token)
+            except ValueError:
+                raise ValueError(f"Некорректное числовое значение: {token}")
+        else:
+            base[param.name] = token
+
+    return calc, base, grid
+
+def sweep_to_calc_result(result: SweepResult, rows: int = 10) -> CalcResult:
+    """Компактная таблица для чата: самые выгодные варианты и рейтинг влияния"""
+    schema = result.schema
+    is_money = schema.unit == "руб"
+
+    def metric(value: float) -> Value:
+        return money(value) if is_money else Value(value, schema.unit, ".1f")
+
+    labels = {p.name: p.label for p in schema.params}
+    parameters = {}
+    for p in schema.params:
+        if p.name in result.grid:
+            axis = result.grid[p.name]
+            parameters[p.label.capitalize()] = " / ".join(_format_value(v.item()) for v in axis[:8]) + \
+                (" ..." if axis.size > 8 else "")
+        elif p.name in result.base:
+            parameters[p.label.capitalize()] = _format_value(result.base[p.name])
+
+    table = {}
+    for combo, value in result.best(rows):
+        key = ", ".join(f"{labels[name]} {_format_value(v)}" for name, v in combo.items())
+        table[key] = metric(value)
+
+    values = result.values
+    recommendations = []
+    reference = float(np.median(values)) or 1.0
+    for bar in result.tornado:
+        recommendations.append(
+            f"{bar.param.label}: {_format_value(bar.low_value)} → {_format_value(bar.high_value)} "
+            f"меняет показатель на {metric(bar.swing)} ({bar.swing / reference:.0%})"
+        )
+
+    return CalcResult(
+        type=f"Перебор вариантов ({result.calc}): {values.size} шт.",
+        parameters=parameters,
+        cost=table,
+        results={
+            "Минимум": metric(float(values.min())),
+            "Медиана": metric(float(np.median(values))),
+            "Максимум": metric(float(values.max()))
+        },
+        recommendations=recommendations,
+        notes=[
+            f"{schema.metric}: показаны {min(rows, values.size)} лучших вариантов из {values.size}",
+            "Рекомендации отсортированы по влиянию параметра на итог"
+        ]
+    )
@@ -0,0 +1,8 @@
+"""
+Модули бота лежат в корне репозитория: тесты импортируют их напрямую
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
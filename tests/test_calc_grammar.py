@@ -0,0 +1,69 @@
+"""
+Разбор команд калькуляторов: позиционные и именованные параметры,
+единицы, синонимы и ошибки с позицией в тексте
+"""
+
+import pytest
+
+from calc_grammar import ParseError, parse_command
+
+@pytest.mark.parametrize("text, command, params", [
+    ("фундамент 10 8 1.5 ленточный", "фундамент", ("10", "8", "1.5", "ленточный")),
+    ("фундамент длина=10 ширина 800см глубина=1,5 лента", "фундамент", ("10", "8", "1.5", "ленточный")),
+    ("рассчитай крыша 10 8 30 металл", "крыша", ("10", "8", "30", "металлочерепица")),
+    ("материалы бетон 30 м³", "материалы", ("бетон", "30", "м³")),
+    ("материалы бетон 30000 л", "материалы", ("бетон", "30", "м³")),
+    ("теплопотери 150 2 москва хорошее", "теплопотери", ("150", "2", "москва", "хорошее")),
+    ("площадь круг 3", "площадь", ("круг", "3")),
+])
+def test_parse(text, command, params):
+    parsed = parse_command(text)
+    assert parsed.command == command
+    assert parsed.params == params
+
+def test_named_value_in_base_unit():
+    parsed = parse_command("стены периметр=40 высота=300см толщина=400мм газобетон")
+    assert parsed.args["высота"].value == pytest.approx(3.0)
+    assert parsed.args["толщина"].value == pytest.approx(0.4)
+    assert parsed.args["толщина"].unit == "м"
+
+@pytest.mark.parametrize("text, message, position", [
+    ("фундамент 10 abc 1 ленточный", "ожидалось число", 14),
+    ("фундамент 10 8 1.5кг ленточный", "нужна величина «длина»", 16),
+    ("теплопотери 150 2.5 москва хорошее", "ожидалось целое число", 17),
+    ("фундамент 10 8 1.5фут ленточный", "неизвестная единица", 16),
+    ("материалы бетон 30", "укажите единицу", 17),
+    ("фундамент длина=10 длина=12 8 1.5 ленточный", "указан дважды", 20),
+])
+def test_errors_have_position(text, message, position):
+    with pytest.raises(ParseError) as error:
+        parse_command(text)
+    assert message in str(error.value)
+    assert error.value.position == position
+    assert error.value.command == text.split()[0]
+
+@pytest.mark.parametrize("text, name, position", [
+    ("фундамент 1e400м 8 1.5 ленточный", "длина", 11),
+    ("фундамент 1e308км 8 1.5 ленточный", "длина", 11),
+    ("материалы бетон 1e400 м³", "количество", 17),
+    ("теплопотери 1e400 2 москва хорошее", "площадь", 13),
+    ("теплопотери 150 1e400 москва хорошее", "этажи", 17),
+])
+def test_infinite_number(text, name, position):
+    with pytest.raises(ParseError, match=f"«{name}»: слишком большое число") as error:
+        parse_command(text)
+    assert error.value.position == position
+
+def test_infinite_number_is_calculator_failure():
+    from keyboards import ConstructionCalculators
+    _, _, result = ConstructionCalculators.parse_calc_command("фундамент 1e400м 8 1.5 ленточный")
+    assert not result.success
+    assert "слишком большое число" in result.error
+
+def test_unknown_command():
+    with pytest.raises(ParseError, match="Неизвестный калькулятор"):
+        parse_command("забор 10 2")
+
+def test_empty_command():
+    with pytest.raises(ParseError):
+        parse_command("   ")
@@ -0,0 +1,49 @@
+"""
+Бетон: состав по марке, разбивка заливки на рейсы и предел размера графика
+"""
+
+import pytest
+
+from concrete_mix import batch_sheet, delivery_schedule, design_mix, grade_value
+from config import CONCRETE_MAX_LOADS
+from keyboards import ConstructionCalculators
+
+def test_grade_and_class():
+    assert grade_value("М300") == 300
+    assert grade_value("m300") == 300
+    assert grade_value("В25") == 350
+    with pytest.raises(ValueError):
+        grade_value("М700")
+
+def test_schedule_splits_volume():
+    schedule = delivery_schedule(design_mix("М300"), 500, truck_volume=9, fleet=6)
+    assert len(schedule.loads) == 56
+    assert schedule.loads[-1].volume == pytest.approx(5)
+    assert sum(load.volume for load in schedule.loads) == pytest.approx(500)
+    assert schedule.trucks == 6
+
+def test_batch_sheet_groups_full_loads():
+    rows = batch_sheet(delivery_schedule(design_mix("М300"), 20))
+    assert [(row["volume"], row["loads"]) for row in rows] == [(7.0, 2), (6.0, 1)]
+    assert rows[0]["cement"] == pytest.approx(380 * 7)   # на один рейс
+
+@pytest.mark.parametrize("volume, truck_volume", [
+    (5_000_000, 1),
+    (10, 0.0001),
+    (1e300, 7),
+    (float("inf"), 7),
+    (float("nan"), 7),
+])
+def test_schedule_size_is_limited(volume, truck_volume):
+    with pytest.raises(ValueError, match="Слишком много рейсов"):
+        delivery_schedule(design_mix("М300"), volume, truck_volume)
+
+def test_limit_allows_large_pour():
+    schedule = delivery_schedule(design_mix("М300"), 500, truck_volume=500 / CONCRETE_MAX_LOADS)
+    assert len(schedule.loads) == CONCRETE_MAX_LOADS
+
+@pytest.mark.parametrize("text", ["бетон 5000000 М300 миксер=1", "бетон 10 М300 миксер=0.0001", "бетон 1e300 М300"])
+def test_calculator_reports_failure(text):
+    _, _, result = ConstructionCalculators.parse_calc_command(text)
+    assert not result.success
+    assert "рейсов" in result.error
@@ -0,0 +1,48 @@
+"""
+Метрики: время запросов к БД через курсор и соединение попадает в фазу db
+"""
+
+import asyncio
+import sqlite3
+
+from metrics import MetricsRegistry, TimedProxy
+
+class Database:
+    def __init__(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.cursor = self.conn.cursor()
+        self.cursor.execute("CREATE TABLE items (x INTEGER)")
+        self.cursor.executemany("INSERT INTO items VALUES (?)", [(i,) for i in range(100)])
+
+    def count(self) -> int:
+        return self.cursor.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+def methods(registry: MetricsRegistry):
+    return {dict(labels)["method"] for name, labels in registry.histograms if name == "db_call_seconds"}
+
+def test_cursor_and_connection_are_timed():
+    registry = MetricsRegistry()
+    db = registry.timed(Database(), "db")
+
+    assert db.count() == 100
+    rows = db.cursor.execute("SELECT x FROM items WHERE x < ?", (3,)).fetchall()
+    assert rows == [(0,), (1,), (2,)]
+    db.cursor.execute("SELECT x FROM items LIMIT 2")
+    assert db.cursor.fetchall() == [(0,), (1,)]
+    db.conn.commit()
+    assert [row[0] for row in db.conn.execute("SELECT x FROM items LIMIT 2")] == [0, 1]
+
+    # Курсор внутри методов базы не оборачивается: count учтен один раз целиком
+    assert methods(registry) == {"count", "cursor.execute", "cursor.fetchall", "conn.commit", "conn.execute"}
+    assert isinstance(db.cursor, TimedProxy)
+
+def test_cursor_time_counts_as_db_phase():
+    registry = MetricsRegistry()
+    db = registry.timed(Database(), "db")
+
+    async def handler(update, context):
+        db.cursor.execute("SELECT * FROM items").fetchall()
+
+    asyncio.run(registry.instrument("test", handler)(None, None))
+    db_phase = registry.histograms[("handler_phase_seconds", (("handler", "test"), ("phase", "db")))]
+    assert db_phase.count == 1 and db_phase.sum > 0
@@ -0,0 +1,48 @@
+"""
+Геометрия крыши: площадь и линии по форме, раскладка листов и ее предел
+"""
+
+import math
+
+import pytest
+
+from keyboards import ConstructionCalculators
+from roof_geometry import MAX_SHEET_STRIPS, ROOF_FORMS, rectangular_roof
+
+@pytest.mark.parametrize("form", ROOF_FORMS)
+def test_area_does_not_depend_on_form(form):
+    roof = rectangular_roof(10, 8, 30, form)
+    assert roof.area == pytest.approx(10 * 8 / math.cos(math.radians(30)))
+
+def test_lines():
+    gable = rectangular_roof(10, 8, 30, "двускатная").lengths()
+    assert gable["конек"] == pytest.approx(10)
+    assert gable["карниз"] == pytest.approx(20)
+    assert gable["ребро"] == 0
+    hip = rectangular_roof(10, 8, 30, "вальмовая").lengths()
+    assert hip["конек"] == pytest.approx(2)
+    assert hip["карниз"] == pytest.approx(36)
+    assert hip["фронтон"] == 0
+
+def test_hip_roof_needs_more_sheets():
+    gable = rectangular_roof(10, 8, 30, "двускатная").sheets()
+    hip = rectangular_roof(10, 8, 30, "вальмовая").sheets()
+    assert 0 < gable.waste < 1
+    assert hip.sheets > gable.sheets
+    assert hip.ordered_area > gable.ordered_area
+
+def test_sheet_strip_limit():
+    with pytest.raises(ValueError, match=str(MAX_SHEET_STRIPS)):
+        rectangular_roof(1e200, 8, 30, "двускатная").sheets()
+
+def test_cost_follows_layout():
+    costs = {}
+    for form in ("двускатная", "вальмовая"):
+        _, _, result = ConstructionCalculators.parse_calc_command(f"крыша 10 8 30 металлочерепица {form}")
+        assert result.success
+        costs[form] = result.cost["Итого"].amount
+    assert costs["вальмовая"] > costs["двускатная"]
+
+def test_huge_roof_is_failure():
+    _, _, result = ConstructionCalculators.parse_calc_command("крыша 1e200 8 30 металлочерепица")
+    assert not result.success
@@ -0,0 +1,68 @@
+"""
+Планировщик обновлений: порядок для одного пользователя, параллельность
+для разных и отбрасывание при переполнении очереди
+"""
+
+import asyncio
+
+from telegram import Update
+
+from scheduler import PerUserUpdateProcessor
+
+def make_update(update_id: int, user_id: int) -> Update:
+    return Update.de_json({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id, "date": 0, "text": "тест",
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Тест"}
+        }
+    }, None)
+
+def test_per_user_order_and_parallel_users():
+    async def scenario():
+        processor = PerUserUpdateProcessor(workers=4)
+        await processor.initialize()
+        log, running = [], set()
+        overlap = []
+
+        async def handler(user_id: int, number: int):
+            if user_id in running:
+                overlap.append(user_id)
+            running.add(user_id)
+            log.append(("start", user_id, number))
+            await asyncio.sleep(0.01 * (3 - number))   # первые медленнее: порядок держит очередь
+            log.append(("end", user_id, number))
+            running.discard(user_id)
+
+        updates = [(make_update(i * 2 + user, user), user, i) for i in range(3) for user in (1, 2)]
+        await asyncio.gather(*(processor.do_process_update(update, handler(user, i))
+                               for update, user, i in updates))
+        return processor, log, overlap
+
+    processor, log, overlap = asyncio.run(scenario())
+    assert overlap == []
+    for user in (1, 2):
+        starts = [number for event, u, number in log if event == "start" and u == user]
+        assert starts == [0, 1, 2]
+    # Пользователи обрабатываются одновременно: второй начинает до конца первого обновления первого
+    assert log.index(("start", 2, 0)) < log.index(("end", 1, 0))
+    stats = processor.get_stats()
+    assert stats["processed"] == 6 and stats["queued_users"] == 0
+
+def test_full_user_queue_drops_updates():
+    async def scenario():
+        processor = PerUserUpdateProcessor(workers=2, max_user_queue=2)
+        await processor.initialize()
+        done = []
+
+        async def handler(number: int):
+            await asyncio.sleep(0.01)
+            done.append(number)
+
+        await asyncio.gather(*(processor.do_process_update(make_update(i, 7), handler(i)) for i in range(5)))
+        return processor, done
+
+    processor, done = asyncio.run(scenario())
+    assert done == [0, 1]
+    assert processor.get_stats()["dropped"] == 3
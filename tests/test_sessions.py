@@ -0,0 +1,101 @@
+import sqlite3
+import time
+
+import pytest
+
+from sessions import SessionStore
+
+
+def rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return {uid: (state, created) for uid, state, created in
+                conn.execute("SELECT user_id, state, created FROM user_sessions")}
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "sessions.db")
+
+
+def test_writes_are_deferred_until_flush(db_path, monkeypatch):
+    store = SessionStore(persist_path=db_path, flush_interval=3600)
+    try:
+        # Без немедленной записи по границе шага
+        monkeypatch.setattr(store._wake, "set", lambda: None)
+        store.set(1, "project_name")
+        store.update(1, name="Дом")
+        assert rows(db_path) == {}
+        assert store.get_stats()["pending_writes"] == 1
+
+        store.flush()
+        assert rows(db_path)[1][0] == "project_name"
+        assert store.get_stats()["pending_writes"] == 0
+    finally:
+        monkeypatch.undo()
+        store.close()
+
+
+def test_step_change_is_written_without_waiting(db_path):
+    store = SessionStore(persist_path=db_path, flush_interval=3600)
+    try:
+        store.set(1, "calc_concrete")
+        deadline = time.time() + 5
+        while 1 not in rows(db_path) and time.time() < deadline:
+            time.sleep(0.01)
+        assert rows(db_path)[1][0] == "calc_concrete"
+    finally:
+        store.close()
+
+
+def test_restart_restores_state_and_start_time(db_path):
+    store = SessionStore(persist_path=db_path, flush_interval=3600)
+    first = store.set(1, "project_name", {"step": 1})
+    store.update(1, name="Дом")
+    store.close()
+
+    store = SessionStore(persist_path=db_path, flush_interval=3600)
+    try:
+        session = store.get(1)
+        assert session.state == "project_name"
+        assert session.data == {"step": 1, "name": "Дом"}
+        assert store.set(1, "project_area").created == first.created
+    finally:
+        store.close()
+
+
+def test_clear_removes_row(db_path):
+    store = SessionStore(persist_path=db_path, flush_interval=3600)
+    store.set(1, "project_name")
+    store.flush()
+    store.clear(1)
+    assert store.get(1) is None
+    store.close()
+    assert rows(db_path) == {}
+
+
+def test_evicted_session_is_read_from_queue(db_path, monkeypatch):
+    store = SessionStore(max_sessions=1, persist_path=db_path, flush_interval=3600)
+    try:
+        monkeypatch.setattr(store._wake, "set", lambda: None)
+        store.set(1, "first")
+        store.set(2, "second")
+        assert len(store) == 1
+        assert store.get(1).state == "first"
+    finally:
+        monkeypatch.undo()
+        store.close()
+
+
+def test_memory_store_limits_and_ttl():
+    store = SessionStore(max_sessions=2, ttl=60)
+    for uid in range(3):
+        store.set(uid, "state")
+    assert 0 not in store and len(store) == 2
+    assert store.get_stats()["evicted"] == 1
+
+    store.get(1).last_seen -= 120
+    assert store.evict_expired() == 1
+    assert store.get(1) is None
@@ -0,0 +1,52 @@
+"""
+Единицы измерения: пересчет, арифметика величин и разбор "400мм"
+"""
+
+import numpy as np
+import pytest
+
+from units import Quantity, UnitError, convert, find_unit, parse_quantity
+
+@pytest.mark.parametrize("value, source, target, expected", [
+    (400, "мм", "м", 0.4),
+    (1.5, "км", "м", 1500),
+    (2, "сот", "м²", 200),
+    (30000, "л", "м³", 30),
+    (2.5, "т", "кг", 2500),
+    (1500, "Вт", "кВт", 1.5),
+    (7, "м", "м", 7),
+])
+def test_convert(value, source, target, expected):
+    assert convert(value, source, target) == pytest.approx(expected)
+
+def test_convert_array():
+    np.testing.assert_allclose(convert(np.array([100.0, 250.0]), "см", "м"), [1.0, 2.5])
+
+def test_convert_between_dimensions():
+    with pytest.raises(UnitError):
+        convert(1, "м", "кг")
+
+def test_aliases():
+    assert find_unit("м2").symbol == "м²"
+    assert find_unit("КВТ").symbol == "кВт"
+    assert find_unit("фут") is None
+
+def test_quantity_arithmetic():
+    area = Quantity(10, "м²")
+    volume = area * Quantity(200, "мм")
+    assert volume.unit.symbol == "м³"
+    assert volume.value == pytest.approx(2.0)
+    mass = volume * Quantity(2400, "кг/м³")
+    assert mass.unit.symbol == "кг"
+    assert mass.value == pytest.approx(4800)
+    assert Quantity(1, "м") + Quantity(50, "см") == Quantity(1.5, "м")
+
+def test_parse_quantity():
+    quantity = parse_quantity("1,5 м")
+    assert quantity.value == 1.5 and quantity.unit.symbol == "м"
+    assert parse_quantity("30м3").unit.symbol == "м³"
+    assert parse_quantity("12", "шт").unit.symbol == "шт"
+    with pytest.raises(ValueError):
+        parse_quantity("много")
+    with pytest.raises(UnitError):
+        parse_quantity("3 фут")
@@ -0,0 +1,217 @@
+"""
+ЕДИНИЦЫ ИЗМЕРЕНИЯ v12.0
+Величины с единицами: таблицы пересчета строятся один раз при импорте,
+арифметика одинаково работает с числами и с массивами NumPy
+"""
+
+import re
+from typing import Dict, NamedTuple, Optional, Tuple, Union
+
+# Базовые величины; размерность - показатели степеней в этом порядке
+BASE_DIMENSIONS = ("length", "mass", "count", "power", "voltage", "angle")
+
+Dimension = Tuple[int, ...]
+
+def dimension(**exponents: int) -> Dimension:
+    """dimension(length=2) - площадь"""
+    return tuple(exponents.get(name, 0) for name in BASE_DIMENSIONS)
+
+DIMENSIONLESS = dimension()
+LENGTH = dimension(length=1)
+AREA = dimension(length=2)
+VOLUME = dimension(length=3)
+MASS = dimension(mass=1)
+DENSITY = dimension(mass=1, length=-3)
+COUNT = dimension(count=1)
+POWER = dimension(power=1)
+VOLTAGE = dimension(voltage=1)
+ANGLE = dimension(angle=1)
+
+DIMENSION_NAMES = {
+    DIMENSIONLESS: "число",
+    LENGTH: "длина",
+    AREA: "площадь",
+    VOLUME: "объем",
+    MASS: "масса",
+    DENSITY: "плотность",
+    COUNT: "количество",
+    POWER: "мощность",
+    VOLTAGE: "напряжение",
+    ANGLE: "угол",
+}
+
+class Unit(NamedTuple):
+    symbol: str
+    dimension: Dimension
+    factor: float   # множитель к основной единице величины
+
+# Основная единица каждой величины - первая с множителем 1
+UNITS: Dict[str, Unit] = {unit.symbol: unit for unit in (
+    Unit("", DIMENSIONLESS, 1.0),
+    Unit("м", LENGTH, 1.0),
+    Unit("мм", LENGTH, 0.001),
+    Unit("см", LENGTH, 0.01),
+    Unit("дм", LENGTH, 0.1),
+    Unit("км", LENGTH, 1000.0),
+    Unit("м²", AREA, 1.0),
+    Unit("см²", AREA, 0.0001),
+    Unit("сот", AREA, 100.0),
+    Unit("га", AREA, 10000.0),
+    Unit("м³", VOLUME, 1.0),
+    Unit("л", VOLUME, 0.001),
+    Unit("кг", MASS, 1.0),
+    Unit("г", MASS, 0.001),
+    Unit("т", MASS, 1000.0),
+    Unit("кг/м³", DENSITY, 1.0),
+    Unit("шт", COUNT, 1.0),
+    Unit("кВт", POWER, 1.0),
+    Unit("Вт", POWER, 0.001),
+    Unit("В", VOLTAGE, 1.0),
+    Unit("°", ANGLE, 1.0),
+)}
+
+# Другие написания; ключи в нижнем регистре
+UNIT_ALIASES = {
+    "м2": "м²",
+    "кв.м": "м²",
+    "квм": "м²",
+    "м3": "м³",
+    "куб": "м³",
+    "куб.м": "м³",
+    "литр": "л",
+    "кг/м3": "кг/м³",
+    "квт": "кВт",
+    "вт": "Вт",
+    "в": "В",
+    "град": "°",
+    "лист": "шт",
+}
+
+_LOOKUP: Dict[str, Unit] = {symbol.lower(): unit for symbol, unit in UNITS.items()}
+_LOOKUP.update({alias: UNITS[symbol] for alias, symbol in UNIT_ALIASES.items()})
+
+BASE_UNITS: Dict[Dimension, Unit] = {}
+for _unit in UNITS.values():
+    if _unit.factor == 1.0:
+        BASE_UNITS.setdefault(_unit.dimension, _unit)
+
+# Множители пересчета для всех пар единиц одной величины
+CONVERSIONS: Dict[Tuple[str, str], float] = {
+    (a.symbol, b.symbol): a.factor / b.factor
+    for a in UNITS.values() for b in UNITS.values() if a.dimension == b.dimension
+}
+
+class UnitError(ValueError):
+    """Неизвестная единица или несовместимые величины"""
+
+def find_unit(symbol: str) -> Optional[Unit]:
+    """Единица по обозначению (любой регистр, синонимы) или None"""
+    return _LOOKUP.get(symbol.strip().lower())
+
+def get_unit(symbol: Union[str, Unit]) -> Unit:
+    if isinstance(symbol, Unit):
+        return symbol
+    unit = find_unit(symbol)
+    if unit is None:
+        raise UnitError(f"Неизвестная единица: {symbol}")
+    return unit
+
+def convert(value, from_unit: Union[str, Unit], to_unit: Union[str, Unit]):
+    """Пересчет числа или массива; единицы разных величин - UnitError"""
+    # Быстрый путь для канонических обозначений
+    factor = CONVERSIONS.get((from_unit, to_unit)) if isinstance(from_unit, str) and isinstance(to_unit, str) else None
+    if factor is None:
+        source, target = get_unit(from_unit), get_unit(to_unit)
+        factor = CONVERSIONS.get((source.symbol, target.symbol))
+    if factor is None:
+        raise UnitError(
+            f"Нельзя перевести {DIMENSION_NAMES.get(source.dimension, source.symbol)} ({source.symbol}) "
+            f"в {DIMENSION_NAMES.get(target.dimension, target.symbol)} ({target.symbol})"
+        )
+    return value if factor == 1.0 else value * factor
+
+def _unit_for(dim: Dimension) -> Unit:
+    unit = BASE_UNITS.get(dim)
+    if unit is None:
+        raise UnitError("Результат не имеет поддерживаемой размерности")
+    return unit
+
+class Quantity:
+    """
+    Значение с единицей измерения
+
+    value - число или массив NumPy. Сложение приводит второе слагаемое
+    к единице первого, умножение и деление дают основную единицу
+    получившейся величины: м² × мм -> м³, м³ × кг/м³ -> кг.
+    """
+
+    __slots__ = ("value", "unit")
+
+    def __init__(self, value, unit: Union[str, Unit] = ""):
+        self.value = value
+        self.unit = get_unit(unit)
+
+    @property
+    def dimension(self) -> Dimension:
+        return self.unit.dimension
+
+    def to(self, unit: Union[str, Unit]) -> "Quantity":
+        target = get_unit(unit)
+        return Quantity(convert(self.value, self.unit, target), target)
+
+    def magnitude(self, unit: Union[str, Unit]):
+        """Значение в указанной единице"""
+        return convert(self.value, self.unit, unit)
+
+    def _base_value(self):
+        return self.value if self.unit.factor == 1.0 else self.value * self.unit.factor
+
+    def __add__(self, other: "Quantity") -> "Quantity":
+        return Quantity(self.value + other.magnitude(self.unit), self.unit)
+
+    def __sub__(self, other: "Quantity") -> "Quantity":
+        return Quantity(self.value - other.magnitude(self.unit), self.unit)
+
+    def __mul__(self, other) -> "Quantity":
+        if isinstance(other, Quantity):
+            dim = tuple(a + b for a, b in zip(self.dimension, other.dimension))
+            return Quantity(self._base_value() * other._base_value(), _unit_for(dim))
+        return Quantity(self.value * other, self.unit)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other) -> "Quantity":
+        if isinstance(other, Quantity):
+            dim = tuple(a - b for a, b in zip(self.dimension, other.dimension))
+            return Quantity(self._base_value() / other._base_value(), _unit_for(dim))
+        return Quantity(self.value / other, self.unit)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Quantity) or other.dimension != self.dimension:
+            return NotImplemented
+        return self.value == other.magnitude(self.unit)
+
+    def __str__(self) -> str:
+        text = f"{self.value:g}" if isinstance(self.value, (int, float)) else str(self.value)
+        if not self.unit.symbol:
+            return text
+        return f"{text}{'' if self.unit.symbol == '°' else ' '}{self.unit.symbol}"
+
+    def __repr__(self) -> str:
+        return f"Quantity({self.value!r}, {self.unit.symbol!r})"
+
+# Число с необязательной единицей: 10, 1,5, -2.5e3, 400мм, 30 м³
+QUANTITY_RE = re.compile(r"\s*([-+]?(?:\d+(?:[.,]\d*)?|[.,]\d+)(?:[eE][-+]?\d+)?)\s*(.*?)\s*")
+
+def parse_quantity(text: str, default_unit: Union[str, Unit] = "") -> Quantity:
+    """
+    Разбор "400мм", "1,5 м", "30м3"
+
+    Без единицы используется default_unit. Ошибка - UnitError
+    (неизвестная единица) или ValueError (не число).
+    """
+    match = QUANTITY_RE.fullmatch(text)
+    if not match:
+        raise ValueError(f"Некорректное числовое значение: {text}")
+    number, symbol = match.groups()
+    return Quantity(float(number.replace(",", ".")), symbol or default_unit)
@@ -7,6 +7,12 @@ import math
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 
+import numpy as np
+
+import geometry
+from units import Quantity
+from norms import consumption_norms
+
 def format_number(num: float) -> str:
     """Форматирование числа с разделителями"""
     return f"{num:,.0f}".replace(",", " ")
@@ -16,21 +22,37 @@ def parse_dimensions(text: str) -> List[float]:
     numbers = re.findall(r'\d+\.?\d*', text)
     return [float(n) for n in numbers]
 
-def calculate_area(length: float, width: float) -> float:
-    """Расчет площади прямоугольника"""
-    return length * width
+def _scalar(value):
+    """Число для скалярных размеров, массив - для массивов"""
+    return float(value) if np.ndim(value) == 0 else value
+
+def calculate_area(length, width):
+    """Расчет площади прямоугольника; размеры - числа или массивы"""
+    return _scalar(geometry.rectangle_area(length, width))
+
+def calculate_volume(length, width, height):
+    """Расчет объема параллелепипеда; размеры - числа или массивы"""
+    return _scalar(geometry.box_volume(length, width, height))
 
-def calculate_volume(length: float, width: float, height: float) -> float:
-    """Расчет объема параллелепипеда"""
-    return length * width * height
+def calculate_circle_area(radius):
+    """Расчет площади круга; радиус - число или массив"""
+    return _scalar(geometry.circle_area(radius))
 
-def calculate_circle_area(radius: float) -> float:
-    """Расчет площади круга"""
-    return math.pi * radius ** 2
+def calculate_triangle_area(base, height):
+    """Расчет площади треугольника; размеры - числа или массивы"""
+    return _scalar(geometry.triangle_area(base, height))
 
-def calculate_triangle_area(base: float, height: float) -> float:
-    """Расчет площади треугольника"""
-    return (base * height) / 2
+def calculate_plan_area(rooms: List[Any]) -> Dict[str, Any]:
+    """
+    Площади помещений плана по контурам (списки вершин x, y) одним
+    вызовом: площадь и периметр каждого помещения и общая площадь
+    """
+    measured = geometry.polygons([np.asarray(points, dtype=float) for points in rooms])
+    return {
+        "areas": measured.area.tolist(),
+        "perimeters": measured.perimeter.tolist(),
+        "total_area": measured.total_area
+    }
 
 def estimate_construction_time(area: float, project_type: str) -> Dict[str, Any]:
     """Оценка времени строительства"""
@@ -56,36 +78,26 @@ def estimate_construction_time(area: float, project_type: str) -> Dict[str, Any]
 
 def estimate_material_quantity(material_type: str, area: float, thickness: float = None) -> Dict[str, Any]:
     """Оценка количества материала"""
-    # Нормы расхода материалов
-    norms = {
-        "кирпич": {"unit": "шт", "per_m2": 102, "notes": "При толщине 510 мм (2 кирпича)"},
-        "газоблок": {"unit": "шт", "per_m2": 8.33, "notes": "Блоки 600×300×200 мм"},
-        "бетон": {"unit": "м³", "per_m2": 0.3, "notes": "Для фундамента толщиной 300 мм"},
-        "утеплитель": {"unit": "м²", "per_m2": 1.1, "notes": "+10% на отходы"},
-        "краска": {"unit": "л", "per_m2": 0.2, "notes": "В 2 слоя"},
-        "плитка": {"unit": "м²", "per_m2": 1.1, "notes": "+10% на подрезку"},
-        "гипсокартон": {"unit": "лист", "per_m2": 0.33, "notes": "Лист 1.2×2.5 м = 3 м²"},
-        "доска": {"unit": "м³", "per_m2": 0.015, "notes": "Доска 25×150 мм с шагом 400 мм"}
-    }
-    
-    material_info = norms.get(material_type.lower())
+    # Общая норма расхода на м² из таблицы норм
+    norm = consumption_norms.get(material_type.lower())
     
-    if not material_info:
+    if not norm or norm.base_unit != "м²":
         return {"error": f"Неизвестный материал: {material_type}"}
     
-    quantity = area * material_info["per_m2"]
+    quantity = area * norm.per_unit
+    unit = norm.unit
     
-    if thickness and material_type == "утеплитель":
-        # Для утеплителя учитываем толщину
-        volume = area * thickness / 1000  # м³
-        quantity = volume
+    if thickness and material_type.lower() == "утеплитель":
+        # Для утеплителя учитываем толщину (мм): количество - объем слоя
+        quantity = (Quantity(area, "м²") * Quantity(thickness, "мм")).value
+        unit = "м³"
     
     return {
         "material": material_type,
         "area": area,
         "quantity": quantity,
-        "unit": material_info["unit"],
-        "notes": material_info["notes"]
+        "unit": unit,
+        "notes": norm.notes
     }
 
 def format_price_range(price_min: float, price_max: float, unit: str) -> str:
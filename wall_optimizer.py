@@ -0,0 +1,238 @@
+"""
+ПОДБОР СТЕН v12.0
+Самая дешевая конструкция стен при ограничении теплопотерь: материал,
+толщина и утеплитель перебираются векторно, заведомо проигрышные слои
+утеплителя отсекаются до перебора; результат - фронт Парето
+"стоимость - теплопотери"
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import DEFAULT_DELTA_T, WALL_OPTIMIZER_DB_PATH, WALL_OPTIMIZER_CHECK_INTERVAL
+from price_book import price_book
+from heat_loss import DEFAULT_INSULATION, box_house
+from batch_calculators import BatchCalculators
+
+logger = logging.getLogger(__name__)
+
+# Сопротивление теплообмену у внутренней и наружной поверхности, м²·К/Вт
+R_INSIDE = 0.13
+R_OUTSIDE = 0.04
+
+# Теплопроводность кладки в условиях эксплуатации, Вт/(м·К)
+WALL_CONDUCTIVITY = {
+    "газобетон": 0.14,   # D500 на клею
+    "кирпич": 0.70,      # полнотелый на цементно-песчаном растворе
+    "дерево": 0.18,      # сосна поперек волокон
+}
+
+# Толщины стен, м. Брус в пакетном калькуляторе - только 150×150
+WALL_THICKNESSES = {
+    "газобетон": (0.2, 0.25, 0.3, 0.375, 0.4, 0.5),
+    "кирпич": (0.25, 0.38, 0.51, 0.64),
+    "дерево": (0.15,),
+}
+
+# Стена из бруса в пакетном калькуляторе уже оплачена с утеплителем: 100 мм минваты
+WOOD_BUILT_IN_INSULATION = 0.1 / 0.045
+
+# Теплопроводность утеплителей по ключевому слову в названии, Вт/(м·К)
+INSULATION_CONDUCTIVITY = {
+    "минвата": 0.045,
+    "минеральная вата": 0.045,
+    "базальт": 0.042,
+    "эковата": 0.042,
+    "пенопласт": 0.040,
+    "пеноплекс": 0.032,
+    "эппс": 0.032,
+    "pir": 0.022,
+    "пир": 0.022,
+}
+
+INSULATION_THICKNESSES = (0.05, 0.1, 0.15, 0.2)   # м
+REFERENCE_THICKNESS = 0.1   # цена утеплителя за м² (прайс и каталог в м²) - для слоя 100 мм
+
+class InsulationOption(NamedTuple):
+    name: str
+    conductivity: float   # Вт/(м·К)
+    price: float          # руб/м² слоя REFERENCE_THICKNESS
+    source: str = "прайс" # прайс или каталог материалов
+
+class WallDesign(NamedTuple):
+    material: str
+    thickness: float              # м
+    insulation: str               # "" - без утеплителя
+    insulation_thickness: float   # м
+    u: float                      # Вт/(м²·К)
+    cost: float                   # руб, стены с утеплением
+    heat_loss: float              # кВт, весь дом
+
+    @property
+    def label(self) -> str:
+        text = f"{self.material} {self.thickness * 1000:.0f} мм"
+        if self.insulation:
+            text += f" + {self.insulation} {self.insulation_thickness * 1000:.0f} мм"
+        return text
+
+class WallSearch(NamedTuple):
+    front: List[WallDesign]       # по возрастанию стоимости, теплопотери убывают
+    best: Optional[WallDesign]    # самый дешевый вариант в пределе теплопотерь
+    evaluated: int                # вариантов посчитано
+    pruned: int                   # слоев утеплителя отсечено до перебора
+    limit: Optional[float]
+
+    def to_dict(self) -> Dict[str, Any]:
+        def design(d: WallDesign) -> Dict[str, Any]:
+            return {**d._asdict(), "label": d.label}
+
+        return {
+            "front": [design(d) for d in self.front],
+            "best": design(self.best) if self.best else None,
+            "evaluated": self.evaluated,
+            "pruned": self.pruned,
+            "limit_kw": self.limit
+        }
+
+def _conductivity(name: str) -> Optional[float]:
+    name = name.lower()
+    return next((value for key, value in INSULATION_CONDUCTIVITY.items() if key in name), None)
+
+class InsulationCatalog:
+    """
+    Утеплители из таблицы materials (категория "Утеплители")
+
+    Теплопроводность - по ключевому слову в названии; строки без
+    известного утеплителя или с непонятной единицей пропускаются.
+    Цена за м³ пересчитывается на м² слоя 100 мм. Раз в check_interval
+    секунд таблица перечитывается. Без таблицы - только варианты из
+    прайс-листа.
+    """
+
+    def __init__(self, db_path: Optional[str] = None, check_interval: float = 300.0):
+        self.db_path = db_path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._checked = 0.0
+        self._options: Tuple[InsulationOption, ...] = ()
+
+    def options(self, prices: Optional[Mapping[str, float]] = None) -> List[InsulationOption]:
+        """Варианты из прайс-листа и каталога"""
+        prices = prices or price_book.prices()
+        self._refresh()
+        return [
+            InsulationOption("минвата", INSULATION_CONDUCTIVITY["минвата"], prices["insulation"]),
+            InsulationOption("пеноплекс", INSULATION_CONDUCTIVITY["пеноплекс"], prices["insulation_xps"]),
+            *self._options
+        ]
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if not self.db_path or now - self._checked < self.check_interval:
+            return
+        self._checked = now
+        try:
+            with self._lock, sqlite3.connect(self.db_path) as conn:
+                exists = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'materials'"
+                ).fetchone()
+                rows = list(conn.execute('''
+                SELECT name, unit, COALESCE(price_avg, (price_min + price_max) / 2.0)
+                FROM materials WHERE category LIKE '%Утепл%'
+                ''')) if exists else []
+            options = []
+            for name, unit, price in rows:
+                conductivity = _conductivity(name or "")
+                if conductivity is None or not price:
+                    continue
+                unit = (unit or "").strip().lower()
+                if unit in ("м³", "м3"):
+                    price = price * REFERENCE_THICKNESS
+                elif unit not in ("м²", "м2"):
+                    continue
+                options.append(InsulationOption(name, conductivity, float(price), "каталог"))
+            self._options = tuple(options)
+        except Exception as e:
+            logger.error(f"Ошибка чтения утеплителей из каталога, используются прежние: {e}")
+
+insulation_catalog = InsulationCatalog(
+    str(WALL_OPTIMIZER_DB_PATH) if WALL_OPTIMIZER_DB_PATH else None,
+    check_interval=WALL_OPTIMIZER_CHECK_INTERVAL
+)
+
+def _layers(options: Sequence[InsulationOption], work_price: float) -> Tuple[List[Tuple[str, float]], np.ndarray, np.ndarray, int]:
+    """
+    Слои утеплителя: (название, толщина), цена за м² стены и сопротивление
+
+    Слой отсекается, если есть не дороже и с не меньшим сопротивлением -
+    в оптимальный вариант он не попадет ни при каком пределе.
+    """
+    names = [("", 0.0)] + [(o.name, d) for o in options for d in INSULATION_THICKNESSES]
+    cost = np.array([0.0] + [o.price * d / REFERENCE_THICKNESS + work_price
+                             for o in options for d in INSULATION_THICKNESSES])
+    resistance = np.array([0.0] + [d / o.conductivity for o in options for d in INSULATION_THICKNESSES])
+
+    order = np.lexsort((-resistance, cost))
+    best_before = np.concatenate([[-np.inf], np.maximum.accumulate(resistance[order])[:-1]])
+    keep = np.sort(order[resistance[order] > best_before + 1e-12])
+    return [names[i] for i in keep], cost[keep], resistance[keep], len(names) - len(keep)
+
+def optimize_walls(area: float, floors: int = 1, region: str = "", max_heat_loss: Optional[float] = None,
+                   floor_height: float = 2.7, prices: Optional[Mapping[str, float]] = None,
+                   options: Optional[Sequence[InsulationOption]] = None) -> WallSearch:
+    """
+    Фронт Парето стоимости стен и теплопотерь дома
+
+    Стены дома-куба (heat_loss.box_house): стоимость кладки - пакетный
+    калькулятор стен, утеплитель - цена слоя и монтаж. Остальная оболочка
+    утеплена на уровне DEFAULT_INSULATION. Все сочетания материала,
+    толщины и слоя утеплителя считаются одной матрицей; при max_heat_loss
+    (кВт) во фронт попадают только варианты в пределе.
+    """
+    if area <= 0 or floors < 1 or floor_height <= 0:
+        raise ValueError("Площадь, этажность и высота этажа должны быть положительными")
+    prices = prices or price_book.prices(region)
+    options = insulation_catalog.options(prices) if options is None else options
+    delta_t = price_book.delta_t().get(region.lower(), DEFAULT_DELTA_T)
+
+    perimeter = 4 * np.sqrt(area / floors)
+    height = floor_height * floors
+    wall_area = float(perimeter * height)
+
+    materials = np.array([m for m, values in WALL_THICKNESSES.items() for _ in values])
+    thickness = np.array([t for values in WALL_THICKNESSES.values() for t in values])
+    wall_cost = BatchCalculators.walls(perimeter, height, thickness, materials, prices)["total_cost"]
+    conductivity = np.array([WALL_CONDUCTIVITY[m] for m in materials])
+    wall_resistance = thickness / conductivity + np.where(materials == "дерево", WOOD_BUILT_IN_INSULATION, 0.0)
+
+    layers, layer_cost, layer_resistance, pruned = _layers(options, prices["insulation_work"])
+
+    # Матрица (стена × слой): U, стоимость и теплопотери дома
+    u = 1 / (R_INSIDE + R_OUTSIDE + wall_resistance[:, None] + layer_resistance[None, :])
+    cost = wall_cost[:, None] + layer_cost[None, :] * wall_area
+    box = box_house(area, floors, DEFAULT_INSULATION, floor_height, wall_u=u)
+    heat_loss = (box["transmission"] + box["ventilation"]) * delta_t / 1000
+
+    cost, heat_loss, u = cost.ravel(), heat_loss.ravel(), u.ravel()
+    candidates = np.arange(cost.size)
+    if max_heat_loss is not None:
+        candidates = candidates[heat_loss <= max_heat_loss + 1e-9]
+
+    # Фронт: по возрастанию стоимости, каждый следующий теплее всех предыдущих
+    order = candidates[np.lexsort((heat_loss[candidates], cost[candidates]))]
+    best_before = np.concatenate([[np.inf], np.minimum.accumulate(heat_loss[order])[:-1]])
+    front_index = order[heat_loss[order] < best_before - 1e-9]
+
+    width = len(layers)
+    front = [
+        WallDesign(str(materials[i // width]), float(thickness[i // width]),
+                   layers[i % width][0], layers[i % width][1],
+                   float(u[i]), float(cost[i]), float(heat_loss[i]))
+        for i in front_index
+    ]
+    return WallSearch(front, front[0] if front else None, int(cost.size), pruned, max_heat_loss)